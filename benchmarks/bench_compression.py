@@ -0,0 +1,73 @@
+"""
+Mierzy rozmiar treści żądania i czas kompresji dla syntetycznego zadania z 50 000 tekstur,
+zbudowanego na wzór *payload_example.py*.
+
+Uruchomienie z katalogu głównego repozytorium::
+
+    python benchmarks/bench_compression.py [liczba_tekstur]
+"""
+import copy
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'mock_bpy')]
+sys.modules['addon_utils'] = mock.MagicMock()
+
+from cis_render import compression
+from cis_render import config
+
+# payload_example.py zawiera obiekt JSON (false zamiast False), więc jest wczytywany jako tekst
+with open(os.path.join(ROOT, 'payload_example.py')) as example_file:
+    example = json.loads(example_file.read().partition('=')[2])
+
+
+def synthetic_payload(count):
+    payload = copy.deepcopy(example)
+    templates = example["textures"]
+    payload["textures"] = [
+        {
+            "name": "{}.{:03d}".format(template["name"], i // len(templates)),
+            "full_path": "/mnt/projects/set_dressing/library/props/asset_{:05d}/textures/{}".format(
+                i, template["name"])
+        }
+        for i, template in zip(range(count), templates * (count // len(templates) + 1))
+    ]
+    return payload
+
+
+def measure(body, encoding, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        encoded = compression.encode(body, encoding)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(encoded), best
+
+
+def main(count=50000):
+    start = time.perf_counter()
+    body = json.dumps(synthetic_payload(count)).encode('utf-8')
+    print("{} textures, build + json.dumps {:.1f} ms".format(count, (time.perf_counter() - start) * 1000))
+
+    variants = [("identity", None, None)]
+    variants += [("gzip -{}".format(level), 'gzip', ('gzip_level', level)) for level in (1, 5, 9)]
+    if compression.zstd_available():
+        variants += [("zstd -{}".format(level), 'zstd', ('zstd_level', level)) for level in (1, 3, 9)]
+    else:
+        print("zstandard not installed, skipping zstd")
+
+    for label, encoding, level in variants:
+        if level is not None:
+            setattr(config, *level)
+        size, elapsed = measure(body, encoding)
+        print("{:<10} {:>12,d} B  ratio {:6.1f}x  encode {:8.1f} ms".format(
+            label, size, len(body) / size, elapsed * 1000))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
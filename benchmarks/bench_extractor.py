@@ -0,0 +1,151 @@
+"""
+Porównuje odczyt ustawień sceny przez skompilowane tabele (moduł *extractor*) z odczytem
+w stylu poprzednich metod *read_output* / *read_cycles*, które dla każdego pola wyszukiwały
+scenę po nazwie w *bpy.data.scenes*.
+
+Scena jest symulowana obiektami *SimpleNamespace*, a kolekcja scen -- listą przeszukiwaną
+liniowo po nazwie, tak jak kolekcje *bpy_prop_collection*.
+
+Uruchomienie z katalogu głównego repozytorium::
+
+    python benchmarks/bench_extractor.py [liczba_scen] [powtórzenia]
+"""
+import os
+import re
+import sys
+import timeit
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'mock_bpy')]
+sys.modules['addon_utils'] = mock.MagicMock()
+
+from cis_render import extractor
+
+TABLES = {
+    'output': extractor.OUTPUT_TABLE,
+    'cycles': extractor.CYCLES_TABLE,
+    'eevee': extractor.EEVEE_TABLE,
+    'workbench': extractor.WORKBENCH_TABLE,
+}
+
+VALUES = {
+    'render.image_settings.file_format': 'PNG',
+    'cycles.progressive': 'BRANCHED_PATH',
+    'display.shading.light': 'STUDIO',
+    'display.shading.color_type': 'SINGLE',
+    'render.views_format': 'STEREO_3D',
+}
+
+
+class SceneCollection():
+    """Kolekcja scen wyszukiwanych po nazwie przez przeszukanie liniowe.
+    """
+
+    def __init__(self, scenes):
+        self.scenes = scenes
+
+    def __getitem__(self, name):
+        for scene in self.scenes:
+            if scene.name == name:
+                return scene
+        raise KeyError(name)
+
+
+def table_paths(spec):
+    if isinstance(spec, str):
+        yield spec
+    elif isinstance(spec, extractor.AsList):
+        yield spec.path
+    elif isinstance(spec, extractor.When):
+        yield spec.path
+        yield from table_paths(spec.spec)
+        yield from table_paths(spec.otherwise)
+    elif isinstance(spec, dict):
+        for key, value in spec.items():
+            if isinstance(key, extractor.Merge):
+                yield key.path
+            yield from table_paths(value)
+
+
+def make_scene(name):
+    scene = SimpleNamespace(name=name)
+    for table in TABLES.values():
+        for path in table_paths(table):
+            parts = re.sub(r'\[\d+\]', '', path).split('.')
+            node = scene
+            for part in parts[:-1]:
+                if not hasattr(node, part):
+                    setattr(node, part, SimpleNamespace())
+                node = getattr(node, part)
+            value = VALUES.get(path, True)
+            setattr(node, parts[-1], [0.5, 0.5, 0.5, 1.0] if '[' in path or 'stamp_' in path else value)
+
+    scene.render.use_multiview = True
+    scene.render.views_format = 'STEREO_3D'
+    scene.render.views = [SimpleNamespace(name=view, use=True, file_suffix='_' + view[0].upper(),
+                                          camera_suffix='_' + view[0].upper()) for view in ('left', 'right')]
+    return scene
+
+
+_getters = {}
+
+
+def legacy_extract(spec, scenes, name):
+    """Odczytuje tabelę tak, jak robiły to poprzednie metody: scena jest wyszukiwana po nazwie
+    osobno dla każdego pola i każdego warunku.
+    """
+    def get(path):
+        getter = _getters.get(path)
+        if getter is None:
+            getter = _getters[path] = extractor.compile_path(path)
+        return getter(scenes[name])
+
+    if isinstance(spec, str):
+        return get(spec)
+    if isinstance(spec, extractor.AsList):
+        return list(get(spec.path))
+    if isinstance(spec, extractor.When):
+        if get(spec.path) in spec.values:
+            return legacy_extract(spec.spec, scenes, name)
+        if spec.otherwise is extractor.OMIT or not isinstance(spec.otherwise, (str, dict, extractor.When)):
+            return spec.otherwise
+        return legacy_extract(spec.otherwise, scenes, name)
+    if isinstance(spec, dict):
+        result = {}
+        for key, value in spec.items():
+            if isinstance(key, extractor.Merge):
+                if get(key.path) in key.values:
+                    result.update(legacy_extract(value, scenes, name))
+                continue
+            value = legacy_extract(value, scenes, name)
+            if value is not extractor.OMIT:
+                result[key] = value
+        return result
+    return spec(scenes[name])
+
+
+def main(scene_count=1000, repeat=200):
+    scenes = SceneCollection([make_scene('Scene.{:04d}'.format(i)) for i in range(scene_count)])
+    name = scenes.scenes[-1].name
+    readers = {
+        'output': extractor.read_output,
+        'cycles': extractor.read_cycles,
+        'eevee': extractor.read_eevee,
+        'workbench': extractor.read_workbench,
+    }
+
+    print("{} scenes, target scene is last in the collection, {} repetitions".format(scene_count, repeat))
+    for section, table in TABLES.items():
+        compiled = readers[section]
+        assert compiled(scenes[name]) == legacy_extract(table, scenes, name)
+
+        legacy_time = timeit.timeit(lambda: legacy_extract(table, scenes, name), number=repeat) / repeat
+        compiled_time = timeit.timeit(lambda: compiled(scenes[name]), number=repeat) / repeat
+        print("{:<10} per-field lookup {:9.1f} us   compiled {:7.1f} us   speedup {:6.1f}x".format(
+            section, legacy_time * 1e6, compiled_time * 1e6, legacy_time / compiled_time))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,236 @@
+"""
+Mierzy czas kolejnych etapów zgłaszania zadania na syntetycznych scenach o zadanej liczbie
+tekstur, widoków i wtyczek: odczytu ustawień wyjściowych (*read_output*), listy tekstur
+i sprawdzenia ich istnienia (*read_materials*), listy wtyczek (*read_add_ons*), przygotowania
+danych zadania (*prepare_payload*), serializacji (*serialize*) i wysłania zadania na lokalny
+serwer zastępczy (*post*).
+
+Scena jest budowana na atrapie modułu *bpy* (katalog *mock_bpy*), a pliki tekstur -- puste pliki
+w katalogu tymczasowym. Zapamiętywanie ustawień sceny (*scene_cache*) jest wyłączone, a lista
+wtyczek odczytywana ponownie w każdym powtórzeniu, więc mierzony jest pełny odczyt. Indeks katalogów
+(*asset_index*) jest tworzony od nowa dla każdej sceny -- czas pierwszego powtórzenia (*first*)
+odpowiada pierwszemu sprawdzeniu plików, a kolejne sprawdzeniu z indeksem.
+
+Wyniki są zapisywane w pliku JSON razem z identyfikatorem commita, co pozwala porównywać
+je między wersjami (opcja *--compare*)::
+
+    python benchmarks/bench_pipeline.py --images 100 1000 10000 100000 --views 2 --add-ons 200
+    python benchmarks/bench_pipeline.py --images 10000 --compare benchmarks/results/pipeline-1a2b3c4.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'mock_bpy')]
+sys.modules['addon_utils'] = mock.MagicMock()
+
+from cis_render import OBJECT_OT_read_scene_settings
+from cis_render import RequestManager
+from cis_render import addon_inventory
+from cis_render import asset_index
+from cis_render import config
+from cis_render import serialization
+from standin_server import StandInServer
+
+from bench_extractor import make_scene
+
+STAGES = ('read_output', 'read_materials', 'read_add_ons', 'prepare_payload', 'serialize', 'post')
+# Liczba plików tekstur w jednym katalogu syntetycznej sceny
+FILES_PER_DIRECTORY = 1000
+
+
+def make_textures(directory, count):
+    """Tworzy puste pliki tekstur i zwraca obrazy w postaci *bpy.data.images*.
+    """
+    images = []
+    for i in range(count):
+        subdirectory = os.path.join(directory, 'set_{:03d}'.format(i // FILES_PER_DIRECTORY))
+        if i % FILES_PER_DIRECTORY == 0:
+            os.makedirs(subdirectory, exist_ok=True)
+        filepath = os.path.join(subdirectory, 'texture_{:06d}.png'.format(i))
+        open(filepath, 'wb').close()
+        images.append(SimpleNamespace(name='texture_{:06d}.png'.format(i), filepath=filepath, users=1,
+                                      packed_file=None))
+    return images
+
+
+def make_add_ons(count):
+    """Zwraca atrapy modułów wtyczek w postaci zwracanej przez *addon_utils.modules()*.
+    """
+    return [SimpleNamespace(__name__='addon_{}'.format(i),
+                            bl_info={'name': 'Add-on {}'.format(i), 'version': (1, i % 10, 0)})
+            for i in range(count)]
+
+
+def make_bpy(scene, images):
+    """Zwraca atrapę modułu *bpy* z jedną sceną i podanymi obrazami.
+    """
+    fake_bpy = mock.MagicMock()
+    fake_bpy.data.scenes = {scene.name: scene}
+    fake_bpy.data.images = images
+    fake_bpy.data.filepath = os.path.join(ROOT, 'bench.blend')
+    fake_bpy.path.abspath.side_effect = lambda path: path
+    fake_bpy.context.preferences.addons.keys.return_value = []
+    return fake_bpy
+
+
+def make_operator(scene):
+    """Zwraca operator przygotowany do odczytu syntetycznej sceny.
+    """
+    operator = OBJECT_OT_read_scene_settings()
+    operator.scene = scene
+    scene.my_tool = SimpleNamespace(job_name='bench_job', priority='0', use_output_frames_setting=True,
+                                    use_output_format_setting=True, use_cycles_tiles_setting=True,
+                                    frame_start=1, frame_end=250, file_format='PNG', tiles_x=64, tiles_y=64,
+                                    frame_chunk_strategy='AUTO', frame_chunk_size=10, tile_padding=10,
+                                    upload_assets=False)
+    scene.frame_start, scene.frame_end, scene.frame_step = 1, 250, 1
+    return operator
+
+
+def summarize(samples):
+    """Zwraca statystyki czasów jednego etapu w sekundach.
+    """
+    return dict(first=samples[0], min=min(samples), median=statistics.median(samples),
+                max=max(samples), samples=samples)
+
+
+def run_case(images, views, add_ons, repeat, server):
+    """Mierzy czasy etapów dla jednej sceny.
+
+    :return: słownik nazwa etapu -> statystyki czasów
+    :rtype: dict
+    """
+    scene = make_scene('Scene')
+    scene.render.views = [SimpleNamespace(name='view_{}'.format(i), use=True, file_suffix='_{}'.format(i),
+                                          camera_suffix='_{}'.format(i)) for i in range(views)]
+    scene.render.use_multiview = views > 1
+    timings = {stage: [] for stage in STAGES}
+
+    with tempfile.TemporaryDirectory(prefix='cis_render_bench_') as directory:
+        fake_bpy = make_bpy(scene, make_textures(directory, images))
+        modules = make_add_ons(add_ons)
+        request_manager = RequestManager()
+
+        with mock.patch('cis_render.read_scene_settings.bpy', fake_bpy), \
+                mock.patch.object(addon_inventory, 'bpy', fake_bpy), \
+                mock.patch.object(addon_inventory, 'addon_utils',
+                                  SimpleNamespace(modules=lambda: modules, paths=lambda: [])), \
+                mock.patch.object(config, 'scene_cache_enabled', False), \
+                mock.patch.object(config, 'asset_index_file', os.path.join(directory, 'assets.json')), \
+                mock.patch.object(config, 'server', server.url + '/job'), \
+                contextlib.redirect_stdout(io.StringIO()):
+            for i in range(repeat):
+                operator = make_operator(scene)
+                addon_inventory.get_inventory().invalidate()
+
+                stages = [
+                    ('read_output', operator.read_output),
+                    ('read_materials', operator.read_materials),
+                    ('read_add_ons', operator.read_add_ons),
+                    ('prepare_payload', lambda: setattr(operator, 'payload', operator.prepare_job_payload())),
+                    ('serialize', lambda: setattr(operator, 'body', encode(operator.payload))),
+                    ('post', lambda: request_manager.post_job_data(operator.payload)),
+                ]
+                for stage, fn in stages:
+                    start = time.perf_counter()
+                    fn()
+                    timings[stage].append(time.perf_counter() - start)
+            asset_index.close_index()
+
+        request_manager.close()
+
+    return {stage: summarize(samples) for stage, samples in timings.items()}
+
+
+def encode(payload):
+    """Koduje dane zadania tak, jak robi to *RequestManager.post_job_data()*.
+    """
+    body = serialization.PayloadBody(payload)
+    return b''.join(body.chunks()) if body.streamed else body.data
+
+
+def git_commit():
+    """Zwraca identyfikator bieżącego commita i informację, czy drzewo robocze ma niezatwierdzone zmiany.
+    """
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL)
+        status = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT,
+                                         stderr=subprocess.DEVNULL)
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit.decode().strip(), bool(status.strip())
+
+
+def case_key(case):
+    return case['images'], case['views'], case['add_ons']
+
+
+def compare(results, previous):
+    """Wypisuje stosunek median czasów etapów do wyników zapisanych wcześniej.
+    """
+    baseline = {case_key(case): case for case in previous['cases']}
+    print("\ncompared with {} ({})".format((previous.get('commit') or 'unknown')[:10], previous.get('timestamp')))
+    for case in results['cases']:
+        old = baseline.get(case_key(case))
+        if old is None:
+            continue
+        ratios = ["{} {:5.2f}x".format(stage, case['stages'][stage]['median'] / old['stages'][stage]['median'])
+                  for stage in STAGES if stage in old['stages'] and old['stages'][stage]['median']]
+        print("images {:>6}  views {:>2}  add-ons {:>4}:  {}".format(*case_key(case), "  ".join(ratios)))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Time the job submission pipeline on synthetic scenes")
+    parser.add_argument('--images', type=int, nargs='+', default=[100, 1000, 10000, 100000])
+    parser.add_argument('--views', type=int, nargs='+', default=[2])
+    parser.add_argument('--add-ons', type=int, nargs='+', default=[100])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help="JSON file the results are written to, "
+                                         "defaults to benchmarks/results/pipeline-<commit>.json")
+    parser.add_argument('--compare', help="JSON file with earlier results to compare with")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    commit, dirty = git_commit()
+    results = dict(commit=commit, dirty=dirty, timestamp=time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                   python=platform.python_version(), platform=platform.platform(), repeat=args.repeat,
+                   cases=[])
+
+    with StandInServer() as server:
+        for images in args.images:
+            for views in args.views:
+                for add_ons in args.add_ons:
+                    stages = run_case(images, views, add_ons, args.repeat, server)
+                    results['cases'].append(dict(images=images, views=views, add_ons=add_ons, stages=stages))
+                    print("images {:>6}  views {:>2}  add-ons {:>4}:  {}".format(
+                        images, views, add_ons,
+                        "  ".join("{} {:8.2f} ms".format(stage, stages[stage]['median'] * 1000) for stage in STAGES)))
+
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results',
+                                         'pipeline-{}.json'.format((commit or 'unknown')[:7]))
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as outfile:
+        json.dump(results, outfile, indent=2)
+    print("results written to {}".format(output))
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as infile:
+            compare(results, json.load(infile))
+
+
+if __name__ == '__main__':
+    main()
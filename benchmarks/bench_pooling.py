@@ -0,0 +1,72 @@
+"""
+Porównuje czas wysyłania zadań przez *RequestManager* z pulą połączeń (keep-alive)
+i bez niej (nowe połączenie dla każdego zadania) na lokalnym serwerze zastępczym.
+
+Uruchomienie z katalogu głównego repozytorium::
+
+    python benchmarks/bench_pooling.py [liczba_zadań]
+"""
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'mock_bpy')]
+sys.modules['addon_utils'] = mock.MagicMock()
+
+import requests
+
+from cis_render import RequestManager
+from cis_render import config
+from standin_server import StandInServer
+
+PAYLOAD = {"name": "bench_job", "frames": {"start": 1, "end": 250}, "textures": []}
+
+
+class UnpooledRequestManager(RequestManager):
+    """Wysyła każde zadanie przez nowe połączenie, tak jak *requests.post*.
+    """
+
+    def get_session(self):
+        return requests.Session()
+
+
+def run(manager, count, workers):
+    timings = []
+
+    def post(i):
+        start = time.perf_counter()
+        manager.post_job_data(PAYLOAD)
+        timings.append(time.perf_counter() - start)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(post, range(count)))
+    return timings
+
+
+def report(label, timings, connections):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print("{:<28} mean {:7.3f} ms   p50 {:7.3f} ms   p95 {:7.3f} ms   connections {:5d}".format(
+        label, statistics.mean(timings) * 1000, statistics.median(timings) * 1000, p95 * 1000, connections))
+
+
+def main(count=500):
+    for workers in (1, config.pool_size):
+        for label, manager in (("no pooling", UnpooledRequestManager()),
+                               ("pooled session", RequestManager())):
+            with StandInServer() as server:
+                config.server = server.url + '/job'
+                timings = run(manager, count, workers)
+                manager.close()
+                report("{} (x{})".format(label, workers), timings, server.connections)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
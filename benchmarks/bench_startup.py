@@ -0,0 +1,78 @@
+"""
+Mierzy koszt włączenia wtyczki przy starcie programu *Blender*: czas importu pakietu *cis_render*,
+wywołania *register()* i *unregister()* oraz liczbę modułów zaimportowanych przy imporcie i rejestracji.
+Podaje też, czy przy starcie zostały wczytane ciężkie pakiety (np. *requests*).
+
+Każdy pomiar jest wykonywany w nowym procesie interpretera, z atrapą modułu *bpy* (katalog *mock_bpy*)
+uzupełnioną o elementy używane przez *register()*.
+
+Uruchomienie z katalogu głównego repozytorium::
+
+    python benchmarks/bench_startup.py [liczba_powtórzeń]
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pakiety, których wczytanie przy starcie oznacza niepotrzebny koszt
+HEAVY_MODULES = ('requests', 'urllib3', 'hashlib', 'ctypes', 'concurrent.futures', 'gzip')
+
+CHILD = r"""
+import json, os, sys, tempfile, time
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path[:0] = [{root!r}, os.path.join({root!r}, 'mock_bpy')]
+sys.modules['addon_utils'] = mock.MagicMock()
+import bpy
+bpy.utils = mock.MagicMock()
+bpy.app = mock.MagicMock()
+bpy.context = mock.MagicMock()
+bpy.context.preferences.addons = {{'cis_render': SimpleNamespace(preferences=SimpleNamespace(log_level='INFO', log_payloads=False))}}
+bpy.types.TOPBAR_MT_editor_menus = mock.MagicMock()
+bpy.types.Scene = SimpleNamespace()
+
+before = set(sys.modules)
+start = time.perf_counter()
+import cis_render
+imported = time.perf_counter()
+after_import = set(sys.modules)
+from cis_render import config
+config.spool_file = os.path.join(tempfile.mkdtemp(), 'spool.jsonl')
+registering = time.perf_counter()
+cis_render.register()
+registered = time.perf_counter()
+after_register = set(sys.modules)
+cis_render.unregister()
+unregistered = time.perf_counter()
+
+print(json.dumps(dict(
+    import_time=imported - start, register_time=registered - registering, unregister_time=unregistered - registered,
+    import_modules=len(after_import - before), register_modules=len(after_register - after_import),
+    heavy=sorted(name for name in {heavy!r} if name in after_register and name not in before))))
+"""
+
+
+def measure():
+    code = CHILD.format(root=ROOT, heavy=HEAVY_MODULES)
+    output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT)
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main(repeat=10):
+    samples = [measure() for i in range(repeat)]
+    for key in ('import_time', 'register_time', 'unregister_time'):
+        values = [sample[key] for sample in samples]
+        print("{:<16} median {:8.2f} ms   min {:8.2f} ms".format(
+            key, statistics.median(values) * 1000, min(values) * 1000))
+    print("{:<16} {:5d} at import, {:5d} at register".format(
+        "modules", samples[0]['import_modules'], samples[0]['register_modules']))
+    print("{:<16} {}".format("heavy modules", ", ".join(samples[0]['heavy']) or "none"))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
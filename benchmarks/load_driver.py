@@ -0,0 +1,121 @@
+"""
+Generator obciążenia dla *RequestManager*: wysyła zadania z wielu wątków na lokalny serwer zastępczy
+symulujący opóźnienia, błędy i ograniczoną przepustowość RenderDocka (patrz *standin_server*)
+i podaje liczbę zgłoszeń na sekundę oraz rozkład czasu zgłoszenia (p50, p95, p99, maksimum).
+
+Zgłoszenia zakończone błędem przejściowym (*RetryableRequestError*) są liczone osobno i nie trafiają
+do kolejki na dysku (*spool*), tak aby mierzyć samą komunikację z serwerem.
+
+Uruchomienie z katalogu głównego repozytorium::
+
+    python benchmarks/load_driver.py --jobs 2000 --concurrency 8 --latency 0.02 --jitter 0.03 \\
+        --error-rate 0.02 --rate-limit 300
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, 'mock_bpy')]
+sys.modules['addon_utils'] = mock.MagicMock()
+
+import requests
+
+from cis_render import RequestManager
+from cis_render import config
+from cis_render.read_scene_settings import RetryableRequestError
+from standin_server import StandInServer
+
+
+def make_payload(i, textures):
+    return {"name": "load_job_{}".format(i), "frames": {"start": 1, "end": 250},
+            "textures": [{"name": "texture_{}.png".format(t), "full_path": "/textures/texture_{}.png".format(t)}
+                         for t in range(textures)]}
+
+
+def percentile(timings, fraction):
+    """Zwraca percentyl posortowanej listy czasów (metoda najbliższego rzędu).
+    """
+    if not timings:
+        return 0.0
+    return timings[min(len(timings) - 1, max(0, int(round(len(timings) * fraction)) - 1))]
+
+
+def run(manager, count, concurrency, textures):
+    """Wysyła *count* zadań z *concurrency* wątków.
+
+    :return: czasy zgłoszeń zakończonych powodzeniem, liczniki wyników i czas całego przebiegu
+    :rtype: tuple
+    """
+    timings = []
+    outcomes = dict(created=0, retryable=0, rejected=0)
+    lock = threading.Lock()
+
+    def submit(i):
+        payload = make_payload(i, textures)
+        start = time.perf_counter()
+        try:
+            manager.post_job_data(payload)
+            outcome = 'created'
+        except RetryableRequestError:
+            outcome = 'retryable'
+        except requests.exceptions.RequestException:
+            outcome = 'rejected'
+        elapsed = time.perf_counter() - start
+        with lock:
+            outcomes[outcome] += 1
+            if outcome == 'created':
+                timings.append(elapsed)
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(submit, range(count)))
+    return sorted(timings), outcomes, time.perf_counter() - start
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Drive RequestManager against a stand-in RenderDock server")
+    parser.add_argument('--jobs', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, config.pool_size])
+    parser.add_argument('--pool-size', type=int, default=None, help="defaults to config.pool_size")
+    parser.add_argument('--textures', type=int, default=10, help="textures listed in every job")
+    parser.add_argument('--latency', type=float, default=0.0, help="server latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="fraction of connections dropped")
+    parser.add_argument('--rate-limit', type=float, default=0, help="server requests per second, 0 for none")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("server: latency {} s, jitter {} s, error rate {}, drop rate {}, rate limit {}/s".format(
+        args.latency, args.jitter, args.error_rate, args.drop_rate, args.rate_limit or 'none'))
+
+    for concurrency in args.concurrency:
+        with StandInServer(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                           drop_rate=args.drop_rate, rate_limit=args.rate_limit, seed=args.seed) as server:
+            manager = RequestManager(pool_size=args.pool_size)
+            with mock.patch.object(config, 'server', server.url + '/job'), \
+                    mock.patch.object(config.logger, 'disabled', True):
+                timings, outcomes, elapsed = run(manager, args.jobs, concurrency, args.textures)
+            manager.close()
+
+        print("x{:<3} {:8.1f} jobs/s   p50 {:7.2f} ms   p95 {:7.2f} ms   p99 {:7.2f} ms   max {:7.2f} ms   "
+              "created {:5d}   retryable {:4d}   rejected {:4d}   connections {:4d}".format(
+                  concurrency, outcomes['created'] / elapsed, percentile(timings, 0.5) * 1000,
+                  percentile(timings, 0.95) * 1000, percentile(timings, 0.99) * 1000,
+                  (timings[-1] if timings else 0.0) * 1000, outcomes['created'], outcomes['retryable'],
+                  outcomes['rejected'], server.connections))
+
+
+if __name__ == '__main__':
+    main()
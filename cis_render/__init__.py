@@ -7,65 +7,161 @@ bl_info = {
 
 import bpy
 import importlib
+import importlib.util
+import sys
+import types
 
 from bpy.props import PointerProperty
 
 from . import read_scene_settings
 from . import ui
 from . import config
+from . import submission
+from . import spool
+from . import lazy
+from . import scene_cache
+from . import job_status
+from . import log_queue
 
-from . properties import ( JobProperties )
+from . properties import ( JobProperties, CISRenderPreferences )
 
-from . read_scene_settings import ( OBJECT_OT_read_scene_settings, RequestManager )
+from . read_scene_settings import ( OBJECT_OT_read_scene_settings, OBJECT_OT_submit_batch, OBJECT_OT_download_frames,
+                                    RequestManager )
 
 from . ui import ( TOPBAR_MT_CISRender_submenu,
                    TOPBAR_MT_CISRender_menu,
                    JOBDATA_PT_job_name,
+                   JOBDATA_PT_job_status,
                    JOBDATA_PT_tiles,
                    JOBDATA_PT_frames,
+                   JOBDATA_PT_frame_chunks,
                    JOBDATA_PT_file_format
                  )
 
+asset_index = lazy.LazyModule('.asset_index', __name__)
+
 classes = (
+    CISRenderPreferences,
     JobProperties,
     OBJECT_OT_read_scene_settings,
+    OBJECT_OT_submit_batch,
+    OBJECT_OT_download_frames,
     TOPBAR_MT_CISRender_submenu,
     TOPBAR_MT_CISRender_menu,
     JOBDATA_PT_job_name,
     JOBDATA_PT_tiles,
     JOBDATA_PT_frames,
-    JOBDATA_PT_file_format
+    JOBDATA_PT_frame_chunks,
+    JOBDATA_PT_file_format,
+    JOBDATA_PT_job_status
 )
 
 
+def module_dependencies(module):
+    """Zwraca nazwy modułów, z których korzysta moduł: zaimportowanych modułów, modułów leniwych
+    (tylko już wczytanych nazw, bez ich importowania) oraz modułów, z których pochodzą zaimportowane
+    klasy i funkcje.
+
+    :param module: moduł
+    :type module: module
+    :rtype: set
+    """
+    names = set()
+    for value in vars(module).values():
+        if isinstance(value, types.ModuleType):
+            names.add(value.__name__)
+        elif isinstance(value, lazy.LazyModule):
+            names.add(importlib.util.resolve_name(vars(value)['_name'], vars(value)['_package']))
+        elif isinstance(value, (type, types.FunctionType)):
+            names.add(value.__module__)
+    return names
+
+
+def reload_order():
+    """Zwraca wczytane moduły wtyczki w kolejności ponownego wczytywania: każdy moduł
+    po modułach, z których korzysta.
+
+    :rtype: list
+    """
+    prefix = __name__ + '.'
+    modules = {name: module for name, module in sys.modules.items() if name.startswith(prefix)}
+    order = []
+    visited = set()
+
+    def visit(name):
+        if name in visited or name not in modules:
+            return
+        visited.add(name)
+        for dependency in sorted(module_dependencies(modules[name])):
+            visit(dependency)
+        order.append(modules[name])
+
+    for name in sorted(modules):
+        visit(name)
+    return order
+
+
 def register():
     """Wywoływana przy instalacji wtyczki i odświeżaniu skryptów.
-        Odświeża pycache.
+        W trybie programisty (*config.dev_mode*) wczytuje ponownie wszystkie wczytane moduły wtyczki,
+        zaczynając od tych, z których korzystają pozostałe (patrz *reload_order()*).
+        Moduły potrzebne dopiero przy wysyłaniu zadania (klient HTTP, skróty, kompresja)
+        nie są importowane (patrz moduł *lazy*).
         Rejestruje klasy, żeby Blender mógł mieć do nich dostęp.
         Dodaje menu wtyczki do listy menu w górnej belce i daje Blenderowi dostęp
         do grupy własności wtyczki (my_tool).
+        Dodaje funkcje obsługi zdarzeń śledzące zmiany ustawień sceny.
+        Wznawia wysyłanie zadań pozostałych w kolejce z poprzedniej sesji, jeżeli kolejka nie jest pusta.
+        Uruchamia zegar odświeżający panel stanu zadań.
+        Uruchamia wątek zapisujący dziennik z poziomem ustawionym w preferencjach wtyczki
+        (albo w *config*, jeżeli wtyczka nie jest włączona w ustawieniach programu *Blender*).
     """
 
-    importlib.reload(read_scene_settings)
-    importlib.reload(ui)
-    importlib.reload(config)
+    if config.dev_mode:
+        for module in reload_order():
+            importlib.reload(module)
 
     for cls in classes:
         bpy.utils.register_class(cls)
 
+    log_queue.start()
+    # Wtyczka zarejestrowana w trybie wsadowym (patrz *headless.ensure_registered()*) nie ma preferencji
+    addon = bpy.context.preferences.addons.get(__name__)
+    preferences = addon.preferences if addon is not None else config
+    log_queue.set_level(preferences.log_level, preferences.log_payloads)
+
     bpy.types.TOPBAR_MT_editor_menus.append(TOPBAR_MT_CISRender_menu.menu_draw)
     bpy.types.Scene.my_tool = PointerProperty(type=JobProperties)
 
+    scene_cache.register_handlers()
+    if spool.has_pending():
+        read_scene_settings.start_spool_drainer()
+    job_status.register_timer()
+    ui.register_timer()
+
 
 def unregister():
     """Wywoływana przy odinstalowywaniu wtyczki.
         Usuwa elementy dodane do blendera przez metodę *register()*.
+        Usuwa funkcje obsługi zdarzeń, zamyka pulę wątków wysyłających zadania, połączenia z RenderDockiem
+        i zapisuje indeks katalogów z teksturami.
+        Zatrzymuje śledzenie stanu zadań i wątek zapisujący dziennik.
     """
 
     bpy.types.TOPBAR_MT_editor_menus.remove(TOPBAR_MT_CISRender_menu.menu_draw)
     for cls in classes:
         bpy.utils.unregister_class(cls)
     del bpy.types.Scene.my_tool
+    scene_cache.unregister_handlers()
+    submission.shutdown()
+    spool.stop_drainer()
+    if asset_index.loaded:
+        asset_index.close_index()
+    read_scene_settings.RequestManager.close_shared()
+    job_status.unregister_timer()
+    ui.unregister_timer()
+    job_status.stop_client()
+    log_queue.stop()
         
 if __name__ == "__main__":
     register()
\ No newline at end of file
@@ -0,0 +1,123 @@
+"""
+Moduł odpowiedzialny za listę wtyczek zainstalowanych w programie *Blender*, wysyłaną razem z zadaniem.
+
+Funkcja *addon_utils.modules()* przy każdym wywołaniu przegląda katalogi wtyczek i analizuje
+ich pliki, co przy dużej liczbie wtyczek trwa setki milisekund. Lista jest więc zapamiętywana
+i odczytywana ponownie tylko wtedy, gdy zmienił się czas modyfikacji któregoś z katalogów
+wtyczek (wtyczka została dodana albo usunięta) lub zbiór wtyczek włączonych w ustawieniach.
+"""
+import os
+import threading
+
+import addon_utils
+import bpy
+
+from . import config
+
+
+def search_paths():
+    """Zwraca katalogi, w których *Blender* szuka wtyczek.
+
+    :rtype: list
+    """
+    return list(addon_utils.paths())
+
+
+def enabled_modules():
+    """Zwraca nazwy modułów wtyczek włączonych w ustawieniach programu *Blender*.
+
+    :rtype: frozenset
+    """
+    return frozenset(bpy.context.preferences.addons.keys())
+
+
+def directory_mtimes(paths):
+    """Zwraca czasy modyfikacji katalogów. Dla nieistniejącego katalogu czasem jest None.
+
+    :param paths: ścieżki do katalogów
+    :type paths: iterable
+    :return: krotka par (ścieżka, czas modyfikacji w ns)
+    :rtype: tuple
+    """
+    mtimes = []
+    for directory in paths:
+        try:
+            mtimes.append((directory, os.stat(directory).st_mtime_ns))
+        except OSError:
+            mtimes.append((directory, None))
+    return tuple(mtimes)
+
+
+class AddonInventory():
+    """Zapamiętana lista zainstalowanych wtyczek.
+
+    :param entries: lista krotek (nazwa modułu, nazwa wtyczki, wersja)
+    :type entries: list
+    :param key: czasy modyfikacji katalogów wtyczek i zbiór włączonych wtyczek z chwili odczytu listy
+    :type key: tuple
+    """
+
+    def __init__(self):
+        self.entries = None
+        self.key = None
+        self._lock = threading.Lock()
+
+    def is_stale(self, key):
+        """Sprawdza, czy listę wtyczek trzeba odczytać ponownie.
+
+        :param key: aktualne czasy modyfikacji katalogów i zbiór włączonych wtyczek
+        :type key: tuple
+        :rtype: boolean
+        """
+        return self.entries is None or self.key != key
+
+    def scan(self):
+        """Odczytuje listę wtyczek przez *addon_utils.modules()*.
+
+        :rtype: list
+        """
+        return [(mod.__name__, mod.bl_info.get('name'), mod.bl_info.get('version'))
+                for mod in addon_utils.modules()]
+
+    def get(self, enabled_only=None):
+        """Zwraca listę wtyczek: ich nazwy i numery wersji. Odczytuje ją ponownie tylko wtedy,
+        gdy zmieniły się katalogi wtyczek albo zbiór wtyczek włączonych.
+
+        :param enabled_only: czy zwrócić tylko wtyczki włączone w ustawieniach,
+            domyślnie *config.add_ons_enabled_only*
+        :type enabled_only: boolean
+        :rtype: list
+        """
+        if enabled_only is None:
+            enabled_only = config.add_ons_enabled_only
+
+        enabled = enabled_modules()
+        key = (directory_mtimes(search_paths()), enabled)
+
+        with self._lock:
+            if self.is_stale(key):
+                self.entries = self.scan()
+                self.key = key
+            entries = self.entries
+
+        return [dict(version=version, name=name)
+                for module, name, version in entries
+                if not enabled_only or module in enabled]
+
+    def invalidate(self):
+        """Usuwa zapamiętaną listę wtyczek.
+        """
+        with self._lock:
+            self.entries = None
+            self.key = None
+
+
+_inventory = AddonInventory()
+
+
+def get_inventory():
+    """Zwraca wspólną listę wtyczek.
+
+    :rtype: AddonInventory
+    """
+    return _inventory
@@ -0,0 +1,96 @@
+"""
+Moduł odpowiedzialny za sprawdzanie, czy pliki użyte w scenie istnieją na dysku.
+
+Ścieżki są grupowane według katalogów: jeżeli z jednego katalogu sprawdzanych jest wiele plików,
+wystarcza jedno wywołanie *os.scandir()* zamiast osobnego *stat* dla każdego pliku. Katalogi
+są sprawdzane równolegle w ograniczonej puli wątków, co skraca czas oczekiwania na dyskach
+sieciowych (NFS), a wynikiem jest pełna lista brakujących plików.
+"""
+import concurrent.futures
+import os
+
+from . import config
+
+
+class MissingFilesError(FileNotFoundError):
+    """Nie znaleziono jednego lub więcej plików użytych w scenie.
+
+    :param missing: lista ścieżek brakujących plików
+    :type missing: list
+    """
+
+    def __init__(self, missing):
+        self.missing = list(missing)
+        if len(self.missing) == 1:
+            message = "File not found: {}".format(self.missing[0])
+        else:
+            message = "{} files not found:\n{}".format(len(self.missing), "\n".join(self.missing))
+        super().__init__(message)
+
+
+def group_by_directory(paths):
+    """Grupuje ścieżki według katalogów.
+
+    :param paths: ścieżki bezwzględne
+    :type paths: iterable
+    :return: słownik katalog -> lista nazw plików
+    :rtype: dict
+    """
+    groups = {}
+    for file_path in paths:
+        directory, name = os.path.split(file_path)
+        groups.setdefault(directory, []).append(name)
+    return groups
+
+
+def check_directory(directory, names):
+    """Sprawdza, które z podanych plików w katalogu nie istnieją.
+    Dla małej liczby plików wywołuje *os.path.exists()* dla każdego z nich,
+    w przeciwnym razie odczytuje zawartość katalogu raz przez *os.scandir()*.
+
+    :param directory: ścieżka do katalogu
+    :type directory: str
+    :param names: nazwy plików w katalogu
+    :type names: list
+    :return: nazwy brakujących plików
+    :rtype: list
+    """
+    if len(names) < config.scandir_min_files:
+        return [name for name in names if not os.path.exists(os.path.join(directory, name))]
+
+    try:
+        with os.scandir(directory) as entries:
+            # Dowiązania symboliczne mogą być zerwane, więc sprawdzane są osobno
+            found = {entry.name for entry in entries
+                     if not entry.is_symlink() or os.path.exists(entry.path)}
+    except FileNotFoundError:
+        found = set()
+    except OSError:
+        return [name for name in names if not os.path.exists(os.path.join(directory, name))]
+
+    # Nazwy nieznalezione są sprawdzane osobno, bo na systemach plików nierozróżniających
+    # wielkości liter (Windows, macOS) mogą różnić się od nazw zwróconych przez os.scandir()
+    return [name for name in names
+            if name not in found and not os.path.exists(os.path.join(directory, name))]
+
+
+def find_missing(paths, workers=None):
+    """Zwraca listę ścieżek plików, które nie istnieją.
+
+    :param paths: ścieżki bezwzględne
+    :type paths: iterable
+    :param workers: liczba wątków, domyślnie *config.stat_workers*
+    :type workers: int
+    :return: ścieżki brakujących plików w kolejności podania
+    :rtype: list
+    """
+    paths = list(paths)
+    groups = group_by_directory(paths)
+    missing = set()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers or config.stat_workers) as executor:
+        results = executor.map(check_directory, groups.keys(), groups.values())
+        for directory, names in zip(groups.keys(), results):
+            missing.update((directory, name) for name in names)
+
+    return [file_path for file_path in paths if os.path.split(file_path) in missing]
@@ -0,0 +1,501 @@
+"""
+Moduł odpowiedzialny za indeks katalogów z teksturami, przechowywany w pamięci i na dysku stacji roboczej.
+
+Indeks zapamiętuje zawartość każdego katalogu, z którego pochodzą tekstury, i czas jego modyfikacji.
+Zapytania o istnienie i rozmiar pliku są obsługiwane z pamięci, a katalog jest odczytywany ponownie
+tylko wtedy, gdy jego stan jest nieaktualny:
+    *   na dyskach lokalnych w systemie Linux zmiany zgłasza *inotify* -- niezmieniony katalog
+        nie wymaga żadnego wywołania systemowego,
+    *   na dyskach sieciowych (NFS, SMB), na których *inotify* nie widzi zmian wprowadzonych
+        z innych komputerów, oraz w innych systemach porównywany jest czas modyfikacji katalogu,
+        co kosztuje jeden *stat* na katalog zamiast jednego na plik.
+
+Czas modyfikacji katalogu zmienia się przy dodaniu, usunięciu lub zmianie nazwy pliku, ale nie przy
+zmianie jego zawartości, dlatego rozmiary plików w katalogach sprawdzanych przez porównanie czasu
+modyfikacji mogą być nieaktualne. Skróty tekstur (moduł *texture_manifest*) zawsze korzystają z *os.stat()*.
+"""
+import concurrent.futures
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+
+from . import config
+from . import asset_check
+
+
+NETWORK_FILESYSTEMS = {'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'ncpfs', 'afs', '9p', 'ceph',
+                       'glusterfs', 'lustre', 'gpfs', 'fuse.sshfs', 'fuse.glusterfs', 'fuse.s3fs'}
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+CONTENT_EVENTS = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE
+STRUCTURE_EVENTS = IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+WATCH_MASK = CONTENT_EVENTS | STRUCTURE_EVENTS | IN_ONLYDIR
+
+EVENT_HEADER = struct.Struct('iIII')
+
+# Zmiana wprowadzona w tej samej chwili co odczyt katalogu może nie zmienić czasu jego modyfikacji
+# (rozdzielczość czasu na dyskach sieciowych to nawet 1-2 s), więc taki odczyt jest powtarzany
+RACY_INTERVAL_NS = 2 * 10 ** 9
+
+
+def mount_types():
+    """Zwraca typy systemów plików zamontowanych w systemie Linux.
+
+    :return: lista par (punkt montowania, typ), od najdłuższej ścieżki
+    :rtype: list
+    """
+    mounts = []
+    try:
+        with open('/proc/self/mountinfo', 'r') as mountinfo:
+            for line in mountinfo:
+                fields = line.split()
+                separator = fields.index('-')
+                mount_point = re.sub(r'\\([0-7]{3})', lambda match: chr(int(match.group(1), 8)), fields[4])
+                mounts.append((mount_point, fields[separator + 1]))
+    except (OSError, ValueError, IndexError):
+        return []
+    return sorted(mounts, key=lambda mount: len(mount[0]), reverse=True)
+
+
+def is_network_path(directory, mounts):
+    """Sprawdza, czy katalog leży na dysku sieciowym.
+
+    :param directory: ścieżka do katalogu
+    :type directory: str
+    :param mounts: wynik *mount_types()*
+    :type mounts: list
+    :rtype: boolean
+    """
+    for mount_point, fs_type in mounts:
+        if directory == mount_point or directory.startswith(mount_point.rstrip('/') + '/'):
+            return fs_type in NETWORK_FILESYSTEMS
+    return False
+
+
+class InotifyWatcher(threading.Thread):
+    """Wątek odbierający zdarzenia *inotify* dla obserwowanych katalogów
+    i przekazujący je indeksowi (*AssetIndex.on_event()*).
+    Dostępny tylko w systemie Linux; *create()* zwraca None w innych systemach.
+    """
+
+    def __init__(self, libc, fd, callback):
+        super().__init__(name='cis_render_inotify', daemon=True)
+        self.libc = libc
+        self.fd = fd
+        self.callback = callback
+        self.directories = {}
+        self.descriptors = {}
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    @classmethod
+    def create(cls, callback):
+        """Tworzy i uruchamia wątek, jeżeli system udostępnia *inotify*.
+
+        :param callback: funkcja wywoływana z argumentami (katalog, maska, nazwa pliku)
+        :type callback: callable
+        :rtype: InotifyWatcher
+        """
+        if not sys.platform.startswith('linux'):
+            return None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+            fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        except (OSError, AttributeError):
+            return None
+        if fd < 0:
+            return None
+
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        watcher = cls(libc, fd, callback)
+        watcher.start()
+        return watcher
+
+    def watch(self, directory):
+        """Zaczyna obserwować katalog.
+
+        :param directory: ścieżka do katalogu
+        :type directory: str
+        :return: False, jeżeli nie udało się dodać obserwacji (np. wyczerpany limit *max_user_watches*)
+        :rtype: boolean
+        """
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            config.logger.debug("inotify_add_watch({}) failed: {}".format(
+                directory, errno.errorcode.get(ctypes.get_errno())))
+            return False
+        with self._lock:
+            self.directories[wd] = directory
+            self.descriptors[directory] = wd
+        return True
+
+    def unwatch(self, directory):
+        """Przestaje obserwować katalog.
+
+        :param directory: ścieżka do katalogu
+        :type directory: str
+        """
+        with self._lock:
+            wd = self.descriptors.pop(directory, None)
+            self.directories.pop(wd, None)
+        if wd is not None:
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+    def stop(self):
+        """Zatrzymuje wątek i zamyka deskryptor *inotify*.
+        """
+        self._stopped = True
+
+    def run(self):
+        poll = select.poll()
+        poll.register(self.fd, select.POLLIN)
+
+        while not self._stopped:
+            if not poll.poll(200):
+                continue
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            self.dispatch(data)
+
+        os.close(self.fd)
+
+    def dispatch(self, data):
+        """Dekoduje zdarzenia odczytane z deskryptora *inotify*.
+
+        :param data: dane odczytane z deskryptora
+        :type data: bytes
+        """
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.callback(None, mask, name)
+                continue
+
+            with self._lock:
+                directory = self.directories.get(wd)
+                if mask & IN_IGNORED and directory is not None:
+                    self.directories.pop(wd, None)
+                    self.descriptors.pop(directory, None)
+
+            if directory is not None:
+                self.callback(directory, mask, name)
+
+
+class DirectoryState():
+    """Zapamiętana zawartość katalogu.
+
+    :param mtime: czas modyfikacji katalogu w ns
+    :type mtime: int
+    :param names: nazwy plików w katalogu
+    :type names: set
+    :param sizes: rozmiary plików, odczytywane przy pierwszym zapytaniu
+    :type sizes: dict
+    :param watched: czy zmiany katalogu zgłasza *inotify*
+    :type watched: boolean
+    :param stale: czy zawartość trzeba odczytać ponownie
+    :type stale: boolean
+    """
+
+    __slots__ = ('mtime', 'names', 'sizes', 'watched', 'stale')
+
+    def __init__(self, mtime, names, watched=False, stale=False):
+        self.mtime = mtime
+        self.names = names
+        self.sizes = {}
+        self.watched = watched
+        self.stale = stale
+
+
+class AssetIndex():
+    """Indeks katalogów z teksturami.
+
+    :param filename: ścieżka do pliku, w którym indeks jest zapisywany między sesjami, albo None
+    :type filename: str
+    :param use_inotify: czy obserwować katalogi lokalne przez *inotify*
+    :type use_inotify: boolean
+    """
+
+    def __init__(self, filename=None, use_inotify=True):
+        self.filename = filename
+        self.directories = {}
+        self.scanning = {}
+        self.changed = False
+        self.mounts = mount_types()
+        self._lock = threading.RLock()
+        self.watcher = InotifyWatcher.create(self.on_event) if use_inotify else None
+        self.load()
+
+    def load(self):
+        """Wczytuje indeks z dysku. Wczytane katalogi są sprawdzane przez porównanie czasu
+        modyfikacji przy pierwszym zapytaniu, bo mogły się zmienić, gdy program był wyłączony.
+        """
+        if self.filename is None:
+            return
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as index_file:
+                data = json.load(index_file)
+        except FileNotFoundError:
+            return
+        except ValueError:
+            config.logger.warning("Ignoring damaged asset index {}".format(self.filename))
+            return
+
+        with self._lock:
+            for directory, entry in data.items():
+                self.directories[directory] = DirectoryState(entry['mtime'], set(entry['names']))
+
+    def save(self):
+        """Zapisuje indeks na dysku, jeżeli się zmienił.
+        """
+        with self._lock:
+            if self.filename is None or not self.changed:
+                return
+            data = {directory: {'mtime': state.mtime, 'names': sorted(state.names)}
+                    for directory, state in self.directories.items() if state.mtime is not None}
+            self.changed = False
+
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as index_file:
+            json.dump(data, index_file)
+        os.replace(temp_filename, self.filename)
+
+    def close(self):
+        """Zatrzymuje obserwację katalogów.
+        """
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def on_event(self, directory, mask, name):
+        """Obsługuje zdarzenie *inotify*. Zmiana zawartości pliku usuwa tylko jego zapamiętany rozmiar,
+        a każda inna zmiana oznacza cały katalog jako nieaktualny. Zdarzenia dotyczące katalogu
+        odczytywanego właśnie przez *scan()* są zapamiętywane w jego stanie tymczasowym (*scanning*).
+
+        :param directory: katalog, którego dotyczy zdarzenie, albo None przy przepełnieniu kolejki zdarzeń
+        :type directory: str
+        :param mask: maska zdarzenia
+        :type mask: int
+        :param name: nazwa pliku, którego dotyczy zdarzenie
+        :type name: str
+        """
+        with self._lock:
+            if directory is None:
+                for state in list(self.directories.values()) + list(self.scanning.values()):
+                    state.stale = True
+                return
+
+            for state in (self.directories.get(directory), self.scanning.get(directory)):
+                if state is None:
+                    continue
+                if mask & IN_IGNORED:
+                    state.watched = False
+                    state.stale = True
+                elif mask & STRUCTURE_EVENTS:
+                    state.stale = True
+                else:
+                    state.sizes.pop(name, None)
+
+    def is_fresh(self, directory, state):
+        """Sprawdza, czy zapamiętana zawartość katalogu jest aktualna.
+        Dla katalogów obserwowanych przez *inotify* nie wykonuje żadnych wywołań systemowych.
+
+        :rtype: boolean
+        """
+        if state.stale:
+            return False
+        if state.watched:
+            return True
+        return self.is_fresh_on_disk(directory, state)
+
+    def scan(self, directory):
+        """Odczytuje zawartość katalogu i zapamiętuje ją w indeksie.
+
+        :param directory: ścieżka do katalogu
+        :type directory: str
+        :return: zapamiętany stan katalogu
+        :rtype: DirectoryState
+        """
+        # Zdarzenia zgłoszone w trakcie odczytu (w wątku inotify) trafiają do stanu tymczasowego
+        pending = DirectoryState(None, set(), watched=True)
+        with self._lock:
+            self.scanning[directory] = pending
+            previous = self.directories.get(directory)
+        watched = previous is not None and previous.watched
+        if not watched and self.watcher is not None and not is_network_path(directory, self.mounts):
+            # Obserwacja jest dodawana przed odczytem, żeby nie przegapić zmian w trakcie
+            watched = self.watcher.watch(directory)
+
+        try:
+            started = time.time_ns()
+            mtime = os.stat(directory).st_mtime_ns
+            with os.scandir(directory) as entries:
+                # Dowiązania symboliczne mogą być zerwane, więc sprawdzane są osobno
+                names = {entry.name for entry in entries
+                         if not entry.is_symlink() or os.path.exists(entry.path)}
+            stale = not watched and started - mtime < RACY_INTERVAL_NS
+        except FileNotFoundError:
+            mtime, names, stale = None, set(), False
+
+        with self._lock:
+            if self.scanning.get(directory) is pending:
+                del self.scanning[directory]
+            # Zmiana zgłoszona w trakcie odczytu mogła nie zostać w nim uwzględniona
+            state = DirectoryState(mtime, names, watched=watched and pending.watched, stale=stale or pending.stale)
+            self.directories[directory] = state
+            self.changed = True
+        return state
+
+    def get_directory(self, directory):
+        """Zwraca aktualny stan katalogu, odczytując go ponownie, jeżeli jest nieaktualny.
+        Aktualny katalog lokalny, który nie jest jeszcze obserwowany (np. wczytany z indeksu
+        na dysku po ponownym uruchomieniu programu), zaczyna być obserwowany przez *inotify*.
+
+        :param directory: ścieżka do katalogu
+        :type directory: str
+        :rtype: DirectoryState
+        """
+        state = self.directories.get(directory)
+        if state is not None and self.is_fresh(directory, state):
+            if state.watched or not self.start_watching(directory, state):
+                return state
+        return self.scan(directory)
+
+    def start_watching(self, directory, state):
+        """Dodaje obserwację aktualnego katalogu lokalnego i sprawdza ponownie czas jego modyfikacji,
+        bo zmiana wprowadzona przed dodaniem obserwacji nie zostanie zgłoszona.
+
+        :param directory: ścieżka do katalogu
+        :type directory: str
+        :param state: zapamiętany stan katalogu
+        :type state: DirectoryState
+        :return: True, jeżeli katalog zmienił się przed dodaniem obserwacji i trzeba go odczytać ponownie
+        :rtype: boolean
+        """
+        if self.watcher is None or state.mtime is None or is_network_path(directory, self.mounts):
+            return False
+        if not self.watcher.watch(directory):
+            return False
+        state.watched = True
+        return not self.is_fresh_on_disk(directory, state)
+
+    @staticmethod
+    def is_fresh_on_disk(directory, state):
+        """Porównuje zapamiętany czas modyfikacji katalogu z czasem na dysku.
+
+        :rtype: boolean
+        """
+        try:
+            return os.stat(directory).st_mtime_ns == state.mtime
+        except OSError:
+            return state.mtime is None
+
+    def find_missing(self, paths, workers=None):
+        """Zwraca listę ścieżek plików, które nie istnieją. Nieaktualne katalogi
+        są odczytywane równolegle.
+
+        :param paths: ścieżki bezwzględne
+        :type paths: iterable
+        :param workers: liczba wątków, domyślnie *config.stat_workers*
+        :type workers: int
+        :return: ścieżki brakujących plików w kolejności podania
+        :rtype: list
+        """
+        paths = list(paths)
+        groups = asset_check.group_by_directory(paths)
+        missing = set()
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers or config.stat_workers) as executor:
+            states = executor.map(self.get_directory, groups.keys())
+            for (directory, names), state in zip(groups.items(), states):
+                # Nazwy nieznalezione są sprawdzane osobno, bo na systemach plików nierozróżniających
+                # wielkości liter mogą różnić się od nazw zwróconych przez os.scandir()
+                missing.update((directory, name) for name in names
+                               if name not in state.names and not os.path.exists(os.path.join(directory, name)))
+
+        self.save()
+        return [file_path for file_path in paths if os.path.split(file_path) in missing]
+
+    def exists(self, file_path):
+        """Sprawdza, czy plik istnieje.
+
+        :param file_path: ścieżka bezwzględna
+        :type file_path: str
+        :rtype: boolean
+        """
+        return not self.find_missing([file_path], workers=1)
+
+    def size(self, file_path):
+        """Zwraca rozmiar pliku w bajtach, zapamiętany do czasu zmiany pliku albo katalogu.
+
+        :param file_path: ścieżka bezwzględna
+        :type file_path: str
+        :raises: FileNotFoundError: plik nie istnieje
+        :rtype: int
+        """
+        directory, name = os.path.split(file_path)
+        state = self.get_directory(directory)
+        size = state.sizes.get(name)
+        if size is None:
+            size = os.stat(file_path).st_size
+            with self._lock:
+                state.sizes[name] = size
+        return size
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Zwraca wspólny indeks, wczytując go z *config.asset_index_file* przy pierwszym użyciu.
+
+    :rtype: AssetIndex
+    """
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = AssetIndex(config.asset_index_file)
+        return _index
+
+
+def close_index():
+    """Zapisuje i zamyka wspólny indeks. Wywoływana przy wyrejestrowaniu wtyczki.
+    """
+    global _index
+
+    with _index_lock:
+        index, _index = _index, None
+
+    if index is not None:
+        index.save()
+        index.close()
@@ -0,0 +1,55 @@
+"""
+Moduł odpowiedzialny za dane zbiorczego zgłoszenia wielu zadań jednym żądaniem
+(np. wszystkich scen pliku, warstw widoku albo kamer sceny).
+
+Zadania zgłaszane razem pochodzą z jednego pliku *.blend*, więc mają wspólną listę tekstur,
+wtyczek i dane pliku sceny. Te dane, a także ustawienia o tej samej wartości we wszystkich
+zadaniach, są przesyłane raz, w sekcji *common*. Lista *jobs* zawiera tylko ustawienia,
+którymi zadania się różnią, oraz klucz (*key*) identyfikujący zadanie w odpowiedzi serwera::
+
+    {
+        "common": {"scene": {...}, "textures": [...], "add_ons": [...], "priority": "0", ...},
+        "jobs": [{"key": "Scene", "name": "...", "frames": {...}}, ...]
+    }
+"""
+
+
+def dedupe(jobs, common=None):
+    """Przenosi do sekcji wspólnej ustawienia o tej samej wartości we wszystkich zadaniach.
+
+    :param jobs: lista danych zadań, każde z kluczem *key*
+    :type jobs: list
+    :param common: dane wspólne dla wszystkich zadań, np. lista tekstur
+    :type common: dict
+    :return: dane zbiorczego zgłoszenia
+    :rtype: dict
+    """
+    common = dict(common or {})
+    jobs = [dict(job) for job in jobs]
+
+    if len(jobs) > 1:
+        for name, value in list(jobs[0].items()):
+            if name != 'key' and name not in common and all(name in job and job[name] == value for job in jobs[1:]):
+                common[name] = value
+                for job in jobs:
+                    del job[name]
+
+    return dict(common=common, jobs=jobs)
+
+
+def expand(payload, keys=False):
+    """Odtwarza dane pojedynczych zadań ze zbiorczego zgłoszenia, np. do wysłania każdego z nich osobno.
+    Lista wtyczek nie jest częścią danych pojedynczego zadania i jest pomijana.
+
+    :param payload: dane zbiorczego zgłoszenia zwrócone przez *dedupe()*
+    :type payload: dict
+    :param keys: czy zwrócić zadania razem z ich kluczami (*key*)
+    :type keys: boolean
+    :return: lista danych zadań w kolejności zgłoszenia albo, jeżeli *keys* jest prawdą,
+        lista par (klucz zadania, dane zadania)
+    :rtype: list
+    """
+    common = {name: value for name, value in payload['common'].items() if name != 'add_ons'}
+    jobs = [(job['key'], dict(common, **{name: value for name, value in job.items() if name != 'key'}))
+            for job in payload['jobs']]
+    return jobs if keys else [job for key, job in jobs]
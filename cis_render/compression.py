@@ -0,0 +1,149 @@
+"""
+Moduł odpowiedzialny za kompresję treści żądań wysyłanych RenderDockowi (nagłówek *Content-Encoding*).
+
+Obsługiwane są kodowania *gzip* (biblioteka standardowa) oraz *zstd*, jeżeli zainstalowany
+jest pakiet *zstandard*. Treść jest kompresowana tylko wtedy, gdy jest większa niż
+*config.compression_threshold*, a serwer akceptuje dane kodowanie.
+"""
+import gzip
+import zlib
+
+from . import config
+
+
+def zstd_available():
+    """Sprawdza, czy dostępny jest pakiet *zstandard*.
+
+    :rtype: boolean
+    """
+    try:
+        import zstandard
+    except ImportError:
+        return False
+    return True
+
+
+def available_encodings():
+    """Zwraca kodowania obsługiwane przez wtyczkę, w kolejności preferencji.
+
+    :rtype: list
+    """
+    return [encoding for encoding in config.request_encodings
+            if encoding == 'gzip' or (encoding == 'zstd' and zstd_available())]
+
+
+def choose_encoding(size, accepted):
+    """Wybiera kodowanie treści żądania.
+
+    :param size: rozmiar nieskompresowanej treści w bajtach
+    :type size: int
+    :param accepted: kodowania akceptowane przez serwer
+    :type accepted: set
+    :return: nazwa kodowania albo None, jeżeli treść ma być wysłana bez kompresji
+    :rtype: str
+    """
+    if size < config.compression_threshold:
+        return None
+
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def encode(body, encoding):
+    """Kompresuje treść żądania.
+
+    :param body: treść żądania
+    :type body: bytes
+    :param encoding: nazwa kodowania albo None
+    :type encoding: str
+    :raises: ValueError: nieznane kodowanie
+    :return: skompresowana treść
+    :rtype: bytes
+    """
+    if encoding is None:
+        return body
+
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=config.gzip_level)
+
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdCompressor(level=config.zstd_level).compress(body)
+
+    raise ValueError("Unsupported content encoding: {}".format(encoding))
+
+
+def encode_chunks(chunks, encoding):
+    """Kompresuje strumieniowo treść żądania podaną we fragmentach.
+
+    :param chunks: kolejne fragmenty treści
+    :type chunks: iterable
+    :param encoding: nazwa kodowania albo None
+    :type encoding: str
+    :raises: ValueError: nieznane kodowanie
+    :return: kolejne fragmenty skompresowanej treści
+    :rtype: iterator
+    """
+    if encoding is None:
+        yield from chunks
+        return
+
+    if encoding == 'gzip':
+        compressor = zlib.compressobj(config.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    elif encoding == 'zstd':
+        import zstandard
+        compressor = zstandard.ZstdCompressor(level=config.zstd_level).compressobj()
+    else:
+        raise ValueError("Unsupported content encoding: {}".format(encoding))
+
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def decode(body, encoding):
+    """Dekompresuje treść zakodowaną funkcją *encode()*.
+
+    :param body: skompresowana treść
+    :type body: bytes
+    :param encoding: nazwa kodowania albo None
+    :type encoding: str
+    :raises: ValueError: nieznane kodowanie
+    :return: treść po dekompresji
+    :rtype: bytes
+    """
+    if encoding in (None, '', 'identity'):
+        return body
+
+    if encoding == 'gzip':
+        return gzip.decompress(body)
+
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(body)
+
+    raise ValueError("Unsupported content encoding: {}".format(encoding))
+
+
+def parse_accept_encoding(header):
+    """Odczytuje listę kodowań z nagłówka *Accept-Encoding* odpowiedzi serwera (RFC 7694).
+    Kodowania z wagą *q=0* są pomijane.
+
+    :param header: wartość nagłówka, np. ``"zstd, gzip;q=0.5"``
+    :type header: str
+    :return: zbiór akceptowanych kodowań
+    :rtype: set
+    """
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.strip().partition(';')
+        if not name:
+            continue
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    return accepted
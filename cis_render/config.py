@@ -2,27 +2,150 @@
 # server = 'https://httpbin.org/post'
 
 import logging
-import logging.handlers
 import tempfile
 import os
 
 # USER SETTINGS
-log_level = logging.DEBUG
+# Domyślny poziom dziennika; zmieniany w preferencjach wtyczki
+log_level = logging.INFO
+# Czy zapisywać w dzienniku pełne dane zadań i odpowiedzi serwera (tylko na poziomie DEBUG)
+log_payloads = False
 # END
 
 formatter = logging.Formatter("== %(levelname)7s %(asctime)s [%(filename)s:%(lineno)s - %(funcName)s()] :\n%(message)s")
 
+# Tryb programisty: przy każdej rejestracji wtyczki (np. po odświeżeniu skryptów, F8) moduły są wczytywane
+# ponownie, więc zmiany w kodzie są widoczne bez ponownego uruchamiania programu Blender
+dev_mode = os.environ.get('CIS_RENDER_DEV_MODE', '') not in ('', '0')
+
 enviroment = 'production'
 log_file = os.path.join(tempfile.gettempdir(), "renderownia.log")
 logger = logging.getLogger(enviroment)
 
+# Wpisy są zapisywane do pliku log_file w osobnym wątku, uruchamianym przy rejestracji wtyczki (patrz moduł log_queue)
 logger.handlers[:] = []
-
 logger.setLevel(log_level)
-ch = logging.handlers.RotatingFileHandler(log_file, maxBytes=52428800, backupCount=2)
-ch.setFormatter(formatter)
-ch.setLevel(log_level)
-logger.addHandler(ch)
+
+# Pełne dane zadań; wpisy są odrzucane bez formatowania, dopóki log_payloads jest wyłączone
+payload_logger = logger.getChild('payload')
+payload_logger.disabled = not log_payloads
 
 
 server = 'http://localhost:5000/job'
+# Adres zbiorczego zgłaszania wielu zadań jednym żądaniem
+batch_server = server + '/batch'
+
+# Liczba połączeń z serwerem utrzymywanych przez sesję HTTP (keep-alive)
+pool_size = 4
+# Czy przy wyczerpaniu puli czekać na wolne połączenie zamiast otwierać dodatkowe
+pool_block = False
+# Limity czasu nawiązania połączenia i oczekiwania na odpowiedź przy wysyłaniu zadania (w sekundach);
+# przekroczenie jest błędem przejściowym, więc zadanie trafia do kolejki ponownych prób
+request_connect_timeout = 5.0
+request_read_timeout = 60.0
+
+# Kodowania treści żądań (Content-Encoding) w kolejności preferencji; zstd wymaga pakietu zstandard
+request_encodings = ('zstd', 'gzip')
+# Treść mniejsza niż podana liczba bajtów jest wysyłana bez kompresji
+compression_threshold = 65536
+gzip_level = 5
+zstd_level = 3
+
+# Koder JSON: 'auto' (orjson, jeżeli jest zainstalowany, w przeciwnym razie json), 'orjson' albo 'json'
+json_encoder = 'auto'
+# Dane zadania z co najmniej podaną liczbą tekstur są kodowane i wysyłane strumieniowo, fragmentami podanej wielkości
+stream_min_textures = 2000
+stream_chunk_size = 256 * 1024
+
+# Dziennik zadań oczekujących na ponowne wysłanie
+spool_file = os.path.join(os.path.dirname(log_file), "renderownia_spool.jsonl")
+# Czas oczekiwania przed pierwszą ponowną próbą i jego górne ograniczenie (w sekundach)
+spool_backoff_base = 2.0
+spool_backoff_max = 300.0
+
+# Czy ponownie używać ustawień sceny odczytanych przy poprzednim wysłaniu zadania, jeżeli się nie zmieniły
+scene_cache_enabled = True
+
+# Czy wysyłać tylko wtyczki włączone w ustawieniach programu Blender zamiast wszystkich zainstalowanych
+add_ons_enabled_only = False
+
+# Sprawdzanie istnienia tekstur: liczba wątków i minimalna liczba plików z jednego katalogu,
+# od której katalog jest odczytywany raz przez os.scandir() zamiast sprawdzania każdego pliku osobno
+stat_workers = 16
+scandir_min_files = 4
+# Indeks zawartości katalogów z teksturami, pozwalający pominąć sprawdzanie niezmienionych katalogów
+asset_index_enabled = True
+asset_index_file = os.path.join(os.path.dirname(log_file), "renderownia_assets.json")
+
+# Skróty zawartości tekstur: algorytm, rozmiar czytanego fragmentu, liczba wątków i pamięć podręczna
+hash_algorithm = 'sha256'
+hash_chunk_size = 1024 * 1024
+hash_workers = os.cpu_count() or 4
+hash_cache_file = os.path.join(os.path.dirname(log_file), "renderownia_hashes.json")
+
+# Podział zakresu klatek na części: docelowa liczba części i minimalny rozmiar części przy strategii AUTO
+# oraz liczba kolejnych części, które powinny trafić na ten sam węzeł farmy
+frame_chunk_target = 32
+frame_chunk_min = 4
+frame_chunk_affinity_span = 4
+
+# Śledzenie stanu zgłoszonych zadań: strumień zdarzeń (Server-Sent Events) i adres odpytywany,
+# gdy serwer nie obsługuje strumienia (z nagłówkiem If-None-Match, co status_poll_interval sekund)
+status_enabled = True
+status_use_events = True
+status_events_url = server + '/events'
+status_url = server + '/status'
+status_poll_interval = 5.0
+# Limity czasu połączenia i oczekiwania na dane strumienia (serwer co jakiś czas wysyła komentarz podtrzymujący)
+status_connect_timeout = 5.0
+status_read_timeout = 60.0
+# Maksymalna liczba zadań w tabeli stanów i minimalny odstęp między odświeżeniami panelu (w sekundach)
+status_table_size = 20
+status_redraw_interval = 0.5
+
+# Pobieranie wyrenderowanych klatek: adres listy klatek zadania ({} -- identyfikator zadania),
+# liczba klatek pobieranych jednocześnie, rozmiar zapisywanego fragmentu (po zerwaniu połączenia
+# pobieranie jest wznawiane od ostatniego pełnego fragmentu), limit czasu (w sekundach)
+# oraz liczba wznowień przerwanego pobierania i czas oczekiwania przed pierwszym wznowieniem
+frames_url = server + '/{}/frames'
+download_workers = 4
+download_chunk_size = 64 * 1024
+download_timeout = 30.0
+download_retries = 3
+download_retry_delay = 0.5
+
+# Wysyłanie pliku sceny i tekstur na farmę: adres sesji wysyłania, preferowany rozmiar fragmentu,
+# liczba fragmentów wysyłanych jednocześnie, łączna przepustowość w bajtach na sekundę (0 -- bez ograniczenia),
+# limit czasu, liczba ponownych prób wysłania fragmentu i czas oczekiwania przed pierwszą z nich
+upload_url = server + '/upload'
+upload_chunk_size = 8 * 1024 * 1024
+upload_workers = 4
+upload_bandwidth = 0
+upload_timeout = 60.0
+upload_retries = 3
+upload_retry_delay = 1.0
+# Adres zapytania o pliki, które serwer już ma, i maksymalna liczba skrótów w jednym zapytaniu
+asset_query_url = server + '/assets/query'
+asset_query_batch = 1000
+# Żetony niedokończonych sesji wysyłania, pozwalające wznowić wysyłanie po ponownym uruchomieniu
+upload_state_file = os.path.join(os.path.dirname(log_file), "renderownia_uploads.json")
+
+# Pomiar czasu etapów zgłaszania zadania zapisywany w dzienniku (poziom INFO) i opcjonalnie
+# dołączany do danych zadania jako metadane klienta (pole client)
+timing_enabled = True
+timing_in_payload = False
+
+# Przewidywanie czasu renderowania na podstawie historii zakończonych zadań (patrz moduł cost_model):
+# plik historii, liczba zapamiętanych zadań, najmniejsza liczba zadań danego silnika potrzebna
+# do przewidywania, współczynnik regularyzacji modelu i szerokość przedziału ufności w odchyleniach standardowych
+cost_model_enabled = True
+cost_history_file = os.path.join(os.path.dirname(log_file), "renderownia_cost_history.json")
+cost_history_size = 500
+cost_min_jobs = 8
+cost_regularization = 1e-3
+cost_confidence_z = 1.96
+
+# Liczba zadań wysyłanych jednocześnie w tle
+max_submissions = 4
+# Co ile sekund operator sprawdza, czy wysyłanie zadania się zakończyło
+poll_interval = 0.1
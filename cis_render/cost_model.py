@@ -0,0 +1,476 @@
+"""
+Moduł odpowiedzialny za przewidywanie czasu renderowania zadania na podstawie historii
+zadań zakończonych na farmie.
+
+Przy zgłoszeniu zadania zapamiętywane są cechy sceny (silnik, liczba pikseli klatki, liczba
+próbek, maksymalna liczba odbić światła i łączny rozmiar tekstur) oraz ustawienia odczytane
+przez operator wtyczki (*read_output()* i *read_cycles()*). Gdy RenderDock zgłosi zakończenie zadania
+(stan ``DONE`` z listą czasów renderowania klatek *frame_times*, patrz moduł *job_status*),
+zadanie trafia do historii (*config.cost_history_file*) razem z medianą czasu klatki.
+
+Na historii zadań renderowanych tym samym silnikiem dopasowywany jest model regresji liniowej
+logarytmu czasu klatki::
+
+    log(czas) = b0 + b1 log(piksele) + b2 log(próbki) + b3 odbicia + b4 log(1 + GB tekstur)
+
+(metodą najmniejszych kwadratów z niewielką regularyzacją, w bibliotece *NumPy*). Przewidywanie
+ma przedział ufności wynikający z rozrzutu reszt modelu i odległości sceny od scen z historii.
+Jest wysyłane RenderDockowi w danych zadania (pole *scheduling*) jako wskazówka dla planowania zadań
+i wyświetlane w panelu wtyczki. Przewidywanie dla panelu jest obliczane w wątku w tle, gdy zmienią się
+cechy sceny, zakres klatek albo historia (*refresh_estimate()*), a panel odczytuje tylko wynik
+zapamiętany w pamięci (*cached_estimate()*).
+
+*NumPy* jest dołączone do programu *Blender*. Jeżeli go brakuje albo historia zawiera mniej niż
+*config.cost_min_jobs* zadań danego silnika, czas nie jest przewidywany.
+"""
+import json
+import math
+import os
+import statistics
+import threading
+import time
+
+from . import config
+from . import lazy
+
+numpy = lazy.LazyModule('numpy')
+
+FEATURES = ('log_pixels', 'log_samples', 'bounces', 'log_texture_gb')
+
+
+def numpy_available():
+    """Sprawdza, czy dostępna jest biblioteka *NumPy*.
+
+    :rtype: boolean
+    """
+    try:
+        numpy.load()
+    except ImportError:
+        return False
+    return True
+
+
+def scene_characteristics(scene, texture_bytes=0):
+    """Odczytuje cechy sceny, od których zależy czas renderowania klatki.
+
+    :param scene: scena programu *Blender*
+    :type scene: bpy.types.Scene
+    :param texture_bytes: łączny rozmiar tekstur w bajtach
+    :type texture_bytes: int
+    :return: słownik z silnikiem (*engine*), liczbą pikseli klatki (*pixels*), liczbą próbek (*samples*),
+        maksymalną liczbą odbić (*bounces*) i rozmiarem tekstur (*texture_bytes*)
+    :rtype: dict
+    """
+    render = scene.render
+    scale = render.resolution_percentage / 100.0
+    engine = render.engine
+    if engine == 'CYCLES':
+        samples, bounces = scene.cycles.samples, scene.cycles.max_bounces
+    elif engine == 'BLENDER_EEVEE':
+        samples, bounces = scene.eevee.taa_render_samples, 0
+    else:
+        samples, bounces = 1, 0
+    return dict(engine=engine, pixels=int(render.resolution_x * scale) * int(render.resolution_y * scale),
+                samples=samples, bounces=bounces, texture_bytes=texture_bytes)
+
+
+def design_matrix(rows):
+    """Zamienia cechy scen na macierz zmiennych objaśniających modelu (z kolumną wyrazu wolnego).
+
+    :param rows: lista słowników zwróconych przez *scene_characteristics()*
+    :type rows: list
+    :rtype: numpy.ndarray
+    """
+    values = numpy.array([[row['pixels'], row['samples'], row['bounces'], row['texture_bytes']] for row in rows],
+                         dtype=float).reshape(-1, 4)
+    return numpy.column_stack((
+        numpy.ones(len(values)),
+        numpy.log(numpy.maximum(values[:, 0], 1.0)),
+        numpy.log(numpy.maximum(values[:, 1], 1.0)),
+        values[:, 2],
+        numpy.log1p(values[:, 3] / 2.0 ** 30),
+    ))
+
+
+class CostModel():
+    """Model regresji logarytmu czasu renderowania klatki.
+
+    :param coefficients: współczynniki modelu (wyraz wolny i kolejne cechy z *FEATURES*)
+    :type coefficients: numpy.ndarray
+    :param inverse: odwrotność macierzy równań normalnych, używana do wyznaczenia przedziału ufności
+    :type inverse: numpy.ndarray
+    :param sigma: odchylenie standardowe reszt modelu (w skali logarytmicznej)
+    :type sigma: float
+    :param jobs: liczba zadań, na których dopasowano model
+    :type jobs: int
+    """
+
+    def __init__(self, coefficients, inverse, sigma, jobs):
+        self.coefficients = coefficients
+        self.inverse = inverse
+        self.sigma = sigma
+        self.jobs = jobs
+
+    @classmethod
+    def fit(cls, rows, frame_times, regularization=None):
+        """Dopasowuje model do historii zadań.
+
+        :param rows: cechy scen zadań, patrz *scene_characteristics()*
+        :type rows: list
+        :param frame_times: zmierzone czasy renderowania klatki zadań w sekundach
+        :type frame_times: list
+        :param regularization: współczynnik regularyzacji, domyślnie *config.cost_regularization*
+        :type regularization: float
+        :rtype: CostModel
+        """
+        regularization = config.cost_regularization if regularization is None else regularization
+        x = design_matrix(rows)
+        y = numpy.log(numpy.maximum(numpy.asarray(frame_times, dtype=float), 1e-3))
+        # Wyraz wolny nie jest regularyzowany
+        penalty = numpy.diag([0.0] + [regularization] * len(FEATURES))
+        inverse = numpy.linalg.pinv(x.T @ x + penalty)
+        coefficients = inverse @ x.T @ y
+        residuals = y - x @ coefficients
+        dof = max(len(y) - x.shape[1], 1)
+        sigma = float(numpy.sqrt(residuals @ residuals / dof))
+        return cls(coefficients, inverse, sigma, len(y))
+
+    def predict(self, rows, z=None):
+        """Przewiduje czasy renderowania klatki dla wielu scen naraz.
+
+        :param rows: cechy scen, patrz *scene_characteristics()*
+        :type rows: list
+        :param z: szerokość przedziału w odchyleniach standardowych, domyślnie *config.cost_confidence_z*
+        :type z: float
+        :return: trzy tablice: przewidywany czas klatki w sekundach oraz dolna i górna granica przedziału
+        :rtype: tuple
+        """
+        z = config.cost_confidence_z if z is None else z
+        x = design_matrix(rows)
+        mean = x @ self.coefficients
+        leverage = numpy.einsum('ij,jk,ik->i', x, self.inverse, x)
+        spread = z * self.sigma * numpy.sqrt(1.0 + leverage)
+        return numpy.exp(mean), numpy.exp(mean - spread), numpy.exp(mean + spread)
+
+    def predict_one(self, row):
+        """Przewiduje czas renderowania klatki jednej sceny.
+
+        :param row: cechy sceny, patrz *scene_characteristics()*
+        :type row: dict
+        :return: słownik z przewidywanym czasem klatki (*frame_seconds*), granicami przedziału
+            (*low*, *high*) i liczbą zadań, na których oparto model (*jobs*)
+        :rtype: dict
+        """
+        seconds, low, high = self.predict([row])
+        return dict(frame_seconds=float(seconds[0]), low=float(low[0]), high=float(high[0]), jobs=self.jobs)
+
+
+class CostHistory():
+    """Historia zadań zapisywana na dysku w formacie JSON: zadania zgłoszone i jeszcze niezakończone
+    (*pending*) oraz zadania zakończone ze zmierzonym czasem klatki (*jobs*).
+
+    :param filename: ścieżka do pliku
+    :type filename: str
+    :param pending: słownik identyfikator zadania -> cechy sceny i ustawienia z chwili zgłoszenia
+    :type pending: dict
+    :param jobs: zakończone zadania, od najstarszego
+    :type jobs: list
+    :param version: numer zmieniany po każdym dodaniu zakończonego zadania
+    :type version: int
+    """
+
+    def __init__(self, filename, size=None):
+        self.filename = filename
+        self.size = size or config.cost_history_size
+        self.pending = {}
+        self.jobs = []
+        self.version = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Wczytuje historię z dysku. Uszkodzony plik jest ignorowany.
+        """
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as history_file:
+                data = json.load(history_file)
+            self.pending, self.jobs = data['pending'], data['jobs']
+        except FileNotFoundError:
+            self.pending, self.jobs = {}, []
+        except (ValueError, KeyError, TypeError):
+            config.logger.warning("Ignoring damaged render cost history {}".format(self.filename))
+            self.pending, self.jobs = {}, []
+
+    def save(self):
+        """Zapisuje historię na dysku. Wywoływana z założoną blokadą.
+        """
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as history_file:
+            json.dump(dict(pending=self.pending, jobs=self.jobs), history_file)
+        os.replace(temp_filename, self.filename)
+
+    def add_pending(self, job_id, sample):
+        """Zapamiętuje zgłoszone zadanie do czasu jego zakończenia.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :param sample: nazwa sceny (*scene*), cechy sceny (*characteristics*) i ustawienia (*settings*)
+        :type sample: dict
+        """
+        with self._lock:
+            self.pending[job_id] = dict(sample, submitted=time.time())
+            while len(self.pending) > self.size:
+                del self.pending[next(iter(self.pending))]
+            self.save()
+
+    def complete(self, job_id, frame_times):
+        """Przenosi zakończone zadanie do historii razem z medianą czasu renderowania klatki.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :param frame_times: czasy renderowania kolejnych klatek w sekundach
+        :type frame_times: list
+        :return: czy zadanie było zapamiętane jako zgłoszone
+        :rtype: boolean
+        """
+        with self._lock:
+            sample = self.pending.pop(job_id, None)
+            if sample is None or not frame_times:
+                return False
+            self.jobs.append(dict(sample, id=job_id, frame_seconds=statistics.median(frame_times),
+                                  frames=len(frame_times), completed=time.time()))
+            del self.jobs[:-self.size]
+            self.version += 1
+            self.save()
+            return True
+
+    def completed(self, engine):
+        """Zwraca zakończone zadania renderowane podanym silnikiem.
+
+        :param engine: silnik renderujący, np. ``CYCLES``
+        :type engine: str
+        :rtype: list
+        """
+        with self._lock:
+            return [job for job in self.jobs if job['characteristics']['engine'] == engine]
+
+    def texture_bytes(self, scene_name):
+        """Zwraca rozmiar tekstur z ostatniego zgłoszenia sceny o podanej nazwie albo 0.
+
+        :param scene_name: nazwa sceny
+        :type scene_name: str
+        :rtype: int
+        """
+        with self._lock:
+            for sample in reversed(list(self.pending.values()) + self.jobs):
+                if sample.get('scene') == scene_name:
+                    return sample['characteristics']['texture_bytes']
+        return 0
+
+
+_history = None
+_models = {}
+_estimates = {}
+_estimates_version = 0
+_refreshing = set()
+_lock = threading.Lock()
+
+
+def get_history():
+    """Zwraca historię zadań, wczytując ją przy pierwszym użyciu.
+
+    :rtype: CostHistory
+    """
+    global _history
+
+    with _lock:
+        if _history is None:
+            _history = CostHistory(config.cost_history_file)
+        return _history
+
+
+def get_model(engine):
+    """Zwraca model dopasowany do historii zadań podanego silnika. Model jest dopasowywany ponownie
+    tylko po dodaniu do historii nowego zadania.
+
+    :param engine: silnik renderujący
+    :type engine: str
+    :return: model albo None, jeżeli historia jest za krótka albo brakuje biblioteki *NumPy*
+    :rtype: CostModel
+    """
+    history = get_history()
+    version = history.version
+    with _lock:
+        cached = _models.get(engine)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+    jobs = history.completed(engine)
+    model = None
+    if len(jobs) >= config.cost_min_jobs and numpy_available():
+        model = CostModel.fit([job['characteristics'] for job in jobs], [job['frame_seconds'] for job in jobs])
+
+    with _lock:
+        _models[engine] = (version, model)
+    return model
+
+
+def estimate(characteristics, frames=None):
+    """Przewiduje czas renderowania klatki i całego zadania.
+
+    :param characteristics: cechy sceny, patrz *scene_characteristics()*
+    :type characteristics: dict
+    :param frames: liczba klatek zadania
+    :type frames: int
+    :return: słownik z przewidywanym czasem klatki (*frame_seconds*), granicami przedziału (*low*, *high*),
+        liczbą zadań w historii (*jobs*) i, jeżeli podano liczbę klatek, czasem zadania (*job_seconds*)
+        albo None, jeżeli czasu nie da się przewidzieć
+    :rtype: dict
+    """
+    if not config.cost_model_enabled:
+        return None
+    model = get_model(characteristics['engine'])
+    if model is None:
+        return None
+    prediction = model.predict_one(characteristics)
+    if frames:
+        prediction['job_seconds'] = prediction['frame_seconds'] * frames
+    return prediction
+
+
+def estimate_key(characteristics, frames):
+    """Zwraca klucz przewidywania zapamiętanego dla panelu: numer wersji historii, cechy sceny
+    i liczbę klatek. Przed wczytaniem historii numer wersji to None.
+
+    :rtype: tuple
+    """
+    history = _history
+    return (history.version if history is not None else None, characteristics['engine'],
+            characteristics['pixels'], characteristics['samples'], characteristics['bounces'], frames)
+
+
+def refresh_estimate(scene, frames=None):
+    """Zleca wątkowi w tle obliczenie przewidywania dla sceny, jeżeli od poprzedniego obliczenia
+    zmieniły się cechy sceny, liczba klatek albo historia zadań. Wywoływana przez zegar panelu
+    w głównym wątku; sama odczytuje tylko kilka ustawień sceny.
+
+    :param scene: scena programu *Blender*
+    :type scene: bpy.types.Scene
+    :param frames: liczba klatek zadania
+    :type frames: int
+    """
+    if not config.cost_model_enabled:
+        return
+    characteristics = scene_characteristics(scene)
+    key = estimate_key(characteristics, frames)
+    with _lock:
+        cached = _estimates.get(scene.name)
+        if (cached is not None and cached[0] == key) or scene.name in _refreshing:
+            return
+        _refreshing.add(scene.name)
+    threading.Thread(target=compute_estimate, args=(scene.name, characteristics, frames),
+                     name='cis_render_estimate', daemon=True).start()
+
+
+def compute_estimate(scene_name, characteristics, frames):
+    """Oblicza przewidywanie dla panelu, z rozmiarem tekstur z ostatniego zgłoszenia sceny,
+    i zapamiętuje je. Wykonywana w wątku w tle, bo wczytuje historię i dopasowuje model.
+
+    :param scene_name: nazwa sceny
+    :type scene_name: str
+    :param characteristics: cechy sceny, patrz *scene_characteristics()*
+    :type characteristics: dict
+    :param frames: liczba klatek zadania
+    :type frames: int
+    """
+    global _estimates_version
+
+    prediction = None
+    try:
+        characteristics['texture_bytes'] = get_history().texture_bytes(scene_name)
+        prediction = estimate(characteristics, frames)
+    except Exception:
+        config.logger.error("Could not estimate render time of scene {}".format(scene_name), exc_info=True)
+    finally:
+        with _lock:
+            _estimates[scene_name] = (estimate_key(characteristics, frames), prediction)
+            _estimates_version += 1
+            _refreshing.discard(scene_name)
+
+
+def cached_estimate(scene_name):
+    """Zwraca zapamiętane przewidywanie dla sceny. Wywoływana przy rysowaniu panelu.
+
+    :param scene_name: nazwa sceny
+    :type scene_name: str
+    :return: przewidywanie, patrz *estimate()*, albo None
+    :rtype: dict
+    """
+    cached = _estimates.get(scene_name)
+    return cached[1] if cached is not None else None
+
+
+def estimates_version():
+    """Zwraca numer zmieniany po każdym obliczeniu przewidywania dla panelu.
+
+    :rtype: int
+    """
+    return _estimates_version
+
+
+def frame_count(frames, step=1):
+    """Zwraca liczbę klatek renderowanych w zakresie z danych zadania.
+
+    :param frames: słownik z numerami pierwszej (*start*) i ostatniej (*end*) klatki
+    :type frames: dict
+    :param step: co która klatka jest renderowana
+    :type step: int
+    :rtype: int
+    """
+    return len(range(frames['start'], frames['end'] + 1, max(step, 1)))
+
+
+def add_scheduling_hint(payload, sample):
+    """Uzupełnia cechy sceny o rozmiar tekstur z manifestu i dołącza do danych zadania
+    przewidywany czas renderowania (pole *scheduling*), jeżeli da się go przewidzieć.
+
+    :param payload: dane zadania z manifestem tekstur (patrz moduł *texture_manifest*)
+    :type payload: dict
+    :param sample: nazwa sceny, cechy sceny i ustawienia z chwili zgłoszenia
+    :type sample: dict
+    """
+    characteristics = sample['characteristics']
+    characteristics['texture_bytes'] = sum(texture.get('size') or 0 for texture in payload.get('textures') or ())
+    frames = payload.get('frames')
+    prediction = estimate(characteristics, frame_count(frames, sample.get('frame_step', 1)) if frames else None)
+    if prediction is not None:
+        payload['scheduling'] = dict(prediction, characteristics=characteristics)
+
+
+def record_completion(job_id, frame_times):
+    """Dodaje do historii zakończone zadanie. Wywoływana przez wątek śledzący stan zadań.
+
+    :param job_id: identyfikator zadania
+    :type job_id: str
+    :param frame_times: czasy renderowania kolejnych klatek w sekundach
+    :type frame_times: list
+    """
+    try:
+        get_history().complete(job_id, frame_times)
+    except (OSError, TypeError, statistics.StatisticsError):
+        config.logger.error("Could not record render time of job {}".format(job_id), exc_info=True)
+
+
+def format_duration(seconds):
+    """Zapisuje czas w czytelnej postaci, np. ``45s``, ``3m 20s`` albo ``2h 05m``.
+
+    :param seconds: czas w sekundach
+    :type seconds: float
+    :rtype: str
+    """
+    seconds = int(math.ceil(seconds))
+    if seconds < 60:
+        return "{}s".format(seconds)
+    if seconds < 3600:
+        return "{}m {:02d}s".format(seconds // 60, seconds % 60)
+    return "{}h {:02d}m".format(seconds // 3600, seconds % 3600 // 60)
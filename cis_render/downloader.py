@@ -0,0 +1,297 @@
+"""
+Moduł odpowiedzialny za pobieranie wyrenderowanych klatek zadania z RenderDocka do katalogu
+wyjściowego sceny.
+
+Lista klatek zadania (``GET <config.frames_url>``) podaje dla każdej klatki jej numer, rozmiar,
+skrót zawartości i adres pliku. Klatki są pobierane równolegle, przez pulę co najwyżej
+*config.download_workers* wątków, do pliku tymczasowego ``<plik>.part``. Przerwane pobieranie
+jest wznawiane od miejsca przerwania (nagłówek *Range*). Po pobraniu sprawdzany jest rozmiar
+i skrót pliku, a dopiero potem plik zastępuje plik docelowy.
+
+Ścieżka pliku klatki powstaje z szablonu ścieżki wyjściowej sceny (*render.filepath*) tak samo
+jak w programie *Blender*: ostatni ciąg znaków ``#`` jest zastępowany numerem klatki (a jeżeli
+szablon go nie zawiera, numer jest dopisywany na końcu) i, jeżeli włączono *use_file_extension*,
+dopisywane jest rozszerzenie formatu pliku. Pliki, które już istnieją i mają tę samą zawartość,
+są pomijane, a pliki o innej zawartości są zastępowane tylko przy włączonym *use_overwrite*.
+"""
+import concurrent.futures
+import os
+import re
+import time
+import urllib.parse
+
+from . import config
+from . import lazy
+from . import spool
+from . import texture_manifest
+
+requests = lazy.LazyModule('requests')
+
+
+# Rozszerzenia plików poszczególnych formatów, jak w programie Blender
+EXTENSIONS = {
+    'BMP': '.bmp',
+    'IRIS': '.rgb',
+    'PNG': '.png',
+    'JPEG': '.jpg',
+    'JPEG2000': '.jp2',
+    'TARGA': '.tga',
+    'TARGA_RAW': '.tga',
+    'CINEON': '.cin',
+    'DPX': '.dpx',
+    'OPEN_EXR_MULTILAYER': '.exr',
+    'OPEN_EXR': '.exr',
+    'HDR': '.hdr',
+    'TIFF': '.tif',
+    'WEBP': '.webp',
+}
+
+FRAME_CHARS = re.compile(r'#+')
+
+
+def frame_path(template, frame, file_format, use_extension=True):
+    """Zwraca ścieżkę pliku klatki według szablonu ścieżki wyjściowej sceny.
+
+    :param template: bezwzględna ścieżka wyjściowa sceny, np. ``/renders/shot_####``
+    :type template: str
+    :param frame: numer klatki
+    :type frame: int
+    :param file_format: format pliku, np. ``PNG``
+    :type file_format: str
+    :param use_extension: czy dopisywać rozszerzenie formatu pliku
+    :type use_extension: boolean
+    :rtype: str
+    """
+    runs = list(FRAME_CHARS.finditer(template))
+    if runs:
+        run = runs[-1]
+        path = template[:run.start()] + str(frame).zfill(run.end() - run.start()) + template[run.end():]
+    else:
+        path = template + str(frame).zfill(4)
+
+    extension = EXTENSIONS.get(file_format, '')
+    if use_extension and extension and not path.lower().endswith(extension):
+        path += extension
+    return path
+
+
+def is_current(filename, size, digest):
+    """Sprawdza, czy plik istnieje i ma podany rozmiar i skrót zawartości.
+
+    :param filename: ścieżka do pliku
+    :type filename: str
+    :param size: oczekiwany rozmiar w bajtach
+    :type size: int
+    :param digest: oczekiwany skrót w postaci ``"<algorytm>:<hex>"``
+    :type digest: str
+    :rtype: boolean
+    """
+    try:
+        if os.path.getsize(filename) != size:
+            return False
+    except OSError:
+        return False
+    return digest is None or texture_manifest.hash_file(filename) == digest
+
+
+class FrameDownloader():
+    """Pobiera klatki zadań przez sesję HTTP z pulą połączeń, po jednym połączeniu na wątek.
+
+    :param workers: liczba klatek pobieranych jednocześnie
+    :type workers: int
+    :param session: sesja HTTP
+    :type session: requests.Session
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or config.download_workers
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        """Zamyka sesję HTTP.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def list_frames(self, job_id):
+        """Pobiera listę wyrenderowanych klatek zadania.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :raises: RequestException: serwer odrzucił żądanie
+        :return: lista słowników z numerem klatki (*frame*), rozmiarem (*size*), skrótem (*hash*)
+            i bezwzględnym adresem pliku (*url*)
+        :rtype: list
+        """
+        url = config.frames_url.format(job_id)
+        r = self.session.get(url, timeout=config.download_timeout)
+        r.raise_for_status()
+        return [dict(entry, url=urllib.parse.urljoin(url, entry['url'])) for entry in r.json()['frames']]
+
+    def download(self, job_id, template, file_format, use_extension=True, overwrite=True):
+        """Pobiera wszystkie wyrenderowane klatki zadania do plików wskazanych przez szablon ścieżki.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :param template: bezwzględna ścieżka wyjściowa sceny
+        :type template: str
+        :param file_format: format pliku
+        :type file_format: str
+        :param use_extension: czy dopisywać rozszerzenie formatu pliku
+        :type use_extension: boolean
+        :param overwrite: czy zastępować istniejące pliki o innej zawartości
+        :type overwrite: boolean
+        :raises: RequestException: nie udało się pobrać listy klatek
+        :return: wyniki pobierania poszczególnych klatek w kolejności numerów -- słowniki z numerem
+            klatki (*frame*), ścieżką (*path*), stanem (*status*: ``downloaded``, ``skipped``
+            dla plików z tą samą zawartością, ``kept`` dla zachowanych plików o innej zawartości
+            albo ``failed``) i opisem błędu (*error*)
+        :rtype: list
+        """
+        frames = sorted(self.list_frames(job_id), key=lambda entry: entry['frame'])
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                   thread_name_prefix='cis_render_download') as executor:
+            futures = [executor.submit(self.download_frame, entry,
+                                       frame_path(template, entry['frame'], file_format, use_extension), overwrite)
+                       for entry in frames]
+            return [future.result() for future in futures]
+
+    def download_frame(self, entry, filename, overwrite=True):
+        """Pobiera jedną klatkę, jeżeli plik docelowy nie ma już tej samej zawartości.
+
+        :param entry: opis klatki zwrócony przez *list_frames()*
+        :type entry: dict
+        :param filename: ścieżka pliku docelowego
+        :type filename: str
+        :param overwrite: czy zastępować istniejący plik o innej zawartości
+        :type overwrite: boolean
+        :return: wynik pobierania klatki, patrz *download()*
+        :rtype: dict
+        """
+        result = dict(frame=entry['frame'], path=filename, status='downloaded', error=None)
+
+        if os.path.exists(filename):
+            if is_current(filename, entry['size'], entry.get('hash')):
+                result['status'] = 'skipped'
+                return result
+            if not overwrite:
+                result['status'] = 'kept'
+                return result
+
+        try:
+            self.fetch(entry['url'], filename, entry['size'], entry.get('hash'))
+        except (requests.exceptions.RequestException, OSError, ValueError) as error:
+            config.logger.error("Could not download frame {}".format(entry['frame']), exc_info=True)
+            result.update(status='failed', error=str(error))
+        return result
+
+    def fetch(self, url, filename, size, digest=None):
+        """Pobiera plik do ``<filename>.part``, wznawiając przerwane pobieranie od miejsca przerwania,
+        a po sprawdzeniu rozmiaru i skrótu zastępuje nim plik docelowy. Plik jest zapisywany
+        fragmentami, bez wczytywania go w całości do pamięci.
+
+        :param url: adres pliku
+        :type url: str
+        :param filename: ścieżka pliku docelowego
+        :type filename: str
+        :param size: oczekiwany rozmiar w bajtach
+        :type size: int
+        :param digest: oczekiwany skrót w postaci ``"<algorytm>:<hex>"``
+        :type digest: str
+        :raises: RequestException: serwer odrzucił żądanie albo połączenie zrywało się przy każdej próbie
+        :raises: ValueError: pobrany plik ma inny rozmiar albo skrót niż oczekiwany
+        """
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        part = filename + '.part'
+
+        for attempt in range(config.download_retries + 1):
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if offset > size:
+                os.remove(part)
+                offset = 0
+
+            if offset < size or not os.path.exists(part):
+                try:
+                    self.fetch_range(url, part, offset)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                        requests.exceptions.ChunkedEncodingError) as error:
+                    if attempt == config.download_retries:
+                        raise
+                    config.logger.warning("Download of {} interrupted, resuming: {}".format(url, error))
+                    time.sleep(spool.backoff_delay(attempt, config.download_retry_delay))
+                    continue
+
+            actual = os.path.getsize(part)
+            if actual < size:
+                continue
+            if actual > size or (digest is not None and texture_manifest.hash_file(part) != digest):
+                # Uszkodzonej części nie da się wznowić -- kolejna próba pobiera plik od początku
+                os.remove(part)
+                continue
+
+            os.replace(part, filename)
+            return
+
+        raise ValueError("Downloaded file {} does not match its size or hash".format(filename))
+
+    def fetch_range(self, url, part, offset):
+        """Dopisuje do pliku częściowego zawartość pliku od podanego miejsca.
+        Jeżeli serwer nie obsługuje żądań częściowych (odpowiedź 200), plik jest pobierany od początku.
+
+        :param url: adres pliku
+        :type url: str
+        :param part: ścieżka pliku częściowego
+        :type part: str
+        :param offset: liczba bajtów już pobranych
+        :type offset: int
+        :raises: RequestException: błąd połączenia albo odpowiedź z błędem
+        """
+        headers = {'Range': 'bytes={}-'.format(offset)} if offset else {}
+        with self.session.get(url, headers=headers, stream=True, timeout=config.download_timeout) as r:
+            r.raise_for_status()
+            mode = 'ab' if offset and r.status_code == 206 else 'wb'
+            with open(part, mode) as outfile:
+                for chunk in r.iter_content(config.download_chunk_size):
+                    outfile.write(chunk)
+
+
+def output_template(output_settings, abspath):
+    """Odczytuje z ustawień wyjściowych sceny szablon ścieżki i ustawienia zapisu plików.
+
+    :param output_settings: ustawienia wyjściowe sceny odczytane przez *SceneReader.read_output()*
+    :type output_settings: dict
+    :param abspath: funkcja zamieniająca ścieżkę względną pliku *.blend* (``//``) na bezwzględną,
+        np. *bpy.path.abspath*
+    :type abspath: callable
+    :return: argumenty *template*, *file_format*, *use_extension* i *overwrite* metody *FrameDownloader.download()*
+    :rtype: dict
+    """
+    output = output_settings['output']
+    return dict(template=abspath(output['path']), file_format=output['file_format'],
+                use_extension=output['file_extensions'], overwrite=output['overwirte'])
+
+
+def download_frames(job_id, settings):
+    """Wykonywana w wątku roboczym. Pobiera wyrenderowane klatki zadania.
+
+    :param job_id: identyfikator zadania
+    :type job_id: str
+    :param settings: szablon ścieżki i ustawienia zapisu zwrócone przez *output_template()*
+    :type settings: dict
+    :raises: RequestException: nie udało się pobrać listy klatek
+    :return: wyniki pobierania poszczególnych klatek, patrz *FrameDownloader.download()*
+    :rtype: list
+    """
+    with FrameDownloader() as downloader:
+        return downloader.download(job_id, **settings)
@@ -0,0 +1,11 @@
+"""
+Moduł zawierający wyjątki komunikacji z RenderDockiem. Importuje pakiet *requests*,
+więc jest wczytywany dopiero przy pierwszym wysyłaniu zadania (patrz moduł *lazy*).
+"""
+import requests
+
+
+class RetryableRequestError(requests.exceptions.RequestException):
+    """Błąd przejściowy, po którym warto ponowić wysłanie zadania:
+    brak połączenia, przekroczony czas oczekiwania albo błąd serwera (5xx).
+    """
@@ -0,0 +1,358 @@
+"""
+Moduł odpowiedzialny za odczytywanie ustawień sceny na podstawie tabel.
+
+Tabela opisuje strukturę słownika wynikowego: klucze słownika odpowiadają ścieżkom RNA
+względem sceny (np. ``'render.resolution_x'`` albo ``'display.shading.single_color[0]'``).
+Elementy tabeli:
+    *   ``str`` -- ścieżka RNA, której wartość trafia pod dany klucz,
+    *   ``dict`` -- zagnieżdżony słownik,
+    *   ``When(ścieżka, wartości, element, otherwise)`` -- element odczytywany tylko wtedy, gdy
+        wartość pod ścieżką należy do *wartości*; w przeciwnym razie użyty jest *otherwise*,
+        a jeżeli go nie podano, klucz jest pomijany,
+    *   ``Merge(ścieżka, wartości)`` użyty jako klucz -- słownik (albo funkcja go zwracająca)
+        dołączany do słownika nadrzędnego pod tym samym warunkiem,
+    *   ``AsList(ścieżka)`` -- tablica wartości (np. kolor) zamieniona na listę,
+    *   funkcja -- wywoływana z obiektem sceny, zwraca wartość.
+
+Tabela jest kompilowana raz (*compile_table()*) do funkcji, która dostaje obiekt sceny wyszukany
+jeden raz przez wywołującego, zamiast wyszukiwać scenę po nazwie dla każdego pola.
+"""
+import operator
+import re
+
+
+OMIT = object()
+
+PATH_STEP = re.compile(r'\.?([A-Za-z_][A-Za-z0-9_]*)|\[(-?\d+|"[^"]*"|\'[^\']*\')\]')
+
+
+class When():
+    """Element tabeli odczytywany warunkowo.
+
+    :param path: ścieżka RNA wartości sprawdzanej w warunku
+    :type path: str
+    :param values: wartości, dla których warunek jest spełniony
+    :type values: tuple
+    :param spec: element odczytywany, gdy warunek jest spełniony
+    :param otherwise: wartość albo element tabeli użyty, gdy warunek nie jest spełniony;
+        domyślnie klucz jest pomijany
+    """
+
+    def __init__(self, path, values, spec, otherwise=OMIT):
+        self.path = path
+        self.values = values
+        self.spec = spec
+        self.otherwise = otherwise
+
+
+class Merge():
+    """Klucz tabeli, którego wartość (słownik) jest dołączana do słownika nadrzędnego,
+    jeżeli wartość pod ścieżką *path* należy do *values*.
+
+    :param path: ścieżka RNA wartości sprawdzanej w warunku
+    :type path: str
+    :param values: wartości, dla których warunek jest spełniony
+    :type values: tuple
+    """
+
+    def __init__(self, path, values):
+        self.path = path
+        self.values = values
+
+
+class AsList():
+    """Element tabeli odczytujący tablicę RNA (np. kolor) jako listę.
+
+    :param path: ścieżka RNA
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+
+def compile_path(path):
+    """Kompiluje ścieżkę RNA do funkcji zwracającej wartość dla podanego obiektu.
+    Ścieżki złożone z samych atrybutów są obsługiwane przez *operator.attrgetter*.
+
+    :param path: ścieżka, np. ``'render.image_settings.file_format'`` albo ``'render.views["left"].use'``
+    :type path: str
+    :raises: ValueError: niepoprawna ścieżka
+    :rtype: callable
+    """
+    steps = []
+    position = 0
+    for match in PATH_STEP.finditer(path):
+        if match.start() != position:
+            break
+        attribute, index = match.groups()
+        if attribute is not None:
+            steps.append(operator.attrgetter(attribute))
+        elif index[0] in '"\'':
+            steps.append(operator.itemgetter(index[1:-1]))
+        else:
+            steps.append(operator.itemgetter(int(index)))
+        position = match.end()
+
+    if position != len(path) or not steps:
+        raise ValueError("Invalid RNA path: {}".format(path))
+
+    if '[' not in path:
+        return operator.attrgetter(path)
+
+    def get(data):
+        for step in steps:
+            data = step(data)
+        return data
+
+    return get
+
+
+def compile_condition(path, values):
+    """Kompiluje warunek elementów *When* i *Merge*.
+
+    :rtype: callable
+    """
+    getter = compile_path(path)
+    values = tuple(values)
+    return lambda data: getter(data) in values
+
+
+def compile_spec(spec):
+    """Kompiluje element tabeli do funkcji przyjmującej obiekt sceny.
+
+    :param spec: element tabeli
+    :raises: TypeError: nieznany rodzaj elementu
+    :rtype: callable
+    """
+    if isinstance(spec, str):
+        return compile_path(spec)
+
+    if isinstance(spec, AsList):
+        getter = compile_path(spec.path)
+        return lambda data: list(getter(data))
+
+    if isinstance(spec, When):
+        condition = compile_condition(spec.path, spec.values)
+        then = compile_spec(spec.spec)
+        if spec.otherwise is OMIT:
+            otherwise = lambda data: OMIT
+        elif isinstance(spec.otherwise, (str, dict, When, AsList)) or callable(spec.otherwise):
+            otherwise = compile_spec(spec.otherwise)
+        else:
+            value = spec.otherwise
+            otherwise = lambda data: value
+        return lambda data: then(data) if condition(data) else otherwise(data)
+
+    if isinstance(spec, dict):
+        return compile_dict(spec)
+
+    if callable(spec):
+        return spec
+
+    raise TypeError("Unsupported table entry: {!r}".format(spec))
+
+
+def compile_dict(spec):
+    """Kompiluje słownik tabeli. Pola są odczytywane w kolejności podanej w tabeli.
+
+    :rtype: callable
+    """
+    fields = []
+    for key, value in spec.items():
+        if isinstance(key, Merge):
+            fields.append((None, compile_condition(key.path, key.values), compile_spec(value)))
+        else:
+            fields.append((key, None, compile_spec(value)))
+    fields = tuple(fields)
+
+    def extract(data):
+        result = {}
+        for key, condition, getter in fields:
+            if key is None:
+                if condition(data):
+                    result.update(getter(data))
+                continue
+            value = getter(data)
+            if value is not OMIT:
+                result[key] = value
+        return result
+
+    return extract
+
+
+def compile_table(table):
+    """Kompiluje tabelę do funkcji zwracającej słownik z ustawieniami.
+
+    :param table: tabela opisująca strukturę wyniku
+    :type table: dict
+    :return: funkcja przyjmująca obiekt sceny (*bpy.types.Scene*)
+    :rtype: callable
+    """
+    return compile_dict(table)
+
+
+def stereoscopy_setup(scene):
+    """Zwraca tryb stereoskopii (*setup_stereo_mode*) i ustawienia widoków:
+    nazwa widoku -> (czy używany, przyrostek). W trybie *MULTIVIEW* przyrostkiem jest
+    przyrostek kamery, w trybie *STEREO_3D* przyrostek pliku.
+
+    :param scene: scena
+    :type scene: bpy.types.Scene
+    :rtype: dict
+    """
+    render = scene.render
+    setup = {'setup_stereo_mode': render.views_format}
+    multiview = setup['setup_stereo_mode'] == 'MULTIVIEW'
+    for view in render.views:
+        setup[view.name] = (view.use, view.camera_suffix if multiview else view.file_suffix)
+    return setup
+
+
+FILE_FORMAT = 'render.image_settings.file_format'
+
+OUTPUT_TABLE = {
+    'dimensions': {
+        'resolution': {
+            'x': 'render.resolution_x',
+            'y': 'render.resolution_y',
+            'percentage': 'render.resolution_percentage',
+        },
+        'aspect': {
+            'x': 'render.pixel_aspect_x',
+            'y': 'render.pixel_aspect_y',
+        },
+        'border': 'render.use_border',
+        'crop': When('render.use_border', (True,), 'render.use_crop_to_border', otherwise=None),
+        'frame': {
+            'start': 'frame_start',
+            'end': 'frame_end',
+            'step': 'frame_step',
+            'rate': 'render.fps',
+        },
+        'time_remapping': {
+            'old': 'render.frame_map_old',
+            'new': 'render.frame_map_new',
+        },
+    },
+    'output': {
+        'views': {
+            'views_format': When('render.use_multiview', (True,), 'render.image_settings.views_format'),
+        },
+        'path': 'render.filepath',
+        'overwirte': 'render.use_overwrite',
+        'placeholders': 'render.use_placeholder',
+        'file_extensions': 'render.use_file_extension',
+        'cache_result': 'render.use_render_cache',
+        'file_format': FILE_FORMAT,
+        'color': When(FILE_FORMAT, ('PNG', 'TIFF', 'JPEG', 'BMP'), 'render.image_settings.color_mode'),
+        'color_depth': When(FILE_FORMAT, ('PNG', 'TIFF'), 'render.image_settings.color_depth'),
+        'compression': When(FILE_FORMAT, ('PNG', 'TIFF'), 'render.image_settings.compression',
+                            otherwise=When(FILE_FORMAT, ('JPEG',), 'render.image_settings.quality')),
+    },
+    'metadata': {
+        'date': 'render.use_stamp_date',
+        'time': 'render.use_stamp_time',
+        'render_time': 'render.use_stamp_render_time',
+        'frame': 'render.use_stamp_frame',
+        'frame_range': 'render.use_stamp_frame_range',
+        'memory': 'render.use_stamp_memory',
+        'hostname': 'render.use_stamp_hostname',
+        'camera': 'render.use_stamp_camera',
+        'lens': 'render.use_stamp_lens',
+        'scene': 'render.use_stamp_scene',
+        'marker': 'render.use_stamp_marker',
+        'filename': 'render.use_stamp_filename',
+        'strip_name': 'render.use_stamp_sequencer_strip',
+        'use_strip_metadata': 'render.use_stamp_strip_meta',
+        'note_text': When('render.use_stamp_strip_meta', (True,), 'render.stamp_note_text'),
+        'burn_into_image': 'render.use_stamp',
+        Merge('render.use_stamp', (True,)): {
+            'font_size': 'render.stamp_font_size',
+            'draw_labels': 'render.use_stamp_labels',
+            'text_color': AsList('render.stamp_foreground'),
+            'background': AsList('render.stamp_background'),
+        },
+    },
+    'stereoscopy': {
+        'use': 'render.use_multiview',
+        Merge('render.use_multiview', (True,)): stereoscopy_setup,
+    },
+    'postprocessing': {
+        'compositing': 'render.use_compositing',
+        'sequencer': 'render.use_sequencer',
+        'dither': 'render.dither_intensity',
+    },
+    'renderer': 'render.engine',
+}
+
+CYCLES_TABLE = {
+    'color_management': {
+        'display_device': 'display_settings.display_device',
+        'view_transform': 'view_settings.view_transform',
+        'look': 'view_settings.look',
+        'exposure': 'view_settings.exposure',
+        'gamma': 'view_settings.gamma',
+        'sequencer': 'sequencer_colorspace_settings.name',
+    },
+    'sampling': {
+        'integrator': 'cycles.progressive',
+        'render': 'cycles.samples',
+        'viewport': 'cycles.preview_samples',
+        'sub_samples': When('cycles.progressive', ('BRANCHED_PATH',), {
+            'diffuse': 'cycles.diffuse_samples',
+            'glossy': 'cycles.glossy_samples',
+            'transmission': 'cycles.transmission_samples',
+            'ao': 'cycles.ao_samples',
+            'mesh_light': 'cycles.mesh_light_samples',
+            'subsurface': 'cycles.subsurface_samples',
+            'volume': 'cycles.volume_samples',
+        }),
+    },
+    'light_paths': {
+        'max_bounces': {
+            'total': 'cycles.max_bounces',
+            'diffuse': 'cycles.diffuse_bounces',
+            'glossy': 'cycles.glossy_bounces',
+            'transparency': 'cycles.transparent_max_bounces',
+            'transmission': 'cycles.transmission_bounces',
+            'volume': 'cycles.volume_bounces',
+        },
+        'clampling': {
+            'direct_light': 'cycles.sample_clamp_direct',
+            'indirect_light': 'cycles.sample_clamp_indirect',
+        },
+        'caustics': {
+            'filter_glossy': 'cycles.blur_glossy',
+            'reflective_caustics': 'cycles.caustics_reflective',
+            'refractive_caustics': 'cycles.caustics_refractive',
+        },
+    },
+}
+
+EEVEE_TABLE = {
+    'sampling': {
+        'render': 'eevee.taa_render_samples',
+        'viewport': 'eevee.taa_samples',
+    },
+}
+
+WORKBENCH_TABLE = {
+    'lightning': {
+        'light': 'display.shading.light',
+        'studio_light': When('display.shading.light', ('STUDIO', 'MATCAP'), 'display.shading.studio_light'),
+    },
+    'color': {
+        'type': 'display.shading.color_type',
+        Merge('display.shading.color_type', ('SINGLE',)): {
+            'red': 'display.shading.single_color[0]',
+            'green': 'display.shading.single_color[1]',
+            'blue': 'display.shading.single_color[2]',
+        },
+    },
+}
+
+read_output = compile_table(OUTPUT_TABLE)
+read_cycles = compile_table(CYCLES_TABLE)
+read_eevee = compile_table(EEVEE_TABLE)
+read_workbench = compile_table(WORKBENCH_TABLE)
@@ -0,0 +1,94 @@
+"""
+Moduł odpowiedzialny za podział zakresu klatek zadania na części (*frame chunks*) renderowane
+przez węzły farmy jako osobne jednostki pracy.
+
+Klatki jednej części są kolejnymi klatkami animacji, więc węzeł renderujący ją może zachować
+między klatkami dane sceny (BVH, wczytane tekstury, opcja *Persistent Data* silnika Cycles).
+Każda część ma też wskazówkę przydziału (*affinity*): kolejne części z tą samą wskazówką
+powinny trafić na ten sam węzeł, który kontynuuje wtedy renderowanie od miejsca, w którym skończył.
+
+Strategie podziału:
+    *   *AUTO* -- rozmiar części dobierany do długości zakresu (patrz *auto_chunk_size()*),
+    *   *FIXED* -- rozmiar części podany przez użytkownika,
+    *   *NONE* -- cały zakres jako jedna część.
+"""
+from . import config
+
+
+STRATEGIES = ('AUTO', 'FIXED', 'NONE')
+
+
+def auto_chunk_size(frame_count, target_chunks=None, minimum=None):
+    """Dobiera rozmiar części tak, żeby zakres został podzielony na około *target_chunks* części,
+    ale nie mniejszych niż *minimum* klatek -- przy krótszych częściach węzeł częściej
+    odbudowuje dane sceny.
+
+    :param frame_count: liczba klatek w zakresie
+    :type frame_count: int
+    :param target_chunks: docelowa liczba części, domyślnie *config.frame_chunk_target*
+    :type target_chunks: int
+    :param minimum: minimalny rozmiar części, domyślnie *config.frame_chunk_min*
+    :type minimum: int
+    :rtype: int
+    """
+    target_chunks = target_chunks or config.frame_chunk_target
+    minimum = minimum or config.frame_chunk_min
+    return max(minimum, -(-frame_count // target_chunks))
+
+
+def split_frames(start, end, chunk_size, affinity_span=None):
+    """Dzieli zakres klatek na części o rozmiarze *chunk_size* (ostatnia może być krótsza).
+
+    :param start: numer pierwszej klatki
+    :type start: int
+    :param end: numer ostatniej klatki
+    :type end: int
+    :param chunk_size: liczba klatek w części
+    :type chunk_size: int
+    :param affinity_span: liczba kolejnych części z tą samą wskazówką przydziału,
+        domyślnie *config.frame_chunk_affinity_span*
+    :type affinity_span: int
+    :raises: ValueError: pusty zakres klatek albo niedodatni rozmiar części
+    :return: lista słowników z numerem części (*index*), pierwszą (*start*) i ostatnią (*end*)
+        klatką części oraz wskazówką przydziału (*affinity*)
+    :rtype: list
+    """
+    if end < start:
+        raise ValueError("Frame end {} is before frame start {}".format(end, start))
+    if chunk_size < 1:
+        raise ValueError("Frame chunk size must be positive, got {}".format(chunk_size))
+
+    affinity_span = affinity_span or config.frame_chunk_affinity_span
+
+    return [
+        dict(index=index,
+             start=chunk_start,
+             end=min(end, chunk_start + chunk_size - 1),
+             affinity="frames-{}".format(index // affinity_span))
+        for index, chunk_start in enumerate(range(start, end + 1, chunk_size))
+    ]
+
+
+def plan_chunks(frames, strategy='AUTO', chunk_size=None):
+    """Dzieli zakres klatek zadania na części zgodnie z wybraną strategią.
+
+    :param frames: słownik z numerami pierwszej (*start*) i ostatniej (*end*) klatki
+    :type frames: dict
+    :param strategy: strategia podziału, jedna z *STRATEGIES*
+    :type strategy: str
+    :param chunk_size: rozmiar części dla strategii *FIXED*
+    :type chunk_size: int
+    :raises: ValueError: nieznana strategia albo niepoprawny zakres
+    :return: lista części, patrz *split_frames()*
+    :rtype: list
+    """
+    frame_count = frames['end'] - frames['start'] + 1
+
+    if strategy == 'AUTO':
+        chunk_size = auto_chunk_size(frame_count)
+    elif strategy == 'NONE':
+        chunk_size = max(frame_count, 1)
+    elif strategy != 'FIXED':
+        raise ValueError("Unknown frame chunk strategy: {}".format(strategy))
+
+    return split_frames(frames['start'], frames['end'], chunk_size)
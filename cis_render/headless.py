@@ -0,0 +1,186 @@
+"""
+Moduł odpowiedzialny za zgłaszanie zadań bez interfejsu użytkownika, w trybie wsadowym
+programu *Blender* (``blender -b``).
+
+Dane zadań są odczytywane tymi samymi metodami co w operatorach wtyczki (klasa *SceneReader*),
+a wszystkie zadania pliku są wysyłane jednym zbiorczym zgłoszeniem (patrz moduł *batch*).
+Wynik -- stan zgłoszenia każdego zadania albo błąd -- jest zapisywany w pliku JSON.
+
+Uruchomienie dla jednego pliku::
+
+    blender -b shot.blend --python-exit-code 1 \\
+        --python-expr "import cis_render.headless; cis_render.headless.main()" \\
+        -- --mode SCENES --result shot.json
+
+Wiele plików równolegle, z raportem zbiorczym, zgłasza skrypt *submit_blends.py*.
+"""
+import argparse
+import json
+import sys
+import time
+
+import bpy
+
+from . import batch
+from . import config
+from . import read_scene_settings
+
+
+class HeadlessReader(read_scene_settings.SceneReader):
+    """Odczytuje dane zadań bez operatora. Komunikaty, które operator wyświetla użytkownikowi,
+    są zapisywane w dzienniku i na liście *messages*.
+
+    :param messages: lista par (rodzaj komunikatu, treść)
+    :type messages: list
+    """
+
+    def __init__(self, scene=None):
+        super().__init__(scene)
+        self.messages = []
+
+    def report(self, type, message):
+        """Zapisuje komunikat, tak jak *bpy.types.Operator.report()* wyświetla go użytkownikowi.
+
+        :param type: rodzaj komunikatu, np. {'ERROR'}
+        :type type: set
+        :param message: treść komunikatu
+        :type message: str
+        """
+        self.messages.append((sorted(type)[0], message))
+        config.logger.warning(message)
+
+
+def build_payload(scene, mode='SCENES'):
+    """Odczytuje dane wszystkich zadań pliku i zwraca je jako zbiorcze zgłoszenie.
+
+    :param scene: bieżąca scena pliku
+    :type scene: bpy.types.Scene
+    :param mode: tryb zgłoszenia, patrz *SceneReader.get_batch_targets()*
+    :type mode: str
+    :raises: MissingFilesError: nie znaleziono plików tekstur
+    :raises: ValueError: niepoprawne dane zadania albo brak zadań do zgłoszenia
+    :return: dane zbiorczego zgłoszenia
+    :rtype: dict
+    """
+    reader = HeadlessReader(scene)
+    reader.read_materials()
+    reader.read_add_ons()
+
+    jobs = [reader.prepare_batch_job(target, key, overrides)
+            for target, key, overrides in reader.get_batch_targets(scene, mode)]
+    if not jobs:
+        raise ValueError("Nothing to render in {} mode".format(mode.lower()))
+
+    return batch.dedupe(jobs, dict(textures=reader.images, add_ons=reader.add_ons))
+
+
+def submit(payload, dry_run=False):
+    """Wysyła zbiorcze zgłoszenie RenderDockowi i czeka na wynik.
+
+    :param payload: dane zbiorczego zgłoszenia zwrócone przez *build_payload()*
+    :type payload: dict
+    :param dry_run: czy tylko przygotować dane, bez wysyłania
+    :type dry_run: boolean
+    :raises: RequestException: serwer odrzucił zgłoszenie
+    :return: wyniki zgłoszenia poszczególnych zadań; zadania dodane do kolejki ponownych prób
+        mają stan *queued*, a niewysłane (*dry_run*) -- *dry-run*
+    :rtype: list
+    """
+    if dry_run:
+        return [dict(key=job['key'], status='dry-run') for job in payload['jobs']]
+
+    results = read_scene_settings.complete_and_submit_batch(read_scene_settings.RequestManager.shared(), payload)
+    if results is None:
+        return [dict(key=job['key'], status='queued') for job in payload['jobs']]
+    return results
+
+
+def run(filename, scene, mode='SCENES', dry_run=False, payload_file=None):
+    """Zgłasza zadania pliku i zwraca wynik. Błędy nie są zgłaszane jako wyjątki, tylko zapisywane w wyniku.
+
+    :param filename: ścieżka do pliku *.blend*
+    :type filename: str
+    :param scene: bieżąca scena pliku
+    :type scene: bpy.types.Scene
+    :param mode: tryb zgłoszenia, patrz *SceneReader.get_batch_targets()*
+    :type mode: str
+    :param dry_run: czy tylko przygotować dane, bez wysyłania
+    :type dry_run: boolean
+    :param payload_file: ścieżka do pliku, w którym zapisywane są dane zgłoszenia, domyślnie None
+    :type payload_file: str
+    :return: słownik ze ścieżką pliku (*file*), wynikami zadań (*jobs*), opisem błędu (*error*)
+        i czasem trwania w sekundach (*duration*)
+    :rtype: dict
+    """
+    start = time.monotonic()
+    result = dict(file=filename, jobs=[], error=None)
+
+    try:
+        payload = build_payload(scene, mode)
+        if payload_file:
+            with open(payload_file, 'w', encoding='utf-8') as outfile:
+                json.dump(payload, outfile)
+        result['jobs'] = submit(payload, dry_run)
+    except Exception as error:
+        config.logger.error("Could not register jobs from {}".format(filename), exc_info=True)
+        result['error'] = "{}: {}".format(type(error).__name__, error)
+
+    result['duration'] = time.monotonic() - start
+    return result
+
+
+def parse_args(argv):
+    """Odczytuje argumenty podane po ``--`` w wierszu poleceń programu *Blender*.
+
+    :param argv: argumenty
+    :type argv: list
+    :rtype: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(prog='cis_render.headless',
+                                     description="Register render jobs of the open .blend file")
+    parser.add_argument('--mode', choices=('SCENES', 'VIEW_LAYERS', 'CAMERAS'), default='SCENES',
+                        help="one job per scene, per view layer or per camera of the current scene")
+    parser.add_argument('--result', help="JSON file the result is written to")
+    parser.add_argument('--payload', help="JSON file the batch payload is written to")
+    parser.add_argument('--server', help="RenderDock job URL, defaults to config.server")
+    parser.add_argument('--dry-run', action='store_true', help="prepare the payload without sending it")
+    return parser.parse_args(argv)
+
+
+def ensure_registered():
+    """Rejestruje wtyczkę, jeżeli nie jest włączona w ustawieniach programu *Blender* --
+    bez tego ustawienia zadania zapisane w scenach (*my_tool*) nie są dostępne.
+    """
+    if not hasattr(bpy.types.Scene, 'my_tool'):
+        import cis_render
+        cis_render.register()
+
+
+def main(argv=None):
+    """Punkt wejścia trybu wsadowego. Zgłasza zadania otwartego pliku i kończy program *Blender*
+    z kodem 0, jeżeli wszystkie zadania zostały zgłoszone, albo 1 w przeciwnym razie.
+
+    :param argv: argumenty, domyślnie argumenty podane po ``--`` w wierszu poleceń
+    :type argv: list
+    """
+    if argv is None:
+        argv = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    args = parse_args(argv)
+
+    if args.server:
+        config.server = args.server
+        config.batch_server = args.server + '/batch'
+
+    ensure_registered()
+    result = run(bpy.data.filepath, bpy.context.scene, args.mode, args.dry_run, args.payload)
+
+    if args.result:
+        with open(args.result, 'w', encoding='utf-8') as outfile:
+            json.dump(result, outfile)
+    else:
+        print(json.dumps(result))
+
+    read_scene_settings.RequestManager.close_shared()
+    failed = result['error'] or any(job.get('status') not in ('created', 'queued', 'dry-run')
+                                    for job in result['jobs'])
+    sys.exit(1 if failed else 0)
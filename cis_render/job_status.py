@@ -0,0 +1,383 @@
+"""
+Moduł odpowiedzialny za śledzenie stanu zadań zgłoszonych w bieżącej sesji programu *Blender*.
+
+Wątek w tle utrzymuje jedno stałe połączenie z RenderDockiem, przez które serwer przesyła
+zmiany stanu zadań (*Server-Sent Events*, ``GET /job/events``). Jeżeli serwer nie obsługuje
+strumienia zdarzeń, wątek odpytuje go co *config.status_poll_interval* sekund o stan wszystkich
+śledzonych zadań naraz (``GET /job/status?ids=...``), z nagłówkiem *If-None-Match* -- niezmieniony
+stan (odpowiedź 304) nie jest przesyłany ponownie.
+
+Zmiany trafiają do niewielkiej tabeli stanów w pamięci. Panel wtyczki jest odświeżany na podstawie
+tej tabeli przez zegar programu *Blender*, nie częściej niż co *config.status_redraw_interval*
+sekund, więc duża liczba zdarzeń nie spowalnia interfejsu.
+"""
+import json
+import threading
+import time
+
+import bpy
+
+from . import config
+from . import lazy
+from . import spool
+
+requests = lazy.LazyModule('requests')
+cost_model = lazy.LazyModule('.cost_model', __package__)
+
+
+class StatusTable():
+    """Tabela stanów śledzonych zadań. Każda zmiana zwiększa numer wersji (*version*),
+    dzięki czemu panel jest odświeżany tylko po zmianie.
+
+    :param jobs: słownik identyfikator zadania -> stan zadania (*id*, *name*, *state*, *progress*,
+        *message*, *updated*), w kolejności zgłoszenia
+    :type jobs: dict
+    :param limit: maksymalna liczba zadań w tabeli; po jej przekroczeniu usuwane są najstarsze
+    :type limit: int
+    """
+
+    def __init__(self, limit=None):
+        self.jobs = {}
+        self.limit = limit or config.status_table_size
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def track(self, job_id, name):
+        """Dodaje zadanie do tabeli.
+
+        :param job_id: identyfikator zadania nadany przez RenderDocka
+        :type job_id: str
+        :param name: nazwa zadania
+        :type name: str
+        """
+        with self._lock:
+            self.jobs[job_id] = dict(id=job_id, name=name, state='SUBMITTED', progress=0.0,
+                                     message='', updated=time.time())
+            while len(self.jobs) > self.limit:
+                del self.jobs[next(iter(self.jobs))]
+            self.version += 1
+
+    def update(self, job_id, **fields):
+        """Zmienia stan zadania. Zmiany zadań, które nie są śledzone, są pomijane.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :return: czy tabela się zmieniła
+        :rtype: boolean
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            fields = {name: value for name, value in fields.items() if name in job and name != 'id'}
+            if all(job[name] == value for name, value in fields.items()):
+                return False
+            job.update(fields, updated=time.time())
+            self.version += 1
+            return True
+
+    def ids(self):
+        """Zwraca identyfikatory śledzonych zadań.
+
+        :rtype: list
+        """
+        with self._lock:
+            return list(self.jobs)
+
+    def snapshot(self):
+        """Zwraca kopię stanów zadań, od najnowszego.
+
+        :rtype: list
+        """
+        with self._lock:
+            return [dict(job) for job in reversed(list(self.jobs.values()))]
+
+    def clear(self):
+        """Usuwa wszystkie zadania z tabeli.
+        """
+        with self._lock:
+            self.jobs.clear()
+            self.version += 1
+
+
+def parse_events(lines):
+    """Odczytuje zdarzenia ze strumienia *Server-Sent Events*.
+
+    :param lines: kolejne wiersze strumienia (bez znaków końca wiersza)
+    :type lines: iterable
+    :return: kolejne zdarzenia jako słowniki z kluczami *event*, *data* i *id*
+    :rtype: iterator
+    """
+    event = dict(event='message', data=[], id=None)
+    for line in lines:
+        if not line:
+            if event['data']:
+                yield dict(event, data="\n".join(event['data']))
+            event = dict(event='message', data=[], id=None)
+            continue
+        if line.startswith(':'):
+            continue
+
+        name, _, value = line.partition(':')
+        value = value[1:] if value.startswith(' ') else value
+        if name == 'data':
+            event['data'].append(value)
+        elif name in ('event', 'id'):
+            event[name] = value
+
+
+class StatusClient(threading.Thread):
+    """Wątek w tle odbierający zmiany stanu zadań i zapisujący je w tabeli stanów.
+
+    :param table: tabela stanów śledzonych zadań
+    :type table: StatusTable
+    :param events_url: adres strumienia zdarzeń
+    :type events_url: str
+    :param status_url: adres stanu zadań, odpytywany, gdy serwer nie obsługuje strumienia zdarzeń
+    :type status_url: str
+    :param use_events: czy używać strumienia zdarzeń; po odrzuceniu strumienia przez serwer False
+    :type use_events: boolean
+    """
+
+    def __init__(self, table, events_url=None, status_url=None):
+        super().__init__(name='cis_render_status', daemon=True)
+        self.table = table
+        self.events_url = events_url or config.status_events_url
+        self.status_url = status_url or config.status_url
+        self.use_events = config.status_use_events
+        self.last_event_id = None
+        self.etag = None
+        self.session = requests.Session()
+        self.response = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def wake(self):
+        """Budzi wątek, np. po zgłoszeniu nowego zadania.
+        """
+        self._wakeup.set()
+
+    def stop(self):
+        """Zatrzymuje wątek i zamyka połączenie.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        response = self.response
+        if response is not None:
+            response.close()
+
+    def run(self):
+        attempt = 0
+        try:
+            while not self._stopped.is_set():
+                if not self.table.ids():
+                    self._wakeup.wait()
+                    self._wakeup.clear()
+                    continue
+
+                try:
+                    if self.use_events:
+                        # Strumień zamknięty bez żadnego zdarzenia (np. przez pośrednika zaraz po nagłówkach)
+                        # jest otwierany ponownie dopiero po czasie oczekiwania, jak po błędzie
+                        if self.listen() == 0 and self.use_events:
+                            self._wakeup.wait(spool.backoff_delay(attempt, config.status_poll_interval))
+                            self._wakeup.clear()
+                            attempt += 1
+                            continue
+                    else:
+                        self.poll()
+                        self._wakeup.wait(config.status_poll_interval)
+                        self._wakeup.clear()
+                    attempt = 0
+                except (requests.exceptions.RequestException, ValueError) as error:
+                    if self._stopped.is_set():
+                        break
+                    config.logger.warning("Job status connection failed: {}".format(error))
+                    self._wakeup.wait(spool.backoff_delay(attempt, config.status_poll_interval))
+                    self._wakeup.clear()
+                    attempt += 1
+        finally:
+            self.session.close()
+
+    def listen(self):
+        """Odbiera zdarzenia ze strumienia, dopóki serwer nie zamknie połączenia.
+        Jeżeli serwer nie obsługuje strumienia zdarzeń (odpowiedź 404, 405 albo 406 lub odpowiedź 200
+        innego typu niż *text/event-stream*), przełącza klienta na odpytywanie. Pozostałe błędy
+        (np. przejściowe 502 albo 503) są zgłaszane, więc *run()* ponawia połączenie po czasie oczekiwania.
+
+        :raises: RequestException: błąd połączenia albo odpowiedź z błędem
+        :raises: ValueError: zdarzenie z niepoprawnymi danymi
+        :return: liczba odebranych zdarzeń
+        :rtype: int
+        """
+        headers = {'Accept': 'text/event-stream'}
+        if self.last_event_id is not None:
+            headers['Last-Event-ID'] = self.last_event_id
+
+        response = self.session.get(self.events_url, headers=headers, stream=True,
+                                    timeout=(config.status_connect_timeout, config.status_read_timeout))
+        self.response = response
+        received = 0
+        try:
+            content_type = response.headers.get('content-type', '')
+            if response.status_code in (404, 405, 406) or (
+                    response.status_code == 200 and not content_type.startswith('text/event-stream')):
+                config.logger.info("Job status stream unavailable ({}), polling instead".format(
+                    response.status_code))
+                self.use_events = False
+                return received
+            response.raise_for_status()
+
+            # Fragmenty strumienia są przetwarzane, gdy tylko nadejdą, bez czekania na zapełnienie bufora
+            for event in parse_events(response.iter_lines(chunk_size=None, decode_unicode=True)):
+                received += 1
+                if event['id'] is not None:
+                    self.last_event_id = event['id']
+                if event['event'] == 'status':
+                    self.apply(json.loads(event['data']))
+        except Exception:
+            # Połączenie zamknięte z innego wątku przez stop() przerywa odczyt dowolnym błędem
+            if not self._stopped.is_set():
+                raise
+        finally:
+            self.response = None
+            response.close()
+        return received
+
+    def poll(self):
+        """Pobiera stan wszystkich śledzonych zadań jednym żądaniem.
+
+        :raises: RequestException: błąd połączenia albo odpowiedź z błędem
+        """
+        headers = {}
+        if self.etag is not None:
+            headers['If-None-Match'] = self.etag
+
+        response = self.session.get(self.status_url, params={'ids': ",".join(self.table.ids())},
+                                    headers=headers, timeout=config.status_connect_timeout)
+        if response.status_code == 304:
+            return
+        response.raise_for_status()
+
+        self.etag = response.headers.get('etag')
+        for update in response.json().get('jobs', []):
+            self.apply(update)
+
+    def apply(self, update):
+        """Zapisuje zmianę stanu zadania w tabeli. Zakończone zadanie z czasami renderowania
+        klatek (*frame_times*) trafia do historii zadań (patrz moduł *cost_model*).
+
+        :param update: słownik z identyfikatorem zadania (*id*) i zmienionymi polami
+        :type update: dict
+        """
+        update = dict(update)
+        job_id = update.pop('id', None)
+        frame_times = update.pop('frame_times', None)
+        if update.get('state') == 'DONE' and frame_times and config.cost_model_enabled:
+            cost_model.record_completion(job_id, frame_times)
+        self.table.update(job_id, **update)
+
+
+_table = StatusTable()
+_client = None
+_client_lock = threading.Lock()
+_drawn_version = None
+
+
+def get_table():
+    """Zwraca tabelę stanów zadań bieżącej sesji.
+
+    :rtype: StatusTable
+    """
+    return _table
+
+
+def job_id_from_response(response):
+    """Odczytuje identyfikator zadania z odpowiedzi na zgłoszenie: z nagłówka *Location*
+    (``/job/<id>``) albo z pola *id* odpowiedzi w formacie JSON.
+
+    :param response: odpowiedź serwera
+    :type response: requests.Response
+    :return: identyfikator zadania albo None, jeżeli serwer go nie podał
+    :rtype: str
+    """
+    location = getattr(response, 'headers', {}).get('location')
+    if isinstance(location, str) and location:
+        return location.rstrip('/').rpartition('/')[2]
+    try:
+        job_id = response.json()['id']
+    except (AttributeError, ValueError, KeyError, TypeError):
+        return None
+    return str(job_id) if isinstance(job_id, (str, int)) else None
+
+
+def track(job_id, name):
+    """Dodaje zadanie do tabeli stanów i uruchamia wątek odbierający zmiany stanu.
+
+    :param job_id: identyfikator zadania albo None, jeżeli serwer go nie podał
+    :type job_id: str
+    :param name: nazwa zadania
+    :type name: str
+    """
+    if job_id is None or not config.status_enabled:
+        return
+
+    global _client
+
+    _table.track(job_id, name)
+    with _client_lock:
+        if _client is None or not _client.is_alive():
+            _client = StatusClient(_table)
+            _client.start()
+        _client.wake()
+
+
+def stop_client():
+    """Zatrzymuje wątek odbierający zmiany stanu. Wywoływana przy wyrejestrowaniu wtyczki.
+    """
+    global _client
+
+    with _client_lock:
+        client, _client = _client, None
+
+    if client is not None:
+        client.stop()
+
+
+def redraw_panels():
+    """Odświeża panele wtyczki, jeżeli tabela stanów zmieniła się od poprzedniego odświeżenia.
+    Wywoływana przez zegar programu *Blender* (*bpy.app.timers*).
+
+    :return: czas do następnego wywołania w sekundach
+    :rtype: float
+    """
+    global _drawn_version
+
+    if _table.version != _drawn_version:
+        _drawn_version = _table.version
+        tag_redraw()
+
+    return config.status_redraw_interval
+
+
+def tag_redraw():
+    """Oznacza do odświeżenia obszary widoku 3D, w których są panele wtyczki.
+    """
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+def register_timer():
+    """Uruchamia zegar odświeżający panele. Wywoływana przy rejestracji wtyczki.
+    """
+    if not bpy.app.timers.is_registered(redraw_panels):
+        bpy.app.timers.register(redraw_panels, first_interval=config.status_redraw_interval, persistent=True)
+
+
+def unregister_timer():
+    """Zatrzymuje zegar odświeżający panele.
+    """
+    if bpy.app.timers.is_registered(redraw_panels):
+        bpy.app.timers.unregister(redraw_panels)
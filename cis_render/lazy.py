@@ -0,0 +1,56 @@
+"""
+Moduł odpowiedzialny za leniwe importowanie modułów, których import jest kosztowny
+(klient HTTP, kompresja, skróty), a które są potrzebne dopiero przy wysyłaniu zadania.
+Dzięki temu włączenie wtyczki przy starcie programu *Blender* ich nie wczytuje.
+
+Przykład::
+
+    requests = lazy.LazyModule('requests')
+    ...
+    requests.Session()  # pakiet jest importowany przy pierwszym odwołaniu do atrybutu
+"""
+import importlib
+import importlib.util
+import sys
+
+
+class LazyModule():
+    """Zastępuje moduł, importując go przy pierwszym odwołaniu do któregokolwiek z jego atrybutów.
+
+    :param name: nazwa modułu, np. ``requests`` albo ``.uploader`` (razem z *package*)
+    :type name: str
+    :param package: pakiet, względem którego importowana jest nazwa względna
+    :type package: str
+    """
+
+    def __init__(self, name, package=None):
+        self._name = name
+        self._package = package
+        self._module = None
+
+    def load(self):
+        """Importuje moduł, jeżeli nie został jeszcze zaimportowany.
+
+        :return: zaimportowany moduł
+        :rtype: module
+        """
+        module = self._module
+        if module is None:
+            module = self._module = importlib.import_module(self._name, self._package)
+        return module
+
+    @property
+    def loaded(self):
+        """Czy moduł został już zaimportowany (także w inny sposób niż przez ten obiekt).
+
+        :rtype: boolean
+        """
+        return self._module is not None or importlib.util.resolve_name(self._name, self._package) in sys.modules
+
+    def __getattr__(self, name):
+        return getattr(self.load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return '<lazy module {!r} ({})>'.format(self._name, state)
+
@@ -0,0 +1,108 @@
+"""
+Moduł odpowiedzialny za zapisywanie dziennika wtyczki w osobnym wątku.
+
+Wpisy dziennika *config.logger* trafiają do kolejki (*QueueHandler*), z której odbiera je wątek
+*QueueListener* -- dopiero on formatuje komunikaty i zapisuje je do pliku *config.log_file*
+(z rotacją co 50 MB). Wątek wywołujący, najczęściej wątek interfejsu programu *Blender*, tylko
+wstawia wpis do kolejki. Argumenty komunikatu nie są formatowane przed wstawieniem do kolejki,
+więc obiekty przekazywane jako argumenty nie mogą być później zmieniane.
+
+Poziom dziennika i zapisywanie pełnych danych zadań (*config.payload_logger*) ustawia się
+w preferencjach wtyczki (patrz *properties.CISRenderPreferences*). Dane zadań są zapisywane
+tylko na poziomie DEBUG i tylko po włączeniu *log_payloads* -- w przeciwnym razie wpis jest
+odrzucany, zanim dane zostaną zamienione na tekst.
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import threading
+
+from . import config
+
+
+LEVELS = ('DEBUG', 'INFO', 'WARNING', 'ERROR')
+
+_listener = None
+_handler = None
+_lock = threading.Lock()
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Wstawia wpisy do kolejki bez formatowania ich w wątku wywołującym
+    (w przeciwieństwie do *QueueHandler*, który formatuje komunikat przed wstawieniem).
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def set_level(level, log_payloads=None):
+    """Ustawia poziom dziennika i zapisywanie pełnych danych zadań.
+
+    :param level: poziom dziennika, np. ``'INFO'`` albo *logging.INFO*
+    :type level: str
+    :param log_payloads: czy zapisywać pełne dane zadań i odpowiedzi serwera (na poziomie DEBUG),
+        domyślnie bez zmian
+    :type log_payloads: boolean
+    """
+    if isinstance(level, str):
+        level = logging.getLevelName(level)
+    config.log_level = level
+    config.logger.setLevel(level)
+
+    if log_payloads is not None:
+        config.log_payloads = log_payloads
+    # Wyłączony logger odrzuca wpis w isEnabledFor(), zanim argumenty zostaną zamienione na tekst
+    config.payload_logger.disabled = not config.log_payloads
+
+
+def start():
+    """Podłącza do *config.logger* kolejkę wpisów i uruchamia wątek zapisujący je do pliku.
+    Kolejne wywołania nic nie robią, dopóki nie zostanie wywołana *stop()*.
+    """
+    global _listener, _handler
+
+    with _lock:
+        if _listener is not None:
+            return
+
+        file_handler = logging.handlers.RotatingFileHandler(config.log_file, maxBytes=52428800, backupCount=2,
+                                                            delay=True)
+        file_handler.setFormatter(config.formatter)
+        records = queue.Queue()
+        _handler = DeferredQueueHandler(records)
+        _listener = logging.handlers.QueueListener(records, file_handler)
+        _listener.start()
+        config.logger.addHandler(_handler)
+
+    set_level(config.log_level)
+
+
+def stop():
+    """Odłącza kolejkę od *config.logger*, czeka na zapisanie oczekujących wpisów i zamyka plik dziennika.
+    Wywoływana przy wyrejestrowaniu wtyczki i przy zamykaniu programu.
+    """
+    global _listener, _handler
+
+    with _lock:
+        listener, handler = _listener, _handler
+        _listener = _handler = None
+
+    if listener is None:
+        return
+    config.logger.removeHandler(handler)
+    listener.stop()
+    for file_handler in listener.handlers:
+        file_handler.close()
+
+
+def is_running():
+    """Sprawdza, czy wątek zapisujący dziennik działa.
+
+    :rtype: boolean
+    """
+    return _listener is not None
+
+
+atexit.register(stop)
@@ -11,7 +11,9 @@ from bpy.props import (StringProperty,
                        EnumProperty,
                        )
 
-from bpy.types import (PropertyGroup)
+from bpy.types import (PropertyGroup, AddonPreferences)
+
+from . import log_queue
 
 class JobProperties(PropertyGroup):
     """Grupa własności wtyczki. Nazwa i priorytet zadania muszą być wprowadzone w panelu wtyczki..
@@ -35,12 +37,20 @@ class JobProperties(PropertyGroup):
     :type frame_start: bpy.types.IntProperty
     :param frame_end: Numer ostatniej klatki do wyrenderowania
     :type frame_end: bpy.types.IntProperty
+    :param frame_chunk_strategy: Sposób podziału zakresu klatek na części renderowane osobno
+    :type frame_chunk_strategy: bpy.types.EnumProperty
+    :param frame_chunk_size: Liczba klatek w części przy podziale na części stałej wielkości
+    :type frame_chunk_size: bpy.types.IntProperty
     :param file_format: Format plików wyjściowych wybierany z listy
     :type file_format: bpy.types.EnumProperty
     :param tiles_x: Szerokość kafelków w pikselach
     :type tiles_x: bpy.types.IntProperty
     :param tiles_y: Wysokość kafelków w pikselach
     :type tiles_y: bpy.types.IntProperty
+    :param tile_padding: Margines dodawany z każdej strony kafelka w pikselach
+    :type tile_padding: bpy.types.IntProperty
+    :param upload_assets: Czy wysłać plik sceny i tekstury na farmę zamiast odczytywać je ze wspólnego dysku?
+    :type upload_assets: bpy.types.BoolProperty
     """
     job_name : StringProperty(
         name = "Name",
@@ -69,6 +79,12 @@ class JobProperties(PropertyGroup):
         )
 
 
+    upload_assets : BoolProperty(
+        name="Upload assets",
+        description="Upload the .blend file and textures to the farm instead of reading them from shared storage",
+        default = False
+        )
+
     use_output_frames_setting : BoolProperty(
         name="Use scene's settings",
         description="Use frames range defined in Output panel",
@@ -101,6 +117,23 @@ class JobProperties(PropertyGroup):
         min = 0
         )
 
+    frame_chunk_strategy : EnumProperty(
+        name="Chunks",
+        description="How the frame range is split into work units",
+        items=[ ('AUTO', "Automatic", "Chunk size computed from the length of the frame range"),
+                ('FIXED', "Fixed Size", "Chunks of the given number of frames"),
+                ('NONE', "Single Chunk", "Whole frame range as one work unit")
+        ],
+        default='AUTO'
+        )
+
+    frame_chunk_size : IntProperty(
+        name = "Chunk Size",
+        description="Number of consecutive frames rendered on one node",
+        default = 10,
+        min = 1
+        )
+
     file_format: EnumProperty(
         name="File Format",
         description="File format of rendered images",
@@ -129,3 +162,52 @@ class JobProperties(PropertyGroup):
         default = 64,
         min = 0
         )
+
+    tile_padding : IntProperty(
+        name = "Padding",
+        description="Overlap added on each side of a tile, in pixels, to hide seams between tiles rendered on different nodes",
+        default = 10,
+        min = 0
+        )
+
+
+def on_log_settings_update(self, context):
+    """Stosuje zmienione w preferencjach ustawienia dziennika (patrz moduł *log_queue*).
+    """
+    log_queue.set_level(self.log_level, self.log_payloads)
+
+
+class CISRenderPreferences(AddonPreferences):
+    """Preferencje wtyczki, zapisywane w ustawieniach programu *Blender*.
+
+    :param log_level: Poziom dziennika wtyczki
+    :type log_level: bpy.types.EnumProperty
+    :param log_payloads: Czy zapisywać w dzienniku pełne dane zadań (na poziomie DEBUG)?
+    :type log_payloads: bpy.types.BoolProperty
+    """
+    bl_idname = __package__
+
+    log_level : EnumProperty(
+        name="Log Level",
+        description="Minimum level of messages written to the add-on log file",
+        update=on_log_settings_update,
+        items=[ ('DEBUG', "Debug", "All messages, including diagnostics"),
+                ('INFO', "Info", "Informational messages, warnings and errors"),
+                ('WARNING', "Warning", "Warnings and errors"),
+                ('ERROR', "Error", "Errors only")
+        ],
+        default='INFO'
+        )
+
+    log_payloads : BoolProperty(
+        name="Log job data",
+        description="Write complete job data and server responses to the log file at the Debug level",
+        update=on_log_settings_update,
+        default = False
+        )
+
+    def draw(self, context):
+        layout = self.layout
+        row = layout.row()
+        row.prop(self, "log_level")
+        row.prop(self, "log_payloads")
@@ -2,21 +2,51 @@
 Moduł odpowiedzialny za implementacje analizy sceny programu *Blender*.
 """
 import bpy
-import addon_utils
-import json
+from bpy.props import EnumProperty, StringProperty
 from . import config
-import requests
+from . import lazy
+from . import submission
+from . import spool
+from . import scene_cache
+from . import extractor
+from . import addon_inventory
+from . import serialization
+from . import frame_chunks
+from . import tile_planner
+from . import job_status
+from . import timing as timings
+import threading
+import logging
+import uuid
 import os
 import os.path
 from os import path
 
-
-class OBJECT_OT_read_scene_settings(bpy.types.Operator):
-    """Klasa operatora rejestrowanego przez wtyczkę. Odpowiada za odczytanie danych o scenie i
-    zapisanie ich w pliku w formacie JSON oraz rozpoczęcie procesu rejestracji zadania:
-    odczytanie danych zadania i wysłanie ich RenderDockowi.
-
-    :param scene: Scena, w której kontekście został wywołany operator
+# Moduły potrzebne dopiero przy wysyłaniu zadania, importowane przy pierwszym użyciu (patrz moduł lazy)
+requests = lazy.LazyModule('requests')
+errors = lazy.LazyModule('.errors', __package__)
+compression = lazy.LazyModule('.compression', __package__)
+texture_manifest = lazy.LazyModule('.texture_manifest', __package__)
+asset_check = lazy.LazyModule('.asset_check', __package__)
+asset_index = lazy.LazyModule('.asset_index', __package__)
+batch = lazy.LazyModule('.batch', __package__)
+downloader = lazy.LazyModule('.downloader', __package__)
+uploader = lazy.LazyModule('.uploader', __package__)
+cost_model = lazy.LazyModule('.cost_model', __package__)
+
+
+def __getattr__(name):
+    # RetryableRequestError dziedziczy po wyjątku pakietu requests, więc jest zdefiniowana w module errors
+    if name == 'RetryableRequestError':
+        return errors.RetryableRequestError
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+class SceneReader():
+    """Odczytuje dane o scenie i przygotowuje dane zadania. Klasa nie zależy od interfejsu użytkownika:
+    jest klasą bazową operatorów wtyczki i jest używana bez nich w trybie wsadowym
+    programu *Blender* (patrz moduł *headless*).
+
+    :param scene: Scena, której dotyczy zadanie
     :type scene: bpy.types.Scene
     :param cycles_settings: Słownik z ustawieniami silnika Cycles, wprowadzanymi w zakładce *Render*
     :type cycles_settings: dict
@@ -33,14 +63,14 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
     :param result_filename: Nazwa pliku, do którego będą zapisywane ustawienia sceny
     :type result_filename: str
     """
-    bl_idname = 'object.read_scene_settings'
-    bl_label = 'Register job'
-    bl_options = {"REGISTER", "UNDO"}
 
-    def __init__(self):
-        """Kontruktor klasy operatora. Inicjalizuje pola.
+    def __init__(self, scene=None):
+        """Kontruktor klasy. Inicjalizuje pola.
+
+        :param scene: scena, której dotyczy zadanie
+        :type scene: bpy.types.Scene
         """
-        self.scene = None
+        self.scene = scene
         self.cycles_settings = None
         self.workbench_settings = None
         self.eevee_settings = None
@@ -49,310 +79,92 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
         self.images = None
         self.result_filename = 'scene_settings.txt'
 
-    def execute(self, context):
-        """Główna metoda operatora, wywoływana razem z jego uruchomieniem.
-        Wykonanie operatora jest przerywane, jeżeli zostanie rzucony wyjątek.
-
-        :param context: kontekst, w jakim został wywołany operator
-        :type context: bpy.types.Context
-        :raises: ValueError
-        :raises: FileNotFoundError
-        :return: FINISHED -- zakończono wywołanie operatora
-        :rtype: enum
-        """
-
-        self.scene = context.scene
-
-        self.read_output()
-        try:
-            self.read_materials()
-        except FileNotFoundError as error:
-            self.report({'ERROR'}, "{} \nCould not register job".format(error))
-            config.logger.error(str(error), exc_info=True)
-            return {"CANCELLED"}
-        self.read_add_ons()
-        self.read_eevee()
-        self.read_cycles()
-        self.read_workbench()
-        self.save_as_json()
-
-        self.request_manager = RequestManager()
-
-        try:
-            payload = self.prepare_payload(
-                self.get_scene_data(),
-                self.get_job_name(), self.get_job_frames(), 
-                False, self.get_job_tiles_info(), 
-                self.get_job_file_format(), self.get_job_priority()
-                )
-            self.request_manager.post_job_data(payload)
-        
-        except ValueError as error:
-            self.report({'ERROR_INVALID_INPUT'}, "{} \nCould not register job".format(error))
-            config.logger.error("Could not register job", exc_info=True)
-            return {"CANCELLED"}
-
-        except Exception as error:
-            self.report({'ERROR'}, "{} \nCould not register job".format(error))
-            config.logger.error("Could not register job", exc_info=True)
-            return {"CANCELLED"}
-
-        self.report({'INFO'}, "Task submitted!")
-        return {"FINISHED"}
-
-
-    def invoke(self, context, event):
-        """Przed uruchomieniem operatora wyświetla okno dialogowe 
-        z informacją, jaki operator będzie wywołany, i przyciskiem potwierdzenia.
-
-        :param context: kontekst, w jakim został wywołany operator
-        :type context: bpy.types.Context
-        :param event: wydarzenie do obsłużenia
-        :type event:  bpy.types.Event
-        :return:
-            *   RUNNING_MODAL -- operator w trakcie wykonywania
-            *   CANCELLED -- anulowano wykonanie operatora
-            *   FINISHED -- zakończono wykonywanie operatora
-            *   PASS_THROUGH -- przekaż dalej event
-        :rtype: enum zawarty w {‘RUNNING_MODAL’, ‘CANCELLED’, ‘FINISHED’, ‘PASS_THROUGH’, ‘INTERFACE’}
-        """
-
-        wm = context.window_manager
-        return wm.invoke_props_dialog(self)
-
-
     def read_cycles(self):
         """Przypisuje do pola *cycles_settings* słownik zawierający ustawienia
-        silnika Cycles wprowadzane w panelu *Render*.
+        silnika Cycles wprowadzane w panelu *Render* (patrz *extractor.CYCLES_TABLE*).
         """
-        color_management = {}
-
-        color_management['display_device'] = bpy.data.scenes[self.scene.name].display_settings.display_device
-        color_management['view_transform'] = bpy.data.scenes[self.scene.name].view_settings.view_transform
-        color_management['look'] = bpy.data.scenes[self.scene.name].view_settings.look
-        color_management['exposure'] = bpy.data.scenes[self.scene.name].view_settings.exposure
-        color_management['gamma'] = bpy.data.scenes[self.scene.name].view_settings.gamma
-        color_management['sequencer'] = bpy.data.scenes[self.scene.name].sequencer_colorspace_settings.name
-
-        sampling = {}
-
-        integrator = bpy.data.scenes[self.scene.name].cycles.progressive
-        sampling['integrator'] = integrator
-
-        sampling['render'] = bpy.data.scenes[self.scene.name].cycles.samples
-        sampling['viewport'] = bpy.data.scenes[self.scene.name].cycles.preview_samples
-
-        if integrator == 'BRANCHED_PATH':
-            sampling['sub_samples'] = {}
-            sampling['sub_samples']['diffuse'] = bpy.data.scenes[self.scene.name].cycles.diffuse_samples
-            sampling['sub_samples']['glossy'] = bpy.data.scenes[self.scene.name].cycles.glossy_samples
-            sampling['sub_samples']['transmission'] = bpy.data.scenes[self.scene.name].cycles.transmission_samples
-            sampling['sub_samples']['ao'] = bpy.data.scenes[self.scene.name].cycles.ao_samples
-            sampling['sub_samples']['mesh_light'] = bpy.data.scenes[self.scene.name].cycles.mesh_light_samples
-            sampling['sub_samples']['subsurface'] = bpy.data.scenes[self.scene.name].cycles.subsurface_samples
-            sampling['sub_samples']['volume'] = bpy.data.scenes[self.scene.name].cycles.volume_samples
-
-        light_paths = {}
-        max_bounces = {}
-        clamping = {}
-        caustics = {}
-
-        max_bounces['total'] = bpy.data.scenes[self.scene.name].cycles.max_bounces
-        max_bounces['diffuse'] = bpy.data.scenes[self.scene.name].cycles.diffuse_bounces
-        max_bounces['glossy'] = bpy.data.scenes[self.scene.name].cycles.glossy_bounces
-        max_bounces['transparency'] = bpy.data.scenes[self.scene.name].cycles.transparent_max_bounces
-        max_bounces['transmission'] = bpy.data.scenes[self.scene.name].cycles.transmission_bounces
-        max_bounces['volume'] = bpy.data.scenes[self.scene.name].cycles.volume_bounces
-
-        light_paths['max_bounces'] = max_bounces
-
-        clamping['direct_light'] = bpy.data.scenes[self.scene.name].cycles.sample_clamp_direct
-        clamping['indirect_light'] = bpy.data.scenes[self.scene.name].cycles.sample_clamp_indirect
-
-        light_paths['clampling'] = clamping
-
-        caustics['filter_glossy'] = bpy.data.scenes[self.scene.name].cycles.blur_glossy
-        caustics['reflective_caustics'] = bpy.data.scenes[self.scene.name].cycles.caustics_reflective
-        caustics['refractive_caustics'] = bpy.data.scenes[self.scene.name].cycles.caustics_refractive
-
-        light_paths['caustics'] = caustics
-
-        self.cycles_settings = {'color_management': color_management, 'sampling': sampling, 'light_paths': light_paths}
+        self.cycles_settings = extractor.read_cycles(bpy.data.scenes[self.scene.name])
 
     def read_workbench(self):
         """Przypisuje do pola *workbench_settings* słownik zawierający ustawienia
-        silnika Workbench wprowadzane w panelu *Render*.
+        silnika Workbench wprowadzane w panelu *Render* (patrz *extractor.WORKBENCH_TABLE*).
         """
-        lightning = {'light': bpy.data.scenes[self.scene.name].display.shading.light}
-
-        if lightning['light'] in ['STUDIO', 'MATCAP']:
-            lightning['studio_light'] = bpy.data.scenes[self.scene.name].display.shading.studio_light
-
-        color = {'type': bpy.data.scenes[self.scene.name].display.shading.color_type}
-
-        if color['type'] == 'SINGLE':
-            color['red'] = bpy.data.scenes[self.scene.name].display.shading.single_color[0]
-            color['green'] = bpy.data.scenes[self.scene.name].display.shading.single_color[1]
-            color['blue'] = bpy.data.scenes[self.scene.name].display.shading.single_color[2]
-
-        self.workbench_settings = {'lightning': lightning, 'color': color}
+        self.workbench_settings = extractor.read_workbench(bpy.data.scenes[self.scene.name])
 
     def read_eevee(self):
         """Przypisuje do pola *eevee_settings* słownik zawierający ustawienia
-        silnika Eevee wprowadzane w panelu *Render*.
+        silnika Eevee wprowadzane w panelu *Render* (patrz *extractor.EEVEE_TABLE*).
         """
-        sampling = {}
-
-        sampling['render'] = bpy.data.scenes[self.scene.name].eevee.taa_render_samples
-        sampling['viewport'] = bpy.data.scenes[self.scene.name].eevee.taa_samples
-
-        self.eevee_settings = {'sampling': sampling}
+        self.eevee_settings = extractor.read_eevee(bpy.data.scenes[self.scene.name])
 
     def read_output(self):
         """Przypisuje do pola *output_settings* słownik zawierający ustawienia
-        wprowadzane w panelu *Output*.
+        wprowadzane w panelu *Output* (patrz *extractor.OUTPUT_TABLE*).
         """
-        dimensions = {"resolution": {}, "aspect": {}, "border": None, "crop": None, "frame": {}, "time_remapping": {}}
-
-        dimensions["resolution"]["x"] = bpy.data.scenes[self.scene.name].render.resolution_x
-        dimensions["resolution"]["y"] = bpy.data.scenes[self.scene.name].render.resolution_y
-        dimensions["resolution"]["percentage"] = bpy.data.scenes[self.scene.name].render.resolution_percentage
-
-        dimensions["aspect"]["x"] = bpy.data.scenes[self.scene.name].render.pixel_aspect_x
-        dimensions["aspect"]["y"] = bpy.data.scenes[self.scene.name].render.pixel_aspect_y
-
-        dimensions["border"] = bpy.data.scenes[self.scene.name].render.use_border
-
-        if dimensions["border"]:
-            dimensions["crop"] = bpy.data.scenes[self.scene.name].render.use_crop_to_border
-
-        dimensions["frame"]["start"] = bpy.data.scenes[self.scene.name].frame_start
-        dimensions["frame"]["end"] = bpy.data.scenes[self.scene.name].frame_end
-        dimensions["frame"]["step"] = bpy.data.scenes[self.scene.name].frame_step
-        dimensions["frame"]["rate"] = bpy.data.scenes[self.scene.name].render.fps
-
-        dimensions["time_remapping"]["old"] = bpy.data.scenes[self.scene.name].render.frame_map_old
-        dimensions["time_remapping"]["new"] = bpy.data.scenes[self.scene.name].render.frame_map_new
-
-        output = {"views": {}}
-        stereoscopy = {"use": None}
-
-        output["path"] = bpy.data.scenes[self.scene.name].render.filepath
-
-        output["overwirte"] = bpy.data.scenes[self.scene.name].render.use_overwrite
-        output["placeholders"] = bpy.data.scenes[self.scene.name].render.use_placeholder
-        output["file_extensions"] = bpy.data.scenes[self.scene.name].render.use_file_extension
-        output["cache_result"] = bpy.data.scenes[self.scene.name].render.use_render_cache
-
-        file_format = bpy.data.scenes[self.scene.name].render.image_settings.file_format
-        output["file_format"] = file_format
-
-        if file_format in ['PNG', 'TIFF']:
-            output["color"] = bpy.data.scenes[self.scene.name].render.image_settings.color_mode
-            output["color_depth"] = bpy.data.scenes[self.scene.name].render.image_settings.color_depth
-            output["compression"] = bpy.data.scenes[self.scene.name].render.image_settings.compression
-
-        if file_format == 'JPEG':
-            output["color"] = bpy.data.scenes[self.scene.name].render.image_settings.color_mode
-            output["compression"] = bpy.data.scenes[self.scene.name].render.image_settings.quality
-
-        if file_format == 'BMP':
-            output["color"] = bpy.data.scenes[self.scene.name].render.image_settings.color_mode
-
-        stereoscopy["use"] = bpy.data.scenes[self.scene.name].render.use_multiview
-
-        if stereoscopy["use"]:
-            output["views"]["views_format"] = bpy.data.scenes[self.scene.name].render.image_settings.views_format
-
-            if output["views"]["views_format"] == 'STEREO_3D':
-                pass
-
-            stereoscopy["setup_stereo_mode"] = bpy.data.scenes[self.scene.name].render.views_format
-
-            for i in range(len(bpy.data.scenes[self.scene.name].render.views)):
-                view_name = bpy.data.scenes["Scene"].render.views[i].name
-                is_view_used = bpy.data.scenes["Scene"].render.views[i].use
-                suffix = None
-
-                if stereoscopy["setup_stereo_mode"] == 'MULTI-VIEW':
-                    suffix = bpy.data.scenes[self.scene.name].render.views["right"].camera_suffix
-                else:
-                    suffix = bpy.data.scenes[self.scene.name].render.views["right"].file_suffix
-
-                stereoscopy[view_name] = (is_view_used, suffix)
-
-        metadata = {}
-
-        metadata["date"] = bpy.data.scenes[self.scene.name].render.use_stamp_date
-        metadata["time"] = bpy.data.scenes[self.scene.name].render.use_stamp_time
-        metadata["render_time"] = bpy.data.scenes[self.scene.name].render.use_stamp_render_time
-        metadata["frame"] = bpy.data.scenes[self.scene.name].render.use_stamp_frame
-        metadata["frame_range"] = bpy.data.scenes[self.scene.name].render.use_stamp_frame_range
-        metadata["memory"] = bpy.data.scenes[self.scene.name].render.use_stamp_memory
-        metadata["hostname"] = bpy.data.scenes[self.scene.name].render.use_stamp_hostname
-        metadata["camera"] = bpy.data.scenes[self.scene.name].render.use_stamp_camera
-        metadata["lens"] = bpy.data.scenes[self.scene.name].render.use_stamp_lens
-        metadata["scene"] = bpy.data.scenes[self.scene.name].render.use_stamp_scene
-        metadata["marker"] = bpy.data.scenes[self.scene.name].render.use_stamp_marker
-        metadata["filename"] = bpy.data.scenes[self.scene.name].render.use_stamp_filename
-        metadata["strip_name"] = bpy.data.scenes[self.scene.name].render.use_stamp_sequencer_strip
-        metadata["use_strip_metadata"] = bpy.data.scenes[self.scene.name].render.use_stamp_strip_meta
-
-        if metadata["use_strip_metadata"]:
-            metadata["note_text"] = bpy.data.scenes[self.scene.name].render.stamp_note_text
-
-        metadata["burn_into_image"] = bpy.data.scenes[self.scene.name].render.use_stamp
-
-        if metadata["burn_into_image"]:
-            metadata["font_size"] = bpy.data.scenes[self.scene.name].render.stamp_font_size
-            metadata["draw_labels"] = bpy.data.scenes[self.scene.name].render.use_stamp_labels
-            metadata["text_color"] = bpy.data.scenes[self.scene.name].render.stamp_foreground
-            metadata["background"] = bpy.data.scenes[self.scene.name].render.stamp_background
-
-        postprocessing = {}
-
-        postprocessing["compositing"] = bpy.data.scenes[self.scene.name].render.use_compositing
-        postprocessing["sequencer"] = bpy.data.scenes[self.scene.name].render.use_sequencer
-        postprocessing["dither"] = bpy.data.scenes[self.scene.name].render.dither_intensity
-
-        self.output_settings = {"dimensions": dimensions, "output": output, "metadata": metadata,
-                                "stereoscopy": stereoscopy,
-                                "postprocessing": postprocessing, "renderer": bpy.data.scenes[self.scene.name].render.engine}
+        self.output_settings = extractor.read_output(bpy.data.scenes[self.scene.name])
+
+    def read_section(self, snapshot, section, reader, attribute):
+        """Odczytuje sekcję ustawień sceny, jeżeli zmieniła się od poprzedniego odczytu,
+        a w przeciwnym razie przypisuje do pola operatora wartość zapamiętaną.
+
+        :param snapshot: zapamiętane sekcje ustawień sceny
+        :type snapshot: scene_cache.SceneSnapshot
+        :param section: nazwa sekcji
+        :type section: str
+        :param reader: metoda odczytująca sekcję, np. *read_cycles*
+        :type reader: callable
+        :param attribute: pole operatora, do którego metoda przypisuje odczytane ustawienia
+        :type attribute: str
+        """
+        if snapshot.is_stale(section):
+            reader()
+            snapshot.store(section, getattr(self, attribute))
+        else:
+            setattr(self, attribute, snapshot.get(section))
 
     def read_materials(self):
         """Przypisuje do pola *images* słownik zawierający listę plików użytych jako tekstury:
-        ich nazwy i ścieżki bezwzględne. Pomija pliki zaszyte w scenie i te, do których ścieżki
-        są podane, ale które nie są używane.
+        ich nazwy i ścieżki bezwzględne (patrz *collect_images()*) i sprawdza, czy pliki istnieją.
+        Lista jest odczytywana ponownie tylko wtedy, gdy zmieniły się obrazy lub materiały,
+        ale istnienie plików jest sprawdzane przy każdym wywołaniu.
+        Istnienie plików jest sprawdzane równolegle dla wszystkich tekstur naraz (patrz moduł *asset_check*),
+        a jeżeli włączony jest indeks katalogów, odczytywane są tylko katalogi, które się zmieniły
+        (patrz moduł *asset_index*).
         
-        :raises: FileNotFoundError: Nie znaleziono pliku pod daną ścieżką
+        :raises: MissingFilesError: Nie znaleziono plików pod danymi ścieżkami; błąd zawiera listę
+            wszystkich brakujących plików
+        """
+        self.read_section(scene_cache.get_global_snapshot(), 'images', self.collect_images, 'images')
+
+        paths = [image['full_path'] for image in self.images]
+        if config.asset_index_enabled:
+            missing = asset_index.get_index().find_missing(paths)
+        else:
+            missing = asset_check.find_missing(paths)
+        if missing:
+            raise asset_check.MissingFilesError(missing)
+
+    def collect_images(self):
+        """Przypisuje do pola *images* listę plików użytych jako tekstury: ich nazwy i ścieżki bezwzględne.
+        Pomija pliki zaszyte w scenie i te, do których ścieżki są podane, ale które nie są używane.
         """
         self.images = []
         for image in bpy.data.images:
-            if image.users:
+            if image.users and image.packed_file is None:
                 if image.name not in ['Render Result', 'Viewer Node']:
-                    abspath = bpy.path.abspath(image.filepath)
-                    if path.exists(abspath):
-                        if image.packed_file is None:
-                            image_data = dict(
-                                name = image.name,
-                                full_path = abspath)
-                            self.images.append(image_data)
-                    else:
-                        raise FileNotFoundError("File not found: {}".format(abspath))
-
+                    image_data = dict(
+                        name = image.name,
+                        full_path = bpy.path.abspath(image.filepath))
+                    self.images.append(image_data)
 
 
     def read_add_ons(self):
         """Przypisuje do pola *add_ons* słownik zawierający listę zaintalowanych wtyczek:
-        ich nazwy i numery wersji.
+        ich nazwy i numery wersji. Lista jest zapamiętywana między wywołaniami
+        (patrz moduł *addon_inventory*).
         """
 
-        self.add_ons = []
-        for mod in addon_utils.modules():
-            self.add_ons.append(dict(
-                version=mod.bl_info.get('version'), 
-                name=mod.bl_info.get('name')
-                ))
+        self.add_ons = addon_inventory.get_inventory().get()
 
 
     def save_as_json(self):
@@ -372,8 +184,9 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
                 "materials": self.images,
                 "add-ons": self.add_ons
             }
-            with open(self.result_filename, 'w') as outfile:
-                json.dump(data, outfile)
+            with open(self.result_filename, 'wb') as outfile:
+                for chunk in serialization.iter_encode(data):
+                    outfile.write(chunk)
         except TypeError:
             self.report({'ERROR'}, "Can't convert to JSON")
             config.logger.error("Can't convert to JSON", exc_info=True)
@@ -382,8 +195,27 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
             config.logger.error("Can't save to {} file".format(self.result_filename), exc_info=True)
 
         
+    def prepare_job_payload(self):
+        """Odczytuje dane zadania dla sceny *scene* i zwraca je w postaci zwracanej przez *prepare_payload()*.
+
+        :raises: ValueError: niepoprawne dane zadania
+        :raises: FileNotFoundError: scena nie została zapisana
+        :return: słownik z danymi zadania
+        :rtype: dict
+        """
+        scene_data = self.get_scene_data()
+        job_name = self.get_job_name()
+        frames = self.get_job_frames()
+        return self.prepare_payload(
+            scene_data,
+            job_name, frames, 
+            False, self.get_job_tiles_info(), 
+            self.get_job_file_format(), self.get_job_priority(),
+            frame_chunks=self.get_job_frame_chunks(frames)
+            )
+
     def prepare_payload(self, scene_data=None, job_name="New Job", frames=None, anim_prepass=False, tiles_info=None,
-        output_format="JPEG", priority=0, sanity_check=False):
+        output_format="JPEG", priority=0, sanity_check=False, frame_chunks=None):
         """Przyjmuje jako argumenty komplet danych zadania i zwraca je zapisane w słowniku.
         Struktura słownika jest analogiczna do struktury sobiektu JSON, którego oczekuje RenderDock.
         
@@ -401,6 +233,8 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
         :type priority: int
         :param sanity_check: czy ma być wykonane sprawdzenie poprawności, domyślnie False
         :type sanity_check: boolean
+        :param frame_chunks: lista części zakresu klatek renderowanych osobno, domyślnie None
+        :type frame_chunks: list
         :return: słownik z danymi zadania
         :rtype: dict
         """
@@ -415,6 +249,8 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
             priority = priority,
             sanity_check = sanity_check
         )
+        if frame_chunks is not None:
+            data['frame_chunks'] = frame_chunks
         data.update(tiles_info)
         return data
 
@@ -427,7 +263,7 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
         :rtype: dict
         """
         path = bpy.path.abspath(bpy.data.filepath)
-        print(path)
+        config.logger.debug("Scene file: %s", path)
 
         if path in [None, '']:
             raise FileNotFoundError("Scene file not found. Did you forget to save it?")
@@ -448,42 +284,66 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
         metoda odczytuje rozmiar kafelków przypisany do sceny w ustawieniach silnika Cycles
         lub podany dla zadania.
         
+        :raises: ValueError: pusty obszar renderowania albo niepoprawny rozmiar kafelków
         :return: słownik zawierający informację, czy scena ma być renderowana z użyciem kafelków
-            oraz informacje o kafelkach: wysokość i szerokość w pikselach
+            oraz informacje o kafelkach: wysokość i szerokość w pikselach, margines
+            i regiony obrazu do wyrenderowania (patrz *get_job_tile_regions()*)
         :rtype: dict
         """
 
-        if bpy.data.scenes[self.scene.name].render.engine != 'CYCLES':
-            tile_info = {                      
+        render = bpy.data.scenes[self.scene.name].render
+
+        if render.engine != 'CYCLES':
+            return {
                 "tile_job": False
             }
 
-        elif self.scene.my_tool.use_cycles_tiles_setting: 
-            tile_info = {                        
-                "tile_job": True,
-                "tiles": {
-                    "padding": 10, # not used by Blender
-                    "y": bpy.data.scenes[self.scene.name].render.tile_y, 
-                    "x": bpy.data.scenes[self.scene.name].render.tile_x
-                },
-                "tile_padding": 10
-            }
+        if self.scene.my_tool.use_cycles_tiles_setting: 
+            tile_x, tile_y = render.tile_x, render.tile_y
+        else:
+            tile_x, tile_y = self.scene.my_tool.tiles_x, self.scene.my_tool.tiles_y
 
+        padding = self.scene.my_tool.tile_padding
 
-        else:
-            tile_info = {                        
-                "tile_job": True, 
-                "tiles": {
-                    "padding": 10, 
-                    "y": self.scene.my_tool.tiles_y, 
-                    "x": self.scene.my_tool.tiles_x
-                },
-                "tile_padding": 10
-            }
+        tile_info = {                        
+            "tile_job": True,
+            "tiles": {
+                "padding": padding, # not used by Blender
+                "y": tile_y, 
+                "x": tile_x
+            },
+            "tile_padding": padding,
+            "tile_regions": self.get_job_tile_regions(render, tile_x, tile_y, padding)
+        }
 
         return tile_info
  
 
+    def get_job_tile_regions(self, render, tile_x, tile_y, padding):
+        """Dzieli obszar renderowania sceny na regiony z marginesem, które farma może przydzielić
+        różnym węzłom (patrz moduł *tile_planner*). Uwzględnia skalę obrazu i, jeżeli jest
+        włączona, opcję *Border*.
+
+        :param render: ustawienia renderowania sceny
+        :type render: bpy.types.RenderSettings
+        :param tile_x: szerokość kafelków w pikselach
+        :type tile_x: int
+        :param tile_y: wysokość kafelków w pikselach
+        :type tile_y: int
+        :param padding: margines kafelków w pikselach
+        :type padding: int
+        :raises: ValueError: pusty obszar renderowania albo niepoprawny rozmiar kafelków
+        :return: słownik z regionami, patrz *tile_planner.plan_job()*
+        :rtype: dict
+        """
+        border = None
+        if render.use_border:
+            border = (render.border_min_x, render.border_min_y, render.border_max_x, render.border_max_y)
+
+        return tile_planner.plan_job(render.resolution_x, render.resolution_y, render.resolution_percentage,
+                                     tile_x, tile_y, padding, border)
+
+
     def get_job_file_format(self):
         """Zwraca format plików wyjściowych, które mają być wygenerowane w wyniku renderowania. 
         Zależnie od ustawienia wybranego przez użytkownika, metoda odczytuje i zwraca
@@ -541,9 +401,6 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
         :return: słownik zawierający numery skajnych klatek zakresu
         :rtype: dict
         """
-        print(self.scene.my_tool.frame_start)
-
-        
         if self.scene.my_tool.use_output_frames_setting: 
             frames = dict(
             start = bpy.data.scenes[self.scene.name].frame_start,
@@ -558,30 +415,730 @@ class OBJECT_OT_read_scene_settings(bpy.types.Operator):
             
         return frames
 
+    def get_job_frame_chunks(self, frames):
+        """Zwraca listę części, na które zakres klatek zadania jest dzielony zgodnie
+        z ustawieniami wybranymi przez użytkownika (patrz moduł *frame_chunks*).
+
+        :param frames: słownik z numerami skrajnych klatek zakresu zwrócony przez *get_job_frames()*
+        :type frames: dict
+        :raises: ValueError: niepoprawny zakres klatek
+        :return: lista części zakresu klatek
+        :rtype: list
+        """
+        return frame_chunks.plan_chunks(frames,
+                                        self.scene.my_tool.frame_chunk_strategy,
+                                        self.scene.my_tool.frame_chunk_size)
+
+    def get_batch_targets(self, scene, mode):
+        """Zwraca sceny, warstwy widoku albo kamery, dla których będą zgłaszane zadania.
+
+        :param scene: bieżąca scena
+        :type scene: bpy.types.Scene
+        :param mode: tryb zgłoszenia: *SCENES* (wszystkie sceny pliku), *VIEW_LAYERS* (włączone
+            warstwy widoku bieżącej sceny) albo *CAMERAS* (kamery bieżącej sceny)
+        :type mode: str
+        :return: lista krotek (scena, klucz zadania, ustawienia zadania zależne od trybu)
+        :rtype: list
+        """
+        if mode == 'SCENES':
+            return [(scene, scene.name, {}) for scene in bpy.data.scenes]
+
+        if mode == 'VIEW_LAYERS':
+            return [(scene, "{}/{}".format(scene.name, layer.name), dict(view_layer=layer.name))
+                    for layer in scene.view_layers if layer.use]
+
+        return [(scene, "{}/{}".format(scene.name, camera.name), dict(camera=camera.name))
+                for camera in scene.objects if camera.type == 'CAMERA']
+
+    def prepare_batch_job(self, scene, key, overrides):
+        """Odczytuje dane zadania dla sceny. Tekstury są przesyłane we wspólnej sekcji zgłoszenia,
+        więc nie są częścią danych zadania.
+
+        :param scene: scena
+        :type scene: bpy.types.Scene
+        :param key: klucz identyfikujący zadanie w odpowiedzi serwera
+        :type key: str
+        :param overrides: ustawienia zależne od trybu, np. nazwa kamery
+        :type overrides: dict
+        :raises: ValueError: niepoprawne dane zadania
+        :return: słownik z danymi zadania
+        :rtype: dict
+        """
+        self.scene = scene
+        job = self.prepare_job_payload()
+        del job['textures']
+
+        if overrides:
+            job['name'] = "{} [{}]".format(job['name'], key.partition('/')[2])
+        job.update(overrides, key=key)
+        return job
+
+
+class OBJECT_OT_read_scene_settings(SceneReader, bpy.types.Operator):
+    """Klasa operatora rejestrowanego przez wtyczkę. Odpowiada za odczytanie danych o scenie i
+    zapisanie ich w pliku w formacie JSON oraz rozpoczęcie procesu rejestracji zadania:
+    odczytanie danych zadania i wysłanie ich RenderDockowi. Dane są odczytywane metodami
+    klasy *SceneReader*.
+
+    :param future: Wynik wysyłania zadania wykonywanego w wątku roboczym
+    :type future: concurrent.futures.Future
+    :param timer: Zegar, którego zdarzenia wywołują sprawdzenie stanu wysyłania zadania
+    :type timer: bpy.types.Timer
+    :param failure_message: Komunikat wyświetlany, gdy zadanie wykonywane w tle się nie powiedzie
+    :type failure_message: str
+    """
+    bl_idname = 'object.read_scene_settings'
+    bl_label = 'Register job'
+    bl_options = {"REGISTER", "UNDO"}
+
+    failure_message = "Could not register job"
+
+    def __init__(self):
+        """Kontruktor klasy operatora. Inicjalizuje pola.
+        """
+        super().__init__()
+        self.future = None
+        self.timer = None
+        self.submitted_name = None
+        self.cost_sample = None
+
+    def execute(self, context):
+        """Główna metoda operatora, wywoływana razem z jego uruchomieniem.
+        Odczytuje dane sceny (tylko sekcje, które zmieniły się od poprzedniego wywołania,
+        patrz moduł *scene_cache*) i przygotowuje dane zadania w głównym wątku, a ich wysłanie
+        zleca wątkowi roboczemu. Następnie operator przechodzi w tryb modalny i czeka
+        na wynik wysyłania (patrz *modal()*), nie blokując interfejsu.
+        Wykonanie operatora jest przerywane, jeżeli zostanie rzucony wyjątek.
+        Czas każdego etapu jest mierzony (patrz moduł *timing*), a pomiar zapisywany w dzienniku
+        po wysłaniu zadania.
+
+        :param context: kontekst, w jakim został wywołany operator
+        :type context: bpy.types.Context
+        :raises: ValueError
+        :raises: FileNotFoundError
+        :return:
+            *   RUNNING_MODAL -- zadanie jest wysyłane w tle
+            *   CANCELLED -- nie udało się przygotować danych zadania
+        :rtype: enum
+        """
+
+        self.scene = context.scene
+        scene_cache.check_settings(self.scene)
+        snapshot = scene_cache.get_snapshot(self.scene.name)
+        timing = timings.start('submit')
+
+        with timing.stage('read_output'):
+            self.read_section(snapshot, 'output', self.read_output, 'output_settings')
+        try:
+            with timing.stage('read_materials'):
+                self.read_materials()
+        except FileNotFoundError as error:
+            self.report({'ERROR'}, "{} \nCould not register job".format(error))
+            config.logger.error(str(error), exc_info=True)
+            return {"CANCELLED"}
+        with timing.stage('read_add_ons'):
+            self.read_add_ons()
+        with timing.stage('read_render_settings'):
+            self.read_section(snapshot, 'eevee', self.read_eevee, 'eevee_settings')
+            self.read_section(snapshot, 'cycles', self.read_cycles, 'cycles_settings')
+            self.read_section(snapshot, 'workbench', self.read_workbench, 'workbench_settings')
+        with timing.stage('save_as_json'):
+            self.save_as_json()
+
+        self.request_manager = RequestManager.shared()
+
+        try:
+            with timing.stage('prepare_payload'):
+                payload = self.prepare_job_payload()
+        
+        except ValueError as error:
+            self.report({'ERROR_INVALID_INPUT'}, "{} \nCould not register job".format(error))
+            config.logger.error("Could not register job", exc_info=True)
+            return {"CANCELLED"}
+
+        except Exception as error:
+            self.report({'ERROR'}, "{} \nCould not register job".format(error))
+            config.logger.error("Could not register job", exc_info=True)
+            return {"CANCELLED"}
+
+        self.submitted_name = payload['name']
+        self.cost_sample = self.read_cost_sample()
+        timing.set(textures=len(payload.get('textures') or ()))
+        return self.run_in_background(context, complete_and_submit, self.request_manager, payload,
+                                      self.scene.my_tool.upload_assets, timing, self.cost_sample)
+
+
+    def read_cost_sample(self):
+        """Odczytuje cechy sceny i ustawienia, z którymi zadanie trafi do historii zadań
+        po jego zakończeniu (patrz moduł *cost_model*). Rozmiar tekstur jest uzupełniany
+        w wątku roboczym, po zbudowaniu manifestu.
+
+        :return: nazwa sceny, cechy sceny i ustawienia albo None, jeżeli przewidywanie jest wyłączone
+        :rtype: dict
+        """
+        if not config.cost_model_enabled:
+            return None
+        return dict(scene=self.scene.name, frame_step=int(self.scene.frame_step),
+                    characteristics=cost_model.scene_characteristics(self.scene),
+                    settings=dict(output=(self.output_settings or {}).get('dimensions'),
+                                  cycles=self.cycles_settings))
+
+
+    def run_in_background(self, context, fn, *args):
+        """Zleca wysłanie danych wątkowi roboczemu i przełącza operator w tryb modalny,
+        w którym czeka na wynik (patrz *modal()*).
+
+        :param context: kontekst, w jakim został wywołany operator
+        :type context: bpy.types.Context
+        :param fn: funkcja wysyłająca dane, np. *complete_and_submit*
+        :type fn: callable
+        :return: RUNNING_MODAL
+        :rtype: enum
+        """
+        self.future = submission.submit(fn, *args)
+
+        wm = context.window_manager
+        self.timer = wm.event_timer_add(config.poll_interval, window=context.window)
+        wm.modal_handler_add(self)
+        return {"RUNNING_MODAL"}
+
+
+    def modal(self, context, event):
+        """Obsługuje zdarzenia w czasie, gdy zadanie jest wysyłane w tle.
+        Przy każdym zdarzeniu zegara sprawdza, czy wątek roboczy zakończył wysyłanie,
+        i zgłasza użytkownikowi wynik. Pozostałe zdarzenia są przekazywane dalej,
+        więc interfejs pozostaje dostępny.
+
+        :param context: kontekst, w jakim został wywołany operator
+        :type context: bpy.types.Context
+        :param event: wydarzenie do obsłużenia
+        :type event:  bpy.types.Event
+        :return:
+            *   PASS_THROUGH -- zadanie jest nadal wysyłane
+            *   CANCELLED -- nie udało się zarejestrować zadania
+            *   FINISHED -- zadanie zostało zarejestrowane albo dodane do kolejki ponownych prób
+        :rtype: enum
+        """
+
+        if event.type != 'TIMER' or not self.future.done():
+            return {"PASS_THROUGH"}
+
+        context.window_manager.event_timer_remove(self.timer)
+        self.timer = None
+
+        try:
+            response = self.future.result()
+
+        except ValueError as error:
+            self.report({'ERROR_INVALID_INPUT'}, "{} \n{}".format(error, self.failure_message))
+            config.logger.error(self.failure_message, exc_info=True)
+            return {"CANCELLED"}
+
+        except Exception as error:
+            self.report({'ERROR'}, "{} \n{}".format(error, self.failure_message))
+            config.logger.error(self.failure_message, exc_info=True)
+            return {"CANCELLED"}
+
+        if response is None:
+            self.report({'WARNING'}, "RenderDock is unavailable, job queued for retry ({} pending)".format(
+                spool.get_spool().depth()))
+            return {"FINISHED"}
+
+        self.report_result(response)
+        return {"FINISHED"}
+
+
+    def report_result(self, response):
+        """Zgłasza użytkownikowi, że zadanie zostało zarejestrowane, i dodaje je do tabeli
+        stanów śledzonych zadań (patrz moduł *job_status*).
+
+        :param response: odpowiedź serwera
+        :type response: requests.Response
+        """
+        job_status.track(job_status.job_id_from_response(response), self.submitted_name)
+        self.report({'INFO'}, "Task submitted!")
+
+
+    def invoke(self, context, event):
+        """Przed uruchomieniem operatora wyświetla okno dialogowe 
+        z informacją, jaki operator będzie wywołany, i przyciskiem potwierdzenia.
+
+        :param context: kontekst, w jakim został wywołany operator
+        :type context: bpy.types.Context
+        :param event: wydarzenie do obsłużenia
+        :type event:  bpy.types.Event
+        :return:
+            *   RUNNING_MODAL -- operator w trakcie wykonywania
+            *   CANCELLED -- anulowano wykonanie operatora
+            *   FINISHED -- zakończono wykonywanie operatora
+            *   PASS_THROUGH -- przekaż dalej event
+        :rtype: enum zawarty w {‘RUNNING_MODAL’, ‘CANCELLED’, ‘FINISHED’, ‘PASS_THROUGH’, ‘INTERFACE’}
+        """
+
+        wm = context.window_manager
+        return wm.invoke_props_dialog(self)
+
+
+class OBJECT_OT_submit_batch(OBJECT_OT_read_scene_settings):
+    """Operator zgłaszający jednym żądaniem osobne zadania dla wszystkich scen pliku albo dla warstw
+    widoku lub kamer bieżącej sceny. Tekstury i wtyczki są odczytywane raz, wspólnie dla wszystkich
+    zadań, a dane zadań przesyłane razem, bez powtarzania wspólnych ustawień (patrz moduł *batch*).
+
+    :param mode: czego dotyczą zgłaszane zadania: scen, warstw widoku czy kamer
+    :type mode: bpy.types.EnumProperty
+    """
+    bl_idname = 'object.submit_batch'
+    bl_label = 'Register batch'
+    bl_options = {"REGISTER", "UNDO"}
+
+    mode : EnumProperty(
+        name="Jobs",
+        description="What each job of the batch renders",
+        items=[ ('SCENES', "Scenes", "One job per scene of the file"),
+                ('VIEW_LAYERS', "View Layers", "One job per enabled view layer of the current scene"),
+                ('CAMERAS', "Cameras", "One job per camera of the current scene")
+        ],
+        default='SCENES'
+        )
+
+    def execute(self, context):
+        """Odczytuje tekstury i wtyczki, a następnie dane zadania dla każdej sceny, warstwy widoku
+        albo kamery i zleca wątkowi roboczemu wysłanie ich jednym żądaniem.
+
+        :param context: kontekst, w jakim został wywołany operator
+        :type context: bpy.types.Context
+        :return:
+            *   RUNNING_MODAL -- zadania są wysyłane w tle
+            *   CANCELLED -- nie udało się przygotować danych zadań
+        :rtype: enum
+        """
+        try:
+            self.read_materials()
+        except FileNotFoundError as error:
+            self.report({'ERROR'}, "{} \nCould not register jobs".format(error))
+            config.logger.error(str(error), exc_info=True)
+            return {"CANCELLED"}
+        self.read_add_ons()
+
+        self.request_manager = RequestManager.shared()
+
+        try:
+            jobs = [self.prepare_batch_job(scene, key, overrides)
+                    for scene, key, overrides in self.get_batch_targets(context.scene, self.mode)]
+            if not jobs:
+                raise ValueError("Nothing to render in {} mode".format(self.mode.lower()))
+            payload = batch.dedupe(jobs, dict(textures=self.images, add_ons=self.add_ons))
+
+        except ValueError as error:
+            self.report({'ERROR_INVALID_INPUT'}, "{} \nCould not register jobs".format(error))
+            config.logger.error("Could not register jobs", exc_info=True)
+            return {"CANCELLED"}
+
+        except Exception as error:
+            self.report({'ERROR'}, "{} \nCould not register jobs".format(error))
+            config.logger.error("Could not register jobs", exc_info=True)
+            return {"CANCELLED"}
+
+        return self.run_in_background(context, complete_and_submit_batch, self.request_manager, payload,
+                                      context.scene.my_tool.upload_assets)
+
+    def report_result(self, results):
+        """Zgłasza użytkownikowi, ile zadań zostało zarejestrowanych, i wymienia zadania odrzucone.
+
+        :param results: wyniki zgłoszenia poszczególnych zadań zwrócone przez *RequestManager.submit_batch()*
+        :type results: list
+        """
+        for result in results:
+            if result.get('status') == 'created':
+                job_status.track(result.get('id'), result.get('key'))
+
+        rejected = [result for result in results if result.get('status') != 'created']
+        if not rejected:
+            self.report({'INFO'}, "{} jobs submitted!".format(len(results)))
+            return
+
+        details = "\n".join("{}: {}".format(result.get('key'), result.get('message', result.get('status')))
+                            for result in rejected)
+        self.report({'WARNING'}, "{} of {} jobs rejected\n{}".format(len(rejected), len(results), details))
+
+
+class OBJECT_OT_download_frames(OBJECT_OT_read_scene_settings):
+    """Operator pobierający wyrenderowane klatki zadania do katalogu wyjściowego bieżącej sceny
+    (patrz moduł *downloader*). Klatki są pobierane w tle, a operator czeka na wynik w trybie modalnym.
+
+    :param job_id: identyfikator zadania nadany przez RenderDocka
+    :type job_id: bpy.types.StringProperty
+    """
+    bl_idname = 'object.download_frames'
+    bl_label = 'Download frames'
+    bl_options = {"REGISTER"}
+
+    failure_message = "Could not download frames"
+
+    job_id : StringProperty(
+        name="Job",
+        description="Identifier of the job whose frames are downloaded",
+        default=""
+        )
+
+    def execute(self, context):
+        """Odczytuje ustawienia wyjściowe sceny i zleca wątkowi roboczemu pobranie klatek.
+
+        :param context: kontekst, w jakim został wywołany operator
+        :type context: bpy.types.Context
+        :return: RUNNING_MODAL -- klatki są pobierane w tle
+        :rtype: enum
+        """
+        self.scene = context.scene
+        self.read_output()
+        settings = downloader.output_template(self.output_settings, bpy.path.abspath)
+        return self.run_in_background(context, downloader.download_frames, self.job_id, settings)
+
+    def report_result(self, results):
+        """Zgłasza użytkownikowi, ile klatek zostało pobranych, i wymienia klatki, których nie udało się pobrać.
+
+        :param results: wyniki pobierania klatek zwrócone przez *downloader.download_frames()*
+        :type results: list
+        """
+        downloaded = sum(1 for result in results if result['status'] == 'downloaded')
+        failed = [result for result in results if result['status'] == 'failed']
+        if not failed:
+            self.report({'INFO'}, "{} frames downloaded, {} already present".format(
+                downloaded, len(results) - downloaded))
+            return
+
+        details = "\n".join("{}: {}".format(result['frame'], result['error']) for result in failed)
+        self.report({'WARNING'}, "{} of {} frames failed\n{}".format(len(failed), len(results), details))
+
+    def invoke(self, context, event):
+        """Uruchamia operator bez okna dialogowego.
+
+        :param context: kontekst, w jakim został wywołany operator
+        :type context: bpy.types.Context
+        :param event: wydarzenie do obsłużenia
+        :type event:  bpy.types.Event
+        :return: RUNNING_MODAL -- klatki są pobierane w tle
+        :rtype: enum
+        """
+        return self.execute(context)
+
+
+def complete_and_submit(request_manager, payload, upload=False, timing=timings.NULL_TIMING, cost_sample=None):
+    """Wykonywana w wątku roboczym. Uzupełnia listę tekstur w danych zadania o ich rozmiary
+    i skróty zawartości (patrz moduł *texture_manifest*), opcjonalnie wysyła plik sceny
+    i tekstury na farmę (patrz moduł *uploader*), dołącza przewidywany czas renderowania
+    (patrz moduł *cost_model*) i wysyła zadanie RenderDockowi. Zarejestrowane zadanie trafia
+    do historii zadań oczekujących na zakończenie.
+    Na końcu zapisuje w dzienniku pomiar czasu zgłoszenia, także wtedy, gdy wysłanie się nie powiodło.
+
+    :param request_manager: obiekt komunikujący się z RenderDockiem
+    :type request_manager: RequestManager
+    :param payload: dane zadania przygotowane przez *prepare_payload()*
+    :type payload: dict
+    :param upload: czy wysłać plik sceny i tekstury, domyślnie False
+    :type upload: boolean
+    :param timing: pomiar czasu zgłoszenia rozpoczęty przez operator (patrz moduł *timing*)
+    :type timing: timing.Timing
+    :param cost_sample: cechy sceny odczytane przez operator, patrz *read_cost_sample()*
+    :type cost_sample: dict
+    :raises: FileNotFoundError: plik tekstury zniknął po odczytaniu sceny
+    :raises: RequestException: serwer odrzucił zadanie albo nie udało się wysłać plików
+    :return: odpowiedź serwera albo None, jeżeli zadanie trafiło do kolejki
+    :rtype: requests.Response
+    """
+    result = 'error'
+    try:
+        if payload.get('textures'):
+            with timing.stage('build_manifest'):
+                payload['textures'] = texture_manifest.build_manifest(payload['textures'])
+        if upload:
+            with timing.stage('upload_assets'):
+                uploader.upload_assets(payload.get('textures'), [payload['scene']])
+        if cost_sample is not None:
+            with timing.stage('estimate_cost'):
+                cost_model.add_scheduling_hint(payload, cost_sample)
+        timing.attach(payload)
+        response = request_manager.submit_job(payload, timing)
+        result = 'queued' if response is None else 'submitted'
+        if response is not None and cost_sample is not None:
+            record_cost_sample(response, cost_sample)
+        return response
+    finally:
+        timing.set(result=result)
+        timing.log()
+
+
+def record_cost_sample(response, cost_sample):
+    """Zapamiętuje w historii zadań cechy sceny zarejestrowanego zadania (patrz moduł *cost_model*).
+    Wykonywana w wątku roboczym, bo zapisuje historię na dysku.
+
+    :param response: odpowiedź serwera na zgłoszenie
+    :type response: requests.Response
+    :param cost_sample: cechy sceny odczytane przez operator
+    :type cost_sample: dict
+    """
+    job_id = job_status.job_id_from_response(response)
+    if job_id is None:
+        return
+    try:
+        cost_model.get_history().add_pending(job_id, cost_sample)
+    except (OSError, TypeError, ValueError):
+        config.logger.error("Could not store render cost sample", exc_info=True)
+
+
+def complete_and_submit_batch(request_manager, payload, upload=False):
+    """Wykonywana w wątku roboczym. Uzupełnia wspólną listę tekstur zbiorczego zgłoszenia
+    o rozmiary i skróty zawartości, opcjonalnie wysyła plik sceny i tekstury na farmę
+    i wysyła zadania RenderDockowi.
+
+    :param request_manager: obiekt komunikujący się z RenderDockiem
+    :type request_manager: RequestManager
+    :param payload: dane zbiorczego zgłoszenia przygotowane przez *batch.dedupe()*
+    :type payload: dict
+    :param upload: czy wysłać plik sceny i tekstury, domyślnie False
+    :type upload: boolean
+    :raises: FileNotFoundError: plik tekstury zniknął po odczytaniu sceny
+    :raises: RequestException: serwer odrzucił zgłoszenie albo nie udało się wysłać plików
+    :return: wyniki zgłoszenia poszczególnych zadań albo None, jeżeli zadania trafiły do kolejki
+    :rtype: list
+    """
+    common = payload['common']
+    if common.get('textures'):
+        common['textures'] = texture_manifest.build_manifest(common['textures'])
+    if upload:
+        scenes = [common['scene']] if 'scene' in common else [job['scene'] for job in payload['jobs']]
+        uploader.upload_assets(common.get('textures'), scenes)
+    return request_manager.submit_batch(payload)
+
+
+def start_spool_drainer():
+    """Uruchamia wątek ponawiający wysyłanie zadań z kolejki przez współdzielony *RequestManager*.
+    """
+    spool.start_drainer(lambda payload, key: RequestManager.shared().post_job_data(payload, idempotency_key=key),
+                        (errors.RetryableRequestError,))
+
 
 class RequestManager():
     """
     Odpowiada za komunikację z RenderDockiem.
+    Utrzymuje sesję HTTP z pulą połączeń (keep-alive), dzięki czemu kolejne zadania
+    wysyłane do tego samego serwera nie nawiązują za każdym razem nowego połączenia.
+    Wywołania operatora korzystają ze wspólnej instancji zwracanej przez *shared()*,
+    zamykanej przy wyrejestrowaniu wtyczki.
+
+    :param pool_size: maksymalna liczba połączeń utrzymywanych z serwerem
+    :type pool_size: int
+    :param session: sesja HTTP tworzona przy pierwszym wysłaniu zadania
+    :type session: requests.Session
+    :param accepted_encodings: kodowania treści żądań (*Content-Encoding*) akceptowane przez serwer
+    :type accepted_encodings: set
     """
 
-    def post_job_data(self, payload):
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_size=None):
+        """Kontruktor klasy. Sesja nie jest tworzona, dopóki nie będzie potrzebna.
+
+        :param pool_size: maksymalna liczba połączeń, domyślnie *config.pool_size*
+        :type pool_size: int
+        """
+        self.pool_size = pool_size or config.pool_size
+        self.session = None
+        self.accepted_encodings = set(config.request_encodings)
+        self._session_lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        """Zwraca instancję współdzieloną przez wszystkie wywołania operatora.
+
+        :return: współdzielony obiekt komunikujący się z RenderDockiem
+        :rtype: RequestManager
+        """
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+            return cls._shared
+
+    @classmethod
+    def close_shared(cls):
+        """Zamyka połączenia instancji współdzielonej. Wywoływana przy wyrejestrowaniu wtyczki.
+        """
+        with cls._shared_lock:
+            shared, cls._shared = cls._shared, None
+
+        if shared is not None:
+            shared.close()
+
+    def get_session(self):
+        """Zwraca sesję HTTP, tworząc ją przy pierwszym użyciu.
+
+        :return: sesja z pulą połączeń o rozmiarze *pool_size*
+        :rtype: requests.Session
+        """
+        with self._session_lock:
+            if self.session is None:
+                adapter = requests.adapters.HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=self.pool_size,
+                    pool_block=config.pool_block)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                session.headers['Connection'] = 'keep-alive'
+                self.session = session
+            return self.session
+
+    def close(self):
+        """Zamyka sesję HTTP i wszystkie połączenia z puli.
+        """
+        with self._session_lock:
+            session, self.session = self.session, None
+
+        if session is not None:
+            session.close()
+
+    def post_job_data(self, payload, url=None, timing=timings.NULL_TIMING, idempotency_key=None):
         """Wysyła dane zadania w formacie JSON RenderDockowi, uruchamiając proces rejestracji zadania.
         
         :param payload: słownik z danymi zadania przeznaczonymi do wysłania RenderDockowi
         :type payload: dict
-        :raises: RequestException
+        :param url: adres, pod który wysyłane są dane, domyślnie *config.server*
+        :type url: str
+        :param timing: pomiar czasu zgłoszenia, do którego dodawane są etapy *serialize* i *post*
+            oraz rozmiar danych zadania (*payload_bytes*)
+        :type timing: timing.Timing
+        :param idempotency_key: klucz wysyłany w nagłówku *Idempotency-Key*, taki sam przy każdym
+            ponowieniu zgłoszenia tego samego zadania (patrz moduł *spool*)
+        :type idempotency_key: str
+        :raises: RetryableRequestError: błąd przejściowy, wysłanie można ponowić
+        :raises: RequestException: serwer odrzucił zadanie
+        :raises: TypeError: danych zadania nie można zapisać w formacie JSON
         :return: odpowiedź serwera
         :rtype: dict
         """
-        headers = {'content-type': 'application/json'}
-        
-        print(json.dumps(payload))
+        with timing.stage('serialize'):
+            body = serialization.PayloadBody(payload)
+        config.payload_logger.debug("Job data: %s", body)
 
         try:
-            r = requests.post(config.server, data=json.dumps(payload), headers=headers)
+            with timing.stage('post'):
+                r = self.send_body(body, url, idempotency_key)
+            timing.set(payload_bytes=body.size)
             r.raise_for_status()
-            print(r.text)
+            # r.text dekoduje całą odpowiedź, więc jest odczytywane tylko przy włączonym log_payloads
+            if not config.payload_logger.disabled and config.payload_logger.isEnabledFor(logging.DEBUG):
+                config.payload_logger.debug("Server response: %s", r.text)
         except requests.exceptions.RequestException as error:
             config.logger.error(str(error), exc_info=True)
+            if self.is_retryable(error):
+                raise errors.RetryableRequestError("Request error occured")
             raise requests.exceptions.RequestException("Request error occured")
         return r
+
+    def send_body(self, body, url=None, idempotency_key=None):
+        """Wysyła treść żądania, kompresując ją, jeżeli jest duża, a serwer akceptuje kompresję.
+        Treść kodowana strumieniowo jest wysyłana fragmentami (*Transfer-Encoding: chunked*).
+        Jeżeli serwer poda w odpowiedzi nagłówek *Accept-Encoding*, kolejne żądania używają tylko
+        wymienionych w nim kodowań. Jeżeli odrzuci kodowanie (415), żądanie jest wysyłane
+        ponownie bez niego. Czas oczekiwania na połączenie i odpowiedź jest ograniczony
+        (*config.request_connect_timeout*, *config.request_read_timeout*).
+
+        :param body: dane zadania zakodowane w formacie JSON
+        :type body: serialization.PayloadBody
+        :param url: adres, pod który wysyłane są dane, domyślnie *config.server*
+        :type url: str
+        :param idempotency_key: klucz idempotentności zgłoszenia, patrz *post_job_data()*
+        :type idempotency_key: str
+        :return: odpowiedź serwera
+        :rtype: requests.Response
+        """
+        headers = {'content-type': 'application/json'}
+        if idempotency_key is not None:
+            headers['idempotency-key'] = idempotency_key
+
+        encoding = compression.choose_encoding(body.size_hint(), self.accepted_encodings)
+        if encoding is not None:
+            headers['content-encoding'] = encoding
+
+        if body.streamed:
+            data = compression.encode_chunks(body.chunks(), encoding)
+        else:
+            data = compression.encode(body.data, encoding)
+
+        r = self.get_session().post(url or config.server, data=data, headers=headers,
+                                    timeout=(config.request_connect_timeout, config.request_read_timeout))
+
+        if 'accept-encoding' in r.headers:
+            self.accepted_encodings = compression.parse_accept_encoding(r.headers['accept-encoding'])
+
+        if r.status_code == 415 and encoding is not None:
+            self.accepted_encodings.discard(encoding)
+            return self.send_body(body, url, idempotency_key)
+
+        return r
+
+    def submit_job(self, payload, timing=timings.NULL_TIMING):
+        """Wysyła dane zadania RenderDockowi. Jeżeli wystąpi błąd przejściowy, zadanie
+        jest zapisywane w kolejce na dysku i wysyłane ponownie w tle (patrz moduł *spool*).
+        Wszystkie próby wysłania mają ten sam klucz idempotentności, więc zadanie zarejestrowane
+        mimo błędu nie zostanie utworzone ponownie.
+
+        :param payload: słownik z danymi zadania przeznaczonymi do wysłania RenderDockowi
+        :type payload: dict
+        :param timing: pomiar czasu zgłoszenia (patrz *post_job_data()*)
+        :type timing: timing.Timing
+        :raises: RequestException: serwer odrzucił zadanie
+        :return: odpowiedź serwera albo None, jeżeli zadanie trafiło do kolejki
+        :rtype: requests.Response
+        """
+        key = uuid.uuid4().hex
+        try:
+            return self.post_job_data(payload, timing=timing, idempotency_key=key)
+        except errors.RetryableRequestError:
+            spool.enqueue(payload, key)
+            start_spool_drainer()
+            return None
+
+    def submit_batch(self, payload):
+        """Wysyła zbiorcze zgłoszenie zadań RenderDockowi (*config.batch_server*). Jeżeli wystąpi
+        błąd przejściowy, zadania są zapisywane w kolejce na dysku osobno, jako pojedyncze zadania,
+        z kluczami idempotentności wyprowadzonymi z klucza zgłoszenia zbiorczego.
+
+        :param payload: dane zbiorczego zgłoszenia przygotowane przez *batch.dedupe()*
+        :type payload: dict
+        :raises: RequestException: serwer odrzucił zgłoszenie
+        :return: wyniki zgłoszenia poszczególnych zadań -- słowniki z kluczem zadania (*key*),
+            stanem (*status*, ``"created"`` dla zarejestrowanych zadań) i opcjonalnym komunikatem
+            (*message*) -- albo None, jeżeli zadania trafiły do kolejki
+        :rtype: list
+        """
+        key = uuid.uuid4().hex
+        try:
+            r = self.post_job_data(payload, config.batch_server, idempotency_key=key)
+        except errors.RetryableRequestError:
+            # Klucz zadania w kolejce wskazuje zbiorcze zgłoszenie, więc zadanie zarejestrowane
+            # mimo błędu nie zostanie utworzone ponownie
+            for job_key, job in batch.expand(payload, keys=True):
+                spool.enqueue(job, '{}:{}'.format(key, job_key))
+            start_spool_drainer()
+            return None
+
+        try:
+            return r.json()['jobs']
+        except (ValueError, KeyError):
+            raise requests.exceptions.RequestException("Invalid batch response: {}".format(r.text[:200]))
+
+    @staticmethod
+    def is_retryable(error):
+        """Sprawdza, czy po danym błędzie warto ponowić wysłanie zadania.
+
+        :param error: błąd zgłoszony przez bibliotekę *requests*
+        :type error: requests.exceptions.RequestException
+        :return: True dla błędów połączenia, przekroczenia czasu i odpowiedzi 5xx
+        :rtype: boolean
+        """
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return True
+        response = getattr(error, 'response', None)
+        return response is not None and response.status_code >= 500
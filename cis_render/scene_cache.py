@@ -0,0 +1,249 @@
+"""
+Moduł odpowiedzialny za pamięć podręczną ustawień sceny odczytywanych przez operator wtyczki.
+
+Ustawienia są podzielone na sekcje (*output*, *cycles*, *eevee*, *workbench*, *images*).
+Sekcja jest odczytywana ponownie tylko wtedy, gdy od poprzedniego wysłania zadania zmieniły się
+dane, od których zależy -- informują o tym zdarzenia *depsgraph_update_post* programu *Blender*.
+Funkcja obsługi zdarzenia tylko oznacza scenę jako zmienioną (zdarzenie występuje też przy
+odtwarzaniu animacji), a odcisk ustawień jest obliczany dopiero przy wysyłaniu zadania (*check_settings()*).
+Zmiana samych ustawień zadania (*JobProperties*, np. nazwy zadania) nie unieważnia żadnej sekcji.
+
+Reguły unieważniania:
+    *   zmiana sceny (ID typu *Scene*) -- sekcje *output*, *cycles*, *eevee* i *workbench* tej sceny,
+        jeżeli zmieniły się wartości ustawień renderowania (porównywany jest odcisk wartości
+        struktur z *FINGERPRINT_STRUCTS* i zakresu klatek, patrz *settings_fingerprint()*); zmiana
+        ustawień zadania też oznacza scenę jako zmienioną, ale nie zmienia odcisku,
+    *   zmiana obrazu, materiału, drzewa węzłów, świata, światła, tekstury albo cieniowania
+        obiektu -- sekcja *images*, wspólna dla wszystkich scen, bo obrazy należą do *bpy.data*,
+    *   wczytanie pliku, cofnięcie i ponowienie operacji -- wszystkie sekcje.
+"""
+import functools
+
+import bpy
+
+from . import config
+
+
+SCENE_SECTIONS = ('output', 'cycles', 'eevee', 'workbench')
+GLOBAL_SECTIONS = ('images',)
+
+IMAGE_ID_TYPES = {'Image', 'Material', 'World', 'ShaderNodeTree', 'Texture'}
+
+# Struktury sceny, z których odczytywane są sekcje output, cycles, eevee i workbench (oprócz widoków render.views)
+FINGERPRINT_STRUCTS = ('render', 'render.image_settings', 'cycles', 'eevee', 'display', 'display.shading',
+                       'view_settings', 'display_settings', 'sequencer_colorspace_settings')
+
+# Własności samej sceny odczytywane do sekcji output (bez frame_current, które zmienia się przy odtwarzaniu)
+FINGERPRINT_SCENE_PROPERTIES = ('frame_start', 'frame_end', 'frame_step')
+
+
+class SceneSnapshot():
+    """Zapamiętane sekcje ustawień jednej sceny. Na początku wszystkie sekcje są nieaktualne.
+
+    :param sections: słownik sekcja -> zapamiętana wartość
+    :type sections: dict
+    :param stale: sekcje do ponownego odczytania
+    :type stale: set
+    """
+
+    def __init__(self, sections):
+        self.sections = {}
+        self.stale = set(sections)
+
+    def is_stale(self, section):
+        """Sprawdza, czy sekcję trzeba odczytać ponownie.
+
+        :param section: nazwa sekcji
+        :type section: str
+        :rtype: boolean
+        """
+        return not config.scene_cache_enabled or section in self.stale
+
+    def get(self, section):
+        """Zwraca zapamiętaną wartość sekcji.
+
+        :param section: nazwa sekcji
+        :type section: str
+        """
+        return self.sections[section]
+
+    def store(self, section, value):
+        """Zapamiętuje odczytaną wartość sekcji.
+
+        :param section: nazwa sekcji
+        :type section: str
+        :param value: odczytane ustawienia
+        """
+        self.sections[section] = value
+        self.stale.discard(section)
+
+    def invalidate(self, sections):
+        """Oznacza sekcje jako nieaktualne.
+
+        :param sections: nazwy sekcji
+        :type sections: iterable
+        """
+        self.stale.update(sections)
+
+
+_scenes = {}
+_global = SceneSnapshot(GLOBAL_SECTIONS)
+_fingerprints = {}
+_changed = set()
+
+
+def get_snapshot(scene_name):
+    """Zwraca zapamiętane sekcje sceny.
+
+    :param scene_name: nazwa sceny
+    :type scene_name: str
+    :rtype: SceneSnapshot
+    """
+    snapshot = _scenes.get(scene_name)
+    if snapshot is None:
+        snapshot = _scenes[scene_name] = SceneSnapshot(SCENE_SECTIONS)
+    return snapshot
+
+
+def get_global_snapshot():
+    """Zwraca zapamiętane sekcje wspólne dla wszystkich scen.
+
+    :rtype: SceneSnapshot
+    """
+    return _global
+
+
+def invalidate_all():
+    """Oznacza wszystkie sekcje wszystkich scen jako nieaktualne.
+    """
+    _scenes.clear()
+    _fingerprints.clear()
+    _changed.clear()
+    _global.invalidate(GLOBAL_SECTIONS)
+
+
+def struct_values(struct):
+    """Zwraca wartości prostych własności RNA struktury (bez wskaźników i kolekcji).
+
+    :param struct: struktura RNA, np. *scene.render*
+    :type struct: bpy.types.bpy_struct
+    :rtype: tuple
+    """
+    values = []
+    for prop in struct.bl_rna.properties:
+        if prop.type in ('POINTER', 'COLLECTION') or prop.identifier == 'rna_type':
+            continue
+        value = getattr(struct, prop.identifier)
+        values.append(tuple(value) if getattr(prop, 'array_length', 0) else value)
+    return tuple(values)
+
+
+def settings_fingerprint(scene):
+    """Zwraca odcisk ustawień renderowania sceny: zakres klatek (*FINGERPRINT_SCENE_PROPERTIES*),
+    wartości własności struktur z *FINGERPRINT_STRUCTS* i widoków stereoskopii. Struktury, których
+    nie ma (np. wyłączony silnik Cycles), są pomijane.
+
+    :param scene: scena
+    :type scene: bpy.types.Scene
+    :rtype: tuple
+    """
+    values = [tuple(getattr(scene, name) for name in FINGERPRINT_SCENE_PROPERTIES)]
+    for path in FINGERPRINT_STRUCTS:
+        try:
+            struct = functools.reduce(getattr, path.split('.'), scene)
+        except AttributeError:
+            values.append(None)
+            continue
+        values.append(struct_values(struct))
+    values.extend(struct_values(view) for view in scene.render.views)
+    return tuple(values)
+
+
+def check_settings(scene):
+    """Unieważnia sekcje sceny, jeżeli od poprzedniego wywołania zmienił się odcisk ustawień renderowania.
+    Odcisk jest obliczany tylko dla scen nowych i oznaczonych jako zmienione przez *on_depsgraph_update()*.
+    Wywoływana przez operator przed odczytaniem sekcji.
+
+    :param scene: scena
+    :type scene: bpy.types.Scene
+    """
+    if scene.name in _fingerprints and scene.name not in _changed:
+        return
+
+    _changed.discard(scene.name)
+    fingerprint = settings_fingerprint(scene)
+    if _fingerprints.get(scene.name) != fingerprint:
+        _fingerprints[scene.name] = fingerprint
+        get_snapshot(scene.name).invalidate(SCENE_SECTIONS)
+
+
+def is_image_id(id_data):
+    """Sprawdza, czy zmiana danego ID może zmienić listę obrazów używanych w scenie.
+
+    :param id_data: zmieniony blok danych
+    :type id_data: bpy.types.ID
+    :rtype: boolean
+    """
+    identifier = id_data.bl_rna.identifier
+    return identifier in IMAGE_ID_TYPES or identifier.endswith('Light') or identifier.endswith('Texture')
+
+
+def on_depsgraph_update(scene, depsgraph=None):
+    """Obsługuje zdarzenie *depsgraph_update_post*, unieważniając sekcje zależne od zmienionych danych.
+    Zmieniona scena jest tylko oznaczana -- jej sekcje są unieważniane przez *check_settings()*, jeżeli
+    zmienił się odcisk ustawień renderowania. Starsze wersje programu *Blender* nie przekazują grafu
+    zależności -- wtedy unieważniane są wszystkie sekcje sceny.
+
+    :param scene: scena, której graf zależności został zaktualizowany
+    :type scene: bpy.types.Scene
+    :param depsgraph: zaktualizowany graf zależności
+    :type depsgraph: bpy.types.Depsgraph
+    """
+    if depsgraph is None:
+        get_snapshot(scene.name).invalidate(SCENE_SECTIONS)
+        _global.invalidate(GLOBAL_SECTIONS)
+        return
+
+    for update in depsgraph.updates:
+        id_data = update.id
+
+        if id_data.bl_rna.identifier == 'Scene':
+            _changed.add(id_data.name)
+
+        elif is_image_id(id_data) or (id_data.bl_rna.identifier == 'Object' and update.is_updated_shading):
+            _global.invalidate(GLOBAL_SECTIONS)
+
+
+def on_file_change(*args):
+    """Obsługuje wczytanie pliku, cofnięcie i ponowienie operacji, unieważniając wszystkie sekcje.
+    """
+    invalidate_all()
+
+
+def handler_lists():
+    """Zwraca pary (lista funkcji obsługi zdarzenia, funkcja obsługi) używane przez wtyczkę.
+    """
+    return (
+        (bpy.app.handlers.depsgraph_update_post, on_depsgraph_update),
+        (bpy.app.handlers.load_post, on_file_change),
+        (bpy.app.handlers.undo_post, on_file_change),
+        (bpy.app.handlers.redo_post, on_file_change),
+    )
+
+
+def register_handlers():
+    """Dodaje funkcje obsługi zdarzeń programu *Blender*. Wywoływana przy rejestracji wtyczki.
+    """
+    invalidate_all()
+    for handlers, handler in handler_lists():
+        if handler not in handlers:
+            handlers.append(bpy.app.handlers.persistent(handler))
+
+
+def unregister_handlers():
+    """Usuwa funkcje obsługi zdarzeń dodane przez *register_handlers()*.
+    """
+    for handlers, handler in handler_lists():
+        if handler in handlers:
+            handlers.remove(handler)
+    invalidate_all()
@@ -0,0 +1,196 @@
+"""
+Moduł odpowiedzialny za kodowanie danych zadania w formacie JSON.
+
+Dane zadania są kodowane raz, do bufora używanego przy wysłaniu i ewentualnym ponownym wysłaniu
+(np. bez kompresji odrzuconej przez serwer). Jeżeli zainstalowany jest szybszy koder (pakiet *orjson*), jest używany
+zamiast modułu *json* z biblioteki standardowej. Dane z bardzo długą listą tekstur są kodowane
+strumieniowo, fragmentami, które są wysyłane od razu po zakodowaniu -- w pamięci nie ma wtedy
+pełnej kopii zakodowanych danych.
+"""
+import json
+
+from . import config
+
+
+def load_orjson():
+    """Zwraca funkcję kodującą z pakietu *orjson* albo None, jeżeli pakiet nie jest zainstalowany.
+
+    :rtype: callable
+    """
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson.dumps
+
+
+def load_json():
+    """Zwraca funkcję kodującą z użyciem modułu *json* z biblioteki standardowej.
+
+    :rtype: callable
+    """
+    encoder = json.JSONEncoder(ensure_ascii=False, check_circular=False, separators=(',', ':'))
+    return lambda obj: encoder.encode(obj).encode('utf-8')
+
+
+# Dostępne kodery w kolejności preferencji: nazwa -> funkcja zwracająca funkcję obj -> bytes albo None
+ENCODERS = {
+    'orjson': load_orjson,
+    'json': load_json,
+}
+
+_dumps = {}
+
+
+def get_dumps(name=None):
+    """Zwraca funkcję kodującą obiekt do JSON (w UTF-8). Przy nazwie *auto* wybierany jest
+    pierwszy dostępny koder z *ENCODERS*.
+
+    :param name: nazwa kodera, domyślnie *config.json_encoder*
+    :type name: str
+    :raises: ValueError: nieznany albo niedostępny koder
+    :rtype: callable
+    """
+    name = name or config.json_encoder
+
+    if name not in _dumps:
+        names = list(ENCODERS) if name == 'auto' else [name]
+        for candidate in names:
+            if candidate not in ENCODERS:
+                raise ValueError("Unknown JSON encoder: {}".format(candidate))
+            dumps = ENCODERS[candidate]()
+            if dumps is not None:
+                _dumps[name] = dumps
+                break
+        else:
+            raise ValueError("JSON encoder {} is not available".format(name))
+
+    return _dumps[name]
+
+
+def dumps(obj):
+    """Koduje obiekt do JSON.
+
+    :param obj: obiekt do zakodowania
+    :raises: TypeError: obiektu nie można zapisać w formacie JSON
+    :rtype: bytes
+    """
+    return get_dumps()(obj)
+
+
+def iter_pieces(obj, dumps):
+    """Zwraca kolejne części zakodowanego obiektu: elementy słowników (rekurencyjnie)
+    i list są kodowane osobno funkcją *dumps*.
+
+    :param obj: obiekt do zakodowania
+    :param dumps: funkcja kodująca zwrócona przez *get_dumps()*
+    :type dumps: callable
+    :rtype: iterator
+    """
+    if isinstance(obj, dict):
+        yield b'{'
+        for index, (key, value) in enumerate(obj.items()):
+            yield (b',' if index else b'') + dumps(key) + b':'
+            yield from iter_pieces(value, dumps)
+        yield b'}'
+    elif isinstance(obj, (list, tuple)):
+        yield b'['
+        for index, item in enumerate(obj):
+            yield (b',' if index else b'') + dumps(item)
+        yield b']'
+    else:
+        yield dumps(obj)
+
+
+def iter_encode(obj, chunk_size=None):
+    """Koduje obiekt do JSON fragmentami. Słowniki i listy są rozkładane na elementy kodowane
+    osobno, więc w pamięci nie powstaje pełna kopia zakodowanego obiektu.
+
+    :param obj: obiekt do zakodowania
+    :param chunk_size: przybliżony rozmiar fragmentu w bajtach, domyślnie *config.stream_chunk_size*
+    :type chunk_size: int
+    :raises: TypeError: obiektu nie można zapisać w formacie JSON
+    :return: kolejne fragmenty zakodowanego obiektu
+    :rtype: iterator
+    """
+    chunk_size = chunk_size or config.stream_chunk_size
+    encode = get_dumps()
+    buffer = bytearray()
+
+    for piece in iter_pieces(obj, encode):
+        buffer += piece
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+
+    if buffer:
+        yield bytes(buffer)
+
+
+class PayloadBody():
+    """Dane zadania zakodowane do wysłania. Małe dane są kodowane od razu, do bufora *data*.
+    Dane z liczbą tekstur co najmniej *config.stream_min_textures* są kodowane przy każdym
+    odczycie *chunks()* od nowa, fragmentami.
+
+    :param payload: dane zadania
+    :type payload: dict
+    :param data: zakodowane dane albo None, jeżeli są kodowane strumieniowo
+    :type data: bytes
+    :param size: rozmiar zakodowanych danych w bajtach; przy kodowaniu strumieniowym znany
+        dopiero po odczytaniu wszystkich fragmentów (wcześniej None)
+    :type size: int
+    """
+
+    def __init__(self, payload, stream=None):
+        """Konstruktor klasy.
+
+        :param payload: dane zadania
+        :type payload: dict
+        :param stream: czy kodować dane strumieniowo, domyślnie zależnie od liczby tekstur
+        :type stream: boolean
+        :raises: TypeError: danych nie można zapisać w formacie JSON
+        """
+        if stream is None:
+            stream = len(payload.get('textures') or ()) >= config.stream_min_textures
+
+        self.payload = payload
+        self.data = None if stream else dumps(payload)
+        self.size = None if stream else len(self.data)
+
+    @property
+    def streamed(self):
+        """Czy dane są kodowane strumieniowo.
+
+        :rtype: boolean
+        """
+        return self.data is None
+
+    def size_hint(self):
+        """Zwraca rozmiar zakodowanych danych albo, przy kodowaniu strumieniowym, próg kompresji
+        (*config.compression_threshold*) -- dane kodowane strumieniowo są zawsze duże.
+
+        :rtype: int
+        """
+        return config.compression_threshold if self.streamed else len(self.data)
+
+    def chunks(self):
+        """Zwraca zakodowane dane we fragmentach.
+
+        :rtype: iterator
+        """
+        if self.streamed:
+            return self._count(iter_encode(self.payload))
+        return iter((self.data,))
+
+    def _count(self, chunks):
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            yield chunk
+        self.size = size
+
+    def __str__(self):
+        # Wywoływana przez moduł logging tylko wtedy, gdy komunikat ma zostać zapisany
+        if self.streamed:
+            return b''.join(self.chunks()).decode('utf-8')
+        return self.data.decode('utf-8')
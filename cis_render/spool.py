@@ -0,0 +1,317 @@
+"""
+Moduł odpowiedzialny za kolejkę zadań, których nie udało się wysłać RenderDockowi
+z powodu błędu przejściowego (brak połączenia, przekroczony czas oczekiwania, błąd serwera 5xx).
+
+Zadania są zapisywane w dzienniku na dysku (jeden obiekt JSON w wierszu, tylko dopisywanie),
+więc kolejka przetrwa ponowne uruchomienie programu *Blender*. Wątek w tle ponawia wysyłanie
+zadań z wykładniczo rosnącym, losowo rozproszonym odstępem (exponential backoff with jitter).
+
+Identyfikator zadania w kolejce jest wysyłany przy każdej próbie jako klucz idempotentności
+(nagłówek *Idempotency-Key*), dzięki czemu serwer, który zarejestrował zadanie mimo błędu
+(np. przekroczonego czasu oczekiwania na odpowiedź), nie utworzy go ponownie.
+"""
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+from . import config
+
+
+class Spool():
+    """Trwała kolejka zadań oczekujących na wysłanie.
+
+    Dziennik zawiera rekordy dwóch rodzajów:
+        *   ``{"op": "add", "id": ..., "payload": ...}`` -- zadanie dodane do kolejki,
+        *   ``{"op": "done", "id": ...}`` -- zadanie wysłane albo odrzucone przez serwer.
+
+    Stan kolejki odtwarzany jest przez odczytanie dziennika od początku.
+
+    :param filename: ścieżka do pliku dziennika
+    :type filename: str
+    :param pending: zadania oczekujące na wysłanie, w kolejności dodania
+    :type pending: dict
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.pending = {}
+        self._finished = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Odtwarza stan kolejki z dziennika. Niekompletny ostatni wiersz
+        (np. po przerwaniu zapisu) jest pomijany.
+        """
+        pending = {}
+        finished = 0
+
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        config.logger.warning("Skipping damaged spool record in {}".format(self.filename))
+                        continue
+
+                    if record.get('op') == 'add':
+                        pending[record['id']] = record['payload']
+                    elif record.get('op') == 'done' and pending.pop(record['id'], None) is not None:
+                        finished += 1
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            self.pending = pending
+            self._finished = finished
+
+    def add(self, payload, job_id=None):
+        """Dopisuje zadanie do kolejki.
+
+        :param payload: dane zadania
+        :type payload: dict
+        :param job_id: identyfikator zadania, np. klucz idempotentności użyty przy pierwszej próbie
+            wysłania; domyślnie nowy losowy identyfikator
+        :type job_id: str
+        :return: identyfikator zadania w kolejce
+        :rtype: str
+        """
+        job_id = job_id or uuid.uuid4().hex
+
+        with self._lock:
+            self._append({'op': 'add', 'id': job_id, 'time': time.time(), 'payload': payload})
+            self.pending[job_id] = payload
+
+        return job_id
+
+    def remove(self, job_id):
+        """Usuwa zadanie z kolejki po jego wysłaniu albo odrzuceniu przez serwer.
+        Gdy kolejka jest pusta lub dziennik zawiera dużo zakończonych zadań, dziennik jest przepisywany.
+
+        :param job_id: identyfikator zadania w kolejce
+        :type job_id: str
+        """
+        with self._lock:
+            if self.pending.pop(job_id, None) is None:
+                return
+
+            self._finished += 1
+            if not self.pending or self._finished > max(64, len(self.pending)):
+                self._compact()
+            else:
+                self._append({'op': 'done', 'id': job_id})
+
+    def items(self):
+        """Zwraca listę par (identyfikator, dane zadania) w kolejności dodania.
+
+        :rtype: list
+        """
+        with self._lock:
+            return list(self.pending.items())
+
+    def depth(self):
+        """Zwraca liczbę zadań oczekujących na wysłanie.
+
+        :rtype: int
+        """
+        return len(self.pending)
+
+    def _append(self, record):
+        with open(self.filename, 'a', encoding='utf-8') as journal:
+            journal.write(json.dumps(record) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _compact(self):
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'w', encoding='utf-8') as journal:
+            for job_id, payload in self.pending.items():
+                journal.write(json.dumps({'op': 'add', 'id': job_id, 'payload': payload}) + '\n')
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(temp_filename, self.filename)
+        self._finished = 0
+
+
+def backoff_delay(attempt, base=None, maximum=None):
+    """Zwraca czas oczekiwania przed kolejną próbą wysłania zadania (full jitter):
+    losową wartość z przedziału od 0 do *base* * 2^*attempt*, ograniczoną przez *maximum*.
+
+    :param attempt: numer nieudanej próby, licząc od 0
+    :type attempt: int
+    :return: czas oczekiwania w sekundach
+    :rtype: float
+    """
+    base = config.spool_backoff_base if base is None else base
+    maximum = config.spool_backoff_max if maximum is None else maximum
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+class SpoolDrainer(threading.Thread):
+    """Wątek w tle ponawiający wysyłanie zadań z kolejki.
+    Zadanie jest usuwane z kolejki po wysłaniu albo po błędzie, którego ponowienie nic nie da
+    (np. odpowiedź 400). Po błędzie przejściowym próba jest powtarzana po czasie *backoff_delay()*.
+
+    :param spool: kolejka zadań
+    :type spool: Spool
+    :param send: funkcja wysyłająca dane zadania, wywoływana z danymi i identyfikatorem zadania
+        w kolejce (kluczem idempotentności), np. *RequestManager.post_job_data*
+    :type send: callable
+    :param retry_on: wyjątki oznaczające błąd przejściowy
+    :type retry_on: tuple
+    """
+
+    def __init__(self, spool, send, retry_on):
+        super().__init__(name='cis_render_spool', daemon=True)
+        self.spool = spool
+        self.send = send
+        self.retry_on = retry_on
+        self.attempts = {}
+        self.next_attempt = {}
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def wake(self):
+        """Budzi wątek, np. po dodaniu nowego zadania do kolejki.
+        """
+        self._wakeup.set()
+
+    def stop(self):
+        """Zatrzymuje wątek po zakończeniu bieżącej próby wysłania.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self):
+        while not self._stopped.is_set():
+            timeout = self.drain()
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
+
+    def drain(self):
+        """Próbuje wysłać wszystkie zadania, dla których minął czas oczekiwania.
+
+        :return: czas do najbliższej zaplanowanej próby w sekundach albo None, jeżeli kolejka jest pusta
+        :rtype: float
+        """
+        for job_id, payload in self.spool.items():
+            if self._stopped.is_set():
+                return None
+            if self.next_attempt.get(job_id, 0) > time.monotonic():
+                continue
+
+            try:
+                self.send(payload, job_id)
+            except self.retry_on:
+                attempt = self.attempts.get(job_id, 0)
+                self.attempts[job_id] = attempt + 1
+                self.next_attempt[job_id] = time.monotonic() + backoff_delay(attempt)
+                continue
+            except Exception:
+                config.logger.error("Spooled job {} rejected, dropping it".format(job_id), exc_info=True)
+
+            self.spool.remove(job_id)
+            self.attempts.pop(job_id, None)
+            self.next_attempt.pop(job_id, None)
+
+        if not self.next_attempt:
+            return None
+        return max(0.0, min(self.next_attempt.values()) - time.monotonic())
+
+
+_spool = None
+_drainer = None
+_lock = threading.Lock()
+
+
+def get_spool():
+    """Zwraca kolejkę zadań, wczytując ją z dziennika przy pierwszym użyciu.
+
+    :rtype: Spool
+    """
+    global _spool
+
+    with _lock:
+        if _spool is None:
+            _spool = Spool(config.spool_file)
+        return _spool
+
+
+def has_pending():
+    """Sprawdza, czy w kolejce mogą być zadania, bez wczytywania dziennika, jeżeli nie był jeszcze wczytany.
+
+    :return: False, jeżeli kolejka jest pusta albo dziennik nie istnieje
+    :rtype: boolean
+    """
+    if _spool is not None:
+        return _spool.depth() > 0
+    try:
+        return os.path.getsize(config.spool_file) > 0
+    except OSError:
+        return False
+
+
+def loaded_depth():
+    """Zwraca liczbę zadań w kolejce bez wczytywania dziennika. Wywoływana przy rysowaniu panelu.
+    Kolejka z zadaniami z poprzedniej sesji jest wczytywana przy rejestracji wtyczki (patrz *has_pending()*).
+
+    :return: liczba zadań albo 0, jeżeli kolejka nie została jeszcze wczytana
+    :rtype: int
+    """
+    spool = _spool
+    return spool.depth() if spool is not None else 0
+
+
+def start_drainer(send, retry_on):
+    """Uruchamia wątek ponawiający wysyłanie zadań z kolejki, jeżeli jeszcze nie działa.
+    Wywoływana przy rejestracji wtyczki, dzięki czemu zadania pozostałe w kolejce
+    z poprzedniej sesji zostaną wysłane.
+
+    :param send: funkcja wysyłająca dane zadania
+    :type send: callable
+    :param retry_on: wyjątki oznaczające błąd przejściowy
+    :type retry_on: tuple
+    """
+    global _drainer
+
+    spool = get_spool()
+    with _lock:
+        if _drainer is None or not _drainer.is_alive():
+            _drainer = SpoolDrainer(spool, send, retry_on)
+            _drainer.start()
+
+
+def enqueue(payload, job_id=None):
+    """Dodaje zadanie do kolejki i budzi wątek ponawiający wysyłanie.
+
+    :param payload: dane zadania
+    :type payload: dict
+    :param job_id: identyfikator zadania w kolejce (klucz idempotentności), patrz *Spool.add()*
+    :type job_id: str
+    :return: liczba zadań w kolejce
+    :rtype: int
+    """
+    spool = get_spool()
+    spool.add(payload, job_id)
+
+    with _lock:
+        if _drainer is not None:
+            _drainer.wake()
+
+    return spool.depth()
+
+
+def stop_drainer():
+    """Zatrzymuje wątek ponawiający wysyłanie. Zadania pozostają w dzienniku.
+    """
+    global _drainer
+
+    with _lock:
+        drainer, _drainer = _drainer, None
+
+    if drainer is not None:
+        drainer.stop()
@@ -0,0 +1,58 @@
+"""
+Moduł odpowiedzialny za wysyłanie danych zadań RenderDockowi w tle, tak żeby oczekiwanie
+na odpowiedź serwera nie blokowało interfejsu programu *Blender*.
+
+Dane sceny są odczytywane w głównym wątku (*bpy* nie jest bezpieczne wątkowo), a serializacja
+i wysłanie zadania odbywają się w puli wątków roboczych współdzielonej przez wszystkie
+wywołania operatora.
+"""
+import concurrent.futures
+import threading
+
+from . import config
+
+
+_executor = None
+_lock = threading.Lock()
+
+
+def get_executor():
+    """Zwraca pulę wątków roboczych, tworząc ją przy pierwszym użyciu.
+
+    :return: pula wątków wysyłających zadania
+    :rtype: concurrent.futures.ThreadPoolExecutor
+    """
+    global _executor
+
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=config.max_submissions,
+                thread_name_prefix='cis_render_submit')
+        return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """Zleca wykonanie funkcji w wątku roboczym.
+
+    :param fn: funkcja do wykonania w tle, np. *RequestManager.post_job_data*
+    :type fn: callable
+    :return: obiekt, przez który można sprawdzić, czy zadanie się zakończyło, i odczytać jego wynik
+    :rtype: concurrent.futures.Future
+    """
+    return get_executor().submit(fn, *args, **kwargs)
+
+
+def shutdown(wait=False):
+    """Zamyka pulę wątków roboczych. Wywoływana przy wyrejestrowaniu wtyczki.
+
+    :param wait: czy czekać na zakończenie wysyłanych zadań, domyślnie False
+    :type wait: boolean
+    """
+    global _executor
+
+    with _lock:
+        executor, _executor = _executor, None
+
+    if executor is not None:
+        executor.shutdown(wait=wait)
@@ -0,0 +1,176 @@
+"""
+Moduł odpowiedzialny za budowanie manifestu tekstur: listy plików użytych w scenie
+uzupełnionej o rozmiar i skrót (hash) zawartości każdego pliku.
+
+Dzięki skrótom RenderDock może sprawdzić, czy tekstura się zmieniła albo czy jest już
+dostępna na węźle farmy. Pliki są czytane fragmentami i haszowane równolegle, a wyniki
+zapisywane w pamięci podręcznej na dysku, kluczowanej ścieżką rzeczywistą, rozmiarem
+i czasem modyfikacji pliku -- ponowne wysłanie niezmienionej sceny nie haszuje niczego.
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+
+from . import config
+
+
+def hash_file(filename, chunk_size=None):
+    """Oblicza skrót zawartości pliku, czytając go fragmentami, bez wczytywania całego pliku do pamięci.
+
+    :param filename: ścieżka do pliku
+    :type filename: str
+    :param chunk_size: rozmiar fragmentu w bajtach, domyślnie *config.hash_chunk_size*
+    :type chunk_size: int
+    :return: skrót w postaci ``"<algorytm>:<hex>"``
+    :rtype: str
+    """
+    digest = hashlib.new(config.hash_algorithm)
+    buffer = bytearray(chunk_size or config.hash_chunk_size)
+    view = memoryview(buffer)
+
+    with open(filename, 'rb', buffering=0) as file:
+        while True:
+            size = file.readinto(buffer)
+            if not size:
+                break
+            digest.update(view[:size])
+
+    return "{}:{}".format(config.hash_algorithm, digest.hexdigest())
+
+
+class HashCache():
+    """Pamięć podręczna skrótów plików zapisywana na dysku w formacie JSON.
+    Wpis jest ważny tylko wtedy, gdy rozmiar i czas modyfikacji pliku się nie zmieniły.
+
+    :param filename: ścieżka do pliku pamięci podręcznej
+    :type filename: str
+    :param entries: słownik ścieżka rzeczywista -> [rozmiar, czas modyfikacji w ns, skrót]
+    :type entries: dict
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.entries = {}
+        self.changed = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Wczytuje pamięć podręczną z dysku. Uszkodzony plik jest ignorowany.
+        """
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as cache_file:
+                self.entries = json.load(cache_file)
+        except FileNotFoundError:
+            self.entries = {}
+        except ValueError:
+            config.logger.warning("Ignoring damaged hash cache {}".format(self.filename))
+            self.entries = {}
+
+    def save(self):
+        """Zapisuje pamięć podręczną na dysku, jeżeli się zmieniła.
+        """
+        with self._lock:
+            if not self.changed:
+                return
+            temp_filename = self.filename + '.tmp'
+            with open(temp_filename, 'w', encoding='utf-8') as cache_file:
+                json.dump(self.entries, cache_file)
+            os.replace(temp_filename, self.filename)
+            self.changed = False
+
+    def get(self, realpath, stat):
+        """Zwraca zapamiętany skrót pliku albo None, jeżeli plik się zmienił lub nie był haszowany.
+
+        :param realpath: ścieżka rzeczywista pliku
+        :type realpath: str
+        :param stat: wynik *os.stat()* dla pliku
+        :type stat: os.stat_result
+        :rtype: str
+        """
+        entry = self.entries.get(realpath)
+        if entry is not None and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        return None
+
+    def put(self, realpath, stat, digest):
+        """Zapamiętuje skrót pliku.
+
+        :param realpath: ścieżka rzeczywista pliku
+        :type realpath: str
+        :param stat: wynik *os.stat()* dla pliku
+        :type stat: os.stat_result
+        :param digest: skrót zawartości pliku
+        :type digest: str
+        """
+        with self._lock:
+            self.entries[realpath] = [stat.st_size, stat.st_mtime_ns, digest]
+            self.changed = True
+
+
+def build_manifest(images, cache=None, workers=None):
+    """Uzupełnia listę tekstur o rozmiar (*size*) i skrót zawartości (*hash*).
+    Wpisy wskazujące na ten sam plik (np. *foo.001* albo dowiązanie symboliczne)
+    są łączone w jeden, a nazwy pozostałych obrazów trafiają do listy *aliases*.
+    Skróty brakujące w pamięci podręcznej są obliczane równolegle.
+
+    :param images: lista słowników z nazwą (*name*) i ścieżką bezwzględną (*full_path*) tekstury
+    :type images: list
+    :param cache: pamięć podręczna skrótów, domyślnie wspólna, zapisywana w *config.hash_cache_file*
+    :type cache: HashCache
+    :param workers: liczba wątków haszujących, domyślnie *config.hash_workers*
+    :type workers: int
+    :raises: FileNotFoundError: plik tekstury nie istnieje
+    :return: manifest tekstur
+    :rtype: list
+    """
+    cache = cache or get_cache()
+
+    manifest = []
+    by_realpath = {}
+    to_hash = {}
+
+    for image in images:
+        realpath = os.path.realpath(image['full_path'])
+
+        entry = by_realpath.get(realpath)
+        if entry is not None:
+            entry.setdefault('aliases', []).append(image['name'])
+            continue
+
+        stat = os.stat(realpath)
+        entry = dict(image, size=stat.st_size, hash=cache.get(realpath, stat))
+        if entry['hash'] is None:
+            to_hash[realpath] = (entry, stat)
+
+        by_realpath[realpath] = entry
+        manifest.append(entry)
+
+    if to_hash:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers or config.hash_workers) as executor:
+            digests = executor.map(hash_file, to_hash)
+            for (realpath, (entry, stat)), digest in zip(to_hash.items(), digests):
+                entry['hash'] = digest
+                cache.put(realpath, stat, digest)
+        cache.save()
+
+    return manifest
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Zwraca wspólną pamięć podręczną skrótów, wczytując ją przy pierwszym użyciu.
+
+    :rtype: HashCache
+    """
+    global _cache
+
+    with _cache_lock:
+        if _cache is None:
+            _cache = HashCache(config.hash_cache_file)
+        return _cache
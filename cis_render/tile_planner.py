@@ -0,0 +1,139 @@
+"""
+Moduł odpowiedzialny za podział obrazu renderowanego z użyciem kafelków na regiony
+przydzielane przez farmę poszczególnym węzłom.
+
+Obszar renderowania (cały obraz albo, przy włączonej opcji *Border*, jego fragment) jest dzielony
+na siatkę kafelków o podanym rozmiarze; kafelki na prawej i górnej krawędzi mogą być mniejsze,
+jeżeli wymiary obszaru nie są wielokrotnością rozmiaru kafelka. Każdy region to kafelek
+powiększony o margines (*padding*) ograniczony do obszaru renderowania -- margines pozwala
+uniknąć widocznych szwów przy łączeniu regionów wyrenderowanych na różnych węzłach.
+
+Współrzędne są podawane w pikselach jako ``[x_min, y_min, x_max, y_max]``, z *x_max* i *y_max*
+nienależącymi do regionu, a początek układu znajduje się w lewym dolnym rogu obrazu, tak jak
+w ustawieniach *border_min_x*/*border_max_x* programu *Blender*.
+"""
+
+
+def render_size(resolution_x, resolution_y, percentage):
+    """Zwraca wymiary renderowanego obrazu po przeskalowaniu, zaokrąglone tak jak w programie *Blender*.
+
+    :param resolution_x: szerokość obrazu w pikselach
+    :type resolution_x: int
+    :param resolution_y: wysokość obrazu w pikselach
+    :type resolution_y: int
+    :param percentage: skala w procentach
+    :type percentage: int
+    :return: para (szerokość, wysokość)
+    :rtype: tuple
+    """
+    return resolution_x * percentage // 100, resolution_y * percentage // 100
+
+
+def border_region(width, height, border=None):
+    """Zwraca obszar renderowania w pikselach.
+
+    :param width: szerokość obrazu w pikselach
+    :type width: int
+    :param height: wysokość obrazu w pikselach
+    :type height: int
+    :param border: granice obszaru jako ułamki wymiarów obrazu (*min_x*, *min_y*, *max_x*, *max_y*)
+        albo None, jeżeli renderowany jest cały obraz
+    :type border: tuple
+    :raises: ValueError: pusty obszar renderowania
+    :return: obszar ``[x_min, y_min, x_max, y_max]``
+    :rtype: list
+    """
+    if border is None:
+        region = [0, 0, width, height]
+    else:
+        min_x, min_y, max_x, max_y = border
+        region = [int(min_x * width), int(min_y * height), int(max_x * width), int(max_y * height)]
+
+    if region[2] <= region[0] or region[3] <= region[1]:
+        raise ValueError("Render region {} of a {}x{} image is empty".format(region, width, height))
+    return region
+
+
+def grid(start, end, size):
+    """Dzieli przedział na kolejne odcinki długości *size* (ostatni może być krótszy).
+
+    :param start: początek przedziału
+    :type start: int
+    :param end: koniec przedziału (nienależący do niego)
+    :type end: int
+    :param size: długość odcinka
+    :type size: int
+    :return: lista par (początek, koniec) odcinków
+    :rtype: list
+    """
+    return [(position, min(position + size, end)) for position in range(start, end, size)]
+
+
+def plan_tiles(region, tile_x, tile_y, padding=0):
+    """Dzieli obszar renderowania na regiony.
+
+    :param region: obszar renderowania ``[x_min, y_min, x_max, y_max]``, patrz *border_region()*
+    :type region: list
+    :param tile_x: szerokość kafelka w pikselach
+    :type tile_x: int
+    :param tile_y: wysokość kafelka w pikselach
+    :type tile_y: int
+    :param padding: margines dodawany z każdej strony kafelka w pikselach
+    :type padding: int
+    :raises: ValueError: niedodatni rozmiar kafelka albo ujemny margines
+    :return: regiony z marginesem, wiersz po wierszu, od lewego dolnego rogu
+    :rtype: list
+    """
+    if tile_x < 1 or tile_y < 1:
+        raise ValueError("Tile size must be positive, got {}x{}".format(tile_x, tile_y))
+    if padding < 0:
+        raise ValueError("Tile padding can't be negative, got {}".format(padding))
+
+    x_min, y_min, x_max, y_max = region
+    columns = grid(x_min, x_max, tile_x)
+
+    return [
+        [max(x_min, left - padding), max(y_min, bottom - padding),
+         min(x_max, right + padding), min(y_max, top + padding)]
+        for bottom, top in grid(y_min, y_max, tile_y)
+        for left, right in columns
+    ]
+
+
+def plan_job(resolution_x, resolution_y, percentage, tile_x, tile_y, padding=0, border=None):
+    """Oblicza regiony zadania na podstawie ustawień sceny.
+
+    :param resolution_x: szerokość obrazu w pikselach przed przeskalowaniem
+    :type resolution_x: int
+    :param resolution_y: wysokość obrazu w pikselach przed przeskalowaniem
+    :type resolution_y: int
+    :param percentage: skala w procentach
+    :type percentage: int
+    :param tile_x: szerokość kafelka w pikselach
+    :type tile_x: int
+    :param tile_y: wysokość kafelka w pikselach
+    :type tile_y: int
+    :param padding: margines dodawany z każdej strony kafelka w pikselach
+    :type padding: int
+    :param border: granice obszaru renderowania, patrz *border_region()*
+    :type border: tuple
+    :raises: ValueError: pusty obszar renderowania albo niepoprawny rozmiar kafelka
+    :return: słownik z wymiarami obrazu (*width*, *height*), obszarem renderowania (*region*),
+        rozmiarem kafelka (*tile_x*, *tile_y*), marginesem (*padding*), liczbą kolumn (*columns*)
+        i listą regionów (*regions*)
+    :rtype: dict
+    """
+    width, height = render_size(resolution_x, resolution_y, percentage)
+    region = border_region(width, height, border)
+    regions = plan_tiles(region, tile_x, tile_y, padding)
+
+    return dict(
+        width=width,
+        height=height,
+        region=region,
+        tile_x=tile_x,
+        tile_y=tile_y,
+        padding=padding,
+        columns=len(grid(region[0], region[2], tile_x)),
+        regions=regions
+    )
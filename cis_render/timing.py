@@ -0,0 +1,158 @@
+"""
+Moduł odpowiedzialny za pomiar czasu kolejnych etapów zgłaszania zadania.
+
+Czas każdego etapu (odczytu ustawień sceny, listy tekstur, wtyczek, przygotowania danych zadania,
+skrótów tekstur, wysyłania plików, serializacji i wysłania zadania) jest mierzony zegarem
+monotonicznym. Razem z liczbą tekstur i rozmiarem danych zadania trafia do dziennika jako jeden
+wpis w formacie JSON na każde zgłoszenie, a opcjonalnie (*config.timing_in_payload*) także do danych
+zadania jako metadane klienta (pole *client*), co pozwala farmie powiązać wolne zgłoszenia z cechami sceny.
+
+Gdy pomiar jest wyłączony (*config.timing_enabled*), *start()* zwraca obiekt *NULL_TIMING*,
+którego metody nic nie robią, więc koszt pomiaru ogranicza się do wywołania pustej metody na etap.
+
+Przykład::
+
+    timing = timings.start('submit')
+    with timing.stage('read_materials'):
+        self.read_materials()
+    timing.set(textures=len(self.images))
+    timing.log()
+"""
+import contextlib
+import json
+import time
+
+from . import config
+
+
+class Stage():
+    """Mierzy czas jednego etapu w bloku *with* i dodaje go do pomiaru.
+    """
+
+    __slots__ = ('timing', 'name', 'start')
+
+    def __init__(self, timing, name):
+        self.timing = timing
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timing.add(self.name, time.perf_counter() - self.start)
+
+
+class Timing():
+    """Pomiar czasu etapów jednego zgłoszenia.
+
+    :param operation: nazwa mierzonej operacji, np. ``submit``
+    :type operation: str
+    :param started: czas rozpoczęcia (czas uniksowy)
+    :type started: float
+    :param stages: słownik nazwa etapu -> czas w sekundach, w kolejności wykonania
+    :type stages: dict
+    :param metrics: dodatkowe wartości, np. liczba tekstur (*textures*) i rozmiar danych zadania (*payload_bytes*)
+    :type metrics: dict
+    """
+
+    enabled = True
+
+    def __init__(self, operation):
+        self.operation = operation
+        self.started = time.time()
+        self.stages = {}
+        self.metrics = {}
+
+    def stage(self, name):
+        """Zwraca kontekst mierzący czas etapu. Czas etapu wykonanego kilka razy jest sumowany.
+
+        :param name: nazwa etapu
+        :type name: str
+        :rtype: Stage
+        """
+        return Stage(self, name)
+
+    def add(self, name, seconds):
+        """Dodaje czas etapu.
+
+        :param name: nazwa etapu
+        :type name: str
+        :param seconds: czas w sekundach
+        :type seconds: float
+        """
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def set(self, **metrics):
+        """Zapisuje dodatkowe wartości pomiaru.
+        """
+        self.metrics.update(metrics)
+
+    def record(self):
+        """Zwraca pomiar w postaci gotowej do zapisania w formacie JSON. Czasy są podane w milisekundach.
+
+        :rtype: dict
+        """
+        stages = {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()}
+        return dict(self.metrics, operation=self.operation, started=self.started, stages_ms=stages,
+                    total_ms=round(sum(stages.values()), 3))
+
+    def attach(self, payload):
+        """Dołącza dotychczasowy pomiar do danych zadania jako metadane klienta (pole *client*),
+        jeżeli włączono *config.timing_in_payload*.
+
+        :param payload: dane zadania
+        :type payload: dict
+        """
+        if config.timing_in_payload:
+            payload['client'] = dict(payload.get('client') or {}, timing=self.record())
+
+    def log(self):
+        """Zapisuje pomiar w dzienniku jako jeden wpis w formacie JSON.
+        Pełny pomiar jest też dostępny w atrybucie *timing* wpisu.
+        """
+        record = self.record()
+        config.logger.info("Submit timing: %s", json.dumps(record), extra={'timing': record})
+
+
+class NullTiming():
+    """Pomiar wyłączony -- wszystkie metody nic nie robią.
+    """
+
+    enabled = False
+    _stage = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._stage
+
+    def add(self, name, seconds):
+        pass
+
+    def set(self, **metrics):
+        pass
+
+    def record(self):
+        return None
+
+    def attach(self, payload):
+        pass
+
+    def log(self):
+        pass
+
+
+NULL_TIMING = NullTiming()
+
+
+def start(operation='submit'):
+    """Rozpoczyna pomiar czasu zgłoszenia.
+
+    :param operation: nazwa mierzonej operacji
+    :type operation: str
+    :return: nowy pomiar albo *NULL_TIMING*, jeżeli pomiar jest wyłączony (*config.timing_enabled*)
+    :rtype: Timing
+    """
+    if not config.timing_enabled:
+        return NULL_TIMING
+    return Timing(operation)
@@ -8,6 +8,13 @@ from bpy.types import (Panel,
                        Operator
                        )
 
+from . import config
+from . import lazy
+from . import spool
+from . import job_status
+
+cost_model = lazy.LazyModule('.cost_model', __package__)
+
 
 class TOPBAR_MT_CISRender_submenu(bpy.types.Menu):
     """Podmenu renderowania dodawane do menu wtyczki w górnej belce.
@@ -19,7 +26,8 @@ class TOPBAR_MT_CISRender_submenu(bpy.types.Menu):
     bl_label = "Render"
 
     def draw(self, context):
-        """Rysuje podmenu. Dodaje opcję wyboru z podmenu operatora wtyczki.
+        """Rysuje podmenu. Dodaje opcje wyboru z podmenu operatorów wtyczki:
+        zgłoszenia zadania dla bieżącej sceny i zbiorczego zgłoszenia zadań.
 
         :param context: Kontekst aktualnej sceny
         :type context: bpy.types.Context
@@ -28,6 +36,7 @@ class TOPBAR_MT_CISRender_submenu(bpy.types.Menu):
         layout = self.layout
         layout.operator_context = 'INVOKE_DEFAULT'
         layout.operator("object.read_scene_settings")
+        layout.operator_menu_enum("object.submit_batch", "mode")
 
 
 class TOPBAR_MT_CISRender_menu(bpy.types.Menu):
@@ -68,7 +77,14 @@ class JOBDATA_PT_job_name(bpy.types.Panel):
     def draw(self, context):
         """Rysuje podpanel złożony z:
             * pola, gdzie użytkownik wprowadza nazwę zadania,
-            * pola, gdzie użytkownik wprowadza priorytet zadania.
+            * pola, gdzie użytkownik wprowadza priorytet zadania,
+            * pola wyboru, czy plik sceny i tekstury mają być wysłane na farmę,
+            * przewidywanego czasu renderowania klatki i całego zadania z przedziałem ufności,
+              jeżeli historia zakończonych zadań na to pozwala (patrz moduł *cost_model*),
+            * liczby zadań oczekujących w kolejce na ponowne wysłanie, jeżeli kolejka nie jest pusta.
+
+        Panel wyświetla tylko dane zapamiętane w pamięci; przewidywanie jest odświeżane przez
+        zegar *refresh_job_panel()*, a kolejka nie jest wczytywana z dysku.
 
         :param context: Kontekst aktualnej sceny
         :type context: bpy.types.Context
@@ -80,6 +96,78 @@ class JOBDATA_PT_job_name(bpy.types.Panel):
         row = layout.row()
         # row.label(text="Priority")
         row.prop(mytool, "priority")
+        layout.prop(mytool, "upload_assets")
+
+        if config.cost_model_enabled:
+            self.draw_estimate(layout, scene)
+
+        depth = spool.loaded_depth()
+        if depth:
+            layout.label(text="Queued for retry: {}".format(depth), icon='TIME')
+
+    def draw_estimate(self, layout, scene):
+        """Rysuje zapamiętany przewidywany czas renderowania klatki i zadania (patrz *refresh_job_panel()*).
+
+        :param layout: układ panelu
+        :type layout: bpy.types.UILayout
+        :param scene: aktualna scena
+        :type scene: bpy.types.Scene
+        """
+        if not cost_model.loaded:
+            return
+        prediction = cost_model.cached_estimate(scene.name)
+        if prediction is None:
+            return
+        duration = cost_model.format_duration
+        layout.label(text="Frame: ~{} ({} - {})".format(
+            duration(prediction['frame_seconds']), duration(prediction['low']), duration(prediction['high'])),
+            icon='RENDER_STILL')
+        if 'job_seconds' in prediction:
+            layout.label(text="Job: ~{} ({} jobs in history)".format(
+                duration(prediction['job_seconds']), prediction['jobs']))
+
+
+class JOBDATA_PT_job_status(bpy.types.Panel):
+    bl_label = "Job Status"
+    bl_category = "CIS Render"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+
+    # Ikony stanów zadań wyświetlane w panelu
+    icons = {
+        'SUBMITTED': 'EXPORT',
+        'QUEUED': 'TIME',
+        'RUNNING': 'RENDER_ANIMATION',
+        'DONE': 'CHECKMARK',
+        'FAILED': 'ERROR',
+        'CANCELLED': 'CANCEL'
+    }
+
+    @classmethod
+    def poll(cls, context):
+        return bool(job_status.get_table().jobs)
+
+    def draw(self, context):
+        """Rysuje panel ze stanem zadań zgłoszonych w bieżącej sesji, od najnowszego:
+        nazwą, stanem i postępem każdego zadania oraz komunikatem serwera, jeżeli go podał.
+        Przy zakończonych zadaniach wyświetla przycisk pobrania wyrenderowanych klatek.
+        Panel jest odświeżany przez zegar modułu *job_status*, a nie przy każdej zmianie stanu.
+
+        :param context: Kontekst aktualnej sceny
+        :type context: bpy.types.Context
+        """
+        layout = self.layout
+        for job in job_status.get_table().snapshot():
+            row = layout.row()
+            row.label(text=job['name'] or job['id'], icon=self.icons.get(job['state'], 'QUESTION'))
+            if job['state'] == 'RUNNING':
+                row.label(text="{:.0%}".format(job['progress']))
+            else:
+                row.label(text=job['state'].capitalize())
+            if job['state'] == 'DONE':
+                row.operator("object.download_frames", text="", icon='IMPORT').job_id = job['id']
+            if job['message']:
+                layout.label(text=job['message'])
 
 
 class JOBDATA_PT_file_format(bpy.types.Panel):
@@ -134,7 +222,8 @@ class JOBDATA_PT_tiles(bpy.types.Panel):
                 jeżeli chce wprowadzić wymiary kafelków dla danego zadania, zamiast wymiarów
                 przypisanych do sceny,
             *   pola, gdzie użytkownik wprowadza szerokość kafelków w pikselach,
-            *   pola, gdzie użytkownik wprowadza wysokość kafelków w pikselach.
+            *   pola, gdzie użytkownik wprowadza wysokość kafelków w pikselach,
+            *   pola, gdzie użytkownik wprowadza margines kafelków w pikselach.
 
             Domyślnie pole wyboru jest zaznaczone, a pola z wymiarami kafelków wyszarzone.
             Podpanel jest rysowany tylko wtedy, kiedy jako silnik renderujący wybrany jest Cycles.
@@ -156,6 +245,8 @@ class JOBDATA_PT_tiles(bpy.types.Panel):
         column.prop(mytool, "tiles_x", text = "Tiles X")
         column.prop(mytool, "tiles_y", text = "Y")
 
+        layout.prop(mytool, "tile_padding")
+
 
 class JOBDATA_PT_frames(bpy.types.Panel):
     bl_label = "Frames"
@@ -192,3 +283,86 @@ class JOBDATA_PT_frames(bpy.types.Panel):
         column.prop(mytool, "frame_end", text = "End")
 
 
+
+
+class JOBDATA_PT_frame_chunks(bpy.types.Panel):
+    bl_label = "Chunks"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_parent_id = 'JOBDATA_PT_frames'
+    bl_options = {'DEFAULT_CLOSED'}
+
+
+    def draw(self, context):
+        """Rysuje podpanel złożony z:
+            *   pola, gdzie użytkownik wybiera sposób podziału zakresu klatek na części,
+            *   pola, gdzie użytkownik wprowadza liczbę klatek w części.
+
+            Pole liczby klatek jest wyszarzone, jeżeli nie jest wybrany podział na części stałej wielkości.
+
+        :param context: Kontekst aktualnej sceny
+        :type context: bpy.types.Context
+        """
+        layout = self.layout
+        scene = context.scene
+        mytool = scene.my_tool
+        layout.prop(mytool, "frame_chunk_strategy")
+
+        column = layout.column()
+
+        if mytool.frame_chunk_strategy != 'FIXED':
+            column.enabled = False
+
+        column.prop(mytool, "frame_chunk_size")
+
+
+def job_frame_count(scene):
+    """Zwraca liczbę klatek zadania z zakresem wybranym w panelu albo przypisanym do sceny.
+
+    :param scene: scena
+    :type scene: bpy.types.Scene
+    :rtype: int
+    """
+    mytool = scene.my_tool
+    if mytool.use_output_frames_setting:
+        frames = dict(start=scene.frame_start, end=scene.frame_end)
+    else:
+        frames = dict(start=mytool.frame_start, end=mytool.frame_end)
+    return cost_model.frame_count(frames, scene.frame_step)
+
+
+_drawn_estimates = None
+
+
+def refresh_job_panel():
+    """Zleca odświeżenie przewidywanego czasu renderowania aktualnej sceny (obliczanego w tle,
+    tylko gdy zmieniły się ustawienia sceny, zakres klatek albo historia zadań) i odświeża panel
+    po obliczeniu nowego przewidywania. Wywoływana przez zegar programu *Blender* (*bpy.app.timers*).
+
+    :return: czas do następnego wywołania w sekundach
+    :rtype: float
+    """
+    global _drawn_estimates
+
+    scene = bpy.context.scene
+    if config.cost_model_enabled and scene is not None:
+        cost_model.refresh_estimate(scene, job_frame_count(scene))
+        if cost_model.estimates_version() != _drawn_estimates:
+            _drawn_estimates = cost_model.estimates_version()
+            job_status.tag_redraw()
+
+    return config.status_redraw_interval
+
+
+def register_timer():
+    """Uruchamia zegar odświeżający przewidywanie w panelu. Wywoływana przy rejestracji wtyczki.
+    """
+    if not bpy.app.timers.is_registered(refresh_job_panel):
+        bpy.app.timers.register(refresh_job_panel, first_interval=config.status_redraw_interval, persistent=True)
+
+
+def unregister_timer():
+    """Zatrzymuje zegar odświeżający przewidywanie w panelu.
+    """
+    if bpy.app.timers.is_registered(refresh_job_panel):
+        bpy.app.timers.unregister(refresh_job_panel)
@@ -0,0 +1,381 @@
+"""
+Moduł odpowiedzialny za wysyłanie RenderDockowi pliku sceny i tekstur, gdy węzły farmy nie mają
+dostępu do dysku, na którym się znajdują (np. przy pracy na lokalnym dysku zamiast na wspólnym
+zasobie sieciowym).
+
+Najpierw serwer jest pytany, które pliki już ma (``POST <config.asset_query_url>`` z listą skrótów
+zawartości z manifestu tekstur). Takie pliki nie są wysyłane, a dane zadania wskazują je skrótem.
+Dla każdego brakującego pliku otwierana jest sesja wysyłania (``POST <config.upload_url>``), w której serwer
+nadaje żeton (*token*) i podaje rozmiar fragmentu oraz fragmenty, które już otrzymał. Plik jest
+wysyłany fragmentami (``PUT <config.upload_url>/<token>/<numer fragmentu>``), kilka fragmentów
+naraz, a po wysłaniu wszystkich sesja jest zamykana (``POST <config.upload_url>/<token>/complete``)
+i serwer podaje identyfikator pliku (*asset*), którym dane zadania odwołują się do pliku.
+
+Żetony niedokończonych sesji są zapisywane na dysku, więc przerwane wysyłanie (także po ponownym
+uruchomieniu programu *Blender*) jest wznawiane -- wysyłane są tylko brakujące fragmenty.
+Mniejsze pliki są wysyłane jako pierwsze, żeby węzły mogły wcześniej zacząć pracę. Łączna
+przepustowość wszystkich wątków jest ograniczona do *config.upload_bandwidth* bajtów na sekundę.
+Fragmenty są czytane z dysku małymi porcjami w trakcie wysyłania -- ani plik, ani cały
+fragment nie jest wczytywany do pamięci.
+"""
+import concurrent.futures
+import json
+import os
+import threading
+import time
+
+from . import config
+from . import lazy
+from . import spool
+from . import texture_manifest
+
+requests = lazy.LazyModule('requests')
+
+
+class RateLimiter():
+    """Ogranicza łączną przepustowość wątków wysyłających dane. Każda porcja danych ma wyznaczony
+    czas wysłania, tak żeby średnia przepustowość nie przekraczała *rate*.
+
+    :param rate: przepustowość w bajtach na sekundę; 0 oznacza brak ograniczenia
+    :type rate: int
+    """
+
+    def __init__(self, rate):
+        self.rate = rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, size):
+        """Czeka, aż można wysłać podaną liczbę bajtów.
+
+        :param size: liczba bajtów
+        :type size: int
+        """
+        if not self.rate:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + size / self.rate
+        if start > now:
+            time.sleep(start - now)
+
+
+class ChunkReader():
+    """Obiekt plikopodobny udostępniający fragment pliku. Biblioteka *requests* wysyła go,
+    czytając małe porcje, więc w pamięci jest tylko bieżąca porcja, a ogranicznik przepustowości
+    jest stosowany do każdej z nich.
+
+    :param filename: ścieżka do pliku
+    :type filename: str
+    :param offset: początek fragmentu w bajtach
+    :type offset: int
+    :param length: długość fragmentu w bajtach
+    :type length: int
+    :param limiter: ogranicznik przepustowości
+    :type limiter: RateLimiter
+    """
+
+    def __init__(self, filename, offset, length, limiter):
+        self.file = open(filename, 'rb')
+        self.file.seek(offset)
+        self.remaining = length
+        self.length = length
+        self.limiter = limiter
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        self.limiter.acquire(len(data))
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+class UploadState():
+    """Żetony niedokończonych sesji wysyłania zapisywane na dysku w formacie JSON,
+    kluczowane skrótem zawartości pliku.
+
+    :param filename: ścieżka do pliku
+    :type filename: str
+    :param tokens: słownik skrót zawartości -> żeton sesji
+    :type tokens: dict
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.tokens = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """Wczytuje żetony z dysku. Uszkodzony plik jest ignorowany.
+        """
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as state_file:
+                self.tokens = json.load(state_file)
+        except FileNotFoundError:
+            self.tokens = {}
+        except ValueError:
+            config.logger.warning("Ignoring damaged upload state {}".format(self.filename))
+            self.tokens = {}
+
+    def get(self, digest):
+        """Zwraca żeton sesji wysyłania pliku o podanym skrócie albo None.
+
+        :param digest: skrót zawartości pliku
+        :type digest: str
+        :rtype: str
+        """
+        with self._lock:
+            return self.tokens.get(digest)
+
+    def put(self, digest, token):
+        """Zapamiętuje żeton sesji wysyłania albo, jeżeli *token* jest None, usuwa go.
+
+        :param digest: skrót zawartości pliku
+        :type digest: str
+        :param token: żeton sesji
+        :type token: str
+        """
+        with self._lock:
+            if token is None:
+                if self.tokens.pop(digest, None) is None:
+                    return
+            else:
+                self.tokens[digest] = token
+            temp_filename = self.filename + '.tmp'
+            with open(temp_filename, 'w', encoding='utf-8') as state_file:
+                json.dump(self.tokens, state_file)
+            os.replace(temp_filename, self.filename)
+
+
+class AssetUploader():
+    """Wysyła pliki RenderDockowi fragmentami, przez sesję HTTP z pulą połączeń.
+
+    :param workers: liczba fragmentów wysyłanych jednocześnie
+    :type workers: int
+    :param limiter: ogranicznik łącznej przepustowości
+    :type limiter: RateLimiter
+    :param state: żetony niedokończonych sesji wysyłania
+    :type state: UploadState
+    """
+
+    def __init__(self, workers=None, bandwidth=None, state=None):
+        self.workers = workers or config.upload_workers
+        self.limiter = RateLimiter(config.upload_bandwidth if bandwidth is None else bandwidth)
+        self.state = state or get_state()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        """Zamyka sesję HTTP.
+        """
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def upload(self, files):
+        """Wysyła pliki, od najmniejszego, i zwraca ich identyfikatory nadane przez serwer.
+
+        :param files: lista słowników ze ścieżką (*full_path*), rozmiarem (*size*) i skrótem
+            zawartości (*hash*) pliku, np. wpisy manifestu tekstur
+        :type files: list
+        :raises: RequestException: nie udało się wysłać pliku; wysłane fragmenty pozostają na serwerze,
+            a kolejne wysyłanie je pominie
+        :return: słownik skrót zawartości -> identyfikator pliku; plik, który serwer już miał,
+            jest identyfikowany skrótem zawartości
+        :rtype: dict
+        """
+        unique = {}
+        for entry in sorted(files, key=lambda entry: entry['size']):
+            unique.setdefault(entry['hash'], entry)
+
+        # Pliki, które serwer już ma, są wskazywane skrótem zawartości i nie są wysyłane
+        assets = {digest: digest for digest in self.query(list(unique))}
+        config.logger.info("{} of {} assets already on the farm".format(len(assets), len(unique)))
+
+        pending = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers,
+                                                   thread_name_prefix='cis_render_upload') as executor:
+            # Fragmenty trafiają do kolejki puli w kolejności rozmiaru plików, więc mniejsze pliki
+            # są wysyłane w całości, zanim pula zajmie się większymi
+            for digest, entry in unique.items():
+                if digest in assets:
+                    continue
+                session = self.open_session(entry)
+                if 'asset' in session:
+                    assets[digest] = session['asset']
+                    continue
+                futures = [executor.submit(self.send_chunk, entry, session, index)
+                           for index in missing_chunks(entry['size'], session['chunk_size'], session['received'])]
+                pending.append((entry, session, futures))
+
+            for entry, session, futures in pending:
+                for future in futures:
+                    future.result()
+                assets[entry['hash']] = self.complete(entry, session)
+
+        return assets
+
+    def query(self, hashes):
+        """Pyta serwer, które pliki już ma, wysyłając skróty zawartości w paczkach
+        po *config.asset_query_batch*.
+
+        :param hashes: skróty zawartości plików
+        :type hashes: list
+        :raises: RequestException: serwer odrzucił żądanie
+        :return: skróty plików, które serwer już ma
+        :rtype: set
+        """
+        present = set()
+        for start in range(0, len(hashes), config.asset_query_batch):
+            r = self.session.post(config.asset_query_url, json={'hashes': hashes[start:start + config.asset_query_batch]},
+                                  timeout=config.upload_timeout)
+            r.raise_for_status()
+            present.update(r.json()['present'])
+        return present
+
+    def open_session(self, entry):
+        """Otwiera sesję wysyłania pliku albo wznawia niedokończoną sesję zapisaną w *state*.
+
+        :param entry: opis pliku
+        :type entry: dict
+        :raises: RequestException: serwer odrzucił żądanie
+        :return: odpowiedź serwera: identyfikator pliku (*asset*), jeżeli serwer już go ma, albo żeton
+            sesji (*token*), rozmiar fragmentu (*chunk_size*) i numery otrzymanych fragmentów (*received*)
+        :rtype: dict
+        """
+        request = dict(name=os.path.basename(entry['full_path']), size=entry['size'], hash=entry['hash'],
+                       chunk_size=config.upload_chunk_size, token=self.state.get(entry['hash']))
+        r = self.session.post(config.upload_url, json=request, timeout=config.upload_timeout)
+        r.raise_for_status()
+        session = r.json()
+        if 'asset' not in session:
+            session.setdefault('chunk_size', config.upload_chunk_size)
+            session.setdefault('received', [])
+            self.state.put(entry['hash'], session['token'])
+        return session
+
+    def send_chunk(self, entry, session, index):
+        """Wysyła jeden fragment pliku, ponawiając próbę po błędzie przejściowym.
+
+        :param entry: opis pliku
+        :type entry: dict
+        :param session: sesja wysyłania zwrócona przez *open_session()*
+        :type session: dict
+        :param index: numer fragmentu
+        :type index: int
+        :raises: RequestException: nie udało się wysłać fragmentu
+        """
+        offset = index * session['chunk_size']
+        length = min(session['chunk_size'], entry['size'] - offset)
+        url = '{}/{}/{}'.format(config.upload_url, session['token'], index)
+        headers = {'Content-Type': 'application/octet-stream',
+                   'Content-Range': 'bytes {}-{}/{}'.format(offset, offset + length - 1, entry['size'])}
+
+        for attempt in range(config.upload_retries + 1):
+            reader = ChunkReader(entry['full_path'], offset, length, self.limiter)
+            try:
+                r = self.session.put(url, data=reader, headers=headers, timeout=config.upload_timeout)
+                r.raise_for_status()
+                return
+            except requests.exceptions.RequestException as error:
+                response = getattr(error, 'response', None)
+                if attempt == config.upload_retries or (response is not None and response.status_code < 500):
+                    raise
+                config.logger.warning("Chunk {} of {} failed, retrying: {}".format(index, entry['full_path'], error))
+                time.sleep(spool.backoff_delay(attempt, config.upload_retry_delay))
+            finally:
+                reader.close()
+
+    def complete(self, entry, session):
+        """Zamyka sesję wysyłania pliku, którego wszystkie fragmenty zostały wysłane.
+
+        :param entry: opis pliku
+        :type entry: dict
+        :param session: sesja wysyłania zwrócona przez *open_session()*
+        :type session: dict
+        :raises: RequestException: serwer odrzucił plik
+        :return: identyfikator pliku
+        :rtype: str
+        """
+        r = self.session.post('{}/{}/complete'.format(config.upload_url, session['token']),
+                              timeout=config.upload_timeout)
+        r.raise_for_status()
+        self.state.put(entry['hash'], None)
+        return r.json()['asset']
+
+
+def missing_chunks(size, chunk_size, received):
+    """Zwraca numery fragmentów pliku, których serwer jeszcze nie otrzymał.
+
+    :param size: rozmiar pliku w bajtach
+    :type size: int
+    :param chunk_size: rozmiar fragmentu w bajtach
+    :type chunk_size: int
+    :param received: numery otrzymanych fragmentów
+    :type received: list
+    :rtype: list
+    """
+    received = set(received)
+    count = max(1, -(-size // chunk_size))
+    return [index for index in range(count) if index not in received]
+
+
+def upload_assets(textures, scenes):
+    """Wykonywana w wątku roboczym. Wysyła pliki scen i tekstury, których serwer jeszcze nie ma,
+    i dopisuje do ich opisów w danych zadania identyfikatory plików (*asset*) nadane przez serwer
+    albo, dla plików, które serwer już miał, skróty zawartości.
+
+    :param textures: manifest tekstur (patrz *texture_manifest.build_manifest()*)
+    :type textures: list
+    :param scenes: opisy scen (nazwa i ścieżka do pliku sceny); plik wspólny dla kilku scen jest wysyłany raz
+    :type scenes: list
+    :raises: RequestException: nie udało się wysłać pliku
+    :raises: FileNotFoundError: plik sceny nie istnieje
+    """
+    scene_files = {}
+    for scene in scenes:
+        if scene['full_path'] not in scene_files:
+            scene_files[scene['full_path']] = dict(full_path=scene['full_path'],
+                                                   size=os.stat(scene['full_path']).st_size,
+                                                   hash=texture_manifest.hash_file(scene['full_path']))
+
+    with AssetUploader() as uploader:
+        assets = uploader.upload(list(textures or []) + list(scene_files.values()))
+
+    for entry in textures or []:
+        entry['asset'] = assets[entry['hash']]
+    for scene in scenes:
+        scene['asset'] = assets[scene_files[scene['full_path']]['hash']]
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_state():
+    """Zwraca wspólne żetony niedokończonych sesji wysyłania, wczytując je przy pierwszym użyciu.
+
+    :rtype: UploadState
+    """
+    global _state
+
+    with _state_lock:
+        if _state is None:
+            _state = UploadState(config.upload_state_file)
+        return _state
@@ -18,3 +18,7 @@ class Menu():
 class PropertyGroup():
     def __init__(self):
         pass
+
+class AddonPreferences():
+    def __init__(self):
+        pass
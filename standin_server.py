@@ -0,0 +1,656 @@
+"""
+Lokalny serwer zastępujący RenderDocka w testach i benchmarkach.
+Przyjmuje zgłoszenia zadań (pojedyncze i zbiorcze) i zlicza nawiązane połączenia, co pozwala sprawdzić,
+czy klient utrzymuje połączenia (keep-alive) między kolejnymi zadaniami.
+Przyjmuje treść żądań wysyłaną w całości albo fragmentami (*chunked*).
+Dekompresuje treść żądań zakodowaną jednym z kodowań z listy *accepted_encodings*,
+a na pozostałe odpowiada kodem 415.
+
+Każde przyjęte zadanie dostaje identyfikator (nagłówek *Location* albo pole *id* wyniku zgłoszenia
+zbiorczego). Stan zadań, zmieniany w testach przez *set_status()*, jest dostępny jako strumień zdarzeń
+(``GET /job/events``, *Server-Sent Events*) i przez odpytywanie z nagłówkiem *ETag*
+(``GET /job/status?ids=...``). Serwer utworzony z ``events=False`` odpowiada na żądanie strumienia kodem 404.
+
+Wyrenderowane klatki zadania, dodane w testach przez *add_frame()*, są wymienione w ``GET /job/<id>/frames``
+i dostępne pod ``GET /job/<id>/frames/<klatka>``, także częściowo (nagłówek *Range*).
+*interrupt()* zrywa połączenie w trakcie wysyłania klatki, co pozwala sprawdzić wznawianie pobierania.
+
+Pliki sceny i tekstur są przyjmowane fragmentami w sesjach wysyłania (``/job/upload``), które można
+wznowić żetonem sesji; *fail_chunk()* odrzuca wskazany fragment kodem 503. Przyjęte pliki są identyfikowane
+skrótem zawartości, a ``POST /job/assets/query`` podaje, które z wymienionych skrótów serwer już ma.
+Pliki można dodać bez wysyłania przez *add_asset()*.
+
+Do testów obciążeniowych serwer może symulować warunki prawdziwego RenderDocka: opóźnienie odpowiedzi
+(*latency* i losowe *jitter*), błędy (*error_rate* -- odsetek żądań odrzucanych kodem 503, *drop_rate* --
+odsetek połączeń zrywanych bez odpowiedzi) i ograniczoną przepustowość (*rate_limit* -- co najwyżej tyle
+żądań na sekundę; nadmiarowe żądania czekają w kolejce). Błędy są losowane generatorem o ziarnie *seed*,
+więc przy tym samym ziarnie i kolejności żądań się powtarzają. Zasymulowane błędy są zliczane
+w *injected_errors* i *dropped_connections*.
+
+Przykład::
+
+    with StandInServer() as server:
+        config.server = server.url + '/job'
+        ...
+"""
+import hashlib
+import json
+import queue
+import random
+import re
+import threading
+import time
+
+from cis_render import batch
+from cis_render import compression
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+FRAMES_PATH = re.compile(r'^/job/([^/]+)/frames(?:/(\d+))?/?$')
+RANGE = re.compile(r'^bytes=(\d+)-$')
+UPLOAD_PATH = re.compile(r'^/job/upload/([^/]+)(?:/(\d+))?(?:/complete)?/?$')
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Obsługuje żądania kierowane do serwera zastępczego.
+    Odpowiada w protokole HTTP/1.1, więc połączenia nie są zamykane po każdej odpowiedzi.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    # Nagłówki i treść odpowiedzi są wysyłane osobno; bez tego na utrzymywanym połączeniu
+    # algorytm Nagle'a opóźnia każdą odpowiedź o ~40 ms
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        """Przyjmuje dane zadania w formacie JSON i zapisuje je na liście *jobs* serwera.
+        """
+        body = self.read_body()
+        if self.inject_faults():
+            return
+
+        if self.path.rstrip('/') == '/job/assets/query':
+            hashes = json.loads(body.decode('utf-8'))['hashes']
+            with self.server.lock:
+                self.server.asset_queries.append(hashes)
+                present = [digest for digest in hashes if digest in self.server.assets]
+            self.send_json(200, dict(present=present))
+            return
+        if self.path.rstrip('/') == '/job/upload':
+            self.open_upload(json.loads(body.decode('utf-8')))
+            return
+        if UPLOAD_PATH.match(self.path) and self.path.endswith('/complete'):
+            self.complete_upload(UPLOAD_PATH.match(self.path).group(1))
+            return
+        if self.path.rstrip('/') not in ('/job', '/job/batch'):
+            self.send_text(404, 'Not Found')
+            return
+
+        encoding = self.headers.get('Content-Encoding')
+        if encoding is not None and encoding not in self.server.accepted_encodings:
+            self.send_text(415, 'Unsupported Media Type')
+            return
+
+        try:
+            job = json.loads(compression.decode(body, encoding).decode('utf-8'))
+        except ValueError:
+            self.send_text(400, 'Bad Request')
+            return
+
+        key = self.headers.get('Idempotency-Key')
+        if self.path.rstrip('/') == '/job/batch':
+            self.register_batch(job, encoding, key)
+            return
+
+        with self.server.lock:
+            self.server.request_keys.append(key)
+            job_id = self.server.idempotency_keys.get(key)
+            if job_id is None:
+                self.server.jobs.append(job)
+                self.server.encodings.append(encoding)
+                job_id = self.server.add_status(job.get('name'))
+                if key is not None:
+                    self.server.idempotency_keys[key] = job_id
+        self.send_text(200, 'Created', {'Location': '/job/{}'.format(job_id)})
+
+    def register_batch(self, payload, encoding, idempotency_key=None):
+        """Rejestruje zadania zbiorczego zgłoszenia. Zadania bez nazwy są odrzucane.
+        Odpowiada listą wyników zgłoszenia poszczególnych zadań.
+
+        Każde zadanie jest zapamiętywane pod kluczem ``<klucz zgłoszenia>:<klucz zadania>``, więc
+        ponowione zgłoszenie, zarówno zbiorcze, jak i pojedyncze z kolejki, nie tworzy go drugi raz.
+
+        :param payload: dane zbiorczego zgłoszenia
+        :type payload: dict
+        :param encoding: kodowanie treści żądania
+        :type encoding: str
+        :param idempotency_key: nagłówek *Idempotency-Key* zgłoszenia
+        :type idempotency_key: str
+        """
+        results = []
+        with self.server.lock:
+            self.server.request_keys.append(idempotency_key)
+            self.server.batches.append(payload)
+            for key, job in batch.expand(payload, keys=True):
+                if not job.get('name'):
+                    results.append(dict(key=key, status='rejected', message='Job name is empty'))
+                    continue
+                job_key = None if idempotency_key is None else '{}:{}'.format(idempotency_key, key)
+                job_id = self.server.idempotency_keys.get(job_key)
+                if job_id is None:
+                    self.server.jobs.append(job)
+                    self.server.encodings.append(encoding)
+                    job_id = self.server.add_status(job['name'])
+                    if job_key is not None:
+                        self.server.idempotency_keys[job_key] = job_id
+                results.append(dict(key=key, status='created', id=job_id))
+
+        body = json.dumps({'jobs': results}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """Zwraca stan zadań: jako strumień zdarzeń (*/job/events*) albo jednorazowo (*/job/status*).
+        """
+        if self.inject_faults():
+            return
+
+        url = urlsplit(self.path)
+        if url.path == '/job/events' and self.server.events:
+            self.stream_events()
+        elif url.path == '/job/status':
+            ids = [job_id for value in parse_qs(url.query).get('ids', []) for job_id in value.split(',')]
+            self.send_status(ids)
+        elif FRAMES_PATH.match(url.path):
+            self.send_frame(*FRAMES_PATH.match(url.path).groups())
+        else:
+            self.send_text(404, 'Not Found')
+
+    def send_frame(self, job_id, frame):
+        """Wysyła listę klatek zadania albo zawartość jednej klatki, od miejsca podanego w nagłówku *Range*.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :param frame: numer klatki albo None dla listy klatek
+        :type frame: str
+        """
+        frames = self.server.frames.get(job_id)
+        if frames is None or (frame is not None and int(frame) not in frames):
+            self.send_text(404, 'Not Found')
+            return
+
+        if frame is None:
+            listing = [dict(frame=number, size=len(data), hash='sha256:' + hashlib.sha256(data).hexdigest(),
+                            url='/job/{}/frames/{}'.format(job_id, number))
+                       for number, data in sorted(frames.items())]
+            body = json.dumps({'frames': listing}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        data = frames[int(frame)]
+        requested = RANGE.match(self.headers.get('Range', ''))
+        with self.server.lock:
+            self.server.frame_requests.append((int(frame), self.headers.get('Range')))
+            limit = self.server.interruptions.pop((job_id, int(frame)), None)
+
+        if requested:
+            offset = int(requested.group(1))
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(offset, len(data) - 1, len(data)))
+        else:
+            offset = 0
+            self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data) - offset))
+        self.end_headers()
+
+        if limit is not None:
+            self.wfile.write(data[offset:offset + limit])
+            self.close_connection = True
+            return
+        self.wfile.write(data[offset:])
+
+    def send_status(self, ids):
+        """Wysyła stan podanych zadań. Jeżeli stan nie zmienił się od wersji podanej w nagłówku
+        *If-None-Match*, odpowiada kodem 304 bez treści.
+
+        :param ids: identyfikatory zadań
+        :type ids: list
+        """
+        with self.server.lock:
+            etag = '"{}"'.format(self.server.status_version)
+            jobs = [dict(self.server.statuses[job_id]) for job_id in ids if job_id in self.server.statuses]
+            self.server.status_requests += 1
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = json.dumps({'jobs': jobs}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def stream_events(self):
+        """Wysyła zmiany stanu zadań jako strumień zdarzeń, dopóki serwer nie zostanie zatrzymany
+        albo klient nie zamknie połączenia. Co sekundę bez zmian wysyła komentarz podtrzymujący połączenie.
+        """
+        updates = queue.Queue()
+        with self.server.lock:
+            self.server.subscribers.append(updates)
+
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+
+        try:
+            while not self.server.stopped.is_set():
+                try:
+                    event_id, update = updates.get(timeout=1)
+                except queue.Empty:
+                    event = b': keepalive\n\n'
+                else:
+                    event = 'id: {}\nevent: status\ndata: {}\n\n'.format(event_id, json.dumps(update)).encode('utf-8')
+                # Każde zdarzenie jest osobnym fragmentem, więc klient odbiera je od razu
+                self.wfile.write('{:x}\r\n'.format(len(event)).encode('ascii') + event + b'\r\n')
+                self.wfile.flush()
+            self.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            pass
+        finally:
+            with self.server.lock:
+                self.server.subscribers.remove(updates)
+
+    def do_PUT(self):
+        """Przyjmuje fragment wysyłanego pliku (*/job/upload/<token>/<numer>*).
+        Fragmenty wskazane przez *fail_chunk()* są odrzucane kodem 503.
+        """
+        body = self.read_body()
+        if self.inject_faults():
+            return
+
+        match = UPLOAD_PATH.match(self.path)
+        if not match or match.group(2) is None or match.group(1) not in self.server.uploads:
+            self.send_text(404, 'Not Found')
+            return
+
+        token, index = match.group(1), int(match.group(2))
+        with self.server.lock:
+            upload = self.server.uploads[token]
+            self.server.chunk_requests.append((upload['name'], index))
+            failures = self.server.failing_chunks.get((upload['name'], index), 0)
+            if failures:
+                self.server.failing_chunks[(upload['name'], index)] = failures - 1
+            else:
+                upload['chunks'][index] = body
+
+        if failures:
+            self.send_text(503, 'Service Unavailable')
+        else:
+            self.send_text(200, 'OK')
+
+    def open_upload(self, request):
+        """Otwiera sesję wysyłania pliku albo wznawia sesję o podanym żetonie.
+        Jeżeli serwer ma już plik o podanym skrócie, odpowiada jego identyfikatorem.
+
+        :param request: nazwa (*name*), rozmiar (*size*), skrót (*hash*) pliku, preferowany rozmiar
+            fragmentu (*chunk_size*) i żeton sesji do wznowienia (*token*)
+        :type request: dict
+        """
+        with self.server.lock:
+            if request['hash'] in self.server.assets:
+                response = dict(asset=self.server.assets[request['hash']]['id'])
+            else:
+                upload = self.server.uploads.get(request.get('token'))
+                if upload is None or upload['hash'] != request['hash']:
+                    token = 'upload-{}'.format(len(self.server.uploads) + 1)
+                    upload = dict(token=token, name=request['name'], size=request['size'], hash=request['hash'],
+                                  chunk_size=self.server.upload_chunk_size or request['chunk_size'], chunks={})
+                    self.server.uploads[token] = upload
+                response = dict(token=upload['token'], chunk_size=upload['chunk_size'],
+                                received=sorted(upload['chunks']))
+        self.send_json(200, response)
+
+    def complete_upload(self, token):
+        """Składa plik z otrzymanych fragmentów i sprawdza jego skrót.
+
+        :param token: żeton sesji wysyłania
+        :type token: str
+        """
+        with self.server.lock:
+            upload = self.server.uploads.get(token)
+            if upload is None:
+                self.send_text(404, 'Not Found')
+                return
+            data = b''.join(chunk for index, chunk in sorted(upload['chunks'].items()))
+            if 'sha256:' + hashlib.sha256(data).hexdigest() != upload['hash']:
+                self.send_text(422, 'Hash mismatch')
+                return
+            asset = dict(id=upload['hash'], name=upload['name'], data=data)
+            self.server.assets[upload['hash']] = asset
+            self.server.completed_uploads.append(upload['name'])
+            del self.server.uploads[token]
+        self.send_json(200, dict(asset=asset['id']))
+
+    def send_json(self, status, data):
+        """Wysyła odpowiedź w formacie JSON.
+
+        :param status: kod odpowiedzi HTTP
+        :type status: int
+        :param data: treść odpowiedzi
+        :type data: dict
+        """
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def inject_faults(self):
+        """Symuluje warunki skonfigurowane w serwerze: czeka na swoją kolejkę (*rate_limit*) i przez
+        czas opóźnienia, a następnie może zerwać połączenie albo odpowiedzieć kodem 503.
+        Wywoływana po odczytaniu treści żądania, dzięki czemu połączenie pozostaje w spójnym stanie.
+
+        :return: True, jeżeli żądanie zostało już obsłużone (zerwane albo odrzucone)
+        :rtype: boolean
+        """
+        server = self.server
+        delay = server.reserve_slot() + server.latency
+        with server.lock:
+            if server.jitter:
+                delay += server.random.uniform(0, server.jitter)
+            roll = server.random.random() if server.drop_rate or server.error_rate else 1.0
+            if roll < server.drop_rate:
+                server.dropped_connections += 1
+            elif roll < server.drop_rate + server.error_rate:
+                server.injected_errors += 1
+        if delay > 0:
+            time.sleep(delay)
+
+        if roll < server.drop_rate:
+            self.close_connection = True
+            return True
+        if roll < server.drop_rate + server.error_rate:
+            self.send_text(503, 'Service Unavailable', {'Retry-After': '1'})
+            return True
+        return False
+
+    def read_body(self):
+        """Odczytuje treść żądania podaną w całości (*Content-Length*) albo we fragmentach
+        (*Transfer-Encoding: chunked*).
+
+        :rtype: bytes
+        """
+        if self.headers.get('Transfer-Encoding', '').lower() != 'chunked':
+            return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        chunks = []
+        while True:
+            size = int(self.rfile.readline().split(b';')[0], 16)
+            if not size:
+                break
+            chunks.append(self.rfile.read(size))
+            self.rfile.readline()
+        # Pomija nagłówki końcowe (trailer) zakończone pustym wierszem
+        while self.rfile.readline().strip():
+            pass
+        return b''.join(chunks)
+
+    def send_text(self, status, text, headers=None):
+        """Wysyła odpowiedź tekstową o podanym kodzie.
+
+        :param status: kod odpowiedzi HTTP
+        :type status: int
+        :param text: treść odpowiedzi
+        :type text: str
+        :param headers: dodatkowe nagłówki odpowiedzi
+        :type headers: dict
+        """
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Serwer zastępczy uruchamiany w osobnym wątku na wolnym porcie lokalnym.
+
+    :param jobs: lista przyjętych zadań
+    :type jobs: list
+    :param connections: liczba nawiązanych połączeń
+    :type connections: int
+    :param encodings: kodowanie treści (*Content-Encoding*) każdego przyjętego zadania
+    :type encodings: list
+    :param batches: lista przyjętych zbiorczych zgłoszeń zadań (*/job/batch*)
+    :type batches: list
+    :param statuses: słownik identyfikator zadania -> stan zadania
+    :type statuses: dict
+    :param status_requests: liczba żądań stanu zadań (*/job/status*)
+    :type status_requests: int
+    :param frames: słownik identyfikator zadania -> słownik numer klatki -> zawartość pliku
+    :type frames: dict
+    :param frame_requests: lista par (numer klatki, nagłówek *Range*) kolejnych żądań klatek
+    :type frame_requests: list
+    :param uploads: słownik żeton -> niedokończona sesja wysyłania
+    :type uploads: dict
+    :param assets: słownik skrót zawartości -> przyjęty plik (*id*, *name*, *data*)
+    :type assets: dict
+    :param chunk_requests: lista par (nazwa pliku, numer fragmentu) kolejnych żądań wysłania fragmentów
+    :type chunk_requests: list
+    :param completed_uploads: nazwy plików w kolejności zakończenia wysyłania
+    :type completed_uploads: list
+    :param asset_queries: listy skrótów z kolejnych zapytań o pliki (*/job/assets/query*)
+    :type asset_queries: list
+    :param latency: stałe opóźnienie każdej odpowiedzi w sekundach
+    :type latency: float
+    :param jitter: górna granica losowego opóźnienia dodawanego do *latency*, w sekundach
+    :type jitter: float
+    :param error_rate: odsetek żądań odrzucanych kodem 503 (od 0 do 1)
+    :type error_rate: float
+    :param drop_rate: odsetek żądań, po których połączenie jest zrywane bez odpowiedzi (od 0 do 1)
+    :type drop_rate: float
+    :param rate_limit: maksymalna liczba obsługiwanych żądań na sekundę, 0 -- bez ograniczenia
+    :type rate_limit: float
+    :param injected_errors: liczba żądań odrzuconych kodem 503 przez *error_rate*
+    :type injected_errors: int
+    :param dropped_connections: liczba połączeń zerwanych przez *drop_rate*
+    :type dropped_connections: int
+    :param request_keys: nagłówki *Idempotency-Key* kolejnych zgłoszeń zadań (None, jeżeli go nie było)
+    :type request_keys: list
+    :param idempotency_keys: słownik klucz -> identyfikator zadania; ponowione zgłoszenie z tym samym
+        kluczem nie tworzy nowego zadania
+    :type idempotency_keys: dict
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), handler=StandInHandler, accepted_encodings=('gzip', 'zstd'),
+                 events=True, upload_chunk_size=None, latency=0.0, jitter=0.0, error_rate=0.0, drop_rate=0.0,
+                 rate_limit=0, seed=None):
+        super().__init__(address, handler)
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.next_slot = 0.0
+        self.injected_errors = 0
+        self.dropped_connections = 0
+        self.accepted_encodings = accepted_encodings
+        self.events = events
+        self.jobs = []
+        self.encodings = []
+        self.request_keys = []
+        self.idempotency_keys = {}
+        self.batches = []
+        self.statuses = {}
+        self.status_version = 0
+        self.status_requests = 0
+        self.subscribers = []
+        self.frames = {}
+        self.frame_requests = []
+        self.interruptions = {}
+        self.upload_chunk_size = upload_chunk_size
+        self.uploads = {}
+        self.assets = {}
+        self.chunk_requests = []
+        self.completed_uploads = []
+        self.failing_chunks = {}
+        self.asset_queries = []
+        self.stopped = threading.Event()
+        self.connections = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        """Adres serwera, np. *http://127.0.0.1:54321*.
+        """
+        host, port = self.server_address[:2]
+        return 'http://{}:{}'.format(host, port)
+
+    def get_request(self):
+        request = super().get_request()
+        with self.lock:
+            self.connections += 1
+        return request
+
+    def reserve_slot(self):
+        """Rezerwuje dla żądania kolejną chwilę obsługi, tak aby serwer obsługiwał co najwyżej
+        *rate_limit* żądań na sekundę.
+
+        :return: czas w sekundach, przez który żądanie musi poczekać na swoją kolejkę
+        :rtype: float
+        """
+        if not self.rate_limit:
+            return 0.0
+        now = time.monotonic()
+        with self.lock:
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + 1.0 / self.rate_limit
+        return slot - now
+
+    def add_status(self, name):
+        """Nadaje identyfikator nowemu zadaniu. Wywoływana z założoną blokadą *lock*.
+
+        :param name: nazwa zadania
+        :type name: str
+        :return: identyfikator zadania
+        :rtype: str
+        """
+        job_id = str(len(self.statuses) + 1)
+        self.statuses[job_id] = dict(id=job_id, name=name, state='QUEUED', progress=0.0)
+        self.status_version += 1
+        return job_id
+
+    def set_status(self, job_id, **fields):
+        """Zmienia stan zadania i rozsyła zmianę klientom połączonym ze strumieniem zdarzeń.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        """
+        with self.lock:
+            self.statuses[job_id].update(fields)
+            self.status_version += 1
+            for subscriber in self.subscribers:
+                subscriber.put((self.status_version, dict(fields, id=job_id)))
+
+    def add_frame(self, job_id, frame, data):
+        """Dodaje wyrenderowaną klatkę zadania.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :param frame: numer klatki
+        :type frame: int
+        :param data: zawartość pliku klatki
+        :type data: bytes
+        """
+        with self.lock:
+            self.frames.setdefault(job_id, {})[frame] = data
+
+    def interrupt(self, job_id, frame, after):
+        """Zrywa połączenie przy następnym wysyłaniu klatki, po wysłaniu podanej liczby bajtów.
+
+        :param job_id: identyfikator zadania
+        :type job_id: str
+        :param frame: numer klatki
+        :type frame: int
+        :param after: liczba bajtów wysłanych przed zerwaniem połączenia
+        :type after: int
+        """
+        with self.lock:
+            self.interruptions[(job_id, frame)] = after
+
+    def add_asset(self, name, data):
+        """Dodaje plik, tak jakby został wcześniej wysłany.
+
+        :param name: nazwa pliku
+        :type name: str
+        :param data: zawartość pliku
+        :type data: bytes
+        :return: skrót zawartości pliku
+        :rtype: str
+        """
+        digest = 'sha256:' + hashlib.sha256(data).hexdigest()
+        with self.lock:
+            self.assets[digest] = dict(id=digest, name=name, data=data)
+        return digest
+
+    def fail_chunk(self, name, index, times=1):
+        """Odrzuca kodem 503 podaną liczbę kolejnych prób wysłania fragmentu pliku.
+
+        :param name: nazwa pliku
+        :type name: str
+        :param index: numer fragmentu
+        :type index: int
+        :param times: liczba odrzuconych prób
+        :type times: int
+        """
+        with self.lock:
+            self.failing_chunks[(name, index)] = times
+
+    def start(self):
+        """Uruchamia obsługę żądań w wątku w tle.
+        """
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Zatrzymuje serwer i zwalnia port.
+        """
+        self.stopped.set()
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,193 @@
+"""
+Zgłasza RenderDockowi zadania z wielu plików *.blend* bez interfejsu użytkownika.
+
+Każdy plik jest otwierany w osobnym procesie programu *Blender* w trybie wsadowym
+(``blender -b``), w którym moduł *cis_render.headless* odczytuje i wysyła zadania pliku.
+Jednocześnie działa co najwyżej *--jobs* procesów. Wyniki wszystkich plików są zbierane
+w raporcie zbiorczym: wypisywanym na ekranie i, opcjonalnie, zapisywanym w pliku JSON.
+
+Skrypt nie importuje wtyczki, więc można go uruchomić zwykłym interpreterem Pythona::
+
+    python submit_blends.py --blender /opt/blender/blender --jobs 8 --report report.json shots/*.blend
+
+Wtyczka *cis_render* musi być zainstalowana w programie *Blender* wskazanym przez *--blender*.
+"""
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+WORKER_EXPRESSION = "import cis_render.headless; cis_render.headless.main()"
+# Stany zadań uznawanych za zgłoszone
+OK_STATUSES = ('created', 'queued', 'dry-run')
+
+
+def blender_command(blender, filename, result_file, worker_args):
+    """Zwraca wiersz poleceń procesu programu *Blender* zgłaszającego zadania z pliku.
+
+    :param blender: ścieżka do programu *Blender*
+    :type blender: str
+    :param filename: ścieżka do pliku *.blend*
+    :type filename: str
+    :param result_file: ścieżka do pliku, w którym proces zapisze wynik
+    :type result_file: str
+    :param worker_args: dodatkowe argumenty modułu *cis_render.headless*
+    :type worker_args: list
+    :rtype: list
+    """
+    return [blender, '-b', filename, '--python-exit-code', '1', '--python-expr', WORKER_EXPRESSION,
+            '--', '--result', result_file] + list(worker_args)
+
+
+def run_file(blender, filename, worker_args, timeout=None):
+    """Zgłasza zadania z jednego pliku w osobnym procesie programu *Blender*.
+
+    :param blender: ścieżka do programu *Blender*
+    :type blender: str
+    :param filename: ścieżka do pliku *.blend*
+    :type filename: str
+    :param worker_args: dodatkowe argumenty modułu *cis_render.headless*
+    :type worker_args: list
+    :param timeout: maksymalny czas działania procesu w sekundach
+    :type timeout: float
+    :return: wynik zapisany przez *cis_render.headless.run()* albo, jeżeli proces go nie zapisał,
+        wynik z opisem błędu procesu
+    :rtype: dict
+    """
+    start = time.monotonic()
+    handle, result_file = tempfile.mkstemp(prefix='cis_render_', suffix='.json')
+    os.close(handle)
+
+    try:
+        try:
+            process = subprocess.run(blender_command(blender, filename, result_file, worker_args),
+                                     stdout=subprocess.PIPE, stderr=subprocess.STDOUT, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return dict(file=filename, jobs=[], error="Timed out after {} s".format(timeout),
+                        duration=time.monotonic() - start)
+        except OSError as error:
+            return dict(file=filename, jobs=[], error="Could not start Blender: {}".format(error),
+                        duration=time.monotonic() - start)
+
+        try:
+            with open(result_file, 'r', encoding='utf-8') as infile:
+                return json.load(infile)
+        except ValueError:
+            output = process.stdout.decode('utf-8', 'replace').strip().splitlines()[-5:]
+            return dict(file=filename, jobs=[], duration=time.monotonic() - start,
+                        error="Blender exited with code {}: {}".format(process.returncode, "\n".join(output)))
+    finally:
+        os.remove(result_file)
+
+
+def summarize(results):
+    """Zlicza pliki i zadania według wyniku zgłoszenia.
+
+    :param results: wyniki poszczególnych plików zwrócone przez *run_file()*
+    :type results: list
+    :return: słownik z liczbą plików (*files*), plików, których nie udało się przetworzyć
+        (*failed_files*), zadań według stanu (*jobs*), zadań odrzuconych (*rejected_jobs*)
+        i łącznym czasem przetwarzania (*duration*)
+    :rtype: dict
+    """
+    jobs = {}
+    for result in results:
+        for job in result['jobs']:
+            jobs[job.get('status')] = jobs.get(job.get('status'), 0) + 1
+
+    return dict(
+        files=len(results),
+        failed_files=sum(1 for result in results if result['error']),
+        jobs=jobs,
+        rejected_jobs=sum(count for status, count in jobs.items() if status not in OK_STATUSES),
+        duration=sum(result.get('duration', 0) for result in results)
+    )
+
+
+def format_report(summary, results):
+    """Zwraca raport zbiorczy w postaci tekstu.
+
+    :param summary: podsumowanie zwrócone przez *summarize()*
+    :type summary: dict
+    :param results: wyniki poszczególnych plików
+    :type results: list
+    :rtype: str
+    """
+    lines = []
+    for result in results:
+        if result['error']:
+            lines.append("FAILED  {}\n        {}".format(result['file'], result['error'].replace("\n", "\n        ")))
+            continue
+        statuses = ", ".join("{} {}".format(job['key'], job.get('status')) for job in result['jobs'])
+        lines.append("OK      {} ({:.1f} s): {}".format(result['file'], result.get('duration', 0), statuses))
+
+    jobs = ", ".join("{} {}".format(count, status) for status, count in sorted(summary['jobs'].items()))
+    lines.append("{} files, {} failed; jobs: {}".format(summary['files'], summary['failed_files'], jobs or "none"))
+    return "\n".join(lines)
+
+
+def parse_args(argv):
+    """Odczytuje argumenty wiersza poleceń.
+
+    :param argv: argumenty
+    :type argv: list
+    :rtype: argparse.Namespace
+    """
+    parser = argparse.ArgumentParser(description="Register render jobs from many .blend files in parallel")
+    parser.add_argument('files', nargs='+', help=".blend files")
+    parser.add_argument('--blender', default=os.environ.get('BLENDER', 'blender'),
+                        help="Blender executable, defaults to $BLENDER or 'blender'")
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 4,
+                        help="number of Blender processes running at once")
+    parser.add_argument('--timeout', type=float, help="time limit for one file, in seconds")
+    parser.add_argument('--report', help="JSON file the summary report is written to")
+    parser.add_argument('--mode', choices=('SCENES', 'VIEW_LAYERS', 'CAMERAS'), default='SCENES')
+    parser.add_argument('--server', help="RenderDock job URL")
+    parser.add_argument('--dry-run', action='store_true', help="prepare payloads without sending them")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Zgłasza zadania ze wszystkich plików i wypisuje raport zbiorczy.
+
+    :param argv: argumenty wiersza poleceń, domyślnie *sys.argv*
+    :type argv: list
+    :return: 0, jeżeli wszystkie zadania zostały zgłoszone, w przeciwnym razie 1
+    :rtype: int
+    """
+    args = parse_args(argv)
+
+    worker_args = ['--mode', args.mode]
+    if args.server:
+        worker_args += ['--server', args.server]
+    if args.dry_run:
+        worker_args.append('--dry-run')
+
+    results = []
+    # Każde zadanie puli czeka na zakończenie osobnego procesu programu Blender
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [executor.submit(run_file, args.blender, os.path.abspath(filename), worker_args, args.timeout)
+                   for filename in args.files]
+        for future in concurrent.futures.as_completed(futures):
+            result = future.result()
+            print("{} {}".format("FAILED" if result['error'] else "done  ", result['file']), file=sys.stderr)
+            results.append(result)
+
+    results.sort(key=lambda result: result['file'])
+    summary = summarize(results)
+    print(format_report(summary, results))
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as outfile:
+            json.dump(dict(summary=summary, results=results), outfile, indent=2)
+
+    return 1 if summary['failed_files'] or summary['rejected_jobs'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
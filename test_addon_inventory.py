@@ -0,0 +1,57 @@
+import os
+import sys
+import pytest
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render.addon_inventory import AddonInventory
+
+
+def make_module(module, name, version):
+    return SimpleNamespace(__name__=module, bl_info={'name': name, 'version': version})
+
+
+@pytest.fixture
+def addons(tmp_path):
+    with mock.patch('cis_render.addon_inventory.addon_utils') as mock_addon_utils, \
+            mock.patch('cis_render.addon_inventory.bpy') as mock_bpy:
+        mock_addon_utils.paths.return_value = [str(tmp_path)]
+        mock_addon_utils.modules.return_value = [
+            make_module('node_wrangler', 'Node Wrangler', (3, 36)),
+            make_module('cis_render', 'CIS Render Add-On', (0, 0, 1)),
+        ]
+        mock_bpy.context.preferences.addons.keys.return_value = ['cis_render']
+        yield SimpleNamespace(directory=tmp_path, addon_utils=mock_addon_utils, bpy=mock_bpy)
+
+
+def test_inventory_is_scanned_once_while_directories_are_unchanged(addons):
+    inventory = AddonInventory()
+
+    expected = [dict(version=(3, 36), name='Node Wrangler'), dict(version=(0, 0, 1), name='CIS Render Add-On')]
+    assert inventory.get(enabled_only=False) == expected
+    assert inventory.get(enabled_only=False) == expected
+    assert addons.addon_utils.modules.call_count == 1
+
+
+def test_inventory_is_rescanned_when_directory_changes(addons):
+    inventory = AddonInventory()
+    inventory.get(enabled_only=False)
+
+    stat = os.stat(str(addons.directory))
+    os.utime(str(addons.directory), ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+    addons.addon_utils.modules.return_value.append(make_module('new_addon', 'New Add-On', (1, 0)))
+
+    assert inventory.get(enabled_only=False)[-1] == dict(version=(1, 0), name='New Add-On')
+    assert addons.addon_utils.modules.call_count == 2
+
+
+def test_inventory_is_rescanned_when_enabled_set_changes(addons):
+    inventory = AddonInventory()
+
+    assert inventory.get(enabled_only=True) == [dict(version=(0, 0, 1), name='CIS Render Add-On')]
+
+    addons.bpy.context.preferences.addons.keys.return_value = ['cis_render', 'node_wrangler']
+    assert len(inventory.get(enabled_only=True)) == 2
+    assert addons.addon_utils.modules.call_count == 2
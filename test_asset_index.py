@@ -0,0 +1,147 @@
+import os
+import sys
+import time
+import pytest
+from unittest import mock
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import asset_index
+from cis_render.asset_index import AssetIndex
+
+
+@pytest.fixture
+def library(tmp_path):
+    directory = tmp_path / 'textures'
+    directory.mkdir()
+    for name in ['wood.png', 'metal.png']:
+        (directory / name).write_bytes(b'texture')
+    past = time.time() - 60
+    os.utime(str(directory), (past, past))
+    return directory
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_polling_index_stats_directory_once_per_query(library):
+    index = AssetIndex(use_inotify=False)
+    paths = [str(library / 'wood.png'), str(library / 'metal.png'), str(library / 'stone.png')]
+
+    assert index.find_missing(paths) == [str(library / 'stone.png')]
+
+    with mock.patch('os.scandir', side_effect=AssertionError("directory should not be read")):
+        assert index.find_missing(paths[:2]) == []
+
+    (library / 'stone.png').write_bytes(b'texture')
+    assert index.find_missing(paths) == []
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is available only on Linux")
+def test_watched_index_needs_no_filesystem_calls(library):
+    index = AssetIndex()
+    if index.watcher is None:
+        pytest.skip("inotify is not available")
+    paths = [str(library / 'wood.png'), str(library / 'stone.png')]
+
+    try:
+        assert index.find_missing(paths) == [str(library / 'stone.png')]
+
+        with mock.patch('os.stat', side_effect=AssertionError("directory should not be checked")), \
+                mock.patch('os.scandir', side_effect=AssertionError("directory should not be read")):
+            assert index.find_missing(paths[:1]) == []
+
+        (library / 'stone.png').write_bytes(b'texture')
+        assert wait_until(lambda: index.directories[str(library)].stale)
+        assert index.find_missing(paths) == []
+    finally:
+        index.close()
+
+
+def test_size_is_cached_until_file_changes(library):
+    index = AssetIndex(use_inotify=False)
+    texture = str(library / 'wood.png')
+
+    assert index.size(texture) == 7
+    with mock.patch('os.stat', wraps=os.stat) as stat:
+        assert index.size(texture) == 7
+        assert stat.call_count == 1
+
+    index.on_event(str(library), asset_index.IN_CLOSE_WRITE, 'wood.png')
+    (library / 'wood.png').write_bytes(b'larger texture')
+    assert index.size(texture) == 14
+
+
+def test_index_is_restored_and_revalidated(tmp_path, library):
+    filename = str(tmp_path / 'index.json')
+    index = AssetIndex(filename, use_inotify=False)
+    index.find_missing([str(library / 'wood.png')])
+
+    restored = AssetIndex(filename, use_inotify=False)
+    assert restored.directories[str(library)].names == {'wood.png', 'metal.png'}
+
+    (library / 'wood.png').unlink()
+    assert restored.find_missing([str(library / 'wood.png')]) == [str(library / 'wood.png')]
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="inotify is available only on Linux")
+def test_restored_directories_are_watched(tmp_path, library):
+    filename = str(tmp_path / 'index.json')
+    paths = [str(library / 'wood.png'), str(library / 'stone.png')]
+    assert AssetIndex(filename, use_inotify=False).find_missing(paths) == [str(library / 'stone.png')]
+
+    restored = AssetIndex(filename)
+    if restored.watcher is None:
+        pytest.skip("inotify is not available")
+    try:
+        with mock.patch.object(restored.watcher, 'watch', wraps=restored.watcher.watch) as watch, \
+                mock.patch('os.scandir', side_effect=AssertionError("directory should not be read")):
+            assert restored.find_missing(paths) == [str(library / 'stone.png')]
+        watch.assert_called_once_with(str(library))
+        assert restored.directories[str(library)].watched
+
+        with mock.patch('os.stat', side_effect=AssertionError("directory should not be checked")), \
+                mock.patch('os.scandir', side_effect=AssertionError("directory should not be read")):
+            assert restored.find_missing(paths[:1]) == []
+
+        (library / 'stone.png').write_bytes(b'texture')
+        assert wait_until(lambda: restored.directories[str(library)].stale)
+        assert restored.find_missing(paths) == []
+    finally:
+        restored.close()
+
+
+def test_event_during_scan_marks_directory_stale(library):
+    index = AssetIndex(use_inotify=False)
+    index.watcher = mock.MagicMock()
+    index.watcher.watch.return_value = True
+    scandir = os.scandir
+
+    def scandir_and_delete(path):
+        entries = scandir(path)
+        # Plik usunięty po odczytaniu katalogu, zanim stan trafi do indeksu
+        (library / 'wood.png').unlink()
+        index.on_event(str(library), asset_index.IN_DELETE, 'wood.png')
+        return entries
+
+    with mock.patch('os.scandir', side_effect=scandir_and_delete):
+        state = index.get_directory(str(library))
+    assert state.watched and state.stale
+    assert not index.scanning
+
+    assert index.find_missing([str(library / 'wood.png')]) == [str(library / 'wood.png')]
+    assert not index.directories[str(library)].stale
+
+
+def test_network_mounts_are_polled():
+    mounts = [('/mnt/nfs/textures', 'nfs4'), ('/mnt', 'ext4'), ('/', 'ext4')]
+
+    assert asset_index.is_network_path('/mnt/nfs/textures/wood', mounts)
+    assert not asset_index.is_network_path('/mnt/nfs/texturesX', mounts)
+    assert not asset_index.is_network_path('/home/user', mounts)
@@ -0,0 +1,37 @@
+import sys
+from unittest import mock
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import batch
+
+
+JOBS = [
+    {"key": "Scene", "name": "Shot", "frames": {"start": 1, "end": 10}, "priority": "0", "tile_job": False},
+    {"key": "Scene.001", "name": "Shot", "frames": {"start": 11, "end": 20}, "priority": "0", "tile_job": False},
+    {"key": "Scene.002", "name": "Shot", "frames": {"start": 21, "end": 30}, "priority": "1"},
+]
+
+
+def test_settings_shared_by_all_jobs_are_sent_once():
+    payload = batch.dedupe(JOBS, {"textures": [{"name": "wood.png"}]})
+
+    assert payload['common'] == {"textures": [{"name": "wood.png"}], "name": "Shot"}
+    assert payload['jobs'][0] == {"key": "Scene", "frames": {"start": 1, "end": 10}, "priority": "0",
+                                  "tile_job": False}
+    assert payload['jobs'][2] == {"key": "Scene.002", "frames": {"start": 21, "end": 30}, "priority": "1"}
+    assert JOBS[0]['name'] == "Shot"
+
+
+def test_expanded_batch_matches_single_jobs():
+    payload = batch.dedupe(JOBS, {"textures": [], "add_ons": [{"name": "Node Wrangler"}]})
+
+    expected = [dict({k: v for k, v in job.items() if k != 'key'}, textures=[]) for job in JOBS]
+    assert batch.expand(payload) == expected
+    assert batch.expand(payload, keys=True) == [(job['key'], single) for job, single in zip(JOBS, expected)]
+
+
+def test_single_job_batch_keeps_all_settings_in_job():
+    payload = batch.dedupe(JOBS[:1])
+
+    assert payload == {"common": {}, "jobs": JOBS[:1]}
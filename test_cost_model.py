@@ -0,0 +1,221 @@
+import pytest
+from unittest import mock
+import json
+import random
+import time
+import sys
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import config
+from cis_render import cost_model
+from cis_render import job_status
+from cis_render import spool
+from cis_render import texture_manifest
+from cis_render import ui
+from cis_render.read_scene_settings import RequestManager, complete_and_submit
+from standin_server import StandInServer
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    filename = str(tmp_path / 'cost_history.json')
+    with mock.patch.object(config, 'cost_history_file', filename), \
+            mock.patch.object(cost_model, '_history', None), \
+            mock.patch.object(cost_model, '_models', {}), \
+            mock.patch.object(cost_model, '_estimates', {}), \
+            mock.patch.object(cost_model, '_refreshing', set()):
+        yield filename
+
+
+def characteristics(pixels, samples, bounces=12, texture_bytes=0, engine='CYCLES'):
+    return dict(engine=engine, pixels=pixels, samples=samples, bounces=bounces, texture_bytes=texture_bytes)
+
+
+def render_time(row, noise=0.0):
+    # Czas klatki proporcjonalny do liczby pikseli i próbek, rosnący z liczbą odbić
+    return 2e-8 * row['pixels'] * row['samples'] * 1.05 ** row['bounces'] * (1 + noise)
+
+
+def fill_history(count, seed=0):
+    generator = random.Random(seed)
+    history = cost_model.get_history()
+    for i in range(count):
+        row = characteristics(generator.choice([640 * 360, 1280 * 720, 1920 * 1080]),
+                              generator.choice([32, 64, 128, 256]), generator.randint(4, 12))
+        history.add_pending(str(i), dict(scene='Scene', characteristics=row, settings={}))
+        seconds = render_time(row)
+        history.complete(str(i), [seconds * (1 + generator.uniform(-0.05, 0.05)) for frame in range(5)])
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def make_scene(samples=128):
+    scene = mock.MagicMock()
+    scene.name = 'Scene'
+    scene.render.engine = 'CYCLES'
+    scene.render.resolution_x, scene.render.resolution_y, scene.render.resolution_percentage = 1920, 1080, 50
+    scene.cycles.samples, scene.cycles.max_bounces = samples, 8
+    return scene
+
+
+def test_scene_characteristics():
+    scene = make_scene()
+    assert cost_model.scene_characteristics(scene, 100) == characteristics(960 * 540, 128, 8, 100)
+
+
+def test_history_keeps_pending_jobs_until_completed(history_file):
+    history = cost_model.get_history()
+    history.add_pending('1', dict(scene='Scene', characteristics=characteristics(100, 16, texture_bytes=5),
+                                  settings={}))
+    assert not history.complete('2', [1.0])
+    assert history.version == 0
+
+    reloaded = cost_model.CostHistory(history_file)
+    assert reloaded.texture_bytes('Scene') == 5
+    assert reloaded.complete('1', [3.0, 1.0, 2.0, 10.0, 2.5])
+    assert reloaded.version == 1
+
+    job = cost_model.CostHistory(history_file).completed('CYCLES')[0]
+    assert (job['id'], job['frame_seconds'], job['frames']) == ('1', 2.5, 5)
+    assert cost_model.CostHistory(history_file).completed('BLENDER_EEVEE') == []
+
+
+def test_history_is_trimmed_to_size(history_file):
+    history = cost_model.CostHistory(history_file, size=3)
+    for i in range(5):
+        history.add_pending(str(i), dict(characteristics=characteristics(100, 16)))
+        history.complete(str(i), [1.0])
+    assert [job['id'] for job in history.jobs] == ['2', '3', '4']
+
+
+def test_damaged_history_is_ignored(history_file):
+    with open(history_file, 'w') as outfile:
+        outfile.write('{"pending": ')
+    assert cost_model.get_history().jobs == []
+
+
+def test_no_estimate_until_enough_jobs(history_file):
+    fill_history(config.cost_min_jobs - 1)
+    assert cost_model.estimate(characteristics(1280 * 720, 64)) is None
+
+
+def test_model_recovers_render_time():
+    pytest.importorskip('numpy')
+    generator = random.Random(1)
+    rows = [characteristics(generator.randint(10 ** 5, 10 ** 7), generator.choice([16, 64, 256, 1024]),
+                            generator.randint(2, 16), generator.randint(0, 2 ** 32)) for i in range(200)]
+    times = [render_time(row, generator.gauss(0, 0.05)) for row in rows]
+    model = cost_model.CostModel.fit(rows, times)
+
+    assert model.coefficients[1] == pytest.approx(1.0, abs=0.05)
+    assert model.coefficients[2] == pytest.approx(1.0, abs=0.05)
+    row = characteristics(1920 * 1080, 128, 8)
+    prediction = model.predict_one(row)
+    assert prediction['low'] < render_time(row) < prediction['high']
+    assert prediction['frame_seconds'] == pytest.approx(render_time(row), rel=0.1)
+
+    seconds, low, high = model.predict(rows)
+    assert len(seconds) == 200 and (low < seconds).all() and (seconds < high).all()
+
+
+def test_estimate_for_job(history_file):
+    pytest.importorskip('numpy')
+    fill_history(20)
+    row = characteristics(1280 * 720, 128, 8)
+    prediction = cost_model.estimate(row, frames=10)
+    assert prediction['jobs'] == 20
+    assert prediction['low'] < render_time(row) < prediction['high']
+    assert prediction['job_seconds'] == pytest.approx(prediction['frame_seconds'] * 10)
+    assert cost_model.get_model('CYCLES') is cost_model.get_model('CYCLES')
+    assert cost_model.estimate(characteristics(1280 * 720, 128, engine='BLENDER_EEVEE')) is None
+
+
+def test_completed_job_status_is_recorded(history_file):
+    cost_model.get_history().add_pending('7', dict(scene='Scene', characteristics=characteristics(100, 16)))
+    table = job_status.StatusTable()
+    table.track('7', 'Shot')
+    client = job_status.StatusClient(table)
+    client.apply({'id': '7', 'state': 'DONE', 'progress': 1.0, 'frame_times': [4.0, 6.0]})
+
+    assert table.jobs['7']['state'] == 'DONE' and 'frame_times' not in table.jobs['7']
+    assert cost_model.get_history().completed('CYCLES')[0]['frame_seconds'] == 5.0
+
+
+def test_scheduling_hint_is_sent_with_job(history_file, tmp_path):
+    pytest.importorskip('numpy')
+    fill_history(20)
+    texture = tmp_path / 'texture.png'
+    texture.write_bytes(b'0' * 1024)
+    payload = dict(name='Shot', scene='/tmp/scene.blend', frames=dict(start=1, end=4),
+                   textures=[dict(name='texture.png', full_path=str(texture))])
+    sample = dict(scene='Scene', characteristics=characteristics(1280 * 720, 128, 8), settings={})
+
+    request_manager = RequestManager()
+    with StandInServer() as server:
+        with mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(config, 'asset_index_enabled', False), \
+                mock.patch.object(config, 'hash_cache_file', str(tmp_path / 'hashes.json')), \
+                mock.patch.object(texture_manifest, '_cache', None):
+            complete_and_submit(request_manager, payload, cost_sample=sample)
+        request_manager.close()
+
+    hint = server.jobs[0]['scheduling']
+    assert sample['characteristics']['texture_bytes'] == 1024
+    # Zgłoszone zadanie jest zapisywane w historii przez wątek roboczy
+    assert list(cost_model.get_history().pending) == ['1']
+    assert hint['low'] < hint['frame_seconds'] < hint['high']
+    assert hint['job_seconds'] == pytest.approx(hint['frame_seconds'] * 4)
+    json.dumps(hint)
+
+
+def test_frame_count_honours_frame_step():
+    assert cost_model.frame_count(dict(start=1, end=10)) == 10
+    assert cost_model.frame_count(dict(start=1, end=10), 3) == 4
+    assert cost_model.frame_count(dict(start=5, end=4)) == 0
+
+
+def test_panel_estimate_is_computed_in_background_only_after_changes(history_file):
+    pytest.importorskip('numpy')
+    fill_history(20)
+    scene = make_scene()
+
+    with mock.patch.object(cost_model, 'estimate', wraps=cost_model.estimate) as estimate:
+        version = cost_model.estimates_version()
+        cost_model.refresh_estimate(scene, 10)
+        assert wait_for(lambda: cost_model.estimates_version() != version)
+        prediction = cost_model.cached_estimate('Scene')
+        assert prediction['jobs'] == 20
+        assert prediction['job_seconds'] == pytest.approx(prediction['frame_seconds'] * 10)
+
+        cost_model.refresh_estimate(scene, 10)
+        assert estimate.call_count == 1
+
+        version = cost_model.estimates_version()
+        scene.cycles.samples = 256
+        cost_model.refresh_estimate(scene, 10)
+        assert wait_for(lambda: cost_model.estimates_version() != version)
+        assert estimate.call_count == 2
+        assert cost_model.cached_estimate('Scene')['frame_seconds'] > prediction['frame_seconds']
+
+
+def test_job_panel_draws_without_reading_history_or_spool(history_file):
+    panel = ui.JOBDATA_PT_job_name()
+    panel.layout = mock.MagicMock()
+    context = mock.MagicMock()
+    context.scene.name = 'Scene'
+    with mock.patch.object(cost_model, '_estimates', {'Scene': (None, dict(frame_seconds=90.0, low=60.0, high=150.0,
+                                                                           jobs=12, job_seconds=900.0))}), \
+            mock.patch.object(cost_model, 'get_history', side_effect=AssertionError("history should not be read")), \
+            mock.patch.object(spool, 'get_spool', side_effect=AssertionError("spool should not be read")):
+        panel.draw(context)
+
+    labels = [call[1]['text'] for call in panel.layout.label.call_args_list]
+    assert labels == ["Frame: ~1m 30s (1m 00s - 2m 30s)", "Job: ~15m 00s (12 jobs in history)"]
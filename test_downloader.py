@@ -0,0 +1,97 @@
+import pytest
+from unittest import mock
+import sys
+import os
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import config
+from cis_render import downloader
+from standin_server import StandInServer
+
+
+def frame_data(frame, size=50000):
+    return bytes((frame * 7 + i) % 251 for i in range(size))
+
+
+@pytest.fixture
+def server():
+    with StandInServer() as server:
+        with mock.patch.object(config, 'frames_url', server.url + '/job/{}/frames'), \
+                mock.patch.object(config, 'download_retry_delay', 0):
+            yield server
+
+
+@pytest.mark.parametrize("template, file_format, use_extension, expected", [
+    ('/renders/shot_####', 'PNG', True, '/renders/shot_0007.png'),
+    ('/renders/v##/shot_###', 'JPEG', True, '/renders/v##/shot_007.jpg'),
+    ('/renders/', 'OPEN_EXR', True, '/renders/0007.exr'),
+    ('/renders/shot_####.PNG', 'PNG', True, '/renders/shot_0007.PNG'),
+    ('/renders/shot_#', 'PNG', False, '/renders/shot_7'),
+])
+def test_frame_path_follows_output_template(template, file_format, use_extension, expected):
+    assert downloader.frame_path(template, 7, file_format, use_extension) == expected
+
+
+def test_downloading_all_frames(server, tmp_path):
+    for frame in range(1, 6):
+        server.add_frame('1', frame, frame_data(frame))
+
+    with downloader.FrameDownloader(workers=3) as frames:
+        results = frames.download('1', str(tmp_path / 'out' / 'shot_####'), 'PNG')
+
+    assert [result['frame'] for result in results] == [1, 2, 3, 4, 5]
+    assert all(result['status'] == 'downloaded' for result in results)
+    for frame in range(1, 6):
+        assert (tmp_path / 'out' / 'shot_{:04}.png'.format(frame)).read_bytes() == frame_data(frame)
+    assert not list((tmp_path / 'out').glob('*.part'))
+
+
+def test_identical_files_are_skipped_and_different_kept(server, tmp_path):
+    for frame in range(1, 4):
+        server.add_frame('1', frame, frame_data(frame))
+    (tmp_path / 'shot_0001.png').write_bytes(frame_data(1))
+    (tmp_path / 'shot_0002.png').write_bytes(b'older render')
+
+    with downloader.FrameDownloader() as frames:
+        results = frames.download('1', str(tmp_path / 'shot_####'), 'PNG', overwrite=False)
+
+    assert [result['status'] for result in results] == ['skipped', 'kept', 'downloaded']
+    assert (tmp_path / 'shot_0002.png').read_bytes() == b'older render'
+    assert [frame for frame, _ in server.frame_requests] == [3]
+
+
+def test_interrupted_download_is_resumed_with_range(server, tmp_path):
+    server.add_frame('1', 1, frame_data(1, 200000))
+    server.interrupt('1', 1, 150000)
+
+    with downloader.FrameDownloader() as frames:
+        results = frames.download('1', str(tmp_path / 'shot_####'), 'PNG')
+
+    assert results[0]['status'] == 'downloaded'
+    assert (tmp_path / 'shot_0001.png').read_bytes() == frame_data(1, 200000)
+    assert server.frame_requests[0] == (1, None)
+    assert len(server.frame_requests) == 2
+    offset = int(server.frame_requests[1][1][len('bytes='):-1])
+    assert 0 < offset <= 150000
+
+
+def test_corrupted_download_is_rejected(server, tmp_path):
+    server.add_frame('1', 1, frame_data(1))
+    target = str(tmp_path / 'shot_0001.png')
+
+    with mock.patch.object(config, 'download_retries', 1):
+        with downloader.FrameDownloader() as frames:
+            entry = frames.list_frames('1')[0]
+            with pytest.raises(ValueError):
+                frames.fetch(entry['url'], target, entry['size'], 'sha256:' + '0' * 64)
+
+    assert not os.path.exists(target)
+    assert not os.path.exists(target + '.part')
+    assert len(server.frame_requests) == 2
+
+
+def test_missing_job_fails_listing(server):
+    with downloader.FrameDownloader() as frames:
+        with pytest.raises(downloader.requests.exceptions.HTTPError):
+            frames.list_frames('404')
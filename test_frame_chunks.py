@@ -0,0 +1,43 @@
+import sys
+import pytest
+from unittest import mock
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import config
+from cis_render import frame_chunks
+
+
+def test_chunks_cover_range_without_gaps():
+    chunks = frame_chunks.split_frames(1, 250, 16, affinity_span=4)
+
+    frames = [frame for chunk in chunks for frame in range(chunk['start'], chunk['end'] + 1)]
+    assert frames == list(range(1, 251))
+    assert [chunk['index'] for chunk in chunks] == list(range(len(chunks)))
+    assert chunks[-1] == dict(index=15, start=241, end=250, affinity='frames-3')
+
+
+def test_consecutive_chunks_share_affinity():
+    chunks = frame_chunks.split_frames(0, 99, 10, affinity_span=3)
+
+    assert [chunk['affinity'] for chunk in chunks] == ['frames-0'] * 3 + ['frames-1'] * 3 + \
+        ['frames-2'] * 3 + ['frames-3']
+
+
+@pytest.mark.parametrize('frame_count, expected', [(1, 4), (100, 4), (320, 10), (1000, 32)])
+def test_auto_chunk_size(frame_count, expected):
+    with mock.patch.object(config, 'frame_chunk_target', 32), mock.patch.object(config, 'frame_chunk_min', 4):
+        assert frame_chunks.auto_chunk_size(frame_count) == expected
+
+
+def test_plan_chunks_strategies():
+    frames = dict(start=1, end=250)
+
+    assert len(frame_chunks.plan_chunks(frames, 'NONE')) == 1
+    assert len(frame_chunks.plan_chunks(frames, 'FIXED', 50)) == 5
+    assert frame_chunks.plan_chunks(frames, 'AUTO')[0]['start'] == 1
+
+    with pytest.raises(ValueError):
+        frame_chunks.plan_chunks(frames, 'RANDOM')
+    with pytest.raises(ValueError):
+        frame_chunks.plan_chunks(dict(start=10, end=1), 'AUTO')
@@ -0,0 +1,117 @@
+import json
+import os
+import stat
+import sys
+import pytest
+from unittest import mock
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import JobProperties
+from cis_render import config
+from cis_render import headless
+from cis_render import scene_cache
+import submit_blends
+
+
+def make_scene(name, frame_start):
+    scene = mock.MagicMock()
+    scene.name = name
+    for k,v in JobProperties.__annotations__.items():
+        setattr(scene.my_tool, k, v)
+    scene.my_tool.use_output_frames_setting = False
+    scene.my_tool.use_output_format_setting = False
+    scene.my_tool.frame_start = frame_start
+    scene.my_tool.frame_end = frame_start + 9
+    return scene
+
+
+@pytest.fixture
+def blend_file(tmp_path):
+    texture = tmp_path / 'wood.png'
+    texture.write_bytes(b'texture')
+    scenes = [make_scene('Scene', 1), make_scene('Scene.001', 11)]
+    image = mock.MagicMock(users=1, packed_file=None, filepath='//wood.png')
+    image.name = 'wood.png'
+
+    with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy, \
+            mock.patch.object(config, 'asset_index_enabled', False), \
+            mock.patch.object(headless.HeadlessReader, 'read_add_ons'), \
+            mock.patch.object(headless.HeadlessReader, 'get_job_tiles_info', return_value={"tile_job": False}):
+        mock_bpy.data.scenes = scenes
+        mock_bpy.data.images = [image]
+        mock_bpy.data.filepath = str(tmp_path / 'shot.blend')
+        mock_bpy.path.abspath.side_effect = lambda path: str(tmp_path / path.lstrip('/'))
+        scene_cache.on_file_change()
+        yield scenes
+    scene_cache.on_file_change()
+
+
+def test_payload_of_all_scenes_shares_textures(blend_file, tmp_path):
+    payload = headless.build_payload(blend_file[0], 'SCENES')
+
+    assert payload['common']['textures'] == [{"name": "wood.png", "full_path": str(tmp_path / 'wood.png')}]
+    assert [job['key'] for job in payload['jobs']] == ['Scene', 'Scene.001']
+    assert [job['frames']['start'] for job in payload['jobs']] == [1, 11]
+
+
+def test_run_reports_missing_textures_without_raising(blend_file, tmp_path):
+    os.remove(str(tmp_path / 'wood.png'))
+
+    result = headless.run('shot.blend', blend_file[0], dry_run=True)
+
+    assert result['jobs'] == []
+    assert result['error'].startswith('MissingFilesError')
+
+
+def test_dry_run_writes_payload(blend_file, tmp_path):
+    payload_file = str(tmp_path / 'payload.json')
+
+    result = headless.run('shot.blend', blend_file[0], dry_run=True, payload_file=payload_file)
+
+    assert result['error'] is None
+    assert result['jobs'] == [dict(key='Scene', status='dry-run'), dict(key='Scene.001', status='dry-run')]
+    with open(payload_file) as infile:
+        assert len(json.load(infile)['jobs']) == 2
+
+
+FAKE_BLENDER = '''#!{python}
+import json, sys
+filename = sys.argv[2]
+result_file = sys.argv[sys.argv.index('--result') + 1]
+if 'crash' in filename:
+    print("Segmentation fault")
+    sys.exit(139)
+status = 'rejected' if 'bad' in filename else 'created'
+with open(result_file, 'w') as outfile:
+    json.dump(dict(file=filename, jobs=[dict(key='Scene', status=status)], error=None, duration=0.1), outfile)
+'''
+
+
+@pytest.fixture
+def fake_blender(tmp_path):
+    path = tmp_path / 'blender'
+    path.write_text(FAKE_BLENDER.format(python=sys.executable))
+    path.chmod(path.stat().st_mode | stat.S_IEXEC)
+    return str(path)
+
+
+def test_submitter_aggregates_results_of_all_files(fake_blender, tmp_path, capsys):
+    report = str(tmp_path / 'report.json')
+    files = ['shot_010.blend', 'shot_020.blend', 'shot_030_crash.blend', 'shot_040_bad.blend']
+
+    assert submit_blends.main(['--blender', fake_blender, '-j', '2', '--report', report] + files) == 1
+
+    with open(report) as infile:
+        summary = json.load(infile)['summary']
+    assert summary['files'] == 4
+    assert summary['failed_files'] == 1
+    assert summary['jobs'] == {'created': 2, 'rejected': 1}
+    assert summary['rejected_jobs'] == 1
+    assert 'Segmentation fault' in capsys.readouterr().out
+
+
+def test_submitter_reports_missing_blender(tmp_path):
+    result = submit_blends.run_file(str(tmp_path / 'no_blender'), 'shot.blend', [])
+
+    assert result['error'].startswith('Could not start Blender')
@@ -0,0 +1,178 @@
+import pytest
+import requests
+from unittest import mock
+import sys
+import time
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import config
+from cis_render import job_status
+from cis_render import spool
+from cis_render import RequestManager
+from standin_server import StandInServer
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def submit_jobs(server, count):
+    request_manager = RequestManager()
+    with mock.patch.object(config, 'server', server.url + '/job'):
+        responses = [request_manager.post_job_data({"name": "job_{}".format(i)}) for i in range(count)]
+    request_manager.close()
+    return [job_status.job_id_from_response(response) for response in responses]
+
+
+def test_status_table_tracks_only_submitted_jobs():
+    table = job_status.StatusTable(limit=2)
+    table.track('1', 'first')
+    version = table.version
+
+    assert table.update('1', state='RUNNING', progress=0.5)
+    assert table.version == version + 1
+    assert not table.update('1', state='RUNNING', progress=0.5)
+    assert not table.update('7', state='RUNNING')
+    assert table.version == version + 1
+
+    table.track('2', 'second')
+    table.track('3', 'third')
+    assert table.ids() == ['2', '3']
+    assert [job['name'] for job in table.snapshot()] == ['third', 'second']
+
+
+def test_parsing_server_sent_events():
+    lines = [': keepalive', '', 'id: 4', 'event: status', 'data: {"id": "1",', 'data: "state": "DONE"}', '',
+             'data:plain', '']
+    events = list(job_status.parse_events(lines))
+
+    assert events == [dict(event='status', id='4', data='{"id": "1",\n"state": "DONE"}'),
+                      dict(event='message', id=None, data='plain')]
+
+
+def test_job_id_is_read_from_location_or_body():
+    assert job_status.job_id_from_response(mock.MagicMock(headers={'location': '/job/12'})) == '12'
+
+    response = mock.MagicMock(headers={})
+    response.json.return_value = {'id': 7}
+    assert job_status.job_id_from_response(response) == '7'
+
+    response.json.side_effect = ValueError
+    assert job_status.job_id_from_response(response) is None
+
+
+def test_status_client_multiplexes_event_stream():
+    table = job_status.StatusTable()
+    with StandInServer() as server:
+        ids = submit_jobs(server, 3)
+        for job_id in ids:
+            table.track(job_id, 'job')
+
+        client = job_status.StatusClient(table, server.url + '/job/events', server.url + '/job/status')
+        client.start()
+        try:
+            assert wait_for(lambda: server.subscribers)
+            server.set_status(ids[0], state='RUNNING', progress=0.25)
+            server.set_status(ids[2], state='DONE', progress=1.0)
+            assert wait_for(lambda: table.jobs[ids[2]]['state'] == 'DONE')
+        finally:
+            client.stop()
+            client.join(timeout=5)
+
+    assert table.jobs[ids[0]]['state'] == 'RUNNING'
+    assert table.jobs[ids[0]]['progress'] == 0.25
+    assert table.jobs[ids[1]]['state'] == 'SUBMITTED'
+    assert client.use_events
+    assert client.last_event_id == '5'
+    assert server.status_requests == 0
+    assert not client.is_alive()
+
+
+def test_status_client_falls_back_to_conditional_polling():
+    table = job_status.StatusTable()
+    with StandInServer(events=False) as server:
+        ids = submit_jobs(server, 2)
+        for job_id in ids:
+            table.track(job_id, 'job')
+
+        client = job_status.StatusClient(table, server.url + '/job/events', server.url + '/job/status')
+        client.listen()
+        assert not client.use_events
+
+        client.poll()
+        assert table.jobs[ids[0]]['state'] == 'QUEUED'
+        version = table.version
+
+        with mock.patch.object(client, 'apply') as apply:
+            client.poll()
+            apply.assert_not_called()
+        assert table.version == version
+
+        server.set_status(ids[1], state='FAILED', message='Out of memory')
+        client.poll()
+        client.session.close()
+
+    assert table.jobs[ids[1]]['state'] == 'FAILED'
+    assert table.jobs[ids[1]]['message'] == 'Out of memory'
+    assert server.status_requests == 3
+
+
+def test_transient_stream_error_does_not_disable_events():
+    table = job_status.StatusTable()
+    with StandInServer(error_rate=1.0) as server:
+        client = job_status.StatusClient(table, server.url + '/job/events', server.url + '/job/status')
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.listen()
+        client.session.close()
+
+    assert server.injected_errors == 1
+    assert client.use_events
+
+
+def test_stream_closed_without_events_is_reopened_after_backoff():
+    table = job_status.StatusTable()
+    table.track('1', 'job')
+    client = job_status.StatusClient(table, 'http://localhost/job/events', 'http://localhost/job/status')
+
+    def listen():
+        if client.listen.call_count == 3:
+            client.stop()
+        return 0
+
+    with mock.patch.object(client, 'listen', side_effect=listen), \
+            mock.patch.object(spool, 'backoff_delay', return_value=0) as backoff:
+        client.run()
+
+    assert [call[0][0] for call in backoff.call_args_list] == [0, 1, 2]
+
+
+def test_panels_are_redrawn_only_after_changes():
+    area = mock.MagicMock(type='VIEW_3D')
+    window = mock.MagicMock()
+    window.screen.areas = [area, mock.MagicMock(type='PROPERTIES')]
+
+    with mock.patch('cis_render.job_status.bpy') as mock_bpy:
+        mock_bpy.context.window_manager.windows = [window]
+        assert job_status.redraw_panels() == config.status_redraw_interval
+        area.tag_redraw.reset_mock()
+
+        for progress in range(100):
+            job_status.get_table().version += 1
+        job_status.redraw_panels()
+        job_status.redraw_panels()
+
+    area.tag_redraw.assert_called_once()
+    window.screen.areas[1].tag_redraw.assert_not_called()
+
+
+def test_tracking_is_skipped_without_job_id():
+    with mock.patch.object(job_status, 'StatusClient') as client:
+        job_status.track(None, 'job')
+        client.assert_not_called()
+    assert None not in job_status.get_table().jobs
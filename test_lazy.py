@@ -0,0 +1,78 @@
+import pytest
+from unittest import mock
+import subprocess
+import sys
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import lazy
+from cis_render import config
+from cis_render import spool
+from cis_render.read_scene_settings import RetryableRequestError
+
+
+def test_module_is_imported_on_first_attribute_access():
+    module = lazy.LazyModule('.frame_chunks', 'cis_render')
+    assert module._module is None
+    assert callable(module.plan_chunks)
+    assert module.loaded
+    assert module.load() is sys.modules['cis_render.frame_chunks']
+
+
+def test_missing_module_fails_on_first_use():
+    module = lazy.LazyModule('cis_render_no_such_module')
+    assert not module.loaded
+    with pytest.raises(ImportError):
+        module.anything
+
+
+def test_retryable_error_is_a_request_exception():
+    import requests
+    assert issubclass(RetryableRequestError, requests.exceptions.RequestException)
+
+
+def test_importing_add_on_does_not_import_http_client():
+    code = ("import sys; sys.path[:0] = ['.', 'mock_bpy']\n"
+            "from unittest import mock; sys.modules['addon_utils'] = mock.MagicMock()\n"
+            "import cis_render\n"
+            "print(sorted(name for name in ('requests', 'urllib3', 'hashlib', 'cis_render.uploader')"
+            " if name in sys.modules))")
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert output.decode().strip().splitlines()[-1] == '[]'
+
+
+def test_empty_spool_has_nothing_pending(tmp_path):
+    with mock.patch.object(config, 'spool_file', str(tmp_path / 'spool.jsonl')), \
+            mock.patch.object(spool, '_spool', None):
+        assert not spool.has_pending()
+        (tmp_path / 'spool.jsonl').write_text('{"op": "add"}\n')
+        assert spool.has_pending()
+
+
+def test_dev_mode_reloads_dependencies_before_their_users():
+    import cis_render
+    order = [module.__name__ for module in cis_render.reload_order()]
+
+    assert sorted(order) == sorted(name for name in sys.modules if name.startswith('cis_render.'))
+    for name in order:
+        for dependency in cis_render.module_dependencies(sys.modules[name]) & set(order) - {name}:
+            assert order.index(dependency) < order.index(name), (dependency, name)
+    assert order.index('cis_render.scene_cache') < order.index('cis_render.read_scene_settings')
+    assert order.index('cis_render.config') < order.index('cis_render.log_queue')
+
+
+def test_register_in_dev_mode_reloads_add_on_modules():
+    import cis_render
+    with mock.patch.object(config, 'dev_mode', True), \
+            mock.patch.object(cis_render, 'bpy'), \
+            mock.patch.object(cis_render, 'reload_order', return_value=[spool, lazy]), \
+            mock.patch('importlib.reload') as reload, \
+            mock.patch.object(cis_render.log_queue, 'start'), \
+            mock.patch.object(cis_render.log_queue, 'set_level'), \
+            mock.patch.object(cis_render.scene_cache, 'register_handlers'), \
+            mock.patch.object(cis_render.spool, 'has_pending', return_value=False), \
+            mock.patch.object(cis_render.job_status, 'register_timer'), \
+            mock.patch.object(cis_render.ui, 'register_timer'):
+        cis_render.register()
+
+    assert reload.call_args_list == [mock.call(spool), mock.call(lazy)]
@@ -0,0 +1,100 @@
+import pytest
+from unittest import mock
+import sys
+import logging
+import threading
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import config
+from cis_render import log_queue
+
+
+class Recorder():
+    """Argument komunikatu zapamiętujący, w którym wątku został zamieniony na tekst.
+    """
+
+    def __init__(self):
+        self.threads = []
+
+    def __str__(self):
+        self.threads.append(threading.current_thread())
+        return 'payload'
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    filename = str(tmp_path / 'renderownia.log')
+    with mock.patch.object(config, 'log_file', filename), \
+            mock.patch.object(config, 'log_level', logging.INFO), \
+            mock.patch.object(config, 'log_payloads', False):
+        yield filename
+        log_queue.stop()
+        log_queue.set_level(logging.INFO, False)
+
+
+def test_records_are_formatted_and_written_on_listener_thread(log_file):
+    log_queue.start()
+    log_queue.start()
+    assert log_queue.is_running()
+    assert len([handler for handler in config.logger.handlers
+                if isinstance(handler, log_queue.DeferredQueueHandler)]) == 1
+
+    recorder = Recorder()
+    config.logger.info("Job data: %s", recorder)
+    log_queue.stop()
+
+    assert not log_queue.is_running()
+    assert not any(isinstance(handler, log_queue.DeferredQueueHandler) for handler in config.logger.handlers)
+    # Pozostałe wywołania pochodzą od handlerów pytest przechwytujących dziennik
+    assert any(thread is not threading.current_thread() for thread in recorder.threads)
+    with open(log_file, encoding='utf-8') as infile:
+        assert "Job data: payload" in infile.read()
+
+
+def test_level_filters_records_before_they_are_queued(log_file):
+    log_queue.start()
+    log_queue.set_level('WARNING')
+    recorder = Recorder()
+    config.logger.info("Job data: %s", recorder)
+    config.logger.warning("Server unavailable")
+    log_queue.stop()
+
+    assert recorder.threads == []
+    with open(log_file, encoding='utf-8') as infile:
+        text = infile.read()
+    assert "Server unavailable" in text and "Job data" not in text
+
+
+def test_payloads_are_logged_only_when_enabled(log_file):
+    log_queue.start()
+    log_queue.set_level('DEBUG')
+    recorder = Recorder()
+    config.payload_logger.debug("Job data: %s", recorder)
+
+    log_queue.set_level('DEBUG', log_payloads=True)
+    config.payload_logger.debug("Job data: %s", Recorder())
+    log_queue.stop()
+
+    assert recorder.threads == []
+    with open(log_file, encoding='utf-8') as infile:
+        assert infile.read().count("Job data: payload") == 1
+
+
+def test_register_without_add_on_entry_uses_config(log_file):
+    import cis_render
+    with mock.patch.object(cis_render, 'bpy') as bpy, \
+            mock.patch.object(config, 'dev_mode', False), \
+            mock.patch.object(config, 'log_level', logging.WARNING), \
+            mock.patch.object(cis_render.scene_cache, 'register_handlers'), \
+            mock.patch.object(cis_render.spool, 'has_pending', return_value=False), \
+            mock.patch.object(cis_render.job_status, 'register_timer'), \
+            mock.patch.object(cis_render.ui, 'register_timer') as register_timer:
+        # Blender uruchomiony z --python-expr bez --addons
+        bpy.context.preferences.addons = {}
+        cis_render.register()
+
+    register_timer.assert_called_once()
+    assert log_queue.is_running()
+    assert config.logger.level == logging.WARNING
+    assert config.payload_logger.disabled
@@ -4,13 +4,35 @@ import sys
 import httpretty
 import requests
 import json
+import threading
+import time
+import logging
 
 sys.path.append('mock_bpy')
 sys.modules['addon_utils'] = mock.MagicMock()
 from cis_render import OBJECT_OT_read_scene_settings
+from cis_render import OBJECT_OT_submit_batch
+from cis_render import OBJECT_OT_download_frames
 from cis_render import JobProperties
 from cis_render import RequestManager
 from cis_render import config
+from cis_render import scene_cache
+from cis_render import tile_planner
+from cis_render.read_scene_settings import RetryableRequestError
+from standin_server import StandInServer
+
+@pytest.fixture(autouse=True)
+def scene_settings_file(tmp_path):
+    # Ustawienia sceny zapisywane przez save_as_json() trafiają do katalogu tymczasowego, a nie do repozytorium
+    init = OBJECT_OT_read_scene_settings.__init__
+
+    def init_with_temporary_file(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        self.result_filename = str(tmp_path / 'scene_settings.txt')
+
+    with mock.patch.object(OBJECT_OT_read_scene_settings, '__init__', init_with_temporary_file):
+        yield tmp_path / 'scene_settings.txt'
+
 
 def timeout_callback(request, uri, headers):
     raise requests.exceptions.ConnectTimeout('Connection timeout')
@@ -346,6 +368,15 @@ def test_reading_cycles_settings_with_branched_path_integrator():
             assert o.cycles_settings == cycles_data
 
 
+def set_render_resolution(render, x, y, percentage, border=None):
+    render.resolution_x = x
+    render.resolution_y = y
+    render.resolution_percentage = percentage
+    render.use_border = border is not None
+    if border is not None:
+        render.border_min_x, render.border_min_y, render.border_max_x, render.border_max_y = border
+
+
 def test_reading_tiles_data_when_there_is_none():
     o = OBJECT_OT_read_scene_settings()
     tile_info = {
@@ -372,8 +403,11 @@ def test_reading_tiles_from_addon_properties():
                     },
                     "tile_padding": 10
                 }
-            mock_bpy.data.scenes[o.scene.name].render.engine = 'CYCLES'
+            render = mock_bpy.data.scenes[o.scene.name].render
+            set_render_resolution(render, 1920, 1080, 50)
+            render.engine = 'CYCLES'
             mock_scene.my_tool.use_cycles_tiles_setting = False
+            tile_info["tile_regions"] = tile_planner.plan_job(1920, 1080, 50, 64, 64, 10)
             assert o.get_job_tiles_info() == tile_info
 
 
@@ -390,7 +424,644 @@ def test_reading_tiles_from_blender_data():
     }
     with mock.patch.object(o, 'scene') as mock_scene:
         with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy:
-            mock_bpy.data.scenes[o.scene.name].render.engine = 'CYCLES'
-            mock_bpy.data.scenes[o.scene.name].render.tile_y = 32
-            mock_bpy.data.scenes[o.scene.name].render.tile_x = 64
-            assert o.get_job_tiles_info() == tile_info
\ No newline at end of file
+            for k,v in JobProperties.__annotations__.items():
+                setattr(mock_scene.my_tool, k, v)
+            render = mock_bpy.data.scenes[o.scene.name].render
+            set_render_resolution(render, 1920, 1080, 100, border=(0.25, 0.5, 0.75, 1.0))
+            render.engine = 'CYCLES'
+            render.tile_y = 32
+            render.tile_x = 64
+            tile_info["tile_regions"] = tile_planner.plan_job(1920, 1080, 100, 64, 32, 10,
+                                                              border=(0.25, 0.5, 0.75, 1.0))
+            assert tile_info["tile_regions"]["region"] == [480, 540, 1440, 1080]
+            assert o.get_job_tiles_info() == tile_info
+
+def test_reading_tiles_with_custom_padding():
+    o = OBJECT_OT_read_scene_settings()
+    with mock.patch.object(o, 'scene') as mock_scene:
+        with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy:
+            for k,v in JobProperties.__annotations__.items():
+                setattr(mock_scene.my_tool, k, v)
+            mock_scene.my_tool.tile_padding = 0
+            render = mock_bpy.data.scenes[o.scene.name].render
+            set_render_resolution(render, 100, 50, 100)
+            render.engine = 'CYCLES'
+            render.tile_x = render.tile_y = 32
+
+            tile_info = o.get_job_tiles_info()
+            assert tile_info["tiles"]["padding"] == tile_info["tile_padding"] == 0
+            assert tile_info["tile_regions"]["regions"] == [
+                [0, 0, 32, 32], [32, 0, 64, 32], [64, 0, 96, 32], [96, 0, 100, 32],
+                [0, 32, 32, 50], [32, 32, 64, 50], [64, 32, 96, 50], [96, 32, 100, 50],
+            ]
+
+def prepare_operator_for_submission(o, mock_scene):
+    for k,v in JobProperties.__annotations__.items():
+        setattr(mock_scene.my_tool, k, v)
+    mock_scene.my_tool.use_output_frames_setting = False
+    mock_scene.my_tool.use_output_format_setting = False
+
+    o.read_output = mock.MagicMock()
+    o.read_materials = mock.MagicMock()
+    o.read_add_ons = mock.MagicMock()
+    o.read_eevee = mock.MagicMock()
+    o.read_cycles = mock.MagicMock()
+    o.read_workbench = mock.MagicMock()
+    o.save_as_json = mock.MagicMock()
+    o.get_scene_data = mock.MagicMock(return_value={"name": "Scene", "full_path": "/tmp/scene.blend"})
+    o.get_job_tiles_info = mock.MagicMock(return_value={"tile_job": False})
+
+
+def test_execute_operator_posts_job_in_background():
+    o = OBJECT_OT_read_scene_settings()
+    context = mock.MagicMock()
+    with mock.patch.object(o, 'scene') as mock_scene:
+        prepare_operator_for_submission(o, mock_scene)
+        context.scene = mock_scene
+        with mock.patch.object(RequestManager, 'post_job_data', return_value='Created') as post:
+            assert o.execute(context) == {'RUNNING_MODAL'}
+            context.window_manager.modal_handler_add.assert_called_once_with(o)
+
+            o.future.result(timeout=5)
+            assert o.modal(context, mock.MagicMock(type='MOUSEMOVE')) == {'PASS_THROUGH'}
+            assert o.modal(context, mock.MagicMock(type='TIMER')) == {'FINISHED'}
+            assert o.reported == {'INFO'}
+            post.assert_called_once()
+            context.window_manager.event_timer_remove.assert_called_once()
+
+
+def test_execute_operator_sends_frame_chunks():
+    o = OBJECT_OT_read_scene_settings()
+    context = mock.MagicMock()
+    with mock.patch.object(o, 'scene') as mock_scene:
+        prepare_operator_for_submission(o, mock_scene)
+        mock_scene.my_tool.frame_start = 1
+        mock_scene.my_tool.frame_end = 25
+        mock_scene.my_tool.frame_chunk_strategy = 'FIXED'
+        mock_scene.my_tool.frame_chunk_size = 10
+        context.scene = mock_scene
+        with mock.patch.object(RequestManager, 'post_job_data', return_value='Created') as post:
+            assert o.execute(context) == {'RUNNING_MODAL'}
+            o.future.result(timeout=5)
+
+    payload = post.call_args[0][0]
+    assert payload['frames'] == {'start': 1, 'end': 25}
+    assert [(chunk['start'], chunk['end']) for chunk in payload['frame_chunks']] == [(1, 10), (11, 20), (21, 25)]
+
+
+def test_modal_operator_reports_request_error():
+    o = OBJECT_OT_read_scene_settings()
+    context = mock.MagicMock()
+    with mock.patch.object(o, 'scene') as mock_scene:
+        prepare_operator_for_submission(o, mock_scene)
+        context.scene = mock_scene
+        with mock.patch.object(RequestManager, 'post_job_data',
+                side_effect=requests.exceptions.RequestException("Request error occured")):
+            assert o.execute(context) == {'RUNNING_MODAL'}
+
+            with pytest.raises(requests.exceptions.RequestException):
+                o.future.result(timeout=5)
+            assert o.modal(context, mock.MagicMock(type='TIMER')) == {'CANCELLED'}
+            assert o.reported == {'ERROR'}
+
+
+def test_several_submissions_in_flight():
+    release = threading.Event()
+    started = threading.Semaphore(0)
+
+    def slow_post(payload, *args, **kwargs):
+        started.release()
+        release.wait(5)
+        return payload['name']
+
+    context = mock.MagicMock()
+    operators = [OBJECT_OT_read_scene_settings() for i in range(2)]
+    with mock.patch.object(RequestManager, 'post_job_data', side_effect=slow_post):
+        for o in operators:
+            o.scene = mock.MagicMock()
+            prepare_operator_for_submission(o, o.scene)
+            context.scene = o.scene
+            assert o.execute(context) == {'RUNNING_MODAL'}
+
+        assert started.acquire(timeout=5) and started.acquire(timeout=5)
+        for o in operators:
+            assert o.modal(context, mock.MagicMock(type='TIMER')) == {'PASS_THROUGH'}
+
+        release.set()
+        for o in operators:
+            o.future.result(timeout=5)
+            assert o.modal(context, mock.MagicMock(type='TIMER')) == {'FINISHED'}
+
+
+def test_request_manager_reuses_pooled_connection():
+    request_manager = RequestManager(pool_size=2)
+    with StandInServer() as server:
+        with mock.patch.object(config, 'server', server.url + '/job'):
+            for i in range(5):
+                assert request_manager.post_job_data({"name": "job_{}".format(i)}).text == 'Created'
+        request_manager.close()
+
+    assert server.connections == 1
+    assert [job["name"] for job in server.jobs] == ["job_{}".format(i) for i in range(5)]
+    assert request_manager.session is None
+
+
+def test_unanswered_post_times_out_and_is_retryable():
+    request_manager = RequestManager()
+    with StandInServer(latency=1.0) as server:
+        with mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(config, 'request_read_timeout', 0.2):
+            start = time.monotonic()
+            with pytest.raises(RetryableRequestError):
+                request_manager.post_job_data({"name": "job"})
+            assert time.monotonic() - start < 0.9
+        request_manager.close()
+
+
+def test_injected_server_faults_are_retryable():
+    request_manager = RequestManager()
+    with StandInServer(error_rate=1.0) as server:
+        with mock.patch.object(config, 'server', server.url + '/job'):
+            with pytest.raises(RetryableRequestError):
+                request_manager.post_job_data({"name": "job"})
+            server.error_rate, server.drop_rate = 0.0, 1.0
+            with pytest.raises(RetryableRequestError):
+                request_manager.post_job_data({"name": "job"})
+            server.drop_rate = 0.0
+            assert request_manager.post_job_data({"name": "job"}).text == 'Created'
+        request_manager.close()
+
+    assert (server.injected_errors, server.dropped_connections, len(server.jobs)) == (1, 1, 1)
+
+
+def test_stand_in_server_limits_request_rate():
+    request_manager = RequestManager()
+    with StandInServer(rate_limit=20, latency=0.01) as server:
+        with mock.patch.object(config, 'server', server.url + '/job'):
+            start = time.monotonic()
+            for i in range(5):
+                request_manager.post_job_data({"name": "job_{}".format(i)})
+            elapsed = time.monotonic() - start
+        request_manager.close()
+
+    assert elapsed >= 0.2
+    assert len(server.jobs) == 5
+
+
+def test_shared_request_manager_is_closed_on_unregister():
+    shared = RequestManager.shared()
+    assert RequestManager.shared() is shared
+    session = shared.get_session()
+
+    with mock.patch.object(session, 'close') as close:
+        RequestManager.close_shared()
+        close.assert_called_once()
+
+    assert RequestManager.shared() is not shared
+    RequestManager.close_shared()
+
+
+def large_payload(count):
+    return {
+        "name": "test_job",
+        "textures": [
+            {"name": "texture_{}.png".format(i), "full_path": "/mnt/library/textures/texture_{}.png".format(i)}
+            for i in range(count)
+        ]
+    }
+
+
+def test_large_payload_is_compressed():
+    request_manager = RequestManager()
+    payload = large_payload(5000)
+    with StandInServer() as server:
+        with mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(config, 'request_encodings', ('gzip',)):
+            request_manager.accepted_encodings = {'gzip'}
+            request_manager.post_job_data({"name": "small_job"})
+            request_manager.post_job_data(payload)
+        request_manager.close()
+
+    assert server.encodings == [None, 'gzip']
+    assert server.jobs[1] == payload
+
+
+def test_compression_falls_back_when_server_rejects_encoding():
+    request_manager = RequestManager()
+    payload = large_payload(5000)
+    with StandInServer(accepted_encodings=()) as server:
+        with mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(config, 'request_encodings', ('gzip',)):
+            request_manager.accepted_encodings = {'gzip'}
+            assert request_manager.post_job_data(payload).text == 'Created'
+            assert request_manager.post_job_data(payload).text == 'Created'
+        request_manager.close()
+
+    assert server.encodings == [None, None]
+    assert 'gzip' not in request_manager.accepted_encodings
+
+
+def test_accept_encoding_header_limits_request_encodings():
+    from cis_render import compression
+
+    assert compression.parse_accept_encoding("zstd, gzip;q=0.5, br;q=0") == {"zstd", "gzip"}
+    with mock.patch.object(config, 'request_encodings', ('zstd', 'gzip')), \
+            mock.patch.object(compression, 'zstd_available', return_value=True):
+        assert compression.choose_encoding(config.compression_threshold - 1, {"gzip"}) is None
+        assert compression.choose_encoding(config.compression_threshold, {"gzip"}) == 'gzip'
+        assert compression.choose_encoding(config.compression_threshold, {"zstd", "gzip"}) == 'zstd'
+        assert compression.choose_encoding(config.compression_threshold, {"identity"}) is None
+
+
+def mock_image(name, filepath, users=1, packed_file=None):
+    image = mock.MagicMock(users=users, packed_file=packed_file, filepath=filepath)
+    image.name = name
+    return image
+
+
+def test_server_response_is_decoded_only_for_payload_log():
+    request_manager = RequestManager()
+    config.logger.setLevel(logging.DEBUG)
+    try:
+        with StandInServer() as server, \
+                mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(requests.Response, 'text', new_callable=mock.PropertyMock,
+                                  return_value='{}') as text:
+            with mock.patch.object(config.payload_logger, 'disabled', True):
+                request_manager.post_job_data({"name": "job"})
+            text.assert_not_called()
+
+            with mock.patch.object(config.payload_logger, 'disabled', False):
+                request_manager.post_job_data({"name": "job"})
+            text.assert_called_once()
+    finally:
+        config.logger.setLevel(config.log_level)
+        request_manager.close()
+
+
+def test_reading_materials_reports_all_missing_files(tmp_path):
+    o = OBJECT_OT_read_scene_settings()
+    for i in range(5):
+        (tmp_path / 'texture_{}.png'.format(i)).write_bytes(b'')
+
+    images = [mock_image('texture_{}.png'.format(i), str(tmp_path / 'texture_{}.png'.format(i))) for i in range(5)]
+    images += [
+        mock_image('missing_1.png', str(tmp_path / 'missing_1.png')),
+        mock_image('missing_2.png', str(tmp_path / 'other' / 'missing_2.png')),
+        mock_image('packed.png', str(tmp_path / 'packed.png'), packed_file=mock.MagicMock()),
+        mock_image('unused.png', str(tmp_path / 'unused.png'), users=0),
+        mock_image('Render Result', ''),
+    ]
+
+    with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy, \
+            mock.patch.object(config, 'asset_index_enabled', False):
+        mock_bpy.data.images = images
+        mock_bpy.path.abspath.side_effect = lambda filepath: filepath
+
+        with pytest.raises(FileNotFoundError) as error:
+            o.read_materials()
+        assert error.value.missing == [str(tmp_path / 'missing_1.png'), str(tmp_path / 'other' / 'missing_2.png')]
+
+        mock_bpy.data.images = images[:5]
+        scene_cache.on_file_change()
+        o.read_materials()
+        assert [image['name'] for image in o.images] == ['texture_{}.png'.format(i) for i in range(5)]
+
+
+def test_checking_files_with_scandir_and_stat():
+    from cis_render import asset_check
+
+    with mock.patch.object(config, 'scandir_min_files', 2), \
+            mock.patch('os.scandir') as scandir, \
+            mock.patch('os.path.exists', return_value=False):
+        scandir.return_value.__enter__.return_value = [mock.MagicMock(is_symlink=lambda: False) for i in range(2)]
+        for entry, name in zip(scandir.return_value.__enter__.return_value, ['a.png', 'b.png']):
+            entry.name = name
+
+        assert asset_check.find_missing(['/lib/a.png', '/lib/b.png', '/lib/c.png', '/single/d.png']) == \
+            ['/lib/c.png', '/single/d.png']
+        scandir.assert_called_once_with('/lib')
+
+
+def depsgraph_update(identifier, name='Scene', is_updated_shading=False, id_data=None):
+    update = mock.MagicMock(is_updated_shading=is_updated_shading)
+    if id_data is not None:
+        update.id = id_data
+    update.id.bl_rna.identifier = identifier
+    update.id.name = name
+    return update
+
+
+def rna_struct(**values):
+    properties = [mock.MagicMock(identifier=key, type='INT', array_length=0) for key in values]
+    return mock.MagicMock(bl_rna=mock.MagicMock(properties=properties), **values)
+
+
+def render_settings_scene(scene):
+    scene.render = rna_struct(engine='CYCLES', resolution_x=1920, resolution_y=1080, resolution_percentage=100)
+    scene.render.views = []
+    scene.cycles = rna_struct(samples=128, max_bounces=12)
+    scene.frame_start, scene.frame_end, scene.frame_step = 1, 250, 1
+    return scene
+
+
+def run_cached_execute(o, context):
+    for reader in ['read_output', 'read_cycles', 'read_eevee', 'read_workbench', 'collect_images']:
+        getattr(o, reader).reset_mock()
+    with mock.patch.object(RequestManager, 'post_job_data', return_value='Created'):
+        assert o.execute(context) == {'RUNNING_MODAL'}
+        o.future.result(timeout=5)
+    return {reader for reader in ['read_output', 'read_cycles', 'read_eevee', 'read_workbench', 'collect_images']
+            if getattr(o, reader).called}
+
+
+def test_scene_settings_are_extracted_only_when_stale():
+    o = OBJECT_OT_read_scene_settings()
+    context = mock.MagicMock()
+    scene = render_settings_scene(context.scene)
+    scene.name = 'Scene'
+    prepare_operator_for_submission(o, scene)
+    o.read_materials = OBJECT_OT_read_scene_settings.read_materials.__get__(o)
+    o.collect_images = mock.MagicMock(side_effect=lambda: setattr(o, 'images', []))
+    scene_cache.invalidate_all()
+
+    all_readers = {'read_output', 'read_cycles', 'read_eevee', 'read_workbench', 'collect_images'}
+    render_readers = {'read_output', 'read_cycles', 'read_eevee', 'read_workbench'}
+
+    assert run_cached_execute(o, context) == all_readers
+    assert run_cached_execute(o, context) == set()
+
+    # zmiana nazwy zadania oznacza scenę jako zmienioną, ale nie unieważnia ustawień renderowania
+    scene.my_tool.job_name = 'Renamed'
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Scene', id_data=scene)]))
+    assert run_cached_execute(o, context) == set()
+
+    scene.cycles.samples = 256
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Scene', id_data=scene)]))
+    assert run_cached_execute(o, context) == render_readers
+
+    scene.frame_end = 100
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Scene', id_data=scene)]))
+    assert run_cached_execute(o, context) == render_readers
+
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Scene', name='Other')]))
+    assert run_cached_execute(o, context) == set()
+
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Image')]))
+    assert run_cached_execute(o, context) == {'collect_images'}
+
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[
+        depsgraph_update('Object'), depsgraph_update('Mesh')]))
+    assert run_cached_execute(o, context) == set()
+
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[
+        depsgraph_update('Object', is_updated_shading=True), depsgraph_update('PointLight')]))
+    assert run_cached_execute(o, context) == {'collect_images'}
+
+    scene_cache.on_file_change()
+    assert run_cached_execute(o, context) == all_readers
+
+    with mock.patch.object(config, 'scene_cache_enabled', False):
+        assert run_cached_execute(o, context) == all_readers
+
+
+def test_render_change_right_after_job_property_edit_is_not_lost():
+    o = OBJECT_OT_read_scene_settings()
+    context = mock.MagicMock()
+    scene = render_settings_scene(context.scene)
+    scene.name = 'Scene'
+    prepare_operator_for_submission(o, scene)
+    o.read_materials = OBJECT_OT_read_scene_settings.read_materials.__get__(o)
+    o.collect_images = mock.MagicMock(side_effect=lambda: setattr(o, 'images', []))
+    scene_cache.invalidate_all()
+    run_cached_execute(o, context)
+
+    # edycja ustawień zadania i zmiana ustawień renderowania (np. ze skryptu) zaraz po niej
+    scene.my_tool.job_name = 'Renamed'
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Scene', id_data=scene)]))
+    scene.render.resolution_x = 3840
+    scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Scene', id_data=scene)]))
+
+    assert {'read_output', 'read_cycles'} <= run_cached_execute(o, context)
+
+
+def test_scene_update_does_not_compute_fingerprint():
+    scene = render_settings_scene(mock.MagicMock())
+    scene.name = 'Scene'
+    scene_cache.invalidate_all()
+    scene_cache.check_settings(scene)
+    scene_cache.get_snapshot('Scene').stale.clear()
+
+    # np. odtwarzanie animacji -- zdarzenie przy każdej klatce
+    with mock.patch.object(scene_cache, 'settings_fingerprint', wraps=scene_cache.settings_fingerprint) as fingerprint:
+        for frame in range(10):
+            scene.frame_current = frame
+            scene_cache.on_depsgraph_update(scene, mock.MagicMock(updates=[depsgraph_update('Scene', id_data=scene)]))
+        fingerprint.assert_not_called()
+
+        scene_cache.check_settings(scene)
+        scene_cache.check_settings(scene)
+        fingerprint.assert_called_once()
+    assert not scene_cache.get_snapshot('Scene').stale
+
+
+def test_reading_output_settings():
+    o = OBJECT_OT_read_scene_settings()
+    with mock.patch.object(o, 'scene') as mock_scene:
+        with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy:
+            render = mock_bpy.data.scenes[o.scene.name].render
+            render.use_border = False
+            render.image_settings.file_format = 'JPEG'
+            render.image_settings.color_mode = 'RGB'
+            render.image_settings.quality = 90
+            render.use_stamp_strip_meta = False
+            render.use_stamp = True
+            render.stamp_foreground = (1.0, 1.0, 1.0, 1.0)
+            render.stamp_background = (0.0, 0.0, 0.0, 0.8)
+            render.use_multiview = True
+            render.views_format = 'STEREO_3D'
+            left = mock.MagicMock(use=True, file_suffix='_L')
+            left.name = 'left'
+            right = mock.MagicMock(use=False, file_suffix='_R')
+            right.name = 'right'
+            render.views = [left, right]
+
+            o.read_output()
+
+            assert o.output_settings['dimensions']['crop'] is None
+            assert o.output_settings['output']['color'] == 'RGB'
+            assert o.output_settings['output']['compression'] == 90
+            assert 'color_depth' not in o.output_settings['output']
+            assert 'note_text' not in o.output_settings['metadata']
+            assert o.output_settings['metadata']['text_color'] == [1.0, 1.0, 1.0, 1.0]
+            assert o.output_settings['stereoscopy'] == {
+                'use': True,
+                'setup_stereo_mode': 'STEREO_3D',
+                'left': (True, '_L'),
+                'right': (False, '_R')
+            }
+            assert o.output_settings['renderer'] == render.engine
+
+
+def test_reading_workbench_settings():
+    o = OBJECT_OT_read_scene_settings()
+    with mock.patch.object(o, 'scene') as mock_scene:
+        with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy:
+            shading = mock_bpy.data.scenes[o.scene.name].display.shading
+            shading.light = 'FLAT'
+            shading.color_type = 'SINGLE'
+            shading.single_color = (0.8, 0.5, 0.2)
+
+            o.read_workbench()
+            assert o.workbench_settings == {
+                'lightning': {'light': 'FLAT'},
+                'color': {'type': 'SINGLE', 'red': 0.8, 'green': 0.5, 'blue': 0.2}
+            }
+
+
+def test_compiling_rna_paths():
+    from cis_render import extractor
+
+    data = mock.MagicMock()
+    data.render.views = {'left': mock.MagicMock(use=True)}
+    data.display.shading.single_color = (0.1, 0.2, 0.3)
+
+    assert extractor.compile_path('render.views["left"].use')(data) is True
+    assert extractor.compile_path('display.shading.single_color[-1]')(data) == 0.3
+    for path in ['', 'render..engine', 'render.views[left]', '1render']:
+        with pytest.raises(ValueError):
+            extractor.compile_path(path)
+
+
+def make_batch_scene(name, frame_start, job_name='Shot'):
+    scene = mock.MagicMock()
+    scene.name = name
+    for k,v in JobProperties.__annotations__.items():
+        setattr(scene.my_tool, k, v)
+    scene.my_tool.use_output_frames_setting = False
+    scene.my_tool.use_output_format_setting = False
+    scene.my_tool.job_name = job_name
+    scene.my_tool.frame_start = frame_start
+    scene.my_tool.frame_end = frame_start + 9
+    return scene
+
+
+def prepare_batch_operator(o):
+    for k,v in OBJECT_OT_submit_batch.__annotations__.items():
+        if not hasattr(o, k):
+            setattr(o, k, v)
+    o.read_materials = mock.MagicMock()
+    o.read_add_ons = mock.MagicMock()
+    o.images = []
+    o.add_ons = []
+    o.get_scene_data = mock.MagicMock(return_value={"name": "Scene", "full_path": "/tmp/scene.blend"})
+    o.get_job_tiles_info = mock.MagicMock(return_value={"tile_job": False})
+
+
+def test_batch_operator_posts_all_scenes_in_one_request():
+    o = OBJECT_OT_submit_batch()
+    context = mock.MagicMock()
+    scenes = [make_batch_scene('Scene', 1), make_batch_scene('Scene.001', 11), make_batch_scene('Scene.002', 21)]
+    context.scene = scenes[0]
+    prepare_batch_operator(o)
+
+    with StandInServer() as server:
+        with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy, \
+                mock.patch.object(config, 'batch_server', server.url + '/job/batch'):
+            mock_bpy.data.scenes = scenes
+            assert o.execute(context) == {'RUNNING_MODAL'}
+            results = o.future.result(timeout=5)
+
+    assert len(server.batches) == 1
+    assert server.batches[0]['common']['scene'] == {"name": "Scene", "full_path": "/tmp/scene.blend"}
+    assert [job['frames']['start'] for job in server.jobs] == [1, 11, 21]
+    assert [result['key'] for result in results] == ['Scene', 'Scene.001', 'Scene.002']
+    assert all(result['status'] == 'created' for result in results)
+
+    assert o.modal(context, mock.MagicMock(type='TIMER')) == {'FINISHED'}
+    assert o.reported == {'INFO'}
+
+
+def test_batch_operator_reports_rejected_jobs():
+    o = OBJECT_OT_submit_batch()
+    o.report_result([dict(key='Scene', status='created'),
+                     dict(key='Scene.001', status='rejected', message='Unknown camera')])
+    assert o.reported == {'WARNING'}
+
+
+def test_submitted_jobs_are_tracked():
+    o = OBJECT_OT_submit_batch()
+    with mock.patch('cis_render.job_status.track') as track:
+        o.report_result([dict(key='Scene', status='created', id='1'),
+                         dict(key='Scene.001', status='rejected', message='Unknown camera')])
+    track.assert_called_once_with('1', 'Scene')
+
+    o = OBJECT_OT_read_scene_settings()
+    o.submitted_name = 'Shot'
+    response = mock.MagicMock(headers={'location': '/job/42'})
+    with mock.patch('cis_render.job_status.track') as track:
+        o.report_result(response)
+    track.assert_called_once_with('42', 'Shot')
+    assert o.reported == {'INFO'}
+
+
+def test_download_operator_places_frames_by_output_path(tmp_path):
+    o = OBJECT_OT_download_frames()
+    o.job_id = '1'
+    context = mock.MagicMock()
+    output = {'output': {'path': '//renders/shot_##', 'file_format': 'PNG', 'file_extensions': True,
+                         'overwirte': True}}
+    o.read_output = mock.MagicMock(side_effect=lambda: setattr(o, 'output_settings', output))
+
+    with StandInServer() as server:
+        server.add_frame('1', 1, b'frame 1')
+        server.add_frame('1', 2, b'frame 2')
+        with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy, \
+                mock.patch.object(config, 'frames_url', server.url + '/job/{}/frames'):
+            mock_bpy.path.abspath.side_effect = lambda path: str(tmp_path) + path[1:]
+            assert o.execute(context) == {'RUNNING_MODAL'}
+            o.future.result(timeout=5)
+
+    assert o.modal(context, mock.MagicMock(type='TIMER')) == {'FINISHED'}
+    assert o.reported == {'INFO'}
+    assert (tmp_path / 'renders' / 'shot_02.png').read_bytes() == b'frame 2'
+
+
+def test_download_operator_reports_failed_frames():
+    o = OBJECT_OT_download_frames()
+    o.report_result([dict(frame=1, status='downloaded', error=None),
+                     dict(frame=2, status='failed', error='Connection reset')])
+    assert o.reported == {'WARNING'}
+
+
+def test_batch_operator_cancels_batch_with_invalid_job():
+    o = OBJECT_OT_submit_batch()
+    scenes = [make_batch_scene('Scene', 1), make_batch_scene('Scene.001', 11, job_name='')]
+    prepare_batch_operator(o)
+
+    with mock.patch('cis_render.read_scene_settings.bpy') as mock_bpy, \
+            mock.patch.object(RequestManager, 'submit_batch') as submit_batch:
+        mock_bpy.data.scenes = scenes
+        assert o.execute(mock.MagicMock()) == {'CANCELLED'}
+        assert o.reported == {'ERROR_INVALID_INPUT'}
+        submit_batch.assert_not_called()
+
+
+def test_batch_operator_creates_job_per_camera():
+    o = OBJECT_OT_submit_batch()
+    o.mode = 'CAMERAS'
+    context = mock.MagicMock()
+    scene = make_batch_scene('Scene', 1)
+    scene.objects = [mock.MagicMock(type='CAMERA'), mock.MagicMock(type='MESH'), mock.MagicMock(type='CAMERA')]
+    scene.objects[0].name, scene.objects[2].name = 'Front', 'Side'
+    context.scene = scene
+    prepare_batch_operator(o)
+
+    with mock.patch.object(RequestManager, 'submit_batch', return_value=[]) as submit_batch:
+        assert o.execute(context) == {'RUNNING_MODAL'}
+        o.future.result(timeout=5)
+
+    payload = submit_batch.call_args[0][0]
+    assert [job['camera'] for job in payload['jobs']] == ['Front', 'Side']
+    assert [job['name'] for job in payload['jobs']] == ['Shot [Front]', 'Shot [Side]']
+    assert payload['common']['frames'] == {'start': 1, 'end': 10}
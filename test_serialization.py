@@ -0,0 +1,60 @@
+import gzip
+import json
+import sys
+import pytest
+from unittest import mock
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import compression
+from cis_render import config
+from cis_render import serialization
+from cis_render.serialization import PayloadBody
+
+
+PAYLOAD = {
+    "name": "zadanie ąę",
+    "frames": {"start": 1, "end": 250},
+    "tiles": [64, 64],
+    "textures": [{"name": "texture_{}.png".format(i), "full_path": "/textures/texture_{}.png".format(i)}
+                 for i in range(100)],
+    "empty": [],
+}
+
+
+@pytest.mark.parametrize('encoder', ['json', 'orjson'])
+def test_streamed_encoding_matches_single_pass_encoding(encoder):
+    if serialization.ENCODERS[encoder]() is None:
+        pytest.skip("{} is not installed".format(encoder))
+
+    with mock.patch.object(config, 'json_encoder', encoder):
+        chunks = list(serialization.iter_encode(PAYLOAD, chunk_size=256))
+
+        assert len(chunks) > 1
+        assert b''.join(chunks) == serialization.dumps(PAYLOAD)
+        assert json.loads(b''.join(chunks).decode('utf-8')) == PAYLOAD
+
+
+def test_unknown_encoder_is_rejected():
+    with pytest.raises(ValueError):
+        serialization.get_dumps('simdjson')
+
+
+def test_large_payload_is_streamed():
+    with mock.patch.object(config, 'stream_min_textures', 100):
+        body = PayloadBody(PAYLOAD)
+
+    assert body.streamed
+    compressed = b''.join(compression.encode_chunks(body.chunks(), 'gzip'))
+    assert json.loads(gzip.decompress(compressed).decode('utf-8')) == PAYLOAD
+    # Dane kodowane strumieniowo można odczytać ponownie, np. przy ponownym wysłaniu
+    assert json.loads(b''.join(body.chunks()).decode('utf-8')) == PAYLOAD
+
+
+def test_payload_is_echoed_only_when_debug_logging_is_enabled():
+    body = PayloadBody({"name": "test_job"})
+
+    with mock.patch.object(PayloadBody, '__str__', return_value='{}') as to_text:
+        with mock.patch.object(config.logger, 'isEnabledFor', return_value=False):
+            config.logger.debug("Job data: %s", body)
+        to_text.assert_not_called()
@@ -0,0 +1,164 @@
+import pytest
+import time
+from unittest import mock
+import sys
+import httpretty
+import requests
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import RequestManager
+from cis_render import config
+from cis_render import spool
+from cis_render.read_scene_settings import RetryableRequestError
+from standin_server import StandInServer
+
+
+def test_spool_survives_restart(tmp_path):
+    filename = str(tmp_path / 'spool.jsonl')
+    s = spool.Spool(filename)
+    first = s.add({"name": "first"})
+    s.add({"name": "second"})
+    s.add({"name": "third"})
+    s.remove(first)
+
+    restored = spool.Spool(filename)
+    assert restored.depth() == 2
+    assert [payload["name"] for job_id, payload in restored.items()] == ["second", "third"]
+
+
+def test_spool_skips_damaged_record(tmp_path):
+    filename = str(tmp_path / 'spool.jsonl')
+    s = spool.Spool(filename)
+    s.add({"name": "complete"})
+    with open(filename, 'a') as journal:
+        journal.write('{"op": "add", "id": "torn", "payl')
+
+    assert [payload["name"] for job_id, payload in spool.Spool(filename).items()] == ["complete"]
+
+
+def test_spool_is_compacted_when_empty(tmp_path):
+    filename = tmp_path / 'spool.jsonl'
+    s = spool.Spool(str(filename))
+    s.remove(s.add({"name": "job"}))
+
+    assert filename.read_text() == ''
+    assert spool.Spool(str(filename)).depth() == 0
+
+
+def test_backoff_delay_grows_and_is_capped():
+    with mock.patch('random.uniform', side_effect=lambda low, high: high):
+        assert [spool.backoff_delay(i, base=1, maximum=10) for i in range(6)] == [1, 2, 4, 8, 10, 10]
+
+
+def test_drainer_retries_transient_errors_and_drops_rejected_jobs(tmp_path):
+    s = spool.Spool(str(tmp_path / 'spool.jsonl'))
+    s.add({"name": "flaky"})
+    s.add({"name": "rejected"})
+    attempts = []
+
+    def send(payload, key):
+        attempts.append(payload["name"])
+        if payload["name"] == "rejected":
+            raise requests.exceptions.RequestException("Bad Request")
+        if attempts.count("flaky") < 3:
+            raise RetryableRequestError("Request error occured")
+
+    drainer = spool.SpoolDrainer(s, send, (RetryableRequestError,))
+    with mock.patch.object(spool, 'backoff_delay', return_value=0):
+        assert drainer.drain() == 0
+        assert s.depth() == 1
+        drainer.drain()
+        assert drainer.drain() is None
+
+    assert s.depth() == 0
+    assert attempts == ["flaky", "rejected", "flaky", "flaky"]
+
+
+def test_retryable_errors_are_kept_apart_from_rejected_jobs():
+    request_manager = RequestManager()
+    httpretty.enable()
+    httpretty.register_uri(httpretty.POST, config.server,
+            responses=[
+                httpretty.Response(body='', status=503),
+                httpretty.Response(body='Bad Request', status=400)
+            ])
+
+    with pytest.raises(RetryableRequestError):
+        request_manager.post_job_data({"name": "test_job"})
+
+    with pytest.raises(requests.exceptions.RequestException) as error:
+        request_manager.post_job_data({"name": "test_job"})
+    assert not isinstance(error.value, RetryableRequestError)
+
+    httpretty.disable()
+    request_manager.close()
+
+
+def test_submit_job_spools_payload_on_transient_error(tmp_path):
+    request_manager = RequestManager()
+    queue = spool.Spool(str(tmp_path / 'spool.jsonl'))
+    with mock.patch.object(spool, 'get_spool', return_value=queue), \
+            mock.patch('cis_render.read_scene_settings.start_spool_drainer') as start_drainer, \
+            mock.patch.object(request_manager, 'post_job_data', side_effect=RetryableRequestError):
+        assert request_manager.submit_job({"name": "test_job"}) is None
+
+    start_drainer.assert_called_once()
+    assert [payload for job_id, payload in queue.items()] == [{"name": "test_job"}]
+
+
+def test_replayed_job_carries_same_idempotency_key(tmp_path):
+    request_manager = RequestManager()
+    queue = spool.Spool(str(tmp_path / 'spool.jsonl'))
+    with StandInServer(latency=0.5) as server:
+        with mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(config, 'request_read_timeout', 0.1), \
+                mock.patch.object(spool, 'get_spool', return_value=queue), \
+                mock.patch('cis_render.read_scene_settings.start_spool_drainer'):
+            # Serwer rejestruje zadanie, ale odpowiada po przekroczeniu czasu oczekiwania
+            assert request_manager.submit_job({"name": "slow_job"}) is None
+            deadline = time.monotonic() + 5
+            while not server.jobs and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            [(key, payload)] = queue.items()
+            server.latency = 0.0
+            drainer = spool.SpoolDrainer(
+                queue, lambda payload, key: request_manager.post_job_data(payload, idempotency_key=key),
+                (RetryableRequestError,))
+            assert drainer.drain() is None
+        request_manager.close()
+
+    assert server.request_keys == [key, key]
+    assert len(server.jobs) == 1
+    assert queue.depth() == 0
+
+
+def test_replayed_batch_jobs_are_not_created_twice(tmp_path):
+    request_manager = RequestManager()
+    queue = spool.Spool(str(tmp_path / 'spool.jsonl'))
+    payload = {"common": {"scene": "/tmp/scene.blend"},
+               "jobs": [{"key": "Scene", "name": "first"}, {"key": "Scene.001", "name": "second"}]}
+    with StandInServer(latency=0.5) as server:
+        with mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(config, 'batch_server', server.url + '/job/batch'), \
+                mock.patch.object(config, 'request_read_timeout', 0.1), \
+                mock.patch.object(spool, 'get_spool', return_value=queue), \
+                mock.patch('cis_render.read_scene_settings.start_spool_drainer'):
+            # Serwer rejestruje zadania zgłoszenia, ale odpowiada po przekroczeniu czasu oczekiwania
+            assert request_manager.submit_batch(payload) is None
+            deadline = time.monotonic() + 5
+            while len(server.jobs) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            [batch_key] = server.request_keys
+            assert [key for key, job in queue.items()] == [batch_key + ':Scene', batch_key + ':Scene.001']
+            server.latency = 0.0
+            drainer = spool.SpoolDrainer(
+                queue, lambda payload, key: request_manager.post_job_data(payload, idempotency_key=key),
+                (RetryableRequestError,))
+            assert drainer.drain() is None
+        request_manager.close()
+
+    assert [job['name'] for job in server.jobs] == ['first', 'second']
+    assert queue.depth() == 0
@@ -0,0 +1,63 @@
+import os
+import pytest
+from unittest import mock
+import sys
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import texture_manifest
+from cis_render.texture_manifest import HashCache, build_manifest
+
+
+@pytest.fixture
+def textures(tmp_path):
+    (tmp_path / 'wood.png').write_bytes(b'wood' * 1000)
+    (tmp_path / 'metal.png').write_bytes(b'metal' * 1000)
+    os.symlink(str(tmp_path / 'wood.png'), str(tmp_path / 'wood_link.png'))
+    return [
+        {"name": "wood.png", "full_path": str(tmp_path / 'wood.png')},
+        {"name": "wood.png.001", "full_path": str(tmp_path / 'wood.png')},
+        {"name": "wood_link.png", "full_path": str(tmp_path / 'wood_link.png')},
+        {"name": "metal.png", "full_path": str(tmp_path / 'metal.png')},
+    ]
+
+
+def test_hash_file_reads_in_chunks(tmp_path):
+    filename = tmp_path / 'texture.png'
+    filename.write_bytes(os.urandom(10000))
+
+    assert texture_manifest.hash_file(str(filename), chunk_size=1024) == \
+        texture_manifest.hash_file(str(filename), chunk_size=1 << 20)
+    assert texture_manifest.hash_file(str(filename)).startswith('sha256:')
+
+
+def test_manifest_collapses_duplicates(tmp_path, textures):
+    manifest = build_manifest(textures, cache=HashCache(str(tmp_path / 'cache.json')), workers=2)
+
+    assert [entry["name"] for entry in manifest] == ["wood.png", "metal.png"]
+    assert manifest[0]["aliases"] == ["wood.png.001", "wood_link.png"]
+    assert manifest[0]["size"] == 4000
+    assert manifest[0]["hash"] == texture_manifest.hash_file(textures[0]["full_path"])
+    assert manifest[0]["hash"] != manifest[1]["hash"]
+
+
+def test_unchanged_textures_are_not_hashed_again(tmp_path, textures):
+    cache_file = str(tmp_path / 'cache.json')
+    first = build_manifest(textures, cache=HashCache(cache_file))
+
+    with mock.patch.object(texture_manifest, 'hash_file') as hash_file:
+        assert build_manifest(textures, cache=HashCache(cache_file)) == first
+        hash_file.assert_not_called()
+
+    with open(textures[-1]["full_path"], 'ab') as texture:
+        texture.write(b'changed')
+
+    second = build_manifest(textures, cache=HashCache(cache_file))
+    assert second[0]["hash"] == first[0]["hash"]
+    assert second[1]["hash"] != first[1]["hash"]
+
+
+def test_missing_texture_raises(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        build_manifest([{"name": "gone.png", "full_path": str(tmp_path / 'gone.png')}],
+                       cache=HashCache(str(tmp_path / 'cache.json')))
@@ -0,0 +1,90 @@
+import random
+import sys
+import pytest
+from unittest import mock
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import tile_planner
+
+
+def random_jobs(count, seed):
+    generator = random.Random(seed)
+    for _ in range(count):
+        width, height = generator.randint(1, 700), generator.randint(1, 700)
+        border = None
+        if generator.random() < 0.5:
+            min_x, max_x = sorted(generator.uniform(0, 1) for _ in range(2))
+            min_y, max_y = sorted(generator.uniform(0, 1) for _ in range(2))
+            border = (min_x, min_y, max_x, max_y)
+        yield dict(resolution_x=width, resolution_y=height, percentage=generator.choice([10, 33, 50, 100, 150]),
+                   tile_x=generator.randint(1, 300), tile_y=generator.randint(1, 300),
+                   padding=generator.randint(0, 40), border=border)
+
+
+def random_plans(count, seed):
+    for job in random_jobs(count, seed):
+        try:
+            yield tile_planner.plan_job(**job)
+        except ValueError:
+            # Losowe granice obszaru mogą dać obszar węższy niż piksel
+            continue
+
+
+def core(plan, index):
+    x_min, y_min, x_max, y_max = plan['region']
+    row, column = divmod(index, plan['columns'])
+    left, bottom = x_min + column * plan['tile_x'], y_min + row * plan['tile_y']
+    return [left, bottom, min(left + plan['tile_x'], x_max), min(bottom + plan['tile_y'], y_max)]
+
+
+def test_tiles_cover_region_exactly_once():
+    for plan in random_plans(300, seed=2019):
+        x_min, y_min, x_max, y_max = plan['region']
+
+        cores = [core(plan, index) for index in range(len(plan['regions']))]
+        assert all(left < right and bottom < top for left, bottom, right, top in cores)
+        # Kafelki siatki nie nachodzą na siebie, więc suma pól równa polu obszaru oznacza pokrycie bez luk
+        assert len({(left, bottom) for left, bottom, _, _ in cores}) == len(cores)
+        assert sum((right - left) * (top - bottom) for left, bottom, right, top in cores) == \
+            (x_max - x_min) * (y_max - y_min)
+
+
+def test_padded_regions_stay_inside_render_region():
+    for plan in random_plans(300, seed=7):
+        x_min, y_min, x_max, y_max = plan['region']
+        padding = plan['padding']
+
+        for index, (left, bottom, right, top) in enumerate(plan['regions']):
+            core_left, core_bottom, core_right, core_top = core(plan, index)
+            assert x_min <= left <= core_left and core_right <= right <= x_max
+            assert y_min <= bottom <= core_bottom and core_top <= top <= y_max
+            assert left == max(x_min, core_left - padding) and right == min(x_max, core_right + padding)
+            assert bottom == max(y_min, core_bottom - padding) and top == min(y_max, core_top + padding)
+
+
+def test_edge_tiles_of_non_divisible_resolution_are_smaller():
+    plan = tile_planner.plan_job(1920, 1080, 100, 256, 256, padding=0)
+
+    assert plan['columns'] == 8
+    assert len(plan['regions']) == 8 * 5
+    assert plan['regions'][7] == [1792, 0, 1920, 256]
+    assert plan['regions'][-1] == [1792, 1024, 1920, 1080]
+
+
+def test_render_percentage_and_border():
+    plan = tile_planner.plan_job(1921, 1081, 50, 64, 64, padding=8, border=(0.5, 0.5, 1.0, 1.0))
+
+    assert (plan['width'], plan['height']) == (960, 540)
+    assert plan['region'] == [480, 270, 960, 540]
+    assert plan['regions'][0] == [480, 270, 552, 342]
+
+
+@pytest.mark.parametrize('tile_x, tile_y, padding, border', [
+    (0, 64, 0, None),
+    (64, 64, -1, None),
+    (64, 64, 0, (0.5, 0.0, 0.5, 1.0)),
+])
+def test_invalid_plans_are_rejected(tile_x, tile_y, padding, border):
+    with pytest.raises(ValueError):
+        tile_planner.plan_job(1920, 1080, 100, tile_x, tile_y, padding, border)
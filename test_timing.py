@@ -0,0 +1,74 @@
+import pytest
+from unittest import mock
+import sys
+import json
+import logging
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import config
+from cis_render import serialization
+from cis_render import timing as timings
+from cis_render import RequestManager
+from cis_render.read_scene_settings import complete_and_submit
+from standin_server import StandInServer
+
+
+def test_disabled_timing_does_nothing():
+    with mock.patch.object(config, 'timing_enabled', False):
+        timing = timings.start()
+
+    assert timing is timings.NULL_TIMING
+    with timing.stage('read_materials'):
+        pass
+    timing.set(textures=10)
+    payload = {"name": "job"}
+    timing.attach(payload)
+    assert payload == {"name": "job"}
+    assert timing.record() is None
+
+
+def test_stages_are_summed_in_order():
+    timing = timings.Timing('submit')
+    with timing.stage('read_output'):
+        pass
+    timing.add('post', 0.25)
+    timing.add('post', 0.5)
+    timing.set(textures=3)
+
+    record = timing.record()
+    assert list(record['stages_ms']) == ['read_output', 'post']
+    assert record['stages_ms']['post'] == 750.0
+    assert record['textures'] == 3
+    assert record['total_ms'] == pytest.approx(sum(record['stages_ms'].values()))
+
+
+def test_submission_is_logged_as_one_record(caplog):
+    timing = timings.Timing('submit')
+    timing.set(textures=2)
+    payload = {"name": "job", "textures": []}
+
+    with StandInServer() as server, caplog.at_level(logging.INFO, logger=config.logger.name):
+        request_manager = RequestManager()
+        with mock.patch.object(config, 'server', server.url + '/job'), \
+                mock.patch.object(config, 'timing_in_payload', True):
+            complete_and_submit(request_manager, payload, timing=timing)
+        request_manager.close()
+
+    records = [record for record in caplog.records if hasattr(record, 'timing')]
+    assert len(records) == 1
+    logged = json.loads(records[0].getMessage().split(': ', 1)[1])
+    assert logged == records[0].timing
+    assert logged['result'] == 'submitted'
+    assert logged['payload_bytes'] > 0
+    assert set(logged['stages_ms']) == {'serialize', 'post'}
+    assert server.jobs[0]['client']['timing']['textures'] == 2
+
+
+def test_streamed_body_size_is_known_after_encoding():
+    payload = {"name": "job", "textures": [{"name": "t{}.png".format(i)} for i in range(10)]}
+    body = serialization.PayloadBody(payload, stream=True)
+
+    assert body.size is None
+    data = b''.join(body.chunks())
+    assert body.size == len(data) == serialization.PayloadBody(payload, stream=False).size
@@ -0,0 +1,179 @@
+import pytest
+from unittest import mock
+import sys
+import time
+
+sys.path.append('mock_bpy')
+sys.modules['addon_utils'] = mock.MagicMock()
+from cis_render import config
+from cis_render import texture_manifest
+from cis_render import uploader
+from cis_render import RequestManager
+from cis_render.read_scene_settings import complete_and_submit
+from standin_server import StandInServer
+
+
+CHUNK = 64 * 1024
+
+
+@pytest.fixture
+def server():
+    with StandInServer(upload_chunk_size=CHUNK) as server:
+        with mock.patch.object(config, 'upload_url', server.url + '/job/upload'), \
+                mock.patch.object(config, 'asset_query_url', server.url + '/job/assets/query'), \
+                mock.patch.object(config, 'upload_retry_delay', 0):
+            yield server
+
+
+@pytest.fixture
+def state(tmp_path):
+    return uploader.UploadState(str(tmp_path / 'uploads.json'))
+
+
+def make_file(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(bytes((len(name) + i) % 256 for i in range(size)))
+    return dict(name=name, full_path=str(path), size=size, hash=texture_manifest.hash_file(str(path)))
+
+
+def test_missing_chunks():
+    assert uploader.missing_chunks(10, 4, []) == [0, 1, 2]
+    assert uploader.missing_chunks(12, 4, [0, 2]) == [1]
+    assert uploader.missing_chunks(0, 4, []) == [0]
+
+
+def test_chunk_reader_stays_within_chunk(tmp_path):
+    entry = make_file(tmp_path, 'a.png', 1000)
+    limiter = mock.MagicMock()
+    reader = uploader.ChunkReader(entry['full_path'], 300, 500, limiter)
+
+    assert len(reader) == 500
+    data = reader.read(200) + reader.read() + reader.read(10)
+    reader.close()
+
+    assert data == (tmp_path / 'a.png').read_bytes()[300:800]
+    assert [call[0][0] for call in limiter.acquire.call_args_list] == [200, 300, 0]
+
+
+def test_rate_limiter_caps_average_bandwidth():
+    limiter = uploader.RateLimiter(1000000)
+    start = time.monotonic()
+    for i in range(3):
+        limiter.acquire(300000)
+    assert time.monotonic() - start >= 0.55
+
+    unlimited = uploader.RateLimiter(0)
+    start = time.monotonic()
+    unlimited.acquire(10 ** 9)
+    assert time.monotonic() - start < 0.1
+
+
+def test_small_files_are_uploaded_first(server, state, tmp_path):
+    files = [make_file(tmp_path, 'big.exr', 5 * CHUNK + 100), make_file(tmp_path, 'small.png', 1000),
+             make_file(tmp_path, 'medium.png', 2 * CHUNK)]
+    files.append(dict(files[1], name='small.001'))
+
+    with uploader.AssetUploader(workers=1, state=state) as assets_uploader:
+        assets = assets_uploader.upload(files)
+
+    assert server.completed_uploads == ['small.png', 'medium.png', 'big.exr']
+    assert [name for name, _ in server.chunk_requests] == ['small.png'] + ['medium.png'] * 2 + ['big.exr'] * 6
+    for entry in files:
+        asset = server.assets[entry['hash']]
+        assert assets[entry['hash']] == asset['id']
+        assert asset['data'] == (tmp_path / asset['name']).read_bytes()
+    assert state.tokens == {}
+
+
+def test_interrupted_upload_resumes_missing_chunks(server, state, tmp_path):
+    entry = make_file(tmp_path, 'scene.blend', 4 * CHUNK)
+    server.fail_chunk('scene.blend', 2, times=10)
+
+    with mock.patch.object(config, 'upload_retries', 1):
+        with uploader.AssetUploader(workers=2, state=state) as assets_uploader:
+            with pytest.raises(uploader.requests.exceptions.HTTPError):
+                assets_uploader.upload([entry])
+
+    assert uploader.UploadState(state.filename).get(entry['hash']) is not None
+    assert not server.assets
+
+    server.failing_chunks.clear()
+    del server.chunk_requests[:]
+    with uploader.AssetUploader(workers=2, state=uploader.UploadState(state.filename)) as assets_uploader:
+        assets = assets_uploader.upload([entry])
+
+    assert server.chunk_requests == [('scene.blend', 2)]
+    assert server.assets[entry['hash']]['data'] == (tmp_path / 'scene.blend').read_bytes()
+    assert list(assets) == [entry['hash']]
+    assert uploader.UploadState(state.filename).tokens == {}
+
+
+def test_files_already_on_server_are_not_uploaded(server, state, tmp_path):
+    entry = make_file(tmp_path, 'a.png', 1000)
+    with uploader.AssetUploader(state=state) as assets_uploader:
+        first = assets_uploader.upload([entry])
+        second = assets_uploader.upload([entry])
+
+    assert first == second
+    assert len(server.chunk_requests) == 1
+
+
+def test_job_references_uploaded_assets(server, state, tmp_path):
+    texture = make_file(tmp_path, 'wall.png', 3000)
+    scene = make_file(tmp_path, 'shot.blend', CHUNK + 1)
+    payload = {"name": "Shot", "scene": {"name": "Scene", "full_path": scene['full_path']},
+               "textures": [{"name": "wall.png", "full_path": texture['full_path']}]}
+    request_manager = RequestManager()
+
+    with mock.patch.object(config, 'server', server.url + '/job'), \
+            mock.patch.object(uploader, 'get_state', return_value=state), \
+            mock.patch.object(texture_manifest, 'get_cache', return_value=texture_manifest.HashCache(
+                str(tmp_path / 'hashes.json'))):
+        complete_and_submit(request_manager, payload, upload=True)
+    request_manager.close()
+
+    job = server.jobs[0]
+    assert job['scene']['asset'] == server.assets[scene['hash']]['id']
+    assert job['textures'][0]['asset'] == server.assets[texture['hash']]['id']
+
+
+def test_only_missing_assets_are_uploaded(server, state, tmp_path):
+    textures = [make_file(tmp_path, 'texture_{}.png'.format(i), 2000 + i) for i in range(5)]
+    for entry in textures[1:4]:
+        server.add_asset(entry['name'], (tmp_path / entry['name']).read_bytes())
+
+    with mock.patch.object(config, 'asset_query_batch', 2):
+        with uploader.AssetUploader(state=state) as assets_uploader:
+            assets = assets_uploader.upload(textures)
+
+    assert [len(hashes) for hashes in server.asset_queries] == [2, 2, 1]
+    assert sorted(name for name, _ in server.chunk_requests) == ['texture_0.png', 'texture_4.png']
+    assert assets == {entry['hash']: entry['hash'] for entry in textures}
+
+
+def test_job_references_present_assets_by_hash(server, state, tmp_path):
+    texture = make_file(tmp_path, 'wall.png', 3000)
+    unchanged = make_file(tmp_path, 'floor.png', 4000)
+    scene = make_file(tmp_path, 'shot.blend', 5000)
+    server.add_asset('floor.png', (tmp_path / 'floor.png').read_bytes())
+    textures = [dict(name='wall.png', full_path=texture['full_path'], size=3000, hash=texture['hash']),
+                dict(name='floor.png', full_path=unchanged['full_path'], size=4000, hash=unchanged['hash'])]
+    scenes = [{"name": "Scene", "full_path": scene['full_path']}, {"name": "Scene.001", "full_path": scene['full_path']}]
+
+    with mock.patch.object(uploader, 'get_state', return_value=state):
+        uploader.upload_assets(textures, scenes)
+
+    assert [entry['asset'] for entry in textures] == [texture['hash'], unchanged['hash']]
+    assert [entry['asset'] for entry in scenes] == [scene['hash'], scene['hash']]
+    assert server.completed_uploads == ['wall.png', 'shot.blend']
+
+
+def test_nothing_is_uploaded_when_server_has_everything(server, state, tmp_path):
+    entry = make_file(tmp_path, 'a.png', 1000)
+    server.add_asset('a.png', (tmp_path / 'a.png').read_bytes())
+
+    with uploader.AssetUploader(state=state) as assets_uploader:
+        assert assets_uploader.upload([entry]) == {entry['hash']: entry['hash']}
+
+    assert not server.uploads
+    assert not server.chunk_requests